@@ -40,6 +40,17 @@ class WarehouseInventorySerializer(serializers.Serializer):
     total_value = serializers.DecimalField(max_digits=15, decimal_places=2) # Valor total del inventario en el almacén
     product_count = serializers.IntegerField() # Cantidad de productos únicos en el almacén
 
+class AbcXyzSerializer(serializers.Serializer):
+    """
+    Serializador para una celda de la matriz ABC/XYZ.
+    Corresponde a la interfaz { clase_abc: string; clase_xyz: string; product_count: number; revenue: number; stock_value: number; }
+    """
+    clase_abc = serializers.CharField(max_length=1) # A, B o C (aporte a los ingresos)
+    clase_xyz = serializers.CharField(max_length=1) # X, Y o Z (variabilidad de la demanda)
+    product_count = serializers.IntegerField() # Productos en la celda
+    revenue = serializers.DecimalField(max_digits=15, decimal_places=2) # Ingresos del periodo analizado
+    stock_value = serializers.DecimalField(max_digits=15, decimal_places=2, allow_null=True) # Valor del stock actual
+
 
 # -----------------------------------------------------------
 # Serializador Principal del Dashboard
@@ -53,7 +64,12 @@ class DashboardERPSerializer(serializers.Serializer):
     total_categorias = serializers.IntegerField(default=0)
     total_productos = serializers.IntegerField(default=0)
     valor_total_inventario = serializers.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    # Valoración guardada de la que parte valor_total_inventario y variación posterior (ventas y
+    # movimientos); ambas vacías si el valor se calculó sobre los productos
+    valoracion_fecha = serializers.DateField(allow_null=True, required=False)
+    variacion_inventario = serializers.DecimalField(max_digits=15, decimal_places=2, allow_null=True, required=False)
     productos_bajo_stock = serializers.ListField(child=serializers.CharField(), default=[])
+    total_bajo_stock = serializers.IntegerField(default=0)
 
     # Métricas de SuperUsuario (ya existentes)
     total_empresas = serializers.IntegerField(default=0, required=False)
@@ -65,4 +81,6 @@ class DashboardERPSerializer(serializers.Serializer):
     monthly_sales = MonthlySalesSerializer(many=True, required=False) # Lista de ventas mensuales
     top_products = TopProductSerializer(many=True, required=False) # Lista de productos más vendidos
     category_distribution = CategoryDistributionSerializer(many=True, required=False) # Lista de distribución por categoría
-    inventory_by_warehouse = WarehouseInventorySerializer(many=True, required=False) # Lista de inventario por almacén
\ No newline at end of file
+    inventory_by_warehouse = WarehouseInventorySerializer(many=True, required=False) # Lista de inventario por almacén
+    abc_xyz_distribution = AbcXyzSerializer(many=True, required=False) # Productos, ingresos y stock por clase ABC/XYZ
+    recent_activities = serializers.ListField(child=serializers.DictField(), default=[], required=False) # Últimos eventos de ActividadLog
\ No newline at end of file
@@ -1,7 +1,9 @@
 # dashboard/views.py
 
-from rest_framework.views import APIView
-from rest_framework.response import Response
+import logging
+from decimal import Decimal
+
+from django.views import View
 from rest_framework import status
 from django.db.models import Count, Sum, F, ExpressionWrapper, DecimalField, Q
 from django.db.models.functions import TruncMonth
@@ -16,15 +18,23 @@ from apps.empresas.models import Empresa
 from apps.sucursales.models import Sucursal
 from apps.almacenes.models import Almacen
 from apps.categorias.models import Categoria
-from apps.productos.models import Producto
+from apps.productos.models import ClasificacionProducto, Producto
+from apps.productos.valoracion import flujos_posteriores, valoraciones
 from apps.suscripciones.models import Suscripcion
 from apps.proveedores.models import Proveedor  # ¡NUEVO! Importamos el modelo Proveedor
 
 # Importaciones de modelos de Ventas y DetalleVenta
 from apps.ventas.models import Venta, DetalleVenta
+from apps.logs.models import ActividadLog
 
 # Asegúrate de que este serializer exista y esté definido correctamente
 from .serializers import DashboardERPSerializer
+from erp.asincrono import autenticar, respuesta_json
+
+logger = logging.getLogger(__name__)
+
+# Nombres de productos en alerta que se incluyen en el resumen del dashboard
+MAX_PRODUCTOS_BAJO_STOCK = 20
 
 
 class IsWorkerUser(BasePermission):
@@ -41,14 +51,79 @@ class IsWorkerUser(BasePermission):
         if user.is_superuser:
             return True
 
-        return user.role in ['ADMINISTRATIVO', 'EMPLEADO']
+        return user.role is not None and user.role.name in ['Administrador', 'Empleado']
+
+
+async def _valor_inventario(dashboard_data, empresa_id, producto_qs, almacen_qs):
+    """
+    Completa valor_total_inventario e inventory_by_warehouse. Con valoraciones guardadas se
+    leen las filas de la última de cada empresa y se les suman las ventas y movimientos
+    posteriores (apps.productos.valoracion); sin ninguna todavía, se suma precio × stock
+    sobre los productos.
+    """
+    instantanea = [fila async for fila in valoraciones(empresa_id).values(
+        'almacen_id', 'fecha', 'productos', 'valor_venta')]
+    if not instantanea:
+        valor_inventario_agg = (await producto_qs.aaggregate(
+            total_valor=Sum(ExpressionWrapper(F('precio') * F('stock'),
+                                              output_field=DecimalField(max_digits=15, decimal_places=2)))
+        ))['total_valor']
+        dashboard_data['valor_total_inventario'] = f"{valor_inventario_agg or 0.00:.2f}"
+
+        inventory_by_warehouse_data = [item async for item in
+            almacen_qs.annotate(
+                total_value=Sum(F('productos__precio') * F('productos__stock'),
+                                output_field=DecimalField(max_digits=15, decimal_places=2)),
+                product_count=Count('productos__id', distinct=True)
+            ).values('nombre', 'total_value', 'product_count')
+        ]
+        dashboard_data['inventory_by_warehouse'] = []
+        for item in inventory_by_warehouse_data:
+            if item['nombre'] is not None and (
+                    item['total_value'] is not None or item['product_count'] is not None):
+                dashboard_data['inventory_by_warehouse'].append({
+                    'name': item['nombre'],
+                    'total_value': float(item['total_value'] or 0.00),
+                    'product_count': item['product_count'] or 0
+                })
+        return
+
+    valor_por_almacen, productos_por_almacen = {}, {}
+    for fila in instantanea:
+        almacen_id = fila['almacen_id']
+        valor_por_almacen[almacen_id] = valor_por_almacen.get(almacen_id, 0) + fila['valor_venta']
+        productos_por_almacen[almacen_id] = productos_por_almacen.get(almacen_id, 0) + fila['productos']
+    variacion = Decimal('0.00')
+    for flujo in flujos_posteriores(empresa_id):
+        async for fila in flujo:
+            valor = fila['valor'] or 0
+            valor_por_almacen[fila['almacen_id']] = valor_por_almacen.get(fila['almacen_id'], 0) + valor
+            variacion += valor
+
+    dashboard_data['valor_total_inventario'] = f"{sum(valor_por_almacen.values()):.2f}"
+    dashboard_data['valoracion_fecha'] = max(fila['fecha'] for fila in instantanea)
+    dashboard_data['variacion_inventario'] = f"{variacion:.2f}"
+    dashboard_data['inventory_by_warehouse'] = [
+        {
+            'name': almacen['nombre'],
+            'total_value': float(valor_por_almacen.get(almacen['id'], 0)),
+            'product_count': productos_por_almacen.get(almacen['id'], 0),
+        }
+        async for almacen in almacen_qs.values('id', 'nombre')
+    ]
 
 
-class DashboardERPView(APIView):
-    permission_classes = [IsWorkerUser]
+class DashboardERPView(View):
+    """
+    Dashboard general (superusuarios) o de la empresa del usuario.
+    Vista async: las agregaciones usan el ORM asíncrono y, con ASGI, no ocupan un hilo
+    mientras esperan a la base de datos. Autenticación y permisos como en DRF (erp.asincrono).
+    """
 
-    def get(self, request):
-        user = request.user
+    async def get(self, request):
+        user, rechazo = await autenticar(request, [IsWorkerUser])
+        if rechazo is not None:
+            return rechazo
 
         dashboard_data = {
             'total_usuarios': 0,
@@ -57,12 +132,16 @@ class DashboardERPView(APIView):
             'total_categorias': 0,
             'total_productos': 0,
             'valor_total_inventario': '0.00',
+            'valoracion_fecha': None,
+            'variacion_inventario': None,
             'productos_bajo_stock': [],
+            'total_bajo_stock': 0,
             'distribucion_suscripciones': [],
             'monthly_sales': [],
             'top_products': [],
             'category_distribution': [],
             'inventory_by_warehouse': [],
+            'abc_xyz_distribution': [],
             'recent_activities': [],  # Aseguramos que esté aquí desde el inicio
             'total_empresas': 0,
             'total_proveedores': 0,  # ¡NUEVO! Inicializamos el total de proveedores
@@ -72,38 +151,23 @@ class DashboardERPView(APIView):
             empresa_filter = Q()
 
             if not user.is_superuser:
-                if hasattr(user, 'empresa') and user.empresa:
-                    # DEBUG: Imprime la empresa asociada al usuario
-                    print(
-                        f"DEBUG: User '{user.email}' is associated with company: {user.empresa.nombre} (ID: {user.empresa.id})")
-                    empresa_filter = Q(empresa=user.empresa)
+                if user.empresa_id:
+                    empresa_filter = Q(empresa_id=user.empresa_id)
                 else:
-                    # DEBUG: Imprime si el usuario no tiene empresa
-                    print(f"DEBUG: Non-superuser '{user.email}' has no associated company or user.empresa is None.")
-                    return Response(
+                    return respuesta_json(
                         {"message": "No hay datos de dashboard disponibles para su cuenta o empresa."},
                         status=status.HTTP_200_OK
                     )
-            else:
-                # DEBUG: Usuario superusuario
-                print(f"DEBUG: User '{user.email}' is a Superuser.")
 
             # Aplicamos el filtro a todos los QuerySets
             user_qs = CustomUser.objects.filter(empresa_filter)
-            empresa_qs = Empresa.objects.all() if user.is_superuser else Empresa.objects.filter(id=user.empresa.id)
             sucursal_qs = Sucursal.objects.filter(empresa_filter)
             almacen_qs = Almacen.objects.filter(empresa_filter)
             categoria_qs = Categoria.objects.filter(empresa_filter)
             producto_qs = Producto.objects.filter(empresa_filter)
-
-            # DEBUG: Queryset de Proveedores ANTES de contar
             proveedor_qs = Proveedor.objects.filter(empresa_filter)
-            print(f"DEBUG: Proveedor queryset filter applied: {empresa_filter}")
-            print(f"DEBUG: Proveedores found by filter: {proveedor_qs.count()}")
-            # DEBUG: Imprime los IDs y nombres de los proveedores encontrados
-            print(f"DEBUG: Details of providers found: {list(proveedor_qs.values('id', 'nombre', 'empresa__nombre'))}")
 
-            dashboard_data['total_proveedores'] = proveedor_qs.count()
+            dashboard_data['total_proveedores'] = await proveedor_qs.acount()
 
             # Querysets para ventas, considerando la relación con la empresa
             venta_qs = Venta.objects.filter(empresa_filter)
@@ -114,30 +178,35 @@ class DashboardERPView(APIView):
             # -----------------------------------------------------------
 
             # Métricas Core
-            dashboard_data['total_usuarios'] = user_qs.count()
-            dashboard_data['total_sucursales'] = sucursal_qs.count()
-            dashboard_data['total_almacenes'] = almacen_qs.count()
-            dashboard_data['total_categorias'] = categoria_qs.count()
-            dashboard_data['total_productos'] = producto_qs.count()
-
-            valor_inventario_agg = producto_qs.aggregate(
-                total_valor=Sum(ExpressionWrapper(F('precio') * F('stock'),
-                                                  output_field=DecimalField(max_digits=15, decimal_places=2)))
-            )['total_valor']
-            dashboard_data['valor_total_inventario'] = f"{valor_inventario_agg or 0.00:.2f}"
-
-            productos_bajo_stock_qs = producto_qs.filter(stock__lt=10).values_list('nombre', flat=True)
-            dashboard_data['productos_bajo_stock'] = list(productos_bajo_stock_qs)
+            dashboard_data['total_usuarios'] = await user_qs.acount()
+            dashboard_data['total_sucursales'] = await sucursal_qs.acount()
+            dashboard_data['total_almacenes'] = await almacen_qs.acount()
+            dashboard_data['total_categorias'] = await categoria_qs.acount()
+            dashboard_data['total_productos'] = await producto_qs.acount()
+
+            # Valor del inventario (total y por almacén): última valoración guardada
+            # (manage.py valorar_inventario) más las ventas y movimientos posteriores
+            await _valor_inventario(dashboard_data, None if user.is_superuser else user.empresa_id,
+                                    producto_qs, almacen_qs)
+
+            # Alertas de stock: marca bajo_stock (stock <= punto de reorden) mantenida por Producto.save().
+            # El listado completo y paginado está en /api/productos/alertas-stock/
+            productos_bajo_stock_qs = producto_qs.filter(bajo_stock=True).order_by('nombre')
+            dashboard_data['total_bajo_stock'] = await productos_bajo_stock_qs.acount()
+            dashboard_data['productos_bajo_stock'] = [
+                nombre async for nombre in
+                productos_bajo_stock_qs.values_list('nombre', flat=True)[:MAX_PRODUCTOS_BAJO_STOCK]
+            ]
 
             # Distribución de suscripciones (solo para superusuarios)
             if user.is_superuser:
-                dashboard_data['total_empresas'] = Empresa.objects.count()
+                dashboard_data['total_empresas'] = await Empresa.objects.acount()
                 suscripciones_dist = Empresa.objects.values(
                     plan_nombre=F('suscripcion__nombre')
                 ).annotate(
                     cantidad_empresas=Count('id')
                 ).order_by('plan_nombre')
-                dashboard_data['distribucion_suscripciones'] = list(suscripciones_dist)
+                dashboard_data['distribucion_suscripciones'] = [item async for item in suscripciones_dist]
             else:
                 dashboard_data['total_empresas'] = 0
                 dashboard_data['distribucion_suscripciones'] = []
@@ -148,13 +217,13 @@ class DashboardERPView(APIView):
             start_date_for_charts = (today - timedelta(days=180)).replace(day=1, hour=0, minute=0, second=0,
                                                                           microsecond=0)
 
-            monthly_sales_results = venta_qs.filter(
+            monthly_sales_results = [item async for item in venta_qs.filter(
                 fecha__gte=start_date_for_charts
             ).annotate(
                 month_start=TruncMonth('fecha')
             ).values('month_start').annotate(
                 total_ventas=Sum('monto_total')
-            ).order_by('month_start')
+            ).order_by('month_start')]
 
             current_month_iterator = start_date_for_charts
             while current_month_iterator <= today:
@@ -191,7 +260,7 @@ class DashboardERPView(APIView):
                 units=Sum('cantidad')
             ).order_by('-sales')[:5]
 
-            for item in top_products_results:
+            async for item in top_products_results:
                 top_products_data.append({
                     'name': item['producto__nombre'],
                     'sales': float(item['sales'] or 0.00),
@@ -200,58 +269,40 @@ class DashboardERPView(APIView):
             dashboard_data['top_products'] = top_products_data
 
             # Distribución por Categoría
-            category_distribution_data = list(
+            category_distribution_data = [item async for item in
                 producto_qs.values(name=F('categoria__nombre')).annotate(
                     products_count=Count('id')
                 ).order_by('name')
-            )
+            ]
             dashboard_data['category_distribution'] = [
                 item for item in category_distribution_data if item['name'] is not None
             ]
 
-            # Inventario por Almacén
-            inventory_by_warehouse_data = list(
-                almacen_qs.annotate(
-                    total_value=Sum(F('productos__precio') * F('productos__stock'),
+            # Matriz ABC/XYZ: lectura de la clasificación precalculada (manage.py clasificar_productos)
+            dashboard_data['abc_xyz_distribution'] = [item async for item in
+                ClasificacionProducto.objects.filter(empresa_filter).values('clase_abc', 'clase_xyz').annotate(
+                    product_count=Count('producto_id'),
+                    revenue=Sum('ingresos'),
+                    stock_value=Sum(F('producto__precio') * F('producto__stock'),
                                     output_field=DecimalField(max_digits=15, decimal_places=2)),
-                    product_count=Count('productos__id', distinct=True)
-                ).values('nombre', 'total_value', 'product_count')
-            )
-            dashboard_data['inventory_by_warehouse'] = []
-            for item in inventory_by_warehouse_data:
-                if item['nombre'] is not None and (
-                        item['total_value'] is not None or item['product_count'] is not None):
-                    dashboard_data['inventory_by_warehouse'].append({
-                        'name': item['nombre'],
-                        'total_value': float(item['total_value'] or 0.00),
-                        'product_count': item['product_count'] or 0
-                    })
+                ).order_by('clase_abc', 'clase_xyz')
+            ]
 
             # Actividades Recientes
             recent_activities_list = []
 
-            # Actividades: Nuevas Ventas/Pedidos
-            for venta in venta_qs.order_by('-fecha')[:5]:
-                user_name = venta.usuario.first_name if venta.usuario and venta.usuario.first_name else 'Usuario Desconocido'
+            # Actividades: eventos de auditoría (apps.logs.signals), lectura por el índice (empresa, timestamp)
+            log_qs = ActividadLog.objects.filter(empresa_filter).select_related('user').order_by('-timestamp', '-id')
+            async for log in log_qs[:10]:
                 recent_activities_list.append({
-                    'id': f"venta-{venta.id}",
-                    'description': f"Nuevo pedido #{venta.id} creado por {user_name}.",
-                    'timestamp': venta.fecha.isoformat(),
-                    'type': 'order_created',
-                    'entity_name': f"Pedido #{venta.id}"
+                    'id': f"log-{log.id}",
+                    'description': log.description,
+                    'timestamp': log.timestamp.isoformat(),
+                    'type': log.activity_type,
+                    'entity_name': log.entity_name,
+                    'user_name': log.user.first_name if log.user else None,
                 })
 
-            # Actividades: Nuevos Usuarios
-            for new_user in user_qs.order_by('-date_joined')[:3]:
-                if not new_user.is_superuser:
-                    recent_activities_list.append({
-                        'id': f"user-{new_user.id}",
-                        'description': f"Nuevo usuario registrado: {new_user.first_name or new_user.email}.",
-                        'timestamp': new_user.date_joined.isoformat(),
-                        'type': 'user_created',
-                        'user_name': new_user.first_name,
-                    })
-
             # Actividades: Productos Bajo Stock (como alerta)
             for prod_name in dashboard_data['productos_bajo_stock'][:3]:
                 recent_activities_list.append({
@@ -266,13 +317,11 @@ class DashboardERPView(APIView):
                                                          reverse=True)[:10]
 
             serializer = DashboardERPSerializer(dashboard_data)
-            return Response(serializer.data)
+            return respuesta_json(serializer.data)
 
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            print(f"Error en DashboardERPView: {str(e)}")
-            return Response(
+            logger.exception("Error en DashboardERPView")
+            return respuesta_json(
                 {"error": f"Ha ocurrido un error al obtener las estadísticas del dashboard. Detalles: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
@@ -0,0 +1,79 @@
+# apps/empresas/management/commands/poblar_datos.py
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.empresas.poblador import PobladorDatos
+
+
+class Command(BaseCommand):
+    help = ("Genera datos sintéticos multiempresa (empresas, catálogo, usuarios y años de ventas, "
+            "pagos y movimientos con estacionalidad) para pruebas de carga. Escribe con bulk_create "
+            "o, en PostgreSQL, con COPY (--copy). Determinista a partir de --seed y --hasta.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresas', type=int, default=3)
+        parser.add_argument('--productos', type=int, default=500, help="Productos por empresa.")
+        parser.add_argument('--clientes', type=int, default=200, help="Clientes por empresa.")
+        parser.add_argument('--empleados', type=int, default=5, help="Empleados por empresa.")
+        parser.add_argument('--sucursales', type=int, default=2)
+        parser.add_argument('--almacenes', type=int, default=3)
+        parser.add_argument('--categorias', type=int, default=12)
+        parser.add_argument('--proveedores', type=int, default=8)
+        parser.add_argument('--dias', type=int, default=730, help="Días de historia.")
+        parser.add_argument('--hasta', type=date.fromisoformat, default=None,
+                            help="Último día de la historia (AAAA-MM-DD). Por defecto, hoy.")
+        parser.add_argument('--ventas-diarias', type=float, default=150,
+                            help="Ventas medias por día y empresa (antes de estacionalidad).")
+        parser.add_argument('--lineas-por-venta', type=float, default=2.7)
+        parser.add_argument('--movimientos-semanales', type=float, default=4)
+        parser.add_argument('--crecimiento', type=float, default=0.15, help="Crecimiento anual del volumen.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefijo', default='carga', help="Prefijo de nombres de empresas y usuarios.")
+        parser.add_argument('--password', default='carga1234', help="Contraseña de todos los usuarios generados.")
+        parser.add_argument('--copy', action='store_true', help="Escribe las tablas grandes con COPY (PostgreSQL).")
+        parser.add_argument('--lote', type=int, default=5000, help="Filas por INSERT con bulk_create.")
+
+    def handle(self, *args, **options):
+        if min(options['empresas'], options['productos'], options['clientes'], options['dias'], options['lote']) <= 0:
+            raise CommandError("--empresas, --productos, --clientes, --dias y --lote deben ser mayores que 0.")
+        if options['lineas_por_venta'] < 1:
+            raise CommandError("--lineas-por-venta debe ser al menos 1.")
+
+        try:
+            poblador = PobladorDatos(
+                empresas=options['empresas'],
+                sucursales=options['sucursales'],
+                almacenes=options['almacenes'],
+                categorias=options['categorias'],
+                proveedores=options['proveedores'],
+                productos=options['productos'],
+                empleados=options['empleados'],
+                clientes=options['clientes'],
+                dias=options['dias'],
+                ventas_diarias=options['ventas_diarias'],
+                lineas_por_venta=options['lineas_por_venta'],
+                movimientos_semanales=options['movimientos_semanales'],
+                crecimiento_anual=options['crecimiento'],
+                seed=options['seed'],
+                hasta=options['hasta'],
+                prefijo=options['prefijo'],
+                password=options['password'],
+                usar_copy=options['copy'],
+                lote=options['lote'],
+                progreso=self.stdout.write,
+            )
+            comienzo = time.perf_counter()
+            filas = poblador.generar()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        segundos = time.perf_counter() - comienzo
+        for modelo, total in filas.items():
+            self.stdout.write(f"  {modelo}: {total}")
+        total = sum(filas.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} filas generadas en {segundos:.1f}s ({total / max(segundos, 1e-9):,.0f} filas/s)."
+        ))
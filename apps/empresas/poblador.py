@@ -0,0 +1,421 @@
+# apps/empresas/poblador.py
+
+"""
+Generador de datos sintéticos multiempresa para pruebas de carga.
+
+Crea N empresas con sus sucursales, almacenes, categorías, proveedores, usuarios y
+productos, y varios años de ventas, pagos y movimientos de stock. El volumen diario
+de ventas sigue una estacionalidad semanal y anual con crecimiento sostenido; la
+popularidad de productos y clientes sigue una ley de potencias.
+
+Todo se genera con NumPy por bloques de días y se escribe en lote:
+- bulk_create con IDs asignados de antemano (no hace falta leerlos de vuelta), o
+- COPY ... FROM STDIN en PostgreSQL (usar_copy=True), bastante más rápido para
+  decenas de millones de filas.
+Las escrituras no pasan por save() ni emiten señales: no se ajusta stock ni se
+auditan las filas generadas (el stock inicial de cada producto se fija después para que el
+stock generado cuadre con la historia). La misma semilla y fecha final producen los mismos datos.
+Pensado para bases de datos de pruebas sin escrituras concurrentes (los IDs se reservan
+a partir del máximo existente).
+"""
+
+import csv
+import io
+import math
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.almacenes.models import Almacen
+from apps.categorias.models import Categoria
+from apps.movimientos.models import DetalleMovimiento, Movimiento
+from apps.pagos.models import Pago
+from apps.productos.integridad import fijar_stock_inicial
+from apps.productos.models import Producto
+from apps.proveedores.models import Proveedor
+from apps.rbac.models import Role
+from apps.sucursales.models import Sucursal
+from apps.usuarios.models import CustomUser
+from apps.ventas.models import DetalleVenta, Venta
+from .models import Empresa
+
+# Peso de cada día de la semana (lunes = 0) sobre el volumen medio de ventas
+ESTACIONALIDAD_SEMANAL = np.array([0.9, 0.95, 1.0, 1.0, 1.1, 1.3, 0.75])
+# Horas de venta (8:00 a 21:59) con picos a mediodía y por la tarde
+HORAS = np.arange(8, 22)
+PESO_HORAS = np.array([2, 4, 6, 7, 9, 8, 6, 5, 6, 8, 9, 7, 4, 2], dtype=float)
+PESO_HORAS /= PESO_HORAS.sum()
+METODOS_PAGO = np.array([metodo for metodo, _ in Pago.METODO_PAGO_CHOICES])
+
+MODELOS_MASIVOS = (Venta, DetalleVenta, Pago, Movimiento, DetalleMovimiento)
+
+
+@contextmanager
+def fechas_manuales(*modelos):
+    """Desactiva auto_now/auto_now_add para poder insertar fechas históricas con bulk_create."""
+    previos = []
+    for modelo in modelos:
+        for campo in modelo._meta.concrete_fields:
+            if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False):
+                previos.append((campo, campo.auto_now, campo.auto_now_add))
+                campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in previos:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+def pesos_potencia(n, exponente, rng):
+    """Pesos ∝ 1/rango^exponente repartidos al azar entre n elementos (pocos muy populares)."""
+    pesos = 1 / np.arange(1, n + 1) ** exponente
+    rng.shuffle(pesos)
+    return pesos / pesos.sum()
+
+
+def lineas_distintas(rng, padres, elementos, media, pesos=None, minimo=1):
+    """
+    Reparte líneas entre `padres` filas (ventas, movimientos): cada una recibe
+    minimo + Poisson(media - minimo) elementos distintos elegidos según `pesos`.
+    Devuelve (índice del padre, índice del elemento) ordenados por padre.
+    """
+    por_padre = minimo + rng.poisson(max(media - minimo, 0), padres)
+    padre = np.repeat(np.arange(padres), por_padre)
+    elemento = rng.choice(elementos, size=len(padre), p=pesos)
+    # Un elemento solo puede aparecer una vez por padre (unique_together): se deduplica
+    clave = np.unique(padre.astype(np.int64) * elementos + elemento)
+    return clave // elementos, clave % elementos
+
+
+def importes(valores):
+    return np.char.mod('%.2f', np.round(valores, 2)).tolist()
+
+
+class _Escritor:
+    """Inserta filas por columnas con bulk_create o con COPY (PostgreSQL)."""
+
+    def __init__(self, usar_copy=False, lote=5000):
+        if usar_copy and connection.vendor != 'postgresql':
+            raise ValueError("COPY solo está disponible con PostgreSQL.")
+        self.usar_copy = usar_copy
+        self.lote = lote
+        self.filas = {}
+        self._siguiente = {}
+
+    def fechas(self, segundos):
+        """
+        Momentos (segundos desde epoch, UTC) en el formato que necesita cada vía: texto ISO
+        generado en bloque para COPY (str() de un datetime es lo más caro del CSV) o
+        datetimes aware para bulk_create.
+        """
+        momentos = np.asarray(segundos).astype('datetime64[s]')
+        if self.usar_copy:
+            return np.char.add(np.datetime_as_string(momentos, unit='s'), '+00:00')
+        return np.array([m.replace(tzinfo=dt_timezone.utc) for m in momentos.tolist()], dtype=object)
+
+    def reservar_ids(self, modelo, cantidad):
+        """IDs consecutivos para `cantidad` filas nuevas de `modelo`."""
+        if modelo not in self._siguiente:
+            self._siguiente[modelo] = (modelo.objects.aggregate(m=Max('pk'))['m'] or 0) + 1
+        inicio = self._siguiente[modelo]
+        self._siguiente[modelo] += cantidad
+        return np.arange(inicio, inicio + cantidad, dtype=np.int64)
+
+    def insertar(self, modelo, columnas):
+        """columnas: dict {attname: lista de valores}, todas de la misma longitud."""
+        campos = list(columnas)
+        valores = [c.tolist() if isinstance(c, np.ndarray) else c for c in columnas.values()]
+        total = len(valores[0]) if valores else 0
+        if not total:
+            return 0
+        if self.usar_copy:
+            self._copy(modelo, campos, zip(*valores))
+        else:
+            for inicio in range(0, total, self.lote):
+                modelo.objects.bulk_create([
+                    modelo(**dict(zip(campos, fila)))
+                    for fila in zip(*(v[inicio:inicio + self.lote] for v in valores))
+                ])
+        self.filas[modelo] = self.filas.get(modelo, 0) + total
+        return total
+
+    def _copy(self, modelo, campos, filas):
+        from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+        buffer = io.StringIO()
+        # En CSV de PostgreSQL un campo vacío sin comillas es NULL
+        csv.writer(buffer).writerows(filas)
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        columnas = ', '.join(quote(modelo._meta.get_field(campo).column) for campo in campos)
+        sql = f"COPY {quote(modelo._meta.db_table)} ({columnas}) FROM STDIN WITH (FORMAT csv)"
+        with connection.cursor() as cursor:
+            # copy_expert solo existe en psycopg2; psycopg 3 (p. ej. con DB_POOL) usa cursor.copy()
+            if is_psycopg3:
+                with cursor.cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+            else:
+                cursor.cursor.copy_expert(sql, buffer)
+
+    def ajustar_secuencias(self):
+        """Tras insertar IDs explícitos, las secuencias (PostgreSQL) deben continuar desde el máximo."""
+        sentencias = connection.ops.sequence_reset_sql(no_style(), list(self._siguiente))
+        with connection.cursor() as cursor:
+            for sql in sentencias:
+                cursor.execute(sql)
+
+
+class PobladorDatos:
+    """
+    Genera `empresas` empresas completas con `dias` días de historia hasta `hasta`.
+    `progreso` recibe un texto al terminar cada empresa.
+    """
+
+    def __init__(self, empresas=3, sucursales=2, almacenes=3, categorias=12, proveedores=8, productos=500,
+                 empleados=5, clientes=200, dias=730, ventas_diarias=150, lineas_por_venta=2.7,
+                 movimientos_semanales=4, crecimiento_anual=0.15, seed=42, hasta=None, prefijo='carga',
+                 password='carga1234', usar_copy=False, lote=5000, bloque_dias=31, progreso=None):
+        self.empresas = empresas
+        self.sucursales = sucursales
+        self.almacenes = almacenes
+        self.categorias = categorias
+        self.proveedores = proveedores
+        self.productos = productos
+        self.empleados = empleados
+        self.clientes = clientes
+        self.dias = dias
+        self.ventas_diarias = ventas_diarias
+        self.lineas_por_venta = lineas_por_venta
+        self.movimientos_semanales = movimientos_semanales
+        self.crecimiento_anual = crecimiento_anual
+        self.seed = seed
+        self.hasta = hasta or timezone.localdate()
+        self.prefijo = prefijo
+        self.password = password
+        self.bloque_dias = bloque_dias
+        self.progreso = progreso or (lambda mensaje: None)
+        self.escritor = _Escritor(usar_copy=usar_copy, lote=lote)
+
+    @property
+    def inicio(self):
+        return self.hasta - timedelta(days=self.dias - 1)
+
+    def nombres_empresas(self):
+        return [f"{self.prefijo.title()} {indice:03d}" for indice in range(1, self.empresas + 1)]
+
+    def generar(self):
+        """Genera todas las empresas (una transacción por empresa). Devuelve {modelo: filas}."""
+        existentes = set(Empresa.objects.filter(nombre__in=self.nombres_empresas()).values_list('nombre', flat=True))
+        if existentes:
+            raise ValueError(f"Ya existen empresas con estos nombres: {', '.join(sorted(existentes))}. "
+                             f"Usa otro prefijo.")
+        hash_password = make_password(self.password)  # Un único hash compartido: el hashing es lo más lento
+        roles = dict(Role.objects.filter(name__in=['Administrador', 'Empleado', 'Cliente']).values_list('name', 'id'))
+
+        with fechas_manuales(Empresa, Proveedor, *MODELOS_MASIVOS):
+            for indice, nombre in enumerate(self.nombres_empresas(), start=1):
+                # Una secuencia aleatoria propia por empresa: el resultado no depende del orden
+                rng = np.random.default_rng([self.seed, indice])
+                comienzo = time.perf_counter()
+                with transaction.atomic():
+                    empresa = self._empresa(nombre, indice, rng, hash_password, roles)
+                    lineas = self._historia(empresa, rng)
+                    # La historia no mueve el stock: el stock generado es el que cuadra con ella
+                    fijar_stock_inicial(Producto.objects.filter(empresa=empresa))
+                self.progreso(f"{nombre}: {lineas} líneas de venta en {time.perf_counter() - comienzo:.1f}s")
+        self.escritor.ajustar_secuencias()
+        return {modelo._meta.label: filas for modelo, filas in self.escritor.filas.items()}
+
+    # --- Datos maestros ---
+
+    def _empresa(self, nombre, indice, rng, hash_password, roles):
+        slug = f"{self.prefijo}{indice:03d}"
+        alta = timezone.make_aware(datetime.combine(self.inicio, dt_time(9)))
+        empresa = Empresa.objects.create(nombre=nombre, email_contacto=f"contacto@{slug}.test", fecha_registro=alta)
+
+        def usuarios(tipo, cantidad, rol):
+            return [CustomUser(
+                username=f"{slug}_{tipo}{numero}", email=f"{slug}_{tipo}{numero}@carga.test",
+                first_name=tipo.title(), last_name=str(numero), password=hash_password,
+                role_id=roles.get(rol), empresa=empresa, date_joined=alta,
+            ) for numero in range(1, cantidad + 1)]
+
+        admin, = CustomUser.objects.bulk_create(usuarios('admin', 1, 'Administrador'))
+        CustomUser.objects.bulk_create(usuarios('empleado', self.empleados, 'Empleado'), batch_size=1000)
+        self.ids_clientes = np.array([u.pk for u in CustomUser.objects.bulk_create(
+            usuarios('cliente', self.clientes, 'Cliente'), batch_size=1000)])
+        empresa.admin_empresa = admin
+        empresa.save(update_fields=['admin_empresa'])
+
+        sucursales = Sucursal.objects.bulk_create(
+            [Sucursal(nombre=f"Sucursal {n}", empresa=empresa) for n in range(1, self.sucursales + 1)])
+        almacenes = Almacen.objects.bulk_create([
+            Almacen(nombre=f"Almacén {n}", empresa=empresa, sucursal=sucursales[n % len(sucursales)] if sucursales else None)
+            for n in range(1, self.almacenes + 1)])
+        categorias = Categoria.objects.bulk_create(
+            [Categoria(nombre=f"Categoría {n}", empresa=empresa) for n in range(1, self.categorias + 1)])
+        self.ids_proveedores = np.array([p.pk for p in Proveedor.objects.bulk_create([
+            Proveedor(nombre=f"Proveedor {n}", empresa=empresa, fecha_creacion=alta, fecha_actualizacion=alta)
+            for n in range(1, self.proveedores + 1)])])
+        self.ids_almacenes = np.array([a.pk for a in almacenes])
+
+        # Precios log-normales (mediana ~30) y descuento solo en el 15% de los productos
+        self.precios = np.clip(np.round(rng.lognormal(math.log(30), 0.9, self.productos), 2), 1, 5000)
+        # Costo promedio alrededor del 60% del precio, como el de las compras de _movimientos
+        self.costos = np.round(self.precios * 0.6, 4)
+        self.descuentos = np.where(rng.random(self.productos) < 0.15,
+                                   rng.choice([0.05, 0.10, 0.15, 0.20], self.productos), 0.0)
+        stock = np.where(rng.random(self.productos) < 0.08, rng.integers(0, 11, self.productos),
+                         rng.integers(11, 300, self.productos))
+        categoria = rng.integers(0, len(categorias), self.productos) if categorias else None
+        almacen = rng.integers(0, len(almacenes), self.productos) if almacenes else None
+        productos = Producto.objects.bulk_create([
+            Producto(
+                nombre=f"Producto {n:05d}", precio=f"{self.precios[n]:.2f}", descuento=f"{self.descuentos[n]:.4f}",
+                costo_promedio=f"{self.costos[n]:.4f}",
+                stock=int(stock[n]), bajo_stock=bool(stock[n] <= 10), empresa=empresa,
+                categoria=categorias[categoria[n]] if categorias else None,
+                almacen=almacenes[almacen[n]] if almacenes else None,
+            ) for n in range(self.productos)
+        ], batch_size=self.escritor.lote)
+        self.ids_productos = np.array([p.pk for p in productos])
+        self.pesos_productos = pesos_potencia(self.productos, 0.9, rng)
+        self.pesos_clientes = pesos_potencia(max(self.clientes, 1), 0.7, rng)
+        return empresa
+
+    # --- Historia ---
+
+    def _volumen_diario(self, dias):
+        """Ventas esperadas por día: tendencia, estacionalidad semanal y anual, pico de diciembre."""
+        fechas = np.array(dias, dtype='datetime64[D]')
+        dia_semana = (fechas.astype(np.int64) + 3) % 7  # 1970-01-01 fue jueves
+        dia_anio = (fechas - fechas.astype('datetime64[Y]')).astype(np.int64)
+        mes = fechas.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        transcurrido = (fechas - np.datetime64(self.inicio)).astype(np.int64)
+        escala = self._escala_empresa
+        return (escala * self.ventas_diarias * ESTACIONALIDAD_SEMANAL[dia_semana]
+                * (1 + 0.2 * np.sin(2 * np.pi * (dia_anio - 80) / 365.25))
+                * np.where(mes == 12, 1.35, 1.0)
+                * (1 + self.crecimiento_anual) ** (transcurrido / 365.25 - self.dias / 365.25))
+
+    def _historia(self, empresa, rng):
+        # Empresas de distinto tamaño alrededor del volumen medio
+        self._escala_empresa = float(rng.lognormal(0, 0.35))
+        lineas = 0
+        for desde in range(0, self.dias, self.bloque_dias):
+            dias = [self.inicio + timedelta(days=d) for d in range(desde, min(desde + self.bloque_dias, self.dias))]
+            lineas += self._ventas(empresa, dias, rng)
+            self._movimientos(empresa, dias, rng)
+        return lineas
+
+    def _momentos(self, dias, por_dia, rng):
+        """Fecha y hora (aware, UTC) de cada evento: horas de comercio del día correspondiente."""
+        medianoche = np.array([datetime.combine(d, dt_time(), tzinfo=dt_timezone.utc).timestamp() for d in dias],
+                              dtype=np.int64)
+        dia = np.repeat(np.arange(len(dias)), por_dia)
+        segundos = medianoche[dia] + rng.choice(HORAS, len(dia), p=PESO_HORAS) * 3600 + rng.integers(0, 3600, len(dia))
+        # Las horas no pasan de las 22:00: ordenar por momento mantiene cada fila en su día
+        segundos.sort()
+        return dia, segundos
+
+    def _ventas(self, empresa, dias, rng):
+        por_dia = rng.poisson(self._volumen_diario(dias))
+        dia, segundos = self._momentos(dias, por_dia, rng)
+        total = len(dia)
+        if not total:
+            return 0
+        fechas = self.escritor.fechas(segundos)
+        ids = self.escritor.reservar_ids(Venta, total)
+
+        # Los últimos días aún tienen ventas pendientes; el resto se completa o se cancela
+        antiguedad = (self.hasta - dias[0]).days - dia
+        azar = rng.random(total)
+        estado = np.where(antiguedad < 3, np.where(azar < 0.4, 'Pendiente', 'Completada'),
+                          np.where(azar < 0.06, 'Cancelada', 'Completada'))
+        origen = np.where(rng.random(total) < 0.3, 'MARKETPLACE', 'MANUAL')
+        cliente = self.ids_clientes[rng.choice(len(self.ids_clientes), total, p=self.pesos_clientes)] \
+            if len(self.ids_clientes) else np.full(total, None)
+
+        venta, producto = lineas_distintas(rng, total, self.productos, self.lineas_por_venta, self.pesos_productos)
+        cantidad = rng.geometric(0.55, len(venta))
+        # Monto en enteros (centavos × diezmilésimas del precio con descuento) y redondeado al
+        # final, como la suma exacta de las líneas; en coma flotante se desviaba un centavo
+        centavos = np.round(self.precios[producto] * 100).astype(np.int64)
+        factor = 10000 - np.round(self.descuentos[producto] * 10000).astype(np.int64)
+        exacto = np.bincount(venta, weights=cantidad * centavos * factor, minlength=total).astype(np.int64)
+        monto = (exacto + 5000) // 10000 / 100
+
+        self.escritor.insertar(Venta, {
+            'id': ids, 'fecha': fechas, 'monto_total': importes(monto), 'usuario_id': cliente,
+            'empresa_id': [empresa.pk] * total, 'estado': estado, 'origen': origen,
+            'fecha_creacion': fechas, 'fecha_actualizacion': fechas,
+        })
+        fechas_lineas = fechas[venta]
+        self.escritor.insertar(DetalleVenta, {
+            'id': self.escritor.reservar_ids(DetalleVenta, len(venta)),
+            'venta_id': ids[venta], 'producto_id': self.ids_productos[producto], 'cantidad': cantidad,
+            'precio_unitario': importes(self.precios[producto]),
+            'descuento_aplicado': np.char.mod('%.4f', self.descuentos[producto]).tolist(),
+            'costo_unitario': np.char.mod('%.4f', self.costos[producto]).tolist(),
+            'fecha_creacion': fechas_lineas, 'fecha_actualizacion': fechas_lineas,
+        })
+
+        # Pago para la mayoría de las ventas no canceladas (OneToOne con la venta)
+        con_pago = np.flatnonzero((estado != 'Cancelada') & (rng.random(total) < 0.85))
+        estado_pago = np.where(estado[con_pago] == 'Pendiente', 'PENDIENTE',
+                               np.where(rng.random(len(con_pago)) < 0.03, 'FALLIDO', 'COMPLETADO'))
+        fechas_pago = self.escritor.fechas(segundos[con_pago] + rng.integers(0, 3600, len(con_pago)))
+        self.escritor.insertar(Pago, {
+            'id': self.escritor.reservar_ids(Pago, len(con_pago)),
+            'venta_id': ids[con_pago], 'cliente_id': cliente[con_pago], 'empresa_id': [empresa.pk] * len(con_pago),
+            'monto': importes(monto[con_pago]), 'fecha_pago': fechas_pago,
+            'metodo_pago': METODOS_PAGO[rng.integers(0, len(METODOS_PAGO), len(con_pago))],
+            'estado_pago': estado_pago, 'fecha_creacion': fechas_pago, 'fecha_actualizacion': fechas_pago,
+        })
+        return len(venta)
+
+    def _movimientos(self, empresa, dias, rng):
+        if not len(self.ids_proveedores):
+            return
+        por_dia = rng.poisson(self.movimientos_semanales / 7, len(dias))
+        dia, segundos = self._momentos(dias, por_dia, rng)
+        total = len(dia)
+        if not total:
+            return
+        llegadas = self.escritor.fechas(segundos)
+        creados = self.escritor.fechas(segundos - 2 * 86400)
+        ids = self.escritor.reservar_ids(Movimiento, total)
+
+        movimiento, producto = lineas_distintas(rng, total, self.productos, 8, minimo=3)
+        cantidad = rng.integers(20, 201, len(movimiento))
+        valor = np.round(self.precios[producto] * rng.uniform(0.5, 0.7, len(movimiento)), 2)
+        total_linea = cantidad * valor
+        transporte = np.round(rng.uniform(20, 300, total), 2)
+
+        antiguedad = (self.hasta - dias[0]).days - dia
+        azar = rng.random(total)
+        estado = np.where(antiguedad < 10, np.where(azar < 0.5, 'Pendiente', 'Aceptado'),
+                          np.where(azar < 0.05, 'Rechazado', 'Aceptado'))
+        self.escritor.insertar(Movimiento, {
+            'id': ids, 'empresa_id': [empresa.pk] * total,
+            'proveedor_id': self.ids_proveedores[rng.integers(0, len(self.ids_proveedores), total)],
+            'almacen_destino_id': self.ids_almacenes[rng.integers(0, len(self.ids_almacenes), total)]
+            if len(self.ids_almacenes) else [None] * total,
+            'created_at': creados, 'updated_at': llegadas, 'fecha_llegada': llegadas,
+            'costo_transporte': importes(transporte),
+            'monto_total_operacion': importes(np.bincount(movimiento, weights=total_linea, minlength=total) + transporte),
+            'estado': estado, 'fecha_aceptacion': np.where(estado == 'Aceptado', llegadas, None),
+        })
+        self.escritor.insertar(DetalleMovimiento, {
+            'id': self.escritor.reservar_ids(DetalleMovimiento, len(movimiento)),
+            'movimiento_id': ids[movimiento], 'producto_id': self.ids_productos[producto],
+            'cantidad_suministrada': cantidad, 'valor_unitario': importes(valor),
+            'valor_total_producto': importes(total_linea),
+        })
@@ -20,10 +20,10 @@ class EmpresaSerializer(serializers.ModelSerializer):
     def get_admin_empresa_detail(self, obj):
         # Importamos UserProfileSerializer LOCALMENTE para evitar la importación circular global
         from apps.usuarios.serializers import UserProfileSerializer
-        if obj.admin_empresa:
-            # Puedes usar un serializer más ligero si no necesitas todos los detalles del perfil aquí
-            # O usar UserProfileSerializer si es lo que necesitas.
-            return UserProfileSerializer(obj.admin_empresa, context=self.context).data
+        # Usuario -> empresa -> admin -> empresa... se corta en el segundo nivel para no recursar sin fin
+        if obj.admin_empresa and not self.context.get('anidado_en_empresa'):
+            contexto = dict(self.context, anidado_en_empresa=True)
+            return UserProfileSerializer(obj.admin_empresa, context=contexto).data
         return None
 
     def create(self, validated_data):
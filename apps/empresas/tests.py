@@ -1,3 +1,36 @@
-from django.test import TestCase
+# apps/empresas/tests.py
 
-# Create your tests here.
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .models import Empresa
+from .poblador import _Escritor
+
+
+class CopyPobladorTest(SimpleTestCase):
+    """COPY de poblar_datos --copy con cada driver de PostgreSQL (sin servidor: cursor simulado)."""
+
+    SQL = 'COPY "empresas_empresa" ("id", "nombre") FROM STDIN WITH (FORMAT csv)'
+
+    def copiar(self, psycopg3):
+        conexion = mock.MagicMock()
+        conexion.ops.quote_name = lambda nombre: f'"{nombre}"'
+        crudo = conexion.cursor.return_value.__enter__.return_value.cursor
+        with mock.patch('apps.empresas.poblador.connection', conexion), \
+                mock.patch('django.db.backends.postgresql.psycopg_any.is_psycopg3', psycopg3):
+            _Escritor()._copy(Empresa, ['id', 'nombre'], [(1, 'Ñandú, S.A.'), (2, None)])
+        return crudo
+
+    def test_psycopg2_copy_expert(self):
+        crudo = self.copiar(psycopg3=False)
+        sql, buffer = crudo.copy_expert.call_args.args
+        self.assertEqual(sql, self.SQL)
+        self.assertEqual(buffer.read(), '1,"Ñandú, S.A."\r\n2,\r\n')
+        crudo.copy.assert_not_called()
+
+    def test_psycopg3_copy(self):
+        crudo = self.copiar(psycopg3=True)
+        crudo.copy.assert_called_once_with(self.SQL)
+        crudo.copy.return_value.__enter__.return_value.write.assert_called_once_with('1,"Ñandú, S.A."\r\n2,\r\n')
+        crudo.copy_expert.assert_not_called()
@@ -1,6 +1,9 @@
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.response import Response  # Necesitarás Response para manejar errores o respuestas específicas
+from django.views import View
 from rest_framework import viewsets, permissions, status, generics
+
+from erp.asincrono import PaginaInvalida, error, paginar, respuesta_json
 from .models import Empresa
 from .serializers import EmpresaSerializer,EmpresaMarketplaceSerializer
 
@@ -104,21 +107,31 @@ class EmpresaViewSet(viewsets.ModelViewSet):
         serializer.save()
 
     # --- NUEVAS VISTAS PARA EL MARKETPLACE PÚBLICO ---
-class MarketplaceEmpresaListView(generics.ListAPIView):
-        """
-        Vista para listar empresas activas en el marketplace público.
-        No requiere autenticación.
-        """
+# Vistas async (ORM asíncrono): el marketplace es público y de solo lectura, y con ASGI
+# sus peticiones no ocupan hilos mientras esperan a la base de datos.
+class MarketplaceEmpresaListView(View):
+    """
+    Vista para listar empresas activas en el marketplace público.
+    No requiere autenticación.
+    """
+
+    async def get(self, request):
         queryset = Empresa.objects.filter(is_active=True).order_by('nombre')
-        serializer_class = EmpresaMarketplaceSerializer  # Usamos el serializer más ligero
-        permission_classes = []  # ¡IMPORTANTE! Acceso público
-
-class MarketplaceEmpresaDetailView(generics.RetrieveAPIView):
-        """
-        Vista para ver detalles de una empresa específica en el marketplace público.
-        No requiere autenticación.
-        """
-        queryset = Empresa.objects.filter(is_active=True)
-        serializer_class = EmpresaMarketplaceSerializer  # Usamos el serializer más ligero
-        lookup_field = 'pk'
-        permission_classes = []  # ¡IMPORTANTE! Acceso público
\ No newline at end of file
+        pagina = await paginar(request, queryset,
+                               lambda empresas: EmpresaMarketplaceSerializer(empresas, many=True).data)
+        if pagina is None:
+            return error(PaginaInvalida)
+        return respuesta_json(pagina)
+
+
+class MarketplaceEmpresaDetailView(View):
+    """
+    Vista para ver detalles de una empresa específica en el marketplace público.
+    No requiere autenticación.
+    """
+
+    async def get(self, request, pk):
+        empresa = await Empresa.objects.filter(is_active=True, pk=pk).afirst()
+        if empresa is None:
+            return error(NotFound)
+        return respuesta_json(EmpresaMarketplaceSerializer(empresa).data)
@@ -1,6 +1,12 @@
+# apps/logs/apps.py
+
 from django.apps import AppConfig
 
 
 class LogsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.logs'
+
+    def ready(self):
+        # Registra los receptores de auditoría (post_save / post_delete)
+        import apps.logs.signals
@@ -0,0 +1,84 @@
+# apps/logs/management/commands/archivar_logs.py
+
+from collections import Counter
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.logs.models import ActividadLog, ActividadLogArchivo
+
+ARCHIVE_FIELDS = ['id', 'user_id', 'empresa_id', 'timestamp', 'activity_type', 'description',
+                  'entity_id', 'entity_name', 'extra_data']
+
+
+def _inicio_de_mes(anio, mes):
+    # Normaliza meses fuera de rango (p. ej. mes 0 -> diciembre del año anterior)
+    anio += (mes - 1) // 12
+    mes = (mes - 1) % 12 + 1
+    return date(anio, mes, 1)
+
+
+class Command(BaseCommand):
+    help = ("Mueve los registros de actividad anteriores a N meses a ActividadLogArchivo, "
+            "agrupados por mes, en lotes con bulk_create. Opcionalmente purga el archivo.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int,
+                            default=getattr(settings, 'ACTIVITY_LOG_RETENTION_MONTHS', 6),
+                            help="Meses completos que se conservan en la tabla activa.")
+        parser.add_argument('--lote', type=int, default=5000, help="Filas movidas por transacción.")
+        parser.add_argument('--purgar-archivo', type=int, default=None, metavar='MESES',
+                            help="Elimina del archivo los periodos anteriores a MESES meses.")
+        parser.add_argument('--dry-run', action='store_true', help="Solo informa, no modifica nada.")
+
+    def handle(self, *args, **options):
+        if options['meses'] < 0 or options['lote'] <= 0:
+            raise CommandError("--meses debe ser >= 0 y --lote mayor que 0.")
+
+        hoy = timezone.localdate()
+        corte = _inicio_de_mes(hoy.year, hoy.month - options['meses'])
+        # Límite como instante (medianoche local del corte): timestamp__date__lt convertiría
+        # cada fila a fecha y el índice de timestamp no serviría
+        pendientes = ActividadLog.objects.filter(
+            timestamp__lt=timezone.make_aware(datetime.combine(corte, time.min)))
+
+        if options['dry_run']:
+            self.stdout.write(f"Se archivarían {pendientes.count()} registros anteriores a {corte}.")
+        else:
+            por_periodo = self._archivar(pendientes, options['lote'])
+            for periodo, total in sorted(por_periodo.items()):
+                self.stdout.write(f"  {periodo:%Y-%m}: {total} registros archivados")
+            self.stdout.write(self.style.SUCCESS(
+                f"Archivado completado: {sum(por_periodo.values())} registros anteriores a {corte}."
+            ))
+
+        if options['purgar_archivo'] is not None:
+            limite = _inicio_de_mes(hoy.year, hoy.month - options['purgar_archivo'])
+            antiguos = ActividadLogArchivo.objects.filter(periodo__lt=limite)
+            if options['dry_run']:
+                self.stdout.write(f"Se purgarían {antiguos.count()} registros archivados anteriores a {limite}.")
+            else:
+                eliminados, _ = antiguos.delete()
+                self.stdout.write(self.style.SUCCESS(f"Purgados {eliminados} registros archivados anteriores a {limite}."))
+
+    def _archivar(self, pendientes, lote):
+        por_periodo = Counter()
+        while True:
+            filas = list(pendientes.order_by('timestamp', 'id').values(*ARCHIVE_FIELDS)[:lote])
+            if not filas:
+                return por_periodo
+            archivados = []
+            for fila in filas:
+                periodo = timezone.localtime(fila['timestamp']).date().replace(day=1)
+                por_periodo[periodo] += 1
+                archivados.append(ActividadLogArchivo(
+                    periodo=periodo,
+                    original_id=fila.pop('id'),
+                    **fila,
+                ))
+            with transaction.atomic():
+                ActividadLogArchivo.objects.bulk_create(archivados, batch_size=lote)
+                ActividadLog.objects.filter(id__in=[a.original_id for a in archivados]).delete()
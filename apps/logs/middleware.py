@@ -0,0 +1,42 @@
+# apps/logs/middleware.py
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from .signals import _Peticion, _peticion_actual
+
+
+class AuditoriaMiddleware:
+    """
+    Agrupa los eventos de auditoría de toda la petición y los escribe al final en un solo INSERT.
+    También deja la petición accesible para saber qué usuario hizo el cambio (DRF asigna
+    request.user al autenticar con JWT, así que se lee en el momento del evento).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        peticion = _Peticion(request)
+        token = _peticion_actual.set(peticion)
+        try:
+            return self.get_response(request)
+        finally:
+            _peticion_actual.reset(token)
+            peticion.vaciar()
+
+    async def __acall__(self, request):
+        peticion = _Peticion(request)
+        token = _peticion_actual.set(peticion)
+        try:
+            return await self.get_response(request)
+        finally:
+            _peticion_actual.reset(token)
+            # La escritura usa el ORM síncrono
+            await sync_to_async(peticion.vaciar)()
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0003_empresa_descripcion_corta'),
+        ('logs', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActividadLogArchivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.DateField(verbose_name='Periodo (primer día del mes)')),
+                ('original_id', models.BigIntegerField(verbose_name='ID Original')),
+                ('timestamp', models.DateTimeField(verbose_name='Fecha y Hora')),
+                ('activity_type', models.CharField(max_length=100, verbose_name='Tipo de Actividad')),
+                ('description', models.TextField(verbose_name='Descripción')),
+                ('entity_id', models.IntegerField(blank=True, null=True, verbose_name='ID de Entidad Afectada')),
+                ('entity_name', models.CharField(blank=True, max_length=255, null=True, verbose_name='Nombre de Entidad Afectada')),
+                ('extra_data', models.JSONField(blank=True, null=True, verbose_name='Datos Adicionales')),
+            ],
+            options={
+                'verbose_name': 'Registro de Actividad Archivado',
+                'verbose_name_plural': 'Registros de Actividad Archivados',
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.AddField(
+            model_name='actividadlog',
+            name='extra_data',
+            field=models.JSONField(blank=True, null=True, verbose_name='Datos Adicionales'),
+        ),
+        migrations.AddIndex(
+            model_name='actividadlog',
+            index=models.Index(fields=['empresa', '-timestamp', '-id'], name='log_empresa_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='actividadlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='log_ts_idx'),
+        ),
+        migrations.AddField(
+            model_name='actividadlogarchivo',
+            name='empresa',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='empresas.empresa'),
+        ),
+        migrations.AddField(
+            model_name='actividadlogarchivo',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='actividadlogarchivo',
+            index=models.Index(fields=['empresa', 'periodo'], name='log_archivo_periodo_idx'),
+        ),
+    ]
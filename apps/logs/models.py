@@ -21,15 +21,49 @@ class ActividadLog(models.Model):
     entity_id = models.IntegerField(null=True, blank=True, verbose_name="ID de Entidad Afectada")
     entity_name = models.CharField(max_length=255, blank=True, null=True, verbose_name="Nombre de Entidad Afectada")
 
-    # Si quieres almacenar datos JSON adicionales del evento
-    # extra_data = models.JSONField(null=True, blank=True)
+    # Datos estructurados adicionales del evento (cambios, montos, origen, etc.)
+    extra_data = models.JSONField(null=True, blank=True, verbose_name="Datos Adicionales")
 
     class Meta:
         verbose_name = "Registro de Actividad"
         verbose_name_plural = "Registros de Actividad"
         ordering = ['-timestamp']  # Las más recientes primero
+        indexes = [
+            # Sirve la paginación keyset (empresa, timestamp, id) del listado de logs
+            models.Index(fields=['empresa', '-timestamp', '-id'], name='log_empresa_ts_idx'),
+            models.Index(fields=['-timestamp', '-id'], name='log_ts_idx'),
+        ]
 
     def __str__(self):
         user_info = f" por {self.user.username}" if self.user else ""
         empresa_info = f" en {self.empresa.nombre}" if self.empresa else ""
-        return f"[{self.timestamp.strftime('%Y-%m-%d %H:%M')}] {self.activity_type}: {self.description}{user_info}{empresa_info}"
\ No newline at end of file
+        return f"[{self.timestamp.strftime('%Y-%m-%d %H:%M')}] {self.activity_type}: {self.description}{user_info}{empresa_info}"
+
+
+class ActividadLogArchivo(models.Model):
+    """
+    Registros de actividad antiguos movidos fuera de la tabla principal, agrupados por mes.
+    La tabla activa se mantiene pequeña; el archivo solo se consulta por empresa y periodo.
+    """
+    periodo = models.DateField(verbose_name="Periodo (primer día del mes)")
+    original_id = models.BigIntegerField(verbose_name="ID Original")
+    user = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    empresa = models.ForeignKey(Empresa, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    timestamp = models.DateTimeField(verbose_name="Fecha y Hora")
+    activity_type = models.CharField(max_length=100, verbose_name="Tipo de Actividad")
+    description = models.TextField(verbose_name="Descripción")
+    entity_id = models.IntegerField(null=True, blank=True, verbose_name="ID de Entidad Afectada")
+    entity_name = models.CharField(max_length=255, blank=True, null=True, verbose_name="Nombre de Entidad Afectada")
+    extra_data = models.JSONField(null=True, blank=True, verbose_name="Datos Adicionales")
+
+    class Meta:
+        verbose_name = "Registro de Actividad Archivado"
+        verbose_name_plural = "Registros de Actividad Archivados"
+        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['empresa', 'periodo'], name='log_archivo_periodo_idx'),
+        ]
+
+    def __str__(self):
+        return f"[{self.periodo:%Y-%m}] {self.activity_type}: {self.description}"
\ No newline at end of file
@@ -9,5 +9,5 @@ class ActividadLogSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ActividadLog
-        fields = ['id', 'user', 'user_username', 'empresa', 'empresa_nombre', 'timestamp', 'activity_type', 'description', 'entity_id', 'entity_name']
+        fields = ['id', 'user', 'user_username', 'empresa', 'empresa_nombre', 'timestamp', 'activity_type', 'description', 'entity_id', 'entity_name', 'extra_data']
         read_only_fields = ['user', 'empresa', 'timestamp'] # Estos campos se asignan en la lógica de la vista o signals
\ No newline at end of file
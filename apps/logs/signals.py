@@ -0,0 +1,220 @@
+# apps/logs/signals.py
+
+"""
+Auditoría automática: cada alta, modificación o baja de los modelos auditados genera
+un evento en ActividadLog.
+
+Los eventos no se escriben al instante. Cada uno se registra con transaction.on_commit
+(si la transacción se revierte, se descarta) y se acumula por objeto, de modo que varias
+escrituras sobre la misma fila dentro de una transacción o petición dejan un solo evento.
+Al terminar la transacción (o la petición, si AuditoriaMiddleware está activo) todo lo
+pendiente se guarda con un único bulk_create a través de apps.logs.writer.
+
+Los callbacks de on_commit se ejecutan en el orden en que se registraron, así que escribe
+el del último evento de la transacción: la conexión guarda cuál es (_auditoria_ultimo) y
+cada evento nuevo lo reemplaza. Si ese último evento se revierte con un bloque anidado, lo
+confirmado queda en la cola del hilo y se escribe con el siguiente evento del hilo.
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import ActividadLog
+from .writer import writer
+
+ACCIONES = {'created': 'creado', 'updated': 'actualizado', 'deleted': 'eliminado'}
+
+# Modelo auditado -> (prefijo del activity_type, nombre legible, cómo nombrar la entidad, campo de usuario)
+MODELOS_AUDITADOS = {
+    'ventas.Venta': ('order', 'Pedido', lambda obj: f"Pedido #{obj.pk}", 'usuario_id'),
+    'movimientos.Movimiento': ('movement', 'Movimiento', lambda obj: f"Movimiento #{obj.pk}", None),
+    'pagos.Pago': ('payment', 'Pago', lambda obj: f"Pago #{obj.pk}", 'cliente_id'),
+    'productos.Producto': ('product', 'Producto', lambda obj: obj.nombre, None),
+    'usuarios.CustomUser': ('user', 'Usuario', lambda obj: obj.first_name or obj.email or obj.username, 'pk'),
+}
+
+# Cambios que no aportan nada al registro de actividad
+CAMPOS_IGNORADOS = {'usuarios.CustomUser': {'last_login'}}
+
+_peticion_actual = contextvars.ContextVar('auditoria_peticion', default=None)
+_estado = threading.local()
+
+
+class _Pendientes:
+    """Eventos ya confirmados pendientes de escribir, fusionados por (modelo, pk)."""
+
+    def __init__(self):
+        self.eventos = {}
+
+    def agregar(self, evento):
+        clave = (evento['modelo'], evento['entity_id'])
+        previo = self.eventos.get(clave)
+        if previo is None:
+            self.eventos[clave] = evento
+            return
+        if evento['accion'] == 'deleted':
+            if previo['accion'] == 'created':
+                # Creado y eliminado en la misma unidad de trabajo: no queda nada que auditar
+                del self.eventos[clave]
+            else:
+                self.eventos[clave] = evento
+            return
+        # created + updated -> created; updated + updated -> updated (acumulando campos)
+        campos = previo['campos']
+        if campos is not None:
+            campos = None if evento['campos'] is None else sorted(set(campos) | set(evento['campos']))
+        self.eventos[clave] = dict(evento, accion=previo['accion'], campos=campos)
+
+    def vaciar(self):
+        eventos, self.eventos = list(self.eventos.values()), {}
+        if eventos:
+            writer.write(_construir_logs(eventos))
+
+
+class _Peticion(_Pendientes):
+    """Pendientes de una petición HTTP; guarda la request para identificar al usuario."""
+
+    def __init__(self, request):
+        super().__init__()
+        self.request = request
+
+
+def _pendientes_del_hilo():
+    pendientes = getattr(_estado, 'pendientes', None)
+    if pendientes is None:
+        pendientes = _estado.pendientes = _Pendientes()
+    return pendientes
+
+
+class _AlConfirmar:
+    """
+    Callback de on_commit que pasa un evento a la cola de pendientes. El del último evento
+    registrado en la transacción, además, escribe la cola.
+    """
+
+    def __init__(self, evento):
+        self.evento = evento
+
+    def __call__(self):
+        peticion = _peticion_actual.get()
+        # Dentro de una petición se escribe todo al final (AuditoriaMiddleware)
+        (peticion or _pendientes_del_hilo()).agregar(self.evento)
+        if getattr(connection, '_auditoria_ultimo', None) is self:
+            connection._auditoria_ultimo = None
+            _escribir_pendientes()
+
+
+def _escribir_pendientes():
+    if _peticion_actual.get() is None:
+        _pendientes_del_hilo().vaciar()
+
+
+def _construir_logs(eventos):
+    from apps.empresas.models import Empresa
+    from apps.usuarios.models import CustomUser
+
+    # Una eliminación en cascada (p. ej. de la empresa) puede dejar referencias a filas
+    # que ya no existen: se comprueban en bloque y se guardan como NULL.
+    empresas = set(Empresa.objects.filter(
+        pk__in={e['empresa_id'] for e in eventos if e['empresa_id']}).values_list('pk', flat=True))
+    usuarios = set(CustomUser.objects.filter(
+        pk__in={e['user_id'] for e in eventos if e['user_id']}).values_list('pk', flat=True))
+
+    logs = []
+    for evento in eventos:
+        prefijo, nombre, _entidad, _campo = MODELOS_AUDITADOS[evento['modelo']]
+        accion = evento['accion']
+        entidad = evento['entity_name']
+        if not entidad.startswith(nombre):
+            entidad = f"{nombre} '{entidad}'"
+        descripcion = f"{entidad} {ACCIONES[accion]}"
+        if evento['actor']:
+            descripcion += f" por {evento['actor']}"
+        extra = {'modelo': evento['modelo'], 'accion': accion}
+        if evento['campos']:
+            extra['campos'] = evento['campos']
+        logs.append(ActividadLog(
+            user_id=evento['user_id'] if evento['user_id'] in usuarios else None,
+            empresa_id=evento['empresa_id'] if evento['empresa_id'] in empresas else None,
+            timestamp=evento['timestamp'],
+            activity_type=f"{prefijo}_{accion}",
+            description=descripcion + '.',
+            entity_id=evento['entity_id'],
+            entity_name=(evento['entity_name'] or '')[:255] or None,
+            extra_data=extra,
+        ))
+    return logs
+
+
+def _actor(instance, campo_usuario):
+    """Usuario que provoca el cambio: el de la petición en curso o, si no hay, el del propio objeto."""
+    peticion = _peticion_actual.get()
+    user = getattr(peticion.request, 'user', None) if peticion is not None else None
+    if user is not None and user.is_authenticated:
+        return user.pk, user.first_name or user.username
+    if campo_usuario:
+        return getattr(instance, campo_usuario), None
+    return None, None
+
+
+def _registrar(instance, accion, campos=None):
+    if getattr(_estado, 'desactivada', False):
+        return
+    modelo = instance._meta.label
+    _prefijo, _nombre, entidad, campo_usuario = MODELOS_AUDITADOS[modelo]
+    user_id, actor = _actor(instance, campo_usuario)
+    al_confirmar = _AlConfirmar({
+        'modelo': modelo,
+        'accion': accion,
+        'campos': campos,
+        'entity_id': instance.pk,
+        'entity_name': entidad(instance),
+        'empresa_id': getattr(instance, 'empresa_id', None),
+        'user_id': user_id,
+        'actor': actor,
+        'timestamp': timezone.now(),
+    })
+    if connection.in_atomic_block:
+        # Al confirmar, escribe el callback del último evento de la transacción
+        connection._auditoria_ultimo = al_confirmar
+        transaction.on_commit(al_confirmar)
+    else:
+        # En autocommit on_commit ejecuta el callback al momento. La marca puede venir de
+        # una transacción revertida: ese callback ya no se va a ejecutar.
+        connection._auditoria_ultimo = None
+        transaction.on_commit(al_confirmar)
+        _escribir_pendientes()
+
+
+def _auditar_guardado(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:  # loaddata
+        return
+    campos = sorted(update_fields) if update_fields else None
+    if campos and set(campos) <= CAMPOS_IGNORADOS.get(sender._meta.label, set()):
+        return
+    _registrar(instance, 'created' if created else 'updated', None if created else campos)
+
+
+def _auditar_borrado(sender, instance, **kwargs):
+    _registrar(instance, 'deleted')
+
+
+for _label in MODELOS_AUDITADOS:
+    post_save.connect(_auditar_guardado, sender=_label, dispatch_uid=f"auditoria_save_{_label}")
+    post_delete.connect(_auditar_borrado, sender=_label, dispatch_uid=f"auditoria_delete_{_label}")
+
+
+@contextmanager
+def auditoria_desactivada():
+    """Desactiva la auditoría en el hilo actual (cargas masivas, scripts de mantenimiento)."""
+    previo = getattr(_estado, 'desactivada', False)
+    _estado.desactivada = True
+    try:
+        yield
+    finally:
+        _estado.desactivada = previo
@@ -1,3 +1,142 @@
+# apps/logs/tests.py
+
+import threading
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.empresas.models import Empresa
+from apps.productos.models import Producto
+from .models import ActividadLog, ActividadLogArchivo
+from .writer import ActividadLogWriter
+
+
+class AuditoriaTransaccionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre='Empresa Auditoría')
+
+    def crear_producto(self, nombre):
+        return Producto.objects.create(nombre=nombre, precio=Decimal('1.00'), empresa=self.empresa)
+
+    def inserciones_de_log(self, consultas):
+        tabla = ActividadLog._meta.db_table
+        return [c for c in consultas.captured_queries if c['sql'].startswith(f'INSERT INTO "{tabla}"')]
+
+    def test_una_transaccion_deja_un_evento_por_objeto_en_un_insert(self):
+        with CaptureQueriesContext(connection) as consultas:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    producto = self.crear_producto('A')
+                    producto.stock = 5
+                    producto.save(update_fields=['stock'])
+                    producto.precio = Decimal('2.00')
+                    producto.save(update_fields=['precio'])
+                    self.crear_producto('B')
+                # Nada se escribe antes de confirmar
+                self.assertFalse(ActividadLog.objects.exists())
+
+        self.assertEqual(len(self.inserciones_de_log(consultas)), 1)
+        logs = ActividadLog.objects.order_by('entity_name')
+        self.assertEqual([(log.entity_name, log.activity_type) for log in logs],
+                         [('A', 'product_created'), ('B', 'product_created')])
+
+    def test_actualizaciones_acumulan_campos(self):
+        producto = self.crear_producto('A')
+        ActividadLog.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                producto.save(update_fields=['stock'])
+                producto.save(update_fields=['precio'])
+
+        log = ActividadLog.objects.get()
+        self.assertEqual(log.activity_type, 'product_updated')
+        # Producto.save() añade bajo_stock a update_fields al tocar el stock
+        self.assertLessEqual({'precio', 'stock'}, set(log.extra_data['campos']))
+
+    def test_creado_y_eliminado_en_la_transaccion_no_deja_evento(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.crear_producto('Efímero').delete()
+
+        self.assertFalse(ActividadLog.objects.exists())
+
+    def test_rollback_descarta_los_eventos(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.crear_producto('A')
+                    raise RuntimeError
+
+        self.assertEqual(callbacks, [])
+        self.assertFalse(ActividadLog.objects.exists())
+
+    def test_rollback_de_bloque_anidado_descarta_solo_sus_eventos(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.crear_producto('Antes')
+                try:
+                    with transaction.atomic():
+                        self.crear_producto('Revertido')
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                self.crear_producto('Después')
+
+        self.assertEqual(sorted(ActividadLog.objects.values_list('entity_name', flat=True)),
+                         ['Antes', 'Después'])
+
+
+class ActividadLogWriterTest(TestCase):
+    def log(self, descripcion='Evento'):
+        return ActividadLog(activity_type='prueba', description=descripcion)
+
+    def test_fallo_al_escribir_no_rompe_la_transaccion(self):
+        escritor = ActividadLogWriter()
+        with transaction.atomic():
+            # description es NOT NULL: el INSERT falla
+            escritor.write([self.log(None)])
+            escritor.write([self.log()])
+        self.assertEqual(ActividadLog.objects.count(), 1)
+
+    def test_savepoint_solo_dentro_de_una_transaccion(self):
+        escritor = ActividadLogWriter()
+        with CaptureQueriesContext(connection) as dentro:
+            escritor.write([self.log()])
+        # El TestCase ya corre en una transacción; fuera de ella (on_commit tras el COMMIT) solo va el INSERT
+        with mock.patch.object(type(connection), 'in_atomic_block', False, create=True), \
+                CaptureQueriesContext(connection) as fuera:
+            escritor.write([self.log()])
+        self.assertEqual(len(dentro), 3)
+        self.assertEqual(len(fuera), 1)
+        self.assertTrue(fuera[0]['sql'].startswith('INSERT'))
+
+    def test_temporizador_escribe_sin_esperar_al_siguiente_evento(self):
+        escritor = ActividadLogWriter(batch_size=100, flush_interval=0.01)
+        escrito = threading.Event()
+        with mock.patch.object(escritor, 'flush', side_effect=escrito.set):
+            escritor.extend([self.log()])
+            self.assertTrue(escrito.wait(5))
+
+
+class ArchivarLogsTest(TestCase):
+    def test_corte_en_la_medianoche_local_del_mes(self):
+        hoy = timezone.localdate()
+        corte = timezone.make_aware(datetime.combine(hoy.replace(day=1), time.min))
+        anterior = ActividadLog.objects.create(activity_type='prueba', description='Anterior',
+                                               timestamp=corte - timedelta(seconds=1))
+        ActividadLog.objects.create(activity_type='prueba', description='En el corte', timestamp=corte)
+
+        call_command('archivar_logs', meses=0, stdout=StringIO())
 
-# Create your tests here.
+        self.assertEqual(list(ActividadLog.objects.values_list('description', flat=True)), ['En el corte'])
+        archivado = ActividadLogArchivo.objects.get()
+        self.assertEqual(archivado.original_id, anterior.id)
+        self.assertEqual(archivado.periodo, (corte - timedelta(seconds=1)).date().replace(day=1))
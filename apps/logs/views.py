@@ -3,6 +3,7 @@
 from rest_framework import viewsets, permissions
 from .models import ActividadLog
 from .serializers import ActividadLogSerializer
+from erp.pagination import KeysetPagination
 
 # --- Permisos Personalizados ---
 class IsAdminOrSuperuser(permissions.BasePermission):
@@ -17,6 +18,8 @@ class ActividadLogViewSet(viewsets.ReadOnlyModelViewSet): # ReadOnly para logs
     queryset = ActividadLog.objects.all()
     serializer_class = ActividadLogSerializer
     permission_classes = [IsAdminOrSuperuser] # Solo admins/superusers pueden ver logs
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-timestamp', '-id')
 
     def get_queryset(self):
         """Filtra logs por empresa del usuario si no es superusuario."""
@@ -24,9 +27,15 @@ class ActividadLogViewSet(viewsets.ReadOnlyModelViewSet): # ReadOnly para logs
             return ActividadLog.objects.none() # Devuelve un QuerySet vacío para drf-yasg
 
         user = self.request.user
+        queryset = ActividadLog.objects.select_related('user', 'empresa')
+        activity_type = self.request.query_params.get('activity_type')
+        if activity_type:
+            queryset = queryset.filter(activity_type=activity_type)
+
         if user.is_superuser:
-            return ActividadLog.objects.all()
+            return queryset
         # Verificar si el usuario está autenticado y si tiene el atributo 'empresa'
+        # El filtro por empresa + orden (timestamp, id) usa el índice log_empresa_ts_idx
         elif user.is_authenticated and hasattr(user, 'empresa') and user.empresa:
-            return ActividadLog.objects.filter(empresa=user.empresa)
+            return queryset.filter(empresa=user.empresa)
         return ActividadLog.objects.none()
\ No newline at end of file
@@ -0,0 +1,116 @@
+# apps/logs/writer.py
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from .models import ActividadLog
+
+logger = logging.getLogger(__name__)
+
+
+class ActividadLogWriter:
+    """
+    Escritor en memoria para ActividadLog (solo inserciones).
+    Los eventos se acumulan en un búfer por proceso y se escriben con un único
+    bulk_create cuando se alcanza `batch_size`, cuando han pasado `flush_interval`
+    segundos desde la última escritura o al terminar el proceso. Si no llegan más
+    eventos, un temporizador escribe lo pendiente pasados `flush_interval` segundos.
+    """
+
+    def __init__(self, batch_size=200, flush_interval=5.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    def record(self, activity_type, description, user=None, empresa=None, entity=None,
+               entity_id=None, entity_name=None, extra_data=None, timestamp=None):
+        """Encola un evento. `entity` (una instancia de modelo) rellena entity_id/entity_name."""
+        if entity is not None:
+            entity_id = entity.pk if entity_id is None else entity_id
+            entity_name = str(entity) if entity_name is None else entity_name
+        self.extend([ActividadLog(
+            user=user,
+            empresa=empresa,
+            timestamp=timestamp or timezone.now(),
+            activity_type=activity_type,
+            description=description,
+            entity_id=entity_id,
+            entity_name=(entity_name or '')[:255] or None,
+            extra_data=extra_data,
+        )])
+
+    def extend(self, entries):
+        """Encola varios ActividadLog sin guardar y escribe si toca."""
+        with self._lock:
+            self._buffer.extend(entries)
+            due = len(self._buffer) >= self.batch_size or \
+                time.monotonic() - self._last_flush >= self.flush_interval
+            if not due and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_programado)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def write(self, entries):
+        """Escribe de inmediato (un INSERT) junto con lo que hubiera pendiente en el búfer."""
+        with self._lock:
+            self._buffer.extend(entries)
+        self.flush()
+
+    def _flush_programado(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # El temporizador corre en su propio hilo, que abre su propia conexión
+            connection.close()
+
+    def flush(self):
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+        try:
+            if connection.in_atomic_block:
+                # En su propio savepoint: si el INSERT falla dentro de la transacción de quien
+                # escribe, solo se revierte el log y la transacción sigue siendo usable.
+                # Fuera de una transacción (lo normal: on_commit, temporizador) no hace falta
+                with transaction.atomic():
+                    ActividadLog.objects.bulk_create(pending, batch_size=self.batch_size)
+            else:
+                ActividadLog.objects.bulk_create(pending, batch_size=self.batch_size)
+        except DatabaseError:
+            # Un fallo del log nunca debe romper la operación de negocio que lo generó
+            logger.exception("No se pudieron guardar %d registros de actividad", len(pending))
+            return 0
+        return len(pending)
+
+    def __len__(self):
+        return len(self._buffer)
+
+
+writer = ActividadLogWriter(
+    batch_size=getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 200),
+    flush_interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_SECONDS', 5.0),
+)
+atexit.register(writer.flush)
+
+
+def registrar_actividad(activity_type, description, **kwargs):
+    """Atajo para registrar un evento en el búfer compartido del proceso."""
+    writer.record(activity_type, description, **kwargs)
@@ -0,0 +1,54 @@
+# apps/movimientos/costeo.py
+
+"""
+Costo promedio ponderado de los productos.
+
+Al aceptar un movimiento de entrada, cada producto recibe sus unidades y su costo promedio
+se mueve con el costo de llegada de la compra:
+
+    costo = (stock * costo_anterior + cantidad * costo_llegada) / (stock + cantidad)
+
+El costo de llegada es valor_unitario más la parte del costo de transporte del movimiento
+que le toca a la línea (repartido según el valor de cada línea). Si el producto no tenía
+stock, el costo anterior no pesa y queda el de la compra.
+
+Las ventas copian el costo vigente en DetalleVenta.costo_unitario, así que el margen bruto
+de cualquier periodo es una suma sobre las líneas de venta (reports.specs.GROSS_MARGIN).
+"""
+
+from decimal import Decimal
+
+from apps.productos.models import Producto
+
+CUATRO_DECIMALES = Decimal('0.0001')
+
+
+def costo_promedio(stock, costo_anterior, cantidad, costo_llegada):
+    """Nuevo costo promedio tras recibir `cantidad` unidades a `costo_llegada`."""
+    stock = max(stock, 0)
+    if stock + cantidad <= 0:
+        return costo_anterior
+    return ((stock * costo_anterior + cantidad * costo_llegada) / (stock + cantidad)).quantize(CUATRO_DECIMALES)
+
+
+def registrar_entrada(movimiento):
+    """
+    Suma al stock las unidades de un movimiento de entrada y actualiza el costo promedio de
+    cada producto. Debe llamarse dentro de una transacción: los productos se bloquean
+    (select_for_update) para que dos entradas simultáneas no pisen stock ni costo.
+    """
+    detalles = list(movimiento.detalles.all())
+    valor_total = sum((detalle.cantidad_suministrada * detalle.valor_unitario for detalle in detalles), Decimal('0'))
+    transporte = Decimal(movimiento.costo_transporte or 0)
+    productos = Producto.objects.select_for_update().in_bulk([detalle.producto_id for detalle in detalles])
+
+    for detalle in detalles:
+        producto = productos[detalle.producto_id]
+        cantidad = detalle.cantidad_suministrada
+        costo_llegada = Decimal(detalle.valor_unitario)
+        if transporte and valor_total and cantidad:
+            valor_linea = cantidad * detalle.valor_unitario
+            costo_llegada += transporte * valor_linea / valor_total / cantidad
+        producto.costo_promedio = costo_promedio(producto.stock, producto.costo_promedio, cantidad, costo_llegada)
+        producto.stock += cantidad
+        producto.save(update_fields=['stock', 'costo_promedio'])
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:33
+
+from django.db import migrations, models
+
+
+def fecha_aceptacion(apps, schema_editor):
+    """Los movimientos ya aceptados toman su última actualización como fecha de aceptación."""
+    Movimiento = apps.get_model('movimientos', 'Movimiento')
+    Movimiento.objects.filter(estado='Aceptado').update(fecha_aceptacion=models.F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movimientos', '0003_movimiento_created_at_movimiento_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movimiento',
+            name='fecha_aceptacion',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Fecha de Aceptación'),
+        ),
+        migrations.RunPython(fecha_aceptacion, migrations.RunPython.noop),
+    ]
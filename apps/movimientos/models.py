@@ -29,6 +29,9 @@ class Movimiento(models.Model):
         default='Pendiente',  # O el estado inicial que prefieras
         help_text="Estado actual del movimiento (Pendiente, Aceptado, Rechazado)"
     )
+    # Momento en que el movimiento se aceptó y movió el stock (updated_at cambia con cualquier
+    # guardado posterior). Lo usa la valoración de inventario (apps.productos.valoracion).
+    fecha_aceptacion = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Fecha de Aceptación")
     class Meta:
         verbose_name = "Movimiento de Stock"
         verbose_name_plural = "Movimientos de Stock"
@@ -55,12 +55,12 @@ class MovimientoSerializer(serializers.ModelSerializer):
 
         request = self.context.get('request')
         if request and request.user and not request.user.is_superuser:
-            if not validated_data.get('empresa') and request.user.empresa_detail:
-                validated_data['empresa'] = request.user.empresa_detail
-            elif validated_data.get('empresa') and validated_data.get('empresa') != request.user.empresa_detail:
+            if not validated_data.get('empresa') and request.user.empresa:
+                validated_data['empresa'] = request.user.empresa
+            elif validated_data.get('empresa') and validated_data.get('empresa') != request.user.empresa:
                 raise serializers.ValidationError(
                     {"empresa": "No tienes permiso para crear movimientos para esta empresa."})
-            elif not validated_data.get('empresa') and not request.user.empresa_detail:
+            elif not validated_data.get('empresa') and not request.user.empresa:
                 raise serializers.ValidationError({"empresa": "La empresa es requerida para tu usuario."})
 
         with transaction.atomic():
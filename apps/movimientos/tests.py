@@ -1,3 +1,68 @@
+# apps/movimientos/tests.py
+
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from apps.empresas.models import Empresa
+from apps.productos.models import Producto
+from apps.proveedores.models import Proveedor
+from apps.ventas.models import DetalleVenta, Venta
+from .costeo import costo_promedio, registrar_entrada
+from .models import DetalleMovimiento, Movimiento
+
+
+class CosteoTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre='Empresa Costeo')
+        cls.proveedor = Proveedor.objects.create(empresa=cls.empresa, nombre='Proveedor')
+
+    def producto(self, nombre, stock, costo):
+        return Producto.objects.create(nombre=nombre, precio=Decimal('50.00'), stock=stock,
+                                       costo_promedio=Decimal(costo), empresa=self.empresa)
+
+    def entrada(self, lineas, transporte='0.00'):
+        movimiento = Movimiento.objects.create(empresa=self.empresa, proveedor=self.proveedor,
+                                               costo_transporte=Decimal(transporte))
+        for producto, cantidad, valor in lineas:
+            DetalleMovimiento.objects.create(movimiento=movimiento, producto=producto,
+                                             cantidad_suministrada=cantidad, valor_unitario=Decimal(valor))
+        registrar_entrada(movimiento)
+
+    def test_promedio_ponderado_sin_transporte(self):
+        producto = self.producto('A', 10, '4.0000')
+        self.entrada([(producto, 30, '8.00')])
+
+        producto.refresh_from_db()
+        self.assertEqual((producto.stock, producto.costo_promedio), (40, Decimal('7.0000')))
+
+    def test_transporte_prorrateado_por_valor_de_linea(self):
+        a = self.producto('A', 10, '4.0000')
+        b = self.producto('B', 0, '0.0000')
+        # Valor de las líneas: 50 y 100; el transporte (30) se reparte 10 y 20:
+        # llegada de A = 5 + 10/10 = 6, de B = 20 + 20/5 = 24
+        self.entrada([(a, 10, '5.00'), (b, 5, '20.00')], transporte='30.00')
+
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertEqual((a.stock, a.costo_promedio), (20, Decimal('5.0000')))
+        self.assertEqual((b.stock, b.costo_promedio), (5, Decimal('24.0000')))
+
+    def test_costo_promedio(self):
+        self.assertEqual(costo_promedio(1, Decimal('1'), 2, Decimal('2')), Decimal('1.6667'))
+        # Un stock negativo no pesa: queda el costo de la compra
+        self.assertEqual(costo_promedio(-3, Decimal('2'), 4, Decimal('10')), Decimal('10.0000'))
+        # Sin unidades no hay nada que promediar
+        self.assertEqual(costo_promedio(0, Decimal('3.5'), 0, Decimal('9')), Decimal('3.5'))
+
+    def test_la_venta_copia_el_costo_vigente(self):
+        producto = self.producto('A', 10, '4.0000')
+        self.entrada([(producto, 10, '6.00')])
+        producto.refresh_from_db()
+
+        venta = Venta.objects.create(empresa=self.empresa)
+        detalle = DetalleVenta.objects.create(venta=venta, producto=producto, cantidad=1,
+                                              precio_unitario=Decimal('50.00'))
+
+        self.assertEqual(detalle.costo_unitario, Decimal('5.0000'))
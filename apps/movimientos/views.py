@@ -4,14 +4,18 @@ from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 
 from .models import Movimiento, DetalleMovimiento
 from .serializers import MovimientoSerializer, DetalleMovimientoSerializer
+from .costeo import registrar_entrada
 from apps.productos.models import Producto
 from erp.permissions import IsAdminOrSuperUser, IsEmployeeOrHigher
+from erp.exportacion import ExportacionMixin
+from erp.pagination import KeysetPagination
 
 
 class MovimientoFilter(DjangoFilterBackend):
@@ -38,7 +42,7 @@ class MovimientoFilter(DjangoFilterBackend):
         return queryset
 
 
-class MovimientoViewSet(viewsets.ModelViewSet):
+class MovimientoViewSet(ExportacionMixin, viewsets.ModelViewSet):
     queryset = Movimiento.objects.all()
     serializer_class = MovimientoSerializer
 
@@ -51,6 +55,19 @@ class MovimientoViewSet(viewsets.ModelViewSet):
         'empresa__nombre', 'proveedor__nombre', 'almacen_destino__nombre'
     ]
     ordering = ['-fecha_llegada', '-created_at']
+    # Con ?ordering= la paginación cae a número de página (ver KeysetPagination)
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-fecha_llegada', '-id')
+    export_nombre = 'movimientos'
+    export_columns = (
+        ('id', 'ID', 8),
+        ('fecha_llegada', 'Fecha Llegada', 19),
+        ('proveedor__nombre', 'Proveedor', 25),
+        ('almacen_destino__nombre', 'Almacén Destino', 20),
+        ('estado', 'Estado', 10),
+        ('costo_transporte', 'Costo Transporte', 16),
+        ('monto_total_operacion', 'Monto Total', 14),
+    )
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy', 'aceptar', 'rechazar']:
@@ -66,8 +83,8 @@ class MovimientoViewSet(viewsets.ModelViewSet):
         if user.is_authenticated:
             if user.is_superuser:
                 pass
-            elif hasattr(user, 'empresa_detail') and user.empresa_detail:
-                queryset = queryset.filter(empresa=user.empresa_detail)
+            elif user.empresa_id:
+                queryset = queryset.filter(empresa_id=user.empresa_id)
             else:
                 return Movimiento.objects.none()
         else:
@@ -112,15 +129,14 @@ class MovimientoViewSet(viewsets.ModelViewSet):
         movimiento = self.get_object()
         if movimiento.estado == 'Pendiente':
             movimiento.estado = 'Aceptado'
+            movimiento.fecha_aceptacion = timezone.now()
 
             with transaction.atomic():
                 # === LÓGICA DE AJUSTE DE STOCK CONSOLIDADA AQUÍ ===
                 # Se infiere el tipo de movimiento basado en la presencia de 'proveedor'
                 if movimiento.proveedor:  # Si hay proveedor, es una ENTRADA
-                    for detalle in movimiento.detalles.all():
-                        producto = detalle.producto
-                        producto.stock += detalle.cantidad_suministrada  # Sumar stock
-                        producto.save(update_fields=['stock'])
+                    # Suma stock y mueve el costo promedio ponderado de cada producto
+                    registrar_entrada(movimiento)
                 else:  # Si NO hay proveedor, es una SALIDA
                     for detalle in movimiento.detalles.all():
                         producto = detalle.producto
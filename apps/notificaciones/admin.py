@@ -0,0 +1,12 @@
+# apps/notificaciones/admin.py
+
+from django.contrib import admin
+from .models import Notificacion
+
+
+@admin.register(Notificacion)
+class NotificacionAdmin(admin.ModelAdmin):
+    list_display = ['creada_en', 'tipo', 'nivel', 'titulo', 'empresa', 'leida']
+    list_filter = ['tipo', 'nivel', 'leida', 'empresa']
+    search_fields = ['titulo', 'mensaje']
+    list_per_page = 20
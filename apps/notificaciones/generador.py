@@ -0,0 +1,123 @@
+# apps/notificaciones/generador.py
+
+"""
+Generación de notificaciones automáticas para todas las empresas.
+
+Cada tipo de aviso se resuelve con una sola consulta sobre todas las empresas: los
+candidatos (productos en bajo stock, movimientos y pagos que siguen pendientes) se
+cruzan con NOT EXISTS contra las notificaciones recientes del mismo tipo y entidad,
+así que solo vuelven las filas que aún no se avisaron. Las notificaciones nuevas se
+insertan con bulk_create en lotes.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from apps.movimientos.models import Movimiento
+from apps.pagos.models import Pago
+from apps.productos.models import Producto
+from .models import Notificacion
+
+
+def _stock_bajo(ahora):
+    filas = Producto.objects.filter(is_active=True, bajo_stock=True) \
+        .values('id', 'empresa_id', 'nombre', 'stock', 'punto_reorden')
+
+    def construir(fila):
+        return Notificacion(
+            empresa_id=fila['empresa_id'],
+            tipo='STOCK_BAJO',
+            nivel='ALERTA' if fila['stock'] == 0 else 'INFO',
+            titulo=f"Stock bajo: {fila['nombre']}",
+            mensaje=f"Quedan {fila['stock']} unidades de {fila['nombre']} "
+                    f"(punto de reorden: {fila['punto_reorden']}).",
+            entity_id=fila['id'],
+            url_accion=f"/productos/{fila['id']}",
+            creada_en=ahora,
+        )
+    return filas, construir
+
+
+def _movimientos_pendientes(ahora):
+    limite = ahora - timedelta(hours=settings.NOTIFICACIONES_PENDIENTE_HORAS)
+    filas = Movimiento.objects.filter(estado='Pendiente', created_at__lte=limite) \
+        .values('id', 'empresa_id', 'proveedor__nombre', 'fecha_llegada')
+
+    def construir(fila):
+        proveedor = fila['proveedor__nombre'] or 'sin proveedor'
+        return Notificacion(
+            empresa_id=fila['empresa_id'],
+            tipo='MOVIMIENTO_PENDIENTE',
+            nivel='INFO',
+            titulo=f"Movimiento #{fila['id']} pendiente",
+            mensaje=f"El movimiento #{fila['id']} ({proveedor}, llegada {fila['fecha_llegada']:%d/%m/%Y}) "
+                    f"sigue pendiente de aceptar o rechazar.",
+            entity_id=fila['id'],
+            url_accion=f"/movimientos/{fila['id']}",
+            creada_en=ahora,
+        )
+    return filas, construir
+
+
+def _pagos_pendientes(ahora):
+    limite = ahora - timedelta(hours=settings.NOTIFICACIONES_PENDIENTE_HORAS)
+    filas = Pago.objects.filter(estado_pago='PENDIENTE', fecha_creacion__lte=limite) \
+        .values('id', 'empresa_id', 'monto', 'venta_id', 'cliente__username')
+
+    def construir(fila):
+        venta = f" de la venta #{fila['venta_id']}" if fila['venta_id'] else ''
+        return Notificacion(
+            empresa_id=fila['empresa_id'],
+            tipo='PAGO_PENDIENTE',
+            nivel='ALERTA',
+            titulo=f"Pago #{fila['id']} pendiente",
+            mensaje=f"El pago #{fila['id']}{venta} por ${fila['monto']} de {fila['cliente__username']} "
+                    f"sigue pendiente.",
+            entity_id=fila['id'],
+            url_accion=f"/pagos/{fila['id']}",
+            creada_en=ahora,
+        )
+    return filas, construir
+
+
+GENERADORES = {
+    'STOCK_BAJO': _stock_bajo,
+    'MOVIMIENTO_PENDIENTE': _movimientos_pendientes,
+    'PAGO_PENDIENTE': _pagos_pendientes,
+}
+
+
+def generar_notificaciones(empresa_ids=None, tipos=None, dry_run=False, lote=1000):
+    """
+    Crea las notificaciones que falten y devuelve un Counter {tipo: creadas}.
+    Una entidad no se vuelve a notificar hasta pasadas NOTIFICACIONES_REPETIR_HORAS.
+    """
+    ahora = timezone.now()
+    desde = ahora - timedelta(hours=settings.NOTIFICACIONES_REPETIR_HORAS)
+    creadas = Counter()
+
+    for tipo in tipos or GENERADORES:
+        filas, construir = GENERADORES[tipo](ahora)
+        if empresa_ids:
+            filas = filas.filter(empresa_id__in=empresa_ids)
+        avisadas = Notificacion.objects.filter(tipo=tipo, entity_id=OuterRef('pk'), creada_en__gte=desde)
+        filas = filas.filter(~Exists(avisadas)).order_by()
+
+        pendientes = []
+        for fila in filas.iterator(chunk_size=lote):
+            pendientes.append(construir(fila))
+            if len(pendientes) >= lote:
+                creadas[tipo] += _insertar(pendientes, dry_run)
+                pendientes = []
+        creadas[tipo] += _insertar(pendientes, dry_run)
+    return creadas
+
+
+def _insertar(notificaciones, dry_run):
+    if notificaciones and not dry_run:
+        Notificacion.objects.bulk_create(notificaciones)
+    return len(notificaciones)
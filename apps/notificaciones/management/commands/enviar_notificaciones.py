@@ -0,0 +1,58 @@
+# apps/notificaciones/management/commands/enviar_notificaciones.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.notificaciones.generador import GENERADORES, generar_notificaciones
+
+
+class Command(BaseCommand):
+    help = ("Genera las notificaciones de bajo stock, movimientos pendientes y pagos pendientes "
+            "de todas las empresas. Con --loop se repite cada --intervalo segundos.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, action='append', dest='empresas',
+                            help="ID de empresa (se puede repetir). Por defecto, todas.")
+        parser.add_argument('--tipo', choices=list(GENERADORES), action='append', dest='tipos',
+                            help="Tipo de notificación a generar (se puede repetir). Por defecto, todos.")
+        parser.add_argument('--loop', action='store_true', help="Se queda en ejecución generando periódicamente.")
+        parser.add_argument('--intervalo', type=int, default=settings.NOTIFICACIONES_INTERVALO_SEGUNDOS,
+                            help="Segundos entre ejecuciones en modo --loop.")
+        parser.add_argument('--dry-run', action='store_true', help="Solo informa, no crea nada.")
+
+    def handle(self, *args, **options):
+        if options['intervalo'] <= 0:
+            raise CommandError("--intervalo debe ser mayor que 0.")
+
+        if not options['loop']:
+            self._ejecutar(options)
+            return
+
+        self.stdout.write(f"Generando notificaciones cada {options['intervalo']}s (Ctrl+C para salir).")
+        try:
+            while True:
+                comienzo = time.monotonic()
+                # Entre ejecuciones la conexión puede caducar (CONN_MAX_AGE) o cerrarse en el servidor
+                close_old_connections()
+                self._ejecutar(options)
+                close_old_connections()
+                time.sleep(max(options['intervalo'] - (time.monotonic() - comienzo), 0))
+        except KeyboardInterrupt:
+            self.stdout.write("Detenido.")
+
+    def _ejecutar(self, options):
+        comienzo = time.perf_counter()
+        creadas = generar_notificaciones(
+            empresa_ids=options['empresas'],
+            tipos=options['tipos'],
+            dry_run=options['dry_run'],
+        )
+        detalle = ', '.join(f"{tipo}: {total}" for tipo, total in creadas.items())
+        verbo = "se crearían" if options['dry_run'] else "creadas"
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(creadas.values())} notificaciones {verbo} ({detalle}) "
+            f"en {time.perf_counter() - comienzo:.2f}s."
+        ))
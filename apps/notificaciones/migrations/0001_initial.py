@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('empresas', '0003_empresa_descripcion_corta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('STOCK_BAJO', 'Stock bajo'), ('MOVIMIENTO_PENDIENTE', 'Movimiento pendiente'), ('PAGO_PENDIENTE', 'Pago pendiente')], max_length=30, verbose_name='Tipo')),
+                ('nivel', models.CharField(choices=[('INFO', 'Información'), ('ALERTA', 'Alerta')], default='INFO', max_length=10, verbose_name='Nivel')),
+                ('titulo', models.CharField(max_length=255, verbose_name='Título')),
+                ('mensaje', models.TextField(verbose_name='Mensaje')),
+                ('entity_id', models.IntegerField(verbose_name='ID de Entidad')),
+                ('url_accion', models.CharField(blank=True, default='', max_length=255, verbose_name='URL de Acción')),
+                ('leida', models.BooleanField(default=False, verbose_name='Leída')),
+                ('creada_en', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Creación')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificaciones', to='empresas.empresa')),
+            ],
+            options={
+                'verbose_name': 'Notificación',
+                'verbose_name_plural': 'Notificaciones',
+                'ordering': ['-creada_en', '-id'],
+                'indexes': [models.Index(fields=['tipo', 'entity_id', 'creada_en'], name='notif_entidad_idx'), models.Index(fields=['empresa', '-creada_en', '-id'], name='notif_empresa_ts_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# apps/notificaciones/models.py
+
+from django.db import models
+from django.utils import timezone
+
+from apps.empresas.models import Empresa
+
+
+class Notificacion(models.Model):
+    """
+    Aviso generado automáticamente para una empresa (bajo stock, movimientos o pagos
+    pendientes). `entity_id` identifica el objeto que lo originó y permite no repetir
+    el mismo aviso mientras siga vigente.
+    """
+    TIPO_CHOICES = [
+        ('STOCK_BAJO', 'Stock bajo'),
+        ('MOVIMIENTO_PENDIENTE', 'Movimiento pendiente'),
+        ('PAGO_PENDIENTE', 'Pago pendiente'),
+    ]
+    NIVEL_CHOICES = [
+        ('INFO', 'Información'),
+        ('ALERTA', 'Alerta'),
+    ]
+
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='notificaciones')
+    tipo = models.CharField(max_length=30, choices=TIPO_CHOICES, verbose_name="Tipo")
+    nivel = models.CharField(max_length=10, choices=NIVEL_CHOICES, default='INFO', verbose_name="Nivel")
+    titulo = models.CharField(max_length=255, verbose_name="Título")
+    mensaje = models.TextField(verbose_name="Mensaje")
+    entity_id = models.IntegerField(verbose_name="ID de Entidad")
+    url_accion = models.CharField(max_length=255, blank=True, default='', verbose_name="URL de Acción")
+    leida = models.BooleanField(default=False, verbose_name="Leída")
+    creada_en = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Creación")
+
+    class Meta:
+        verbose_name = "Notificación"
+        verbose_name_plural = "Notificaciones"
+        ordering = ['-creada_en', '-id']
+        indexes = [
+            # Anti-join del generador: ¿ya se avisó de esta entidad hace poco?
+            models.Index(fields=['tipo', 'entity_id', 'creada_en'], name='notif_entidad_idx'),
+            # Listado keyset por empresa
+            models.Index(fields=['empresa', '-creada_en', '-id'], name='notif_empresa_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"[{self.get_tipo_display()}] {self.titulo}"
@@ -0,0 +1,17 @@
+# apps/notificaciones/serializers.py
+
+from rest_framework import serializers
+from .models import Notificacion
+
+
+class NotificacionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notificacion
+        fields = ['id', 'empresa', 'tipo', 'nivel', 'titulo', 'mensaje', 'entity_id', 'url_accion', 'leida',
+                  'creada_en']
+        read_only_fields = fields
+
+
+class MarcarLeidasSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False,
+                                help_text="IDs a marcar; si se omite se marcan todas las no leídas.")
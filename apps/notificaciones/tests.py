@@ -0,0 +1,103 @@
+# apps/notificaciones/tests.py
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.empresas.models import Empresa
+from apps.movimientos.models import Movimiento
+from apps.pagos.models import Pago
+from apps.productos.models import Producto
+from apps.proveedores.models import Proveedor
+from apps.usuarios.models import CustomUser
+from .generador import generar_notificaciones
+from .models import Notificacion
+
+
+class GenerarNotificacionesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre='Empresa Avisos')
+        proveedor = Proveedor.objects.create(empresa=cls.empresa, nombre='Proveedor')
+        cliente = CustomUser.objects.create_user(username='cliente', email='cliente@test.local', password='clave1234',
+                                                 first_name='Cliente', last_name='Test', ci='CI-1')
+        antiguo = timezone.now() - timedelta(hours=settings.NOTIFICACIONES_PENDIENTE_HORAS + 1)
+
+        def producto(nombre, stock, activo=True):
+            return Producto.objects.create(nombre=nombre, precio=Decimal('1.00'), stock=stock, punto_reorden=5,
+                                           is_active=activo, empresa=cls.empresa)
+
+        cls.agotado = producto('Agotado', 0)
+        cls.bajo = producto('Bajo', 3)
+        producto('Suficiente', 10)
+        producto('Inactivo', 0, activo=False)
+
+        def movimiento(estado, creado):
+            movimiento = Movimiento.objects.create(empresa=cls.empresa, proveedor=proveedor, estado=estado)
+            Movimiento.objects.filter(pk=movimiento.pk).update(created_at=creado)
+            return movimiento
+
+        cls.movimiento = movimiento('Pendiente', antiguo)
+        movimiento('Pendiente', timezone.now())
+        movimiento('Aceptado', antiguo)
+
+        def pago(estado, creado):
+            pago = Pago.objects.create(empresa=cls.empresa, cliente=cliente, monto=Decimal('10.00'),
+                                       estado_pago=estado)
+            Pago.objects.filter(pk=pago.pk).update(fecha_creacion=creado)
+            return pago
+
+        cls.pago = pago('PENDIENTE', antiguo)
+        pago('PENDIENTE', timezone.now())
+        pago('COMPLETADO', antiguo)
+
+    def avisos(self):
+        return sorted(Notificacion.objects.values_list('tipo', 'entity_id', 'nivel'))
+
+    def test_un_aviso_por_entidad_pendiente(self):
+        creadas = generar_notificaciones()
+
+        self.assertEqual(creadas, {'STOCK_BAJO': 2, 'MOVIMIENTO_PENDIENTE': 1, 'PAGO_PENDIENTE': 1})
+        self.assertEqual(self.avisos(), sorted([
+            ('STOCK_BAJO', self.agotado.id, 'ALERTA'),
+            ('STOCK_BAJO', self.bajo.id, 'INFO'),
+            ('MOVIMIENTO_PENDIENTE', self.movimiento.id, 'INFO'),
+            ('PAGO_PENDIENTE', self.pago.id, 'ALERTA'),
+        ]))
+
+    def test_no_repite_dentro_de_la_ventana(self):
+        generar_notificaciones()
+        antes = self.avisos()
+
+        creadas = generar_notificaciones()
+
+        self.assertEqual(sum(creadas.values()), 0)
+        self.assertEqual(self.avisos(), antes)
+
+    def test_repite_pasada_la_ventana(self):
+        generar_notificaciones()
+        Notificacion.objects.update(
+            creada_en=timezone.now() - timedelta(hours=settings.NOTIFICACIONES_REPETIR_HORAS, minutes=1))
+
+        creadas = generar_notificaciones()
+
+        self.assertEqual(creadas, {'STOCK_BAJO': 2, 'MOVIMIENTO_PENDIENTE': 1, 'PAGO_PENDIENTE': 1})
+        self.assertEqual(Notificacion.objects.count(), 8)
+
+    def test_el_aviso_de_otro_tipo_no_cuenta(self):
+        # Mismo entity_id, pero de un producto: el movimiento sigue sin avisar
+        Notificacion.objects.create(empresa=self.empresa, tipo='STOCK_BAJO', titulo='Otro', mensaje='Otro',
+                                    entity_id=self.movimiento.id)
+
+        creadas = generar_notificaciones(tipos=['MOVIMIENTO_PENDIENTE'])
+
+        self.assertEqual(creadas, {'MOVIMIENTO_PENDIENTE': 1})
+
+    def test_dry_run_y_filtro_de_empresas(self):
+        self.assertEqual(generar_notificaciones(dry_run=True)['STOCK_BAJO'], 2)
+        otra = Empresa.objects.create(nombre='Otra')
+        self.assertEqual(sum(generar_notificaciones(empresa_ids=[otra.id]).values()), 0)
+        self.assertFalse(Notificacion.objects.exists())
@@ -0,0 +1,46 @@
+# apps/notificaciones/views.py
+
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from erp.pagination import KeysetPagination
+from .models import Notificacion
+from .serializers import MarcarLeidasSerializer, NotificacionSerializer
+
+
+class NotificacionViewSet(viewsets.ReadOnlyModelViewSet):
+    """Notificaciones de la empresa del usuario. `?leida=false` devuelve solo las no leídas."""
+    serializer_class = NotificacionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-creada_en', '-id')
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Notificacion.objects.none()
+
+        user = self.request.user
+        queryset = Notificacion.objects.all()
+        leida = self.request.query_params.get('leida')
+        if leida is not None:
+            queryset = queryset.filter(leida=leida.lower() in ('1', 'true'))
+        tipo = self.request.query_params.get('tipo')
+        if tipo:
+            queryset = queryset.filter(tipo=tipo)
+
+        if user.is_superuser:
+            return queryset
+        if user.empresa_id:
+            return queryset.filter(empresa_id=user.empresa_id)
+        return Notificacion.objects.none()
+
+    @action(detail=False, methods=['post'], url_path='marcar-leidas')
+    def marcar_leidas(self, request):
+        """Marca como leídas las notificaciones indicadas (o todas las pendientes) con un solo UPDATE."""
+        serializer = MarcarLeidasSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queryset = self.get_queryset().filter(leida=False)
+        if 'ids' in serializer.validated_data:
+            queryset = queryset.filter(id__in=serializer.validated_data['ids'])
+        return Response({'marcadas': queryset.update(leida=True)})
@@ -7,6 +7,8 @@ from django.db.models import Q  # Importa Q para filtros complejos
 
 from .models import Pago
 from .serializers import PagoSerializer
+from erp.exportacion import ExportacionMixin
+from erp.pagination import KeysetPagination
 
 
 # Asume que ya tienes definidas las siguientes clases de permiso en tu proyecto
@@ -41,7 +43,7 @@ class IsEmpleado(BasePermission):
              (hasattr(request.user.role, 'name') and request.user.role.name == 'Empleado'))
 
 
-class PagoViewSet(viewsets.ModelViewSet):
+class PagoViewSet(ExportacionMixin, viewsets.ModelViewSet):
     """
     API para la gestión de Pagos.
     Permite a superusuarios ver todos los pagos.
@@ -51,6 +53,19 @@ class PagoViewSet(viewsets.ModelViewSet):
     queryset = Pago.objects.all()
     serializer_class = PagoSerializer
     permission_classes = [IsAuthenticated]  # Por defecto, solo autenticados
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-fecha_pago', '-id')
+    export_nombre = 'pagos'
+    export_columns = (
+        ('id', 'ID', 8),
+        ('fecha_pago', 'Fecha', 19),
+        ('cliente__username', 'Cliente', 20),
+        ('empresa__nombre', 'Empresa', 25),
+        ('metodo_pago', 'Método', 14),
+        ('estado_pago', 'Estado', 12),
+        ('referencia_transaccion', 'Referencia', 24),
+        ('monto', 'Monto', 12),
+    )
 
     def get_queryset(self):
         """
@@ -83,11 +98,11 @@ class PagoViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         """
         Define permisos más detallados por acción.
-        - Listar y Recuperar: IsSuperUser O (IsAdministrador Y PropiaEmpresa) O (IsEmpleado Y PropiaEmpresa)
+        - Listar, Recuperar y Exportar: IsSuperUser O (IsAdministrador Y PropiaEmpresa) O (IsEmpleado Y PropiaEmpresa)
         - Crear: IsAuthenticated (cualquiera puede crear un pago si viene del carrito)
         - Actualizar/Eliminar: Solo SuperUser (para mantener la integridad de los pagos)
         """
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'exportar']:
             # Permisos para ver pagos: Superuser, o Admin/Empleado de la misma empresa
             self.permission_classes = [
                 IsSuperUser | (IsAdministrador & IsAuthenticated) | (IsEmpleado & IsAuthenticated)]
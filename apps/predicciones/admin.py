@@ -0,0 +1,12 @@
+# apps/predicciones/admin.py
+
+from django.contrib import admin
+from .models import ModeloDemanda
+
+
+@admin.register(ModeloDemanda)
+class ModeloDemandaAdmin(admin.ModelAdmin):
+    list_display = ['empresa', 'version', 'entrenado_en', 'productos', 'dias_historia']
+    list_filter = ['empresa']
+    readonly_fields = [f.name for f in ModeloDemanda._meta.fields]
+    list_per_page = 20
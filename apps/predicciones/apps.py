@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class PrediccionesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.predicciones'
+    verbose_name = 'Predicción de Demanda'
+
+    def ready(self):
+        # Abre (mmap) los modelos publicados al arrancar para que la primera petición no pague la carga.
+        # Solo lee ficheros: no hace consultas a la base de datos.
+        if getattr(settings, 'DEMANDA_PRECARGAR', False):
+            from .forecasting import registro
+            registro.precargar()
@@ -0,0 +1,104 @@
+# apps/predicciones/features.py
+
+"""
+Características y ajuste de los modelos de demanda, sobre matrices NumPy (productos x días).
+
+Todo se calcula por columnas sobre la matriz completa: los retardos son índices
+desplazados y las medias móviles salen de una suma acumulada, sin bucles por fila.
+El módulo no importa Django para que `ajustar_grupo` pueda ejecutarse en los
+procesos de un pool sin inicializar el proyecto.
+"""
+
+import time
+
+import numpy as np
+from sklearn.linear_model import Ridge
+
+LAGS = (1, 7, 14)
+VENTANAS = (7, 28)
+# Días de historia que necesita cada predicción
+MEMORIA = max(LAGS + VENTANAS)
+N_CARACTERISTICAS = len(LAGS) + len(VENTANAS) + 6
+
+
+def caracteristicas(historia, dia_semana_inicial):
+    """
+    historia: matriz (productos, días) cuyo primer día cae en `dia_semana_inicial` (0 = lunes).
+    Devuelve un tensor (productos, días - MEMORIA, N_CARACTERISTICAS): la posición t describe
+    el día MEMORIA + t usando solo datos de días anteriores (retardos, medias móviles y
+    día de la semana).
+    """
+    productos, dias = historia.shape
+    objetivo = np.arange(MEMORIA, dias)
+    acumulado = np.concatenate([np.zeros((productos, 1)), np.cumsum(historia, axis=1)], axis=1)
+
+    columnas = [historia[:, objetivo - lag] for lag in LAGS]
+    columnas += [(acumulado[:, objetivo] - acumulado[:, objetivo - ventana]) / ventana for ventana in VENTANAS]
+    dia_semana = np.eye(7)[(dia_semana_inicial + objetivo) % 7][:, 1:]
+
+    return np.concatenate([
+        np.stack(columnas, axis=2),
+        np.broadcast_to(dia_semana, (productos,) + dia_semana.shape),
+    ], axis=2)
+
+
+def caracteristicas_siguiente(ventana, dia_semana_inicial):
+    """Características (productos, N) del día que sigue a `ventana` (productos, MEMORIA)."""
+    relleno = np.zeros((ventana.shape[0], 1))
+    return caracteristicas(np.concatenate([ventana, relleno], axis=1), dia_semana_inicial)[:, 0, :]
+
+
+def confianza_semanal(real, estimado):
+    """1 - WAPE por producto sobre totales semanales (la demanda diaria suele ser intermitente)."""
+    semanas = real.shape[1] // 7
+    if semanas:
+        recorte = real.shape[1] - semanas * 7
+        real = real[:, recorte:].reshape(real.shape[0], semanas, 7).sum(axis=2)
+        estimado = estimado[:, recorte:].reshape(estimado.shape[0], semanas, 7).sum(axis=2)
+    wape = np.abs(real - estimado).sum(axis=1) / np.maximum(real.sum(axis=1), 1e-9)
+    return np.clip(1 - wape, 0, 1)
+
+
+def ajustar_grupo(clave, historia, dia_semana_inicial, alpha=1.0, validacion=28):
+    """
+    Ajusta un modelo Ridge compartido por las series de `historia` (un producto o una categoría).
+    Si hay datos suficientes, los últimos `validacion` días se reservan primero para medir la
+    confianza de cada producto y luego se reajusta con todo el historial.
+    """
+    comienzo = time.perf_counter()
+    X = caracteristicas(historia, dia_semana_inicial)
+    y = historia[:, MEMORIA:]
+    productos, dias, n = X.shape
+
+    confianza = np.zeros(productos)
+    if dias > 2 * validacion:
+        corte = dias - validacion
+        modelo = Ridge(alpha=alpha).fit(X[:, :corte].reshape(-1, n), y[:, :corte].reshape(-1))
+        estimado = np.clip(modelo.predict(X[:, corte:].reshape(-1, n)), 0, None).reshape(productos, validacion)
+        confianza = confianza_semanal(y[:, corte:], estimado)
+
+    modelo = Ridge(alpha=alpha).fit(X.reshape(-1, n), y.reshape(-1))
+    return {
+        'clave': clave,
+        'coef': modelo.coef_,
+        'intercepto': float(modelo.intercept_),
+        'confianza': confianza,
+        'filas': productos * dias,
+        'segundos': time.perf_counter() - comienzo,
+    }
+
+
+def pronostico_recursivo(ventana, coef, intercepto, dia_semana_inicial, pasos):
+    """
+    Proyecta `pasos` días para todas las filas a la vez: cada predicción se incorpora a la
+    ventana para calcular los retardos del día siguiente.
+    coef: (productos, N); intercepto: (productos,). Devuelve (productos, pasos).
+    """
+    ventana = np.array(ventana, dtype=float)
+    salida = np.empty((ventana.shape[0], pasos))
+    for paso in range(pasos):
+        X = caracteristicas_siguiente(ventana, (dia_semana_inicial + paso) % 7)
+        prediccion = np.clip(np.einsum('ij,ij->i', X, coef) + intercepto, 0, None)
+        salida[:, paso] = prediccion
+        ventana = np.concatenate([ventana[:, 1:], prediccion[:, None]], axis=1)
+    return salida
@@ -0,0 +1,294 @@
+# apps/predicciones/forecasting.py
+
+"""
+Motor de predicción de demanda por producto.
+
+Para una empresa se extrae, con una única consulta agregada, la matriz de unidades
+vendidas (productos x días). Con esa matriz se construyen características de retardos
+y medias móviles (apps.predicciones.features) y se ajusta un modelo Ridge por categoría
+(o por producto), en paralelo si se pasa un executor. Las predicciones se generan de
+forma recursiva para todos los productos a la vez.
+"""
+
+import logging
+import time
+from datetime import datetime, time as dt_time, timedelta
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.productos.models import Producto
+from apps.ventas.models import DetalleVenta
+from .features import LAGS, MEMORIA, VENTANAS, ajustar_grupo, pronostico_recursivo
+from .models import ModeloDemanda
+from .registry import RegistroModelos
+
+logger = logging.getLogger(__name__)
+
+# Versión del formato del artefacto; los de otro formato se ignoran hasta reentrenar
+FORMATO_ARTEFACTO = 2
+AGRUPACIONES = ('categoria', 'producto')
+
+
+def serie_diaria(empresa_id, dias, hasta=None):
+    """
+    Devuelve (producto_ids, inicio, matriz): las unidades vendidas por producto y día en
+    los últimos `dias` días hasta `hasta` (incluido). Las ventas canceladas no cuentan.
+    """
+    hasta = hasta or timezone.localdate()
+    inicio = hasta - timedelta(days=dias - 1)
+    # Límites como instantes (medianoches locales): con venta__fecha__date la base convertiría
+    # la fecha de cada venta y no podría usar el índice
+    desde_ts = timezone.make_aware(datetime.combine(inicio, dt_time.min))
+    hasta_ts = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), dt_time.min))
+    filas = list(
+        DetalleVenta.objects
+        .filter(venta__empresa_id=empresa_id, venta__fecha__gte=desde_ts, venta__fecha__lt=hasta_ts)
+        .exclude(venta__estado='Cancelada')
+        .annotate(dia=TruncDate('venta__fecha'))
+        .values_list('producto_id', 'dia')
+        .annotate(unidades=Sum('cantidad'))
+        .order_by()
+    )
+    producto_ids = np.array(sorted({producto_id for producto_id, _dia, _u in filas}), dtype=np.int64)
+    matriz = np.zeros((len(producto_ids), dias))
+    if filas:
+        productos, dias_venta, unidades = zip(*filas)
+        fila = np.searchsorted(producto_ids, np.array(productos, dtype=np.int64))
+        columna = np.array([(dia - inicio).days for dia in dias_venta])
+        np.add.at(matriz, (fila, columna), np.array(unidades, dtype=float))
+    return producto_ids, inicio, matriz
+
+
+def agrupar_productos(producto_ids, agrupar='categoria'):
+    """
+    Devuelve (grupo de cada producto, claves de los grupos). Con 'categoria' todos los
+    productos de una misma categoría comparten modelo; con 'producto' cada uno tiene el suyo.
+    """
+    if agrupar == 'producto':
+        return np.arange(len(producto_ids)), [f"producto:{pid}" for pid in producto_ids]
+    categorias = dict(Producto.objects.filter(id__in=producto_ids.tolist()).values_list('id', 'categoria_id'))
+    claves = [f"categoria:{categorias.get(pid)}" if categorias.get(pid) else 'sin_categoria'
+              for pid in producto_ids.tolist()]
+    unicas = sorted(set(claves))
+    posicion = {clave: indice for indice, clave in enumerate(unicas)}
+    return np.array([posicion[clave] for clave in claves], dtype=np.int64), unicas
+
+
+class PronosticadorDemanda:
+    """
+    Modelo de demanda de todos los productos de una empresa: coeficientes por grupo,
+    grupo de cada producto y los últimos MEMORIA días de ventas para arrancar la recursión.
+    """
+
+    def __init__(self, empresa_id, producto_ids, fin, dias_historia, ventana, grupos, claves_grupos,
+                 coef_grupos, intercepto_grupos, confianza, version=None, entrenado_en=None, **extra):
+        self.empresa_id = empresa_id
+        self.producto_ids = producto_ids
+        self.fin = fin
+        self.dias_historia = dias_historia
+        self.ventana = ventana
+        self.grupos = grupos
+        self.claves_grupos = claves_grupos
+        self.coef_grupos = coef_grupos
+        self.intercepto_grupos = intercepto_grupos
+        self.confianza = confianza
+        self.version = version
+        self.entrenado_en = entrenado_en
+
+    @property
+    def inicio(self):
+        return self.fin - timedelta(days=self.dias_historia - 1)
+
+    def posicion(self, producto_id):
+        """Fila del producto en el modelo, o None si no tenía ventas en el periodo de entrenamiento."""
+        posicion = int(np.searchsorted(self.producto_ids, producto_id))
+        if posicion >= len(self.producto_ids) or self.producto_ids[posicion] != producto_id:
+            return None
+        return posicion
+
+    def _proyectar(self, filas, horizonte, desde):
+        # Se proyecta desde el último día entrenado hasta cubrir el horizonte pedido
+        desde = max(desde or timezone.localdate(), self.fin)
+        pasos = (desde - self.fin).days + horizonte
+        dia_semana = (self.fin - timedelta(days=MEMORIA - 1)).weekday()
+        grupos = self.grupos[filas]
+        salida = pronostico_recursivo(
+            self.ventana[filas], self.coef_grupos[grupos], self.intercepto_grupos[grupos], dia_semana, pasos
+        )
+        return salida[:, -horizonte:]
+
+    def predecir_todos(self, horizonte, desde=None):
+        """Matriz (productos x horizonte) con la demanda diaria a partir del día siguiente a `desde`."""
+        return self._proyectar(slice(None), horizonte, desde)
+
+    def predecir_filas(self, posiciones, horizonte, desde=None):
+        """Matriz (len(posiciones) x horizonte) con la demanda diaria de esas filas del modelo."""
+        return self._proyectar(np.asarray(posiciones, dtype=np.int64), horizonte, desde)
+
+    def predecir(self, producto_id, horizonte, desde=None):
+        """(demanda diaria, confianza) de un producto, o None si no tiene historial en el modelo."""
+        posicion = self.posicion(producto_id)
+        if posicion is None:
+            return None
+        diaria = self._proyectar(slice(posicion, posicion + 1), horizonte, desde)[0]
+        return diaria, float(self.confianza[posicion])
+
+    def to_dict(self):
+        return {
+            'formato': FORMATO_ARTEFACTO,
+            'lags': LAGS,
+            'ventanas': VENTANAS,
+            'empresa_id': self.empresa_id,
+            'producto_ids': self.producto_ids,
+            'fin': self.fin,
+            'dias_historia': self.dias_historia,
+            'ventana': self.ventana,
+            'grupos': self.grupos,
+            'claves_grupos': self.claves_grupos,
+            'coef_grupos': self.coef_grupos,
+            'intercepto_grupos': self.intercepto_grupos,
+            'confianza': self.confianza,
+        }
+
+    @classmethod
+    def from_dict(cls, data, version=None, entrenado_en=None):
+        if data.get('formato') != FORMATO_ARTEFACTO or tuple(data.get('lags', ())) != LAGS \
+                or tuple(data.get('ventanas', ())) != VENTANAS:
+            raise ValueError("El artefacto se generó con otro formato o con otras características.")
+        return cls(version=version, entrenado_en=entrenado_en, **data)
+
+
+# --- Entrenamiento ---
+
+def entrenar_empresa(empresa_id, dias_historia=None, alpha=1.0, hasta=None, agrupar='categoria',
+                     executor=None, progreso=None):
+    """
+    Entrena y guarda el modelo de todos los productos con ventas de la empresa.
+    - executor: un concurrent.futures.Executor para ajustar los grupos en paralelo.
+    - progreso: función opcional que recibe el resultado de cada grupo al terminar.
+    Devuelve el ModeloDemanda creado, o None si la empresa no tiene ventas en el periodo.
+    """
+    dias_historia = dias_historia or getattr(settings, 'DEMANDA_DIAS_HISTORIA', 180)
+    if dias_historia < MEMORIA + 14:
+        raise ValueError(f"Se necesitan al menos {MEMORIA + 14} días de historial.")
+    if agrupar not in AGRUPACIONES:
+        raise ValueError(f"Agrupación no soportada: {agrupar}")
+
+    tiempos = {}
+    comienzo = time.perf_counter()
+    producto_ids, inicio, matriz = serie_diaria(empresa_id, dias_historia, hasta=hasta)
+    if not len(producto_ids):
+        return None
+    grupos, claves = agrupar_productos(producto_ids, agrupar)
+    tiempos['extraccion'] = time.perf_counter() - comienzo
+
+    comienzo = time.perf_counter()
+    # Un solo orden por grupo deja contiguas las filas de cada uno: np.split da las historias
+    # sin recorrer la matriz una vez por grupo
+    orden = np.argsort(grupos, kind='stable')
+    por_grupo = np.bincount(grupos, minlength=len(claves))
+    historias = np.split(matriz[orden], np.cumsum(por_grupo)[:-1])
+    mapa = executor.map if executor is not None else map
+    resultados = []
+    for resultado in mapa(ajustar_grupo, claves, historias, repeat(inicio.weekday()), repeat(alpha)):
+        resultados.append(resultado)
+        if progreso is not None:
+            progreso(resultado)
+    tiempos['ajuste'] = time.perf_counter() - comienzo
+
+    # La confianza de cada grupo viene por producto, en el orden de su historia
+    confianza = np.empty(len(producto_ids))
+    confianza[orden] = np.concatenate([resultado['confianza'] for resultado in resultados])
+
+    pronosticador = PronosticadorDemanda(
+        empresa_id=empresa_id,
+        producto_ids=producto_ids,
+        fin=inicio + timedelta(days=dias_historia - 1),
+        dias_historia=dias_historia,
+        ventana=matriz[:, -MEMORIA:].copy(),
+        grupos=grupos,
+        claves_grupos=claves,
+        coef_grupos=np.vstack([resultado['coef'] for resultado in resultados]),
+        intercepto_grupos=np.array([resultado['intercepto'] for resultado in resultados]),
+        confianza=confianza,
+    )
+
+    comienzo = time.perf_counter()
+    metricas = {
+        'alpha': alpha,
+        'agrupar': agrupar,
+        'grupos': len(claves),
+        'filas_entrenamiento': sum(resultado['filas'] for resultado in resultados),
+        'unidades': float(matriz.sum()),
+        'confianza_media': float(confianza.mean()),
+    }
+    modelo = guardar(pronosticador, metricas=metricas)
+    tiempos['guardado'] = time.perf_counter() - comienzo
+
+    modelo.metricas['tiempos'] = {clave: round(valor, 4) for clave, valor in tiempos.items()}
+    modelo.save(update_fields=['metricas'])
+    return modelo
+
+
+# --- Persistencia ---
+
+def directorio_modelos():
+    return Path(getattr(settings, 'DEMANDA_MODELOS_DIR', settings.BASE_DIR / 'models' / 'demanda'))
+
+
+registro = RegistroModelos(
+    directorio_modelos,
+    PronosticadorDemanda.from_dict,
+    capacidad=getattr(settings, 'DEMANDA_CACHE_MODELOS', 32),
+)
+
+
+def guardar(pronosticador, metricas=None):
+    empresa_id = pronosticador.empresa_id
+    with transaction.atomic():
+        # unique_together (empresa, version) impide que dos entrenamientos simultáneos se pisen
+        ultima = ModeloDemanda.objects.filter(empresa_id=empresa_id).aggregate(v=Max('version'))['v'] or 0
+        version = ultima + 1
+        relativa = registro.guardar_artefacto(empresa_id, version, pronosticador.to_dict())
+        modelo = ModeloDemanda.objects.create(
+            empresa_id=empresa_id,
+            version=version,
+            inicio_historia=pronosticador.inicio,
+            dias_historia=pronosticador.dias_historia,
+            productos=len(pronosticador.producto_ids),
+            artefacto=str(relativa),
+            metricas=metricas or {},
+        )
+        # Los procesos que sirven predicciones ven la versión nueva solo cuando el registro existe
+        transaction.on_commit(lambda: registro.publicar(
+            empresa_id, version, relativa, formato=FORMATO_ARTEFACTO, entrenado_en=modelo.entrenado_en,
+        ))
+    return modelo
+
+
+def modelo_vigente(empresa_id):
+    """
+    Pronosticador de la versión publicada para la empresa, o None.
+    Se sirve desde el registro en memoria; solo se abre el artefacto cuando cambia su metadata.
+    """
+    try:
+        pronosticador = registro.obtener(empresa_id)
+        if pronosticador is None:
+            # Modelos entrenados antes de existir metadata.json: se publica la última versión
+            meta = ModeloDemanda.objects.filter(empresa_id=empresa_id).order_by('-version') \
+                .values('version', 'artefacto', 'entrenado_en').first()
+            if meta is None or not (directorio_modelos() / meta['artefacto']).exists():
+                return None
+            registro.publicar(empresa_id, meta['version'], meta['artefacto'], entrenado_en=meta['entrenado_en'])
+            pronosticador = registro.obtener(empresa_id)
+    except (OSError, ValueError, KeyError, TypeError):
+        logger.exception("No se pudo cargar el modelo de demanda de la empresa %s", empresa_id)
+        return None
+    return pronosticador
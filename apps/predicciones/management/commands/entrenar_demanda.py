@@ -0,0 +1,83 @@
+# apps/predicciones/management/commands/entrenar_demanda.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.empresas.models import Empresa
+from apps.predicciones.forecasting import AGRUPACIONES, entrenar_empresa
+
+
+class Command(BaseCommand):
+    help = ("Entrena el modelo de demanda de todos los productos de cada empresa. "
+            "El historial se extrae con una consulta agregada por empresa y los modelos "
+            "por categoría (o producto) se ajustan en paralelo en un pool de procesos.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, action='append', dest='empresas',
+                            help="ID de empresa a entrenar (se puede repetir). Por defecto, todas las activas.")
+        parser.add_argument('--dias', type=int, default=None, help="Días de historial a usar.")
+        parser.add_argument('--alpha', type=float, default=1.0, help="Regularización del modelo Ridge.")
+        parser.add_argument('--agrupar', choices=AGRUPACIONES, default='categoria',
+                            help="Un modelo por categoría (por defecto) o por producto.")
+        parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1,
+                            help="Procesos para el ajuste; 1 entrena en el proceso actual.")
+
+    def handle(self, *args, **options):
+        empresas = Empresa.objects.filter(is_active=True)
+        if options['empresas']:
+            empresas = Empresa.objects.filter(id__in=options['empresas'])
+        empresas = list(empresas.order_by('id'))
+
+        executor = None
+        if options['procesos'] > 1:
+            # Los procesos hijos solo hacen cálculo NumPy: no heredan conexiones abiertas
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=options['procesos'])
+
+        comienzo = time.perf_counter()
+        entrenadas = 0
+        try:
+            for numero, empresa in enumerate(empresas, start=1):
+                prefijo = f"[{numero}/{len(empresas)}] {empresa.nombre}"
+                try:
+                    modelo = entrenar_empresa(
+                        empresa.id,
+                        dias_historia=options['dias'],
+                        alpha=options['alpha'],
+                        agrupar=options['agrupar'],
+                        executor=executor,
+                        progreso=self._progreso(prefijo, options['verbosity']),
+                    )
+                except ValueError as e:
+                    raise CommandError(str(e))
+                if modelo is None:
+                    self.stdout.write(f"{prefijo}: sin ventas en el periodo, no se entrena.")
+                    continue
+                entrenadas += 1
+                tiempos = modelo.metricas.get('tiempos', {})
+                self.stdout.write(self.style.SUCCESS(
+                    f"{prefijo}: modelo v{modelo.version}, {modelo.productos} productos en "
+                    f"{modelo.metricas['grupos']} grupos, confianza media "
+                    f"{modelo.metricas['confianza_media']:.0%} "
+                    f"(extracción {tiempos.get('extraccion', 0):.2f}s, ajuste {tiempos.get('ajuste', 0):.2f}s, "
+                    f"guardado {tiempos.get('guardado', 0):.2f}s)"
+                ))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write(f"{entrenadas} de {len(empresas)} empresas entrenadas en "
+                          f"{time.perf_counter() - comienzo:.2f}s.")
+
+    def _progreso(self, prefijo, verbosity):
+        if verbosity < 2:
+            return None
+
+        def informar(resultado):
+            self.stdout.write(f"  {prefijo} · {resultado['clave']}: {resultado['filas']} filas "
+                              f"en {resultado['segundos']:.3f}s")
+        return informar
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('empresas', '0003_empresa_descripcion_corta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModeloDemanda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(verbose_name='Versión')),
+                ('entrenado_en', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Entrenamiento')),
+                ('inicio_historia', models.DateField(verbose_name='Inicio del Historial')),
+                ('dias_historia', models.PositiveIntegerField(verbose_name='Días de Historial')),
+                ('productos', models.PositiveIntegerField(default=0, verbose_name='Productos Modelados')),
+                ('artefacto', models.CharField(max_length=500, verbose_name='Ruta del Artefacto')),
+                ('metricas', models.JSONField(blank=True, default=dict, verbose_name='Métricas')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='modelos_demanda', to='empresas.empresa')),
+            ],
+            options={
+                'verbose_name': 'Modelo de Demanda',
+                'verbose_name_plural': 'Modelos de Demanda',
+                'ordering': ['-entrenado_en'],
+                'unique_together': {('empresa', 'version')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# apps/predicciones/models.py
+
+from django.db import models
+from django.utils import timezone
+
+from apps.empresas.models import Empresa
+
+
+class ModeloDemanda(models.Model):
+    """
+    Metadatos de un modelo de demanda entrenado para una empresa.
+    Los coeficientes se guardan como artefacto en disco (DEMANDA_MODELOS_DIR); esta
+    tabla solo indica qué versión está vigente y con qué datos se entrenó.
+    """
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='modelos_demanda')
+    version = models.PositiveIntegerField(verbose_name="Versión")
+    entrenado_en = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Entrenamiento")
+
+    inicio_historia = models.DateField(verbose_name="Inicio del Historial")
+    dias_historia = models.PositiveIntegerField(verbose_name="Días de Historial")
+    productos = models.PositiveIntegerField(default=0, verbose_name="Productos Modelados")
+
+    artefacto = models.CharField(max_length=500, verbose_name="Ruta del Artefacto")
+    metricas = models.JSONField(default=dict, blank=True, verbose_name="Métricas")
+
+    class Meta:
+        verbose_name = "Modelo de Demanda"
+        verbose_name_plural = "Modelos de Demanda"
+        ordering = ['-entrenado_en']
+        unique_together = [['empresa', 'version']]
+
+    def __str__(self):
+        return f"Modelo de demanda v{self.version} - {self.empresa.nombre}"
@@ -0,0 +1,166 @@
+# apps/predicciones/registry.py
+
+"""
+Almacén de artefactos de modelos con carga perezosa.
+
+Cada empresa tiene un directorio con sus artefactos versionados (vN.joblib) y un
+metadata.json que apunta a la versión vigente. Ambos se escriben en un fichero temporal
+y se publican con os.replace, así que un lector nunca ve un fichero a medias.
+
+Los artefactos se abren con joblib en modo mmap: los arrays NumPy no se deserializan,
+se proyectan en memoria y el sistema operativo comparte las páginas entre los procesos
+del servidor. Cada proceso mantiene un LRU de modelos abiertos; para saber si hay una
+versión nueva basta con un stat() del metadata.json.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+METADATA = 'metadata.json'
+
+
+def escribir_atomico(destino, escribir):
+    """Crea `destino` con la función `escribir(ruta_temporal)` y lo publica con os.replace."""
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=destino.parent, prefix=f".{destino.name}.", suffix='.tmp')
+    os.close(descriptor)
+    try:
+        escribir(temporal)
+        os.replace(temporal, destino)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.unlink(temporal)
+        raise
+
+
+class _Entrada:
+    __slots__ = ('version', 'firma', 'modelo')
+
+    def __init__(self, version, firma, modelo):
+        self.version = version
+        self.firma = firma
+        self.modelo = modelo
+
+
+class RegistroModelos:
+    """
+    Registro de modelos por clave (la empresa) con LRU en memoria.
+    - directorio: ruta base o función que la devuelve (se resuelve en cada uso).
+    - constructor: función (datos, version=, entrenado_en=) -> modelo, p. ej. Pronosticador.from_dict.
+    """
+
+    def __init__(self, directorio, constructor, capacidad=32, mmap_mode='r'):
+        self._directorio = directorio
+        self.constructor = constructor
+        self.capacidad = capacidad
+        self.mmap_mode = mmap_mode
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.cargas = 0
+
+    @property
+    def directorio(self):
+        return Path(self._directorio() if callable(self._directorio) else self._directorio)
+
+    def ruta_clave(self, clave):
+        return self.directorio / f"empresa_{clave}"
+
+    # --- Escritura ---
+
+    def guardar_artefacto(self, clave, version, datos):
+        """Escribe vN.joblib sin compresión (requisito para mmap). Devuelve la ruta relativa."""
+        relativa = Path(f"empresa_{clave}") / f"v{version}.joblib"
+        escribir_atomico(self.directorio / relativa, lambda ruta: joblib.dump(datos, ruta))
+        return relativa
+
+    def publicar(self, clave, version, artefacto, **extra):
+        """Marca `version` como vigente reescribiendo metadata.json de forma atómica."""
+        metadata = dict(extra, version=version, artefacto=str(artefacto))
+
+        def escribir(ruta):
+            with open(ruta, 'w', encoding='utf-8') as fichero:
+                json.dump(metadata, fichero, default=str)
+        escribir_atomico(self.ruta_clave(clave) / METADATA, escribir)
+
+    # --- Lectura ---
+
+    def _firma(self, clave):
+        try:
+            estado = os.stat(self.ruta_clave(clave) / METADATA)
+        except FileNotFoundError:
+            return None
+        # os.replace publica siempre un inodo nuevo: distingue dos versiones escritas en el mismo tick
+        return estado.st_ino, estado.st_mtime_ns, estado.st_size
+
+    def obtener(self, clave):
+        """Modelo vigente de la clave, o None si no hay ninguno publicado."""
+        firma = self._firma(clave)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if firma is None:
+                self._entradas.pop(clave, None)
+                return None
+            if entrada is not None and entrada.firma == firma:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada.modelo
+
+        with open(self.ruta_clave(clave) / METADATA, encoding='utf-8') as fichero:
+            metadata = json.load(fichero)
+        if entrada is not None and entrada.version == metadata['version']:
+            with self._lock:
+                entrada.firma = firma
+            return entrada.modelo
+
+        # La carga (mmap) se hace fuera del lock; el reemplazo es atómico y nunca retrocede de versión
+        datos = joblib.load(self.directorio / metadata['artefacto'], mmap_mode=self.mmap_mode)
+        modelo = self.constructor(datos, version=metadata['version'], entrenado_en=metadata.get('entrenado_en'))
+        with self._lock:
+            self.cargas += 1
+            actual = self._entradas.get(clave)
+            if actual is None or actual.version <= metadata['version']:
+                actual = self._entradas[clave] = _Entrada(metadata['version'], firma, modelo)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+            return actual.modelo
+
+    def precargar(self, limite=None):
+        """Abre los modelos publicados más recientes (hasta la capacidad del LRU). Devuelve cuántos."""
+        base = self.directorio
+        if not base.is_dir():
+            return 0
+        metadatas = sorted(base.glob(f"empresa_*/{METADATA}"), key=lambda ruta: ruta.stat().st_mtime, reverse=True)
+        cargados = 0
+        for ruta in metadatas[:limite or self.capacidad]:
+            clave = ruta.parent.name.removeprefix('empresa_')
+            try:
+                if self.obtener(int(clave)) is not None:
+                    cargados += 1
+            except Exception:
+                logger.exception("No se pudo precargar el modelo de %s", ruta.parent)
+        return cargados
+
+    def invalidar(self, clave=None):
+        with self._lock:
+            if clave is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(clave, None)
+
+    def __contains__(self, clave):
+        return clave in self._entradas
+
+    def __len__(self):
+        return len(self._entradas)
@@ -0,0 +1,225 @@
+# apps/predicciones/tests.py
+
+import json
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.empresas.models import Empresa
+from apps.productos.models import Producto
+from apps.ventas.models import DetalleVenta, Venta
+from .features import MEMORIA, ajustar_grupo
+from .forecasting import PronosticadorDemanda, guardar, modelo_vigente, registro, serie_diaria
+from .registry import METADATA, RegistroModelos
+
+
+class SerieDiariaTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre='Empresa Serie')
+        cls.producto = Producto.objects.create(nombre='Producto', precio=Decimal('1.00'), empresa=cls.empresa)
+
+    def vender(self, momento, cantidad):
+        venta = Venta.objects.create(empresa=self.empresa)
+        Venta.objects.filter(pk=venta.pk).update(fecha=momento)
+        DetalleVenta.objects.bulk_create([DetalleVenta(venta=venta, producto=self.producto, cantidad=cantidad,
+                                                       precio_unitario=Decimal('1.00'))])
+
+    def test_los_limites_son_las_medianoches_locales(self):
+        hasta = date(2026, 3, 10)
+        inicio = timezone.make_aware(datetime.combine(hasta - timedelta(days=6), time.min))
+        fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+        self.vender(inicio - timedelta(seconds=1), 100)
+        self.vender(inicio, 1)
+        self.vender(fin - timedelta(seconds=1), 2)
+        self.vender(fin, 100)
+
+        producto_ids, primer_dia, matriz = serie_diaria(self.empresa.id, 7, hasta=hasta)
+
+        self.assertEqual(producto_ids.tolist(), [self.producto.id])
+        self.assertEqual(primer_dia, hasta - timedelta(days=6))
+        self.assertEqual(matriz[0].tolist(), [1, 0, 0, 0, 0, 0, 2])
+
+
+def crear_pronosticador(empresa_id=1, semilla=0):
+    """Pronosticador pequeño (5 productos, 2 grupos) ajustado sobre una historia aleatoria."""
+    rng = np.random.default_rng(semilla)
+    dias = MEMORIA + 60
+    historia = rng.poisson(3, size=(5, dias)).astype(float)
+    grupos = np.array([0, 1, 0, 1, 1])
+    ajustes = [ajustar_grupo(f"grupo:{g}", historia[grupos == g], 0) for g in (0, 1)]
+    return PronosticadorDemanda(
+        empresa_id=empresa_id, producto_ids=np.arange(10, 15), fin=date(2026, 3, 10), dias_historia=dias,
+        ventana=historia[:, -MEMORIA:], grupos=grupos, claves_grupos=['grupo:0', 'grupo:1'],
+        coef_grupos=np.vstack([ajuste['coef'] for ajuste in ajustes]),
+        intercepto_grupos=np.array([ajuste['intercepto'] for ajuste in ajustes]),
+        confianza=np.zeros(5),
+    )
+
+
+class PredecirFilasTest(SimpleTestCase):
+    def test_filas_sueltas_igual_que_todo_el_modelo(self):
+        pronosticador = crear_pronosticador()
+
+        todos = pronosticador.predecir_todos(14, desde=date(2026, 3, 12))
+        filas = pronosticador.predecir_filas([3, 0], 14, desde=date(2026, 3, 12))
+        np.testing.assert_allclose(filas, todos[[3, 0]])
+
+
+class RegistroModelosTest(SimpleTestCase):
+    def setUp(self):
+        temporal = tempfile.TemporaryDirectory()
+        self.addCleanup(temporal.cleanup)
+        self.directorio = Path(temporal.name)
+        self.registro = self.nuevo_registro()
+
+    def nuevo_registro(self, capacidad=2):
+        # Cada instancia hace de un proceso del servidor: comparten solo el directorio
+        return RegistroModelos(self.directorio, PronosticadorDemanda.from_dict, capacidad=capacidad)
+
+    def publicar(self, registro, clave, version, semilla=0):
+        pronosticador = crear_pronosticador(empresa_id=clave, semilla=semilla)
+        relativa = registro.guardar_artefacto(clave, version, pronosticador.to_dict())
+        registro.publicar(clave, version, relativa, entrenado_en='2026-03-11T00:00:00')
+        return pronosticador
+
+    def ficheros(self, clave):
+        return sorted(ruta.name for ruta in self.registro.ruta_clave(clave).iterdir())
+
+    def test_sin_metadata_no_hay_modelo(self):
+        self.assertIsNone(self.registro.obtener(1))
+        self.assertEqual(self.registro.precargar(), 0)
+
+    def test_carga_perezosa_con_mmap(self):
+        original = self.publicar(self.registro, 1, 1)
+
+        modelo = self.registro.obtener(1)
+
+        self.assertEqual((modelo.version, modelo.entrenado_en), (1, '2026-03-11T00:00:00'))
+        self.assertIsInstance(modelo.ventana, np.memmap)
+        np.testing.assert_array_equal(modelo.ventana, original.ventana)
+        # La segunda lectura solo hace stat() del metadata
+        self.assertIs(self.registro.obtener(1), modelo)
+        self.assertEqual((self.registro.cargas, self.registro.aciertos), (1, 1))
+
+    def test_publicacion_atomica(self):
+        self.publicar(self.registro, 1, 1)
+        metadata = self.registro.ruta_clave(1) / METADATA
+        inodo = metadata.stat().st_ino
+
+        with mock.patch('apps.predicciones.registry.os.replace', wraps=os.replace) as reemplazo:
+            self.publicar(self.registro, 1, 2)
+
+        # Artefacto y metadata se publican renombrando un temporal del mismo directorio
+        destinos = [Path(llamada.args[1]) for llamada in reemplazo.call_args_list]
+        self.assertEqual([ruta.name for ruta in destinos], ['v2.joblib', METADATA])
+        for llamada in reemplazo.call_args_list:
+            self.assertEqual(Path(llamada.args[0]).parent, Path(llamada.args[1]).parent)
+        self.assertNotEqual(metadata.stat().st_ino, inodo)
+        self.assertEqual(json.loads(metadata.read_text())['version'], 2)
+        self.assertEqual(self.ficheros(1), [METADATA, 'v1.joblib', 'v2.joblib'])
+
+    def test_un_fallo_al_publicar_conserva_la_version_anterior(self):
+        self.publicar(self.registro, 1, 1)
+
+        with mock.patch('apps.predicciones.registry.json.dump', side_effect=OSError('disco lleno')):
+            with self.assertRaises(OSError):
+                self.registro.publicar(1, 2, 'empresa_1/v2.joblib')
+
+        self.assertEqual(self.registro.obtener(1).version, 1)
+        # No quedan temporales a medias
+        self.assertEqual(self.ficheros(1), [METADATA, 'v1.joblib'])
+
+    def test_recarga_lo_que_publica_otro_proceso(self):
+        self.publicar(self.registro, 1, 1)
+        self.assertEqual(self.registro.obtener(1).version, 1)
+        metadata = self.registro.ruta_clave(1) / METADATA
+        anterior = metadata.stat()
+
+        # Otro proceso publica la versión 2: mismo tamaño de metadata y, en el peor caso, el mismo tick
+        nuevo = self.publicar(self.nuevo_registro(), 1, 2, semilla=1)
+        os.utime(metadata, ns=(anterior.st_atime_ns, anterior.st_mtime_ns))
+        self.assertEqual(metadata.stat().st_size, anterior.st_size)
+
+        modelo = self.registro.obtener(1)
+        self.assertEqual(modelo.version, 2)
+        np.testing.assert_array_equal(modelo.ventana, nuevo.ventana)
+        self.assertEqual(self.registro.cargas, 2)
+
+    def test_lru_descarta_el_menos_usado(self):
+        for clave in (1, 2, 3):
+            self.publicar(self.registro, clave, 1)
+        self.registro.obtener(1)
+        self.registro.obtener(2)
+        self.registro.obtener(1)
+
+        # Cargar la 3 con capacidad 2 expulsa a la 2, la menos usada
+        self.registro.obtener(3)
+
+        self.assertEqual(len(self.registro), 2)
+        self.assertEqual(list(self.registro._entradas), [1, 3])
+        self.registro.obtener(2)
+        self.assertEqual(list(self.registro._entradas), [3, 2])
+        self.assertEqual(self.registro.cargas, 4)
+
+    def test_precargar_hasta_la_capacidad(self):
+        for clave in (1, 2, 3):
+            self.publicar(self.nuevo_registro(), clave, 1)
+
+        self.assertEqual(self.registro.precargar(), 2)
+        self.assertEqual(len(self.registro), 2)
+
+
+class ModeloVigenteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre='Empresa Modelos')
+
+    def setUp(self):
+        temporal = tempfile.TemporaryDirectory()
+        self.addCleanup(temporal.cleanup)
+        ajustes = override_settings(DEMANDA_MODELOS_DIR=Path(temporal.name))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        registro.invalidar()
+        self.addCleanup(registro.invalidar)
+
+    def guardar(self, semilla):
+        with self.captureOnCommitCallbacks(execute=True):
+            return guardar(crear_pronosticador(empresa_id=self.empresa.id, semilla=semilla))
+
+    def test_sirve_la_version_publicada(self):
+        self.assertIsNone(modelo_vigente(self.empresa.id))
+        self.guardar(0)
+        primero = modelo_vigente(self.empresa.id)
+        self.assertEqual(primero.version, 1)
+
+        nuevo = self.guardar(1)
+
+        vigente = modelo_vigente(self.empresa.id)
+        self.assertEqual(vigente.version, 2)
+        self.assertEqual(vigente.entrenado_en, str(nuevo.entrenado_en))
+        self.assertFalse(np.array_equal(vigente.ventana, primero.ventana))
+
+    def test_sin_publicar_no_se_sirve(self):
+        # Entrenamiento cuya transacción no confirmó: el artefacto existe pero no es vigente
+        self.guardar(0)
+        with self.captureOnCommitCallbacks(execute=False):
+            guardar(crear_pronosticador(empresa_id=self.empresa.id, semilla=1))
+
+        self.assertEqual(modelo_vigente(self.empresa.id).version, 1)
+
+    def test_publica_modelos_anteriores_al_metadata(self):
+        self.guardar(0)
+        (registro.ruta_clave(self.empresa.id) / METADATA).unlink()
+        registro.invalidar()
+
+        self.assertEqual(modelo_vigente(self.empresa.id).version, 1)
+        self.assertTrue((registro.ruta_clave(self.empresa.id) / METADATA).exists())
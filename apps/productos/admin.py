@@ -6,11 +6,17 @@ class ProductoAdmin(admin.ModelAdmin):
     """
     Configuración para la visualización del modelo Producto en el panel de administración.
     """
-    list_display = ('nombre', 'precio', 'stock', 'categoria', 'almacen', 'imagen_tag')
-    list_filter = ('categoria', 'almacen', 'stock')
+    list_display = ('nombre', 'precio', 'stock', 'punto_reorden', 'bajo_stock', 'categoria', 'almacen', 'imagen_tag')
+    list_filter = ('categoria', 'almacen', 'bajo_stock')
     search_fields = ('nombre', 'descripcion')
     readonly_fields = ('imagen_tag',) # Para mostrar la imagen en el admin
 
+    def save_model(self, request, obj, form, change):
+        # Como en ProductoSerializer.update: el cambio manual de stock es un ajuste
+        if change and 'stock' in form.changed_data:
+            obj.stock_inicial += obj.stock - form.initial['stock']
+        super().save_model(request, obj, form, change)
+
     # Método para mostrar la imagen en la lista del admin
     def imagen_tag(self, obj):
         if obj.imagen:
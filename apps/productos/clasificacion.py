@@ -0,0 +1,182 @@
+# apps/productos/clasificacion.py
+
+"""
+Clasificación ABC/XYZ de los productos.
+
+- ABC por aporte a los ingresos de la empresa en el periodo: ordenados de mayor a menor
+  ingreso, son A los productos que entran antes de llegar al `umbral_a` (80 %) de los
+  ingresos acumulados, B hasta el `umbral_b` (95 %) y C el resto (también los que no
+  vendieron).
+- XYZ por variabilidad de la demanda: coeficiente de variación (desviación / media) de las
+  unidades vendidas por semana, con las semanas sin ventas como cero. X hasta `cv_x` (0,5),
+  Y hasta `cv_y` (1,0), Z el resto y los productos sin ventas.
+
+Como en apps.productos.inventario, todo se calcula con NumPy sobre los productos de todas
+las empresas a la vez: una consulta agrega unidades e ingresos por producto y semana
+completa, la matriz productos × semanas da medias y desviaciones, y el orden por empresa e
+ingreso con sumas acumuladas da el ABC. La clasificación de las empresas procesadas se
+reemplaza en ClasificacionProducto en una transacción, con INSERT de varias filas por
+sentencia: preparar cada campo en bulk_create costaba más que el cálculo entero
+(benchmarks/test_clasificacion.py compara las dos escrituras).
+"""
+
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import DateField, DecimalField, F, Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from apps.ventas.models import DetalleVenta
+from .models import ClasificacionProducto, Producto
+
+CAMPOS = ['producto', 'empresa', 'clase_abc', 'clase_xyz', 'ingresos', 'participacion_acumulada',
+          'coeficiente_variacion', 'calculado_en']
+
+
+def _parametro(nombre, por_defecto):
+    return getattr(settings, nombre, por_defecto)
+
+
+def clases_abc(empresas, ingresos, umbral_a, umbral_b):
+    """
+    Clase ABC ('A', 'B' o 'C') y participación acumulada de cada producto, con la suma
+    acumulada dentro de su empresa (`empresas` e `ingresos` son vectores paralelos).
+    """
+    n = len(ingresos)
+    orden = np.lexsort((-ingresos, empresas))
+    grupo = empresas[orden]
+    valores = ingresos[orden]
+    acumulado = np.cumsum(valores)
+    # Inicio de cada empresa en el orden; lo acumulado antes de ella se descuenta
+    inicio = np.flatnonzero(np.r_[True, grupo[1:] != grupo[:-1]])
+    por_grupo = np.diff(np.r_[inicio, n])
+    base = np.repeat(acumulado[inicio] - valores[inicio], por_grupo)
+    total = np.repeat(np.add.reduceat(valores, inicio), por_grupo)
+
+    antes = acumulado - valores - base
+    with np.errstate(divide='ignore', invalid='ignore'):
+        participacion_antes = np.where(total > 0, antes / total, 1.0)
+        participacion = np.where(total > 0, (antes + valores) / total, 0.0)
+    clase = np.where(valores <= 0, 'C', np.where(participacion_antes < umbral_a, 'A',
+                                                  np.where(participacion_antes < umbral_b, 'B', 'C')))
+
+    resultado_clase = np.empty(n, dtype='<U1')
+    resultado_participacion = np.empty(n)
+    resultado_clase[orden] = clase
+    resultado_participacion[orden] = participacion
+    return resultado_clase, resultado_participacion
+
+
+def clases_xyz(demanda, cv_x, cv_y):
+    """Clase XYZ y coeficiente de variación (NaN sin ventas) de cada fila de `demanda` (productos × semanas)."""
+    media = demanda.mean(axis=1)
+    desviacion = demanda.std(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cv = np.where(media > 0, desviacion / media, np.nan)
+    clase = np.where(np.isnan(cv), 'Z', np.where(cv <= cv_x, 'X', np.where(cv <= cv_y, 'Y', 'Z')))
+    return clase, cv
+
+
+def _insertar(filas, lote):
+    """INSERT de `filas` (tuplas en el orden de CAMPOS) en bloques de varias filas."""
+    conexion = connections[ClasificacionProducto.objects.db]
+    opciones = ClasificacionProducto._meta
+    columnas = [opciones.get_field(campo).column for campo in CAMPOS]
+    maximo = conexion.features.max_query_params
+    if maximo:
+        lote = min(lote, maximo // len(columnas))
+    marcadores = '(' + ', '.join(['%s'] * len(columnas)) + ')'
+    prefijo = (f"INSERT INTO {conexion.ops.quote_name(opciones.db_table)} "
+               f"({', '.join(conexion.ops.quote_name(columna) for columna in columnas)}) VALUES ")
+    with conexion.cursor() as cursor:
+        for inicio in range(0, len(filas), lote):
+            bloque = filas[inicio:inicio + lote]
+            cursor.execute(prefijo + ', '.join([marcadores] * len(bloque)),
+                           [valor for fila in bloque for valor in fila])
+
+
+def clasificar_productos(empresa_ids=None, semanas=None, umbral_a=None, umbral_b=None, cv_x=None, cv_y=None,
+                         lote=2000):
+    """
+    Recalcula ClasificacionProducto de los productos activos (de `empresa_ids` o de todas).
+    Devuelve un dict con el número de productos clasificados y cuántos hay de cada clase.
+    """
+    semanas = semanas or _parametro('CLASIFICACION_SEMANAS', 13)
+    # Un umbral 0 es válido (p. ej. cv_x=0: solo es X la demanda constante)
+    umbral_a = _parametro('CLASIFICACION_UMBRAL_A', 0.80) if umbral_a is None else umbral_a
+    umbral_b = _parametro('CLASIFICACION_UMBRAL_B', 0.95) if umbral_b is None else umbral_b
+    cv_x = _parametro('CLASIFICACION_CV_X', 0.5) if cv_x is None else cv_x
+    cv_y = _parametro('CLASIFICACION_CV_Y', 1.0) if cv_y is None else cv_y
+
+    productos = Producto.objects.filter(is_active=True)
+    if empresa_ids:
+        productos = productos.filter(empresa_id__in=empresa_ids)
+    filas = list(productos.order_by('id').values_list('id', 'empresa_id'))
+    if not filas:
+        return {'clasificados': 0, 'A': 0, 'B': 0, 'C': 0, 'X': 0, 'Y': 0, 'Z': 0}
+    ids, empresas = (np.array(columna) for columna in zip(*filas))
+
+    # Semanas completas (de lunes a domingo) anteriores a la actual
+    hoy = timezone.localdate()
+    fin = hoy - timedelta(days=hoy.weekday())
+    desde = fin - timedelta(weeks=semanas)
+    # Límites como instantes (medianoches locales) para que sirva el índice de venta.fecha
+    ventas = DetalleVenta.objects.filter(
+        producto_id__in=productos.values('id'),
+        venta__fecha__gte=timezone.make_aware(datetime.combine(desde, dt_time.min)),
+        venta__fecha__lt=timezone.make_aware(datetime.combine(fin, dt_time.min)),
+    ).exclude(venta__estado='Cancelada') \
+        .annotate(semana=TruncWeek('venta__fecha', output_field=DateField())) \
+        .values_list('producto_id', 'semana') \
+        .annotate(
+            unidades=Sum('cantidad'),
+            ingresos=Sum(F('cantidad') * F('precio_unitario') * (Decimal('1.00') - F('descuento_aplicado')),
+                         output_field=DecimalField(max_digits=15, decimal_places=2)),
+        ).order_by()
+    producto_venta, semana, unidades, ingresos_venta = [], [], [], []
+    for producto_id, inicio_semana, cantidad, ingreso in ventas.iterator(chunk_size=5000):
+        producto_venta.append(producto_id)
+        semana.append((inicio_semana - desde).days // 7)
+        unidades.append(cantidad)
+        ingresos_venta.append(ingreso or 0)
+
+    demanda = np.zeros((len(ids), semanas))
+    ingresos = np.zeros(len(ids))
+    if producto_venta:
+        posicion = np.searchsorted(ids, np.array(producto_venta))
+        celda = posicion * semanas + np.clip(np.array(semana), 0, semanas - 1)
+        demanda = np.bincount(celda, weights=np.array(unidades, dtype=float),
+                              minlength=len(ids) * semanas).reshape(len(ids), semanas)
+        ingresos = np.bincount(posicion, weights=np.array(ingresos_venta, dtype=float), minlength=len(ids))
+
+    abc, participacion = clases_abc(empresas, ingresos, umbral_a, umbral_b)
+    xyz, cv = clases_xyz(demanda, cv_x, cv_y)
+
+    # Valores ya en el tipo de la columna (tolist() da int, float y str de Python)
+    ahora = ClasificacionProducto._meta.get_field('calculado_en').get_db_prep_save(
+        timezone.now(), connections[ClasificacionProducto.objects.db])
+    filas = list(zip(
+        ids.tolist(), empresas.tolist(), abc.tolist(), xyz.tolist(),
+        [f"{valor:.2f}" for valor in ingresos.tolist()],
+        np.round(participacion, 6).tolist(),
+        [None if valor != valor else valor for valor in np.round(cv, 4).tolist()],  # NaN → NULL
+        [ahora] * len(ids),
+    ))
+    with transaction.atomic():
+        # También desaparece la clasificación de productos ya inactivos
+        anteriores = ClasificacionProducto.objects.all()
+        if empresa_ids:
+            anteriores = anteriores.filter(empresa_id__in=empresa_ids)
+        anteriores.delete()
+        _insertar(filas, lote)
+
+    resultado = {'clasificados': len(ids)}
+    for clase in 'ABC':
+        resultado[clase] = int(np.count_nonzero(abc == clase))
+    for clase in 'XYZ':
+        resultado[clase] = int(np.count_nonzero(xyz == clase))
+    return resultado
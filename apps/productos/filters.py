@@ -1,5 +1,5 @@
 import django_filters
-from .models import Producto
+from .models import ClasificacionProducto, Producto
 
 class ProductoFilter(django_filters.FilterSet):
     """
@@ -9,6 +9,11 @@ class ProductoFilter(django_filters.FilterSet):
     """
     nombre = django_filters.CharFilter(field_name='nombre', lookup_expr='icontains')
     categoria = django_filters.NumberFilter(field_name='categoria')
+    # Clases ABC/XYZ precalculadas (manage.py clasificar_productos)
+    clase_abc = django_filters.ChoiceFilter(field_name='clasificacion__clase_abc',
+                                            choices=ClasificacionProducto.CLASES_ABC)
+    clase_xyz = django_filters.ChoiceFilter(field_name='clasificacion__clase_xyz',
+                                            choices=ClasificacionProducto.CLASES_XYZ)
     # Puedes añadir más filtros aquí si los necesitas, por ejemplo:
     # stock_min = django_filters.NumberFilter(field_name='stock', lookup_expr='gte')
     # precio_max = django_filters.NumberFilter(field_name='precio', lookup_expr='lte')
@@ -16,7 +21,7 @@ class ProductoFilter(django_filters.FilterSet):
 
     class Meta:
         model = Producto
-        fields = ['nombre', 'categoria'] # Los campos que se pueden filtrar
+        fields = ['nombre', 'categoria', 'clase_abc', 'clase_xyz'] # Los campos que se pueden filtrar
         # Si tienes un campo 'search' que no se mapea directamente a un campo del modelo
         # pero quieres usarlo para una búsqueda general en múltiples campos,
         # lo mejor es combinar esto con SearchFilter en la vista.
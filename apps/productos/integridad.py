@@ -0,0 +1,129 @@
+# apps/productos/integridad.py
+
+"""
+Verificación de integridad de montos de venta y stock.
+
+Venta.monto_total y Producto.stock se guardan ya calculados y los modifican varios caminos
+(líneas de venta, cancelación y borrado de ventas, aceptación, edición y borrado de
+movimientos, ediciones manuales). Aquí se recalcula lo que deberían valer con SQL sobre
+conjuntos, una consulta por empresa para cada cosa:
+
+    monto_total esperado = Σ cantidad × precio_unitario × (1 − descuento_aplicado) de sus líneas
+    stock esperado = stock_inicial + entradas aceptadas − salidas aceptadas
+                     − unidades en ventas no canceladas
+
+y se listan las filas que no coinciden. Con reparar=True, cada descuadre se corrige con un
+único UPDATE que vuelve a calcular el valor esperado al escribir. Los productos cuyo stock
+esperado sería negativo se informan, pero no se reparan. verificar_integridad() procesa
+las empresas en paralelo, una por hilo y con su propia conexión.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Abs, Coalesce, Round
+
+from apps.empresas.models import Empresa
+from apps.movimientos.models import DetalleMovimiento
+from apps.ventas.models import DetalleVenta, Venta
+from .models import Producto
+
+MONTO = DecimalField(max_digits=15, decimal_places=2)
+# Diferencias de monto por debajo de medio centavo son redondeo, no descuadre
+TOLERANCIA_MONTO = Decimal('0.005')
+
+
+def _suma_por_producto(lineas, campo):
+    """Subconsulta: suma de `campo` en `lineas` para el producto de la fila externa (0 sin líneas)."""
+    total = lineas.filter(producto_id=OuterRef('pk')).values('producto_id').annotate(total=Sum(campo)).values('total')
+    return Coalesce(Subquery(total, output_field=IntegerField()), 0)
+
+
+def variacion_stock():
+    """Expresión: unidades que sumaron y restaron al stock las entradas, salidas y ventas registradas."""
+    aceptadas = DetalleMovimiento.objects.filter(movimiento__estado='Aceptado')
+    entradas = _suma_por_producto(aceptadas.filter(movimiento__proveedor__isnull=False), 'cantidad_suministrada')
+    salidas = _suma_por_producto(aceptadas.filter(movimiento__proveedor__isnull=True), 'cantidad_suministrada')
+    vendidas = _suma_por_producto(DetalleVenta.objects.exclude(venta__estado='Cancelada'), 'cantidad')
+    return entradas - salidas - vendidas
+
+
+def stock_esperado():
+    return F('stock_inicial') + variacion_stock()
+
+
+def monto_esperado():
+    """Expresión: monto_total que corresponde a las líneas de la venta de la fila externa."""
+    total = DetalleVenta.objects.filter(venta_id=OuterRef('pk')).values('venta_id').annotate(
+        total=Sum(F('cantidad') * F('precio_unitario') * (Decimal('1') - F('descuento_aplicado')), output_field=MONTO),
+    ).values('total')
+    return Round(Coalesce(Subquery(total, output_field=MONTO), Value(Decimal('0')), output_field=MONTO), 2)
+
+
+def fijar_stock_inicial(productos):
+    """
+    Ajusta stock_inicial de `productos` para que su stock actual cuadre con las ventas y
+    movimientos registrados (datos cargados sin pasar por save(), p. ej. el poblador).
+    """
+    return productos.update(stock_inicial=F('stock') - variacion_stock())
+
+
+def ventas_descuadradas(empresa_id):
+    return Venta.objects.filter(empresa_id=empresa_id).annotate(
+        esperado=monto_esperado(),
+    ).annotate(diferencia=Abs(F('monto_total') - F('esperado'), output_field=MONTO)) \
+        .filter(diferencia__gte=TOLERANCIA_MONTO)
+
+
+def productos_descuadrados(empresa_id):
+    return Producto.objects.filter(empresa_id=empresa_id).annotate(esperado=stock_esperado()) \
+        .exclude(stock=F('esperado'))
+
+
+def verificar_empresa(empresa_id, reparar=False, muestra=20):
+    """
+    Descuadres de una empresa: {'empresa', 'ventas', 'productos', 'negativos', 'reparadas',
+    'reparados', 'muestra_ventas', 'muestra_productos'}, con hasta `muestra` filas de cada tipo
+    (id, valor guardado, valor esperado).
+    """
+    ventas = ventas_descuadradas(empresa_id)
+    productos = productos_descuadrados(empresa_id)
+    resultado = {
+        'empresa': empresa_id,
+        'ventas': ventas.count(),
+        'productos': productos.count(),
+        'negativos': productos.filter(esperado__lt=0).count(),
+        'reparadas': 0,
+        'reparados': 0,
+        'muestra_ventas': list(ventas.order_by('id').values_list('id', 'monto_total', 'esperado')[:muestra]),
+        'muestra_productos': list(productos.order_by('id').values_list('id', 'stock', 'esperado')[:muestra]),
+    }
+    if reparar and (resultado['ventas'] or resultado['productos'] > resultado['negativos']):
+        with transaction.atomic():
+            resultado['reparadas'] = ventas.update(monto_total=monto_esperado())
+            resultado['reparados'] = productos.filter(esperado__gte=0).update(stock=stock_esperado())
+            # La marca de bajo stock, como en inventario.recalcular_puntos_reorden
+            empresa = Producto.objects.filter(empresa_id=empresa_id)
+            empresa.filter(bajo_stock=False, stock__lte=F('punto_reorden')).update(bajo_stock=True)
+            empresa.filter(bajo_stock=True, stock__gt=F('punto_reorden')).update(bajo_stock=False)
+    return resultado
+
+
+def _verificar_en_hilo(empresa_id, reparar, muestra):
+    try:
+        return verificar_empresa(empresa_id, reparar=reparar, muestra=muestra)
+    finally:
+        # Cada hilo abre su propia conexión: se cierra al terminar su empresa
+        connection.close()
+
+
+def verificar_integridad(empresa_ids=None, reparar=False, hilos=4, muestra=20):
+    """Verifica (y repara) las empresas activas o `empresa_ids`; una lista de resultados en orden de id."""
+    empresas = Empresa.objects.filter(id__in=empresa_ids) if empresa_ids else Empresa.objects.filter(is_active=True)
+    ids = list(empresas.order_by('id').values_list('id', flat=True))
+    if hilos <= 1 or len(ids) <= 1:
+        return [verificar_empresa(empresa_id, reparar=reparar, muestra=muestra) for empresa_id in ids]
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        return list(executor.map(lambda empresa_id: _verificar_en_hilo(empresa_id, reparar, muestra), ids))
@@ -0,0 +1,34 @@
+# apps/productos/management/commands/calcular_relacionados.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.productos.recomendaciones import calcular_relacionados
+
+
+class Command(BaseCommand):
+    help = ("Recalcula los productos comprados juntos a menudo (coocurrencia y lift sobre las "
+            "ventas recientes) que sirve /api/public-products/<id>/relacionados/.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, action='append', dest='empresas',
+                            help="ID de empresa (se puede repetir). Por defecto, todas las activas.")
+        parser.add_argument('--dias', type=int, default=None, help="Días de ventas a considerar.")
+        parser.add_argument('--k', type=int, default=None, help="Relacionados que se guardan por producto.")
+        parser.add_argument('--minimo', type=int, default=None,
+                            help="Ventas mínimas con ambos productos para relacionarlos.")
+
+    def handle(self, *args, **options):
+        comienzo = time.perf_counter()
+        resultado = calcular_relacionados(
+            empresa_ids=options['empresas'],
+            dias=options['dias'],
+            k=options['k'],
+            minimo=options['minimo'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['empresas']} empresas, {resultado['cestas']} ventas analizadas: "
+            f"{resultado['pares']} relacionados guardados para {resultado['productos']} productos "
+            f"({time.perf_counter() - comienzo:.2f}s)."
+        ))
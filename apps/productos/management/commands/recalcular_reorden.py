@@ -0,0 +1,33 @@
+# apps/productos/management/commands/recalcular_reorden.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.productos.inventario import recalcular_puntos_reorden
+
+
+class Command(BaseCommand):
+    help = ("Recalcula el punto de reorden de todos los productos a partir de su velocidad "
+            "de venta y actualiza la marca de bajo stock.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, action='append', dest='empresas',
+                            help="ID de empresa (se puede repetir). Por defecto, todas.")
+        parser.add_argument('--dias', type=int, default=None, help="Días de ventas a considerar.")
+        parser.add_argument('--reposicion', type=int, default=None, help="Días que tarda en llegar un pedido.")
+        parser.add_argument('--z', type=float, default=None, help="Factor de nivel de servicio (1.65 ≈ 95%%).")
+
+    def handle(self, *args, **options):
+        comienzo = time.perf_counter()
+        resultado = recalcular_puntos_reorden(
+            empresa_ids=options['empresas'],
+            dias=options['dias'],
+            dias_reposicion=options['reposicion'],
+            nivel_servicio_z=options['z'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['evaluados']} productos evaluados, {resultado['actualizados']} con punto de reorden "
+            f"nuevo, {resultado['marcados']} entran y {resultado['desmarcados']} salen de la alerta "
+            f"({time.perf_counter() - comienzo:.2f}s)."
+        ))
@@ -0,0 +1,26 @@
+# apps/productos/management/commands/valorar_inventario.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.productos.valoracion import valorar_inventario
+
+
+class Command(BaseCommand):
+    help = ("Guarda la valoración del inventario de hoy (productos, unidades, valor a precio de venta "
+            "y a costo promedio) por empresa y almacén en ValoracionInventario. Pensado para correr "
+            "cada noche; repetirlo el mismo día reemplaza la valoración de ese día.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, action='append', dest='empresas',
+                            help="ID de empresa (se puede repetir). Por defecto, todas las activas.")
+
+    def handle(self, *args, **options):
+        comienzo = time.perf_counter()
+        resultado = valorar_inventario(empresa_ids=options['empresas'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['empresas']} empresas valoradas en {resultado['filas']} filas "
+            f"(valor a precio de venta {resultado['valor_venta']:.2f}, "
+            f"{time.perf_counter() - comienzo:.2f}s)."
+        ))
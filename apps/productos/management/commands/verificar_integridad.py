@@ -0,0 +1,58 @@
+# apps/productos/management/commands/verificar_integridad.py
+
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.productos.integridad import verificar_integridad
+
+
+class Command(BaseCommand):
+    help = ("Recalcula con SQL el monto total esperado de cada venta y el stock esperado de cada "
+            "producto (stock inicial, movimientos aceptados y ventas no canceladas), informa los "
+            "descuadres y, con --reparar, los corrige. Procesa las empresas en paralelo.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, action='append', dest='empresas',
+                            help="ID de empresa (se puede repetir). Por defecto, todas las activas.")
+        parser.add_argument('--reparar', action='store_true',
+                            help="Corrige monto_total y stock descuadrados (un UPDATE por tipo y empresa).")
+        parser.add_argument('--hilos', type=int, default=min(os.cpu_count() or 1, 4),
+                            help="Empresas verificadas a la vez, cada una con su conexión; 1 las procesa en orden.")
+        parser.add_argument('--muestra', type=int, default=20,
+                            help="Descuadres de cada tipo que se listan por empresa (con -v 2).")
+
+    def handle(self, *args, **options):
+        comienzo = time.perf_counter()
+        resultados = verificar_integridad(
+            empresa_ids=options['empresas'],
+            reparar=options['reparar'],
+            hilos=options['hilos'],
+            muestra=options['muestra'],
+        )
+
+        descuadradas = 0
+        for resultado in resultados:
+            prefijo = f"Empresa {resultado['empresa']}"
+            if not resultado['ventas'] and not resultado['productos']:
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f"{prefijo}: sin descuadres.")
+                continue
+            descuadradas += 1
+            mensaje = (f"{prefijo}: {resultado['ventas']} ventas con monto_total descuadrado, "
+                       f"{resultado['productos']} productos con stock descuadrado")
+            if resultado['negativos']:
+                mensaje += f" ({resultado['negativos']} con stock esperado negativo, no reparables)"
+            if options['reparar']:
+                mensaje += f"; reparadas {resultado['reparadas']} ventas y {resultado['reparados']} productos"
+            self.stdout.write(self.style.WARNING(mensaje + "."))
+            if options['verbosity'] >= 2:
+                for venta_id, guardado, esperado in resultado['muestra_ventas']:
+                    self.stdout.write(f"  Venta #{venta_id}: monto_total {guardado}, esperado {esperado:.2f}")
+                for producto_id, guardado, esperado in resultado['muestra_productos']:
+                    self.stdout.write(f"  Producto #{producto_id}: stock {guardado}, esperado {esperado}")
+
+        estilo = self.style.WARNING if descuadradas else self.style.SUCCESS
+        self.stdout.write(estilo(f"{len(resultados)} empresas verificadas, {descuadradas} con descuadres "
+                                 f"({time.perf_counter() - comienzo:.2f}s)."))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-19 06:21
+
+from django.db import migrations, models
+
+
+def marcar_bajo_stock(apps, schema_editor):
+    Producto = apps.get_model('productos', 'Producto')
+    Producto.objects.filter(stock__lte=models.F('punto_reorden')).update(bajo_stock=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacenes', '0002_initial'),
+        ('categorias', '0002_initial'),
+        ('empresas', '0003_empresa_descripcion_corta'),
+        ('productos', '0003_producto_is_active_alter_producto_descuento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='bajo_stock',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Bajo Stock'),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='punto_reorden',
+            field=models.PositiveIntegerField(default=10, help_text='Cuando el stock llega a este nivel o menos, el producto queda en alerta.', verbose_name='Punto de Reorden'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('bajo_stock', True)), fields=['empresa', 'nombre', 'id'], name='producto_bajo_stock_idx'),
+        ),
+        migrations.RunPython(marcar_bajo_stock, migrations.RunPython.noop),
+    ]
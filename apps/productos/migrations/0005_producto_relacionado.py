@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0004_punto_reorden_bajo_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductoRelacionado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveSmallIntegerField(verbose_name='Posición')),
+                ('coocurrencias', models.PositiveIntegerField(verbose_name='Ventas con Ambos Productos')),
+                ('confianza', models.FloatField(help_text='Fracción de las ventas de `producto` que incluyen también `relacionado`.')),
+                ('lift', models.FloatField(help_text='Cuántas veces más se compran juntos de lo esperado si fueran independientes.')),
+                ('calculado_en', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Cálculo')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionados', to='productos.producto')),
+                ('relacionado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='productos.producto')),
+            ],
+            options={
+                'verbose_name': 'Producto Relacionado',
+                'verbose_name_plural': 'Productos Relacionados',
+                'ordering': ['producto', 'posicion'],
+                'unique_together': {('producto', 'posicion')},
+            },
+        ),
+    ]
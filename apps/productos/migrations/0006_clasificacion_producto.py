@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0003_empresa_descripcion_corta'),
+        ('productos', '0005_producto_relacionado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClasificacionProducto',
+            fields=[
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='clasificacion', serialize=False, to='productos.producto')),
+                ('clase_abc', models.CharField(choices=[('A', 'A'), ('B', 'B'), ('C', 'C')], max_length=1, verbose_name='Clase ABC')),
+                ('clase_xyz', models.CharField(choices=[('X', 'X'), ('Y', 'Y'), ('Z', 'Z')], max_length=1, verbose_name='Clase XYZ')),
+                ('ingresos', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Ingresos del Periodo')),
+                ('participacion_acumulada', models.FloatField(help_text='Fracción de los ingresos de la empresa que suman este producto y los que venden más.')),
+                ('coeficiente_variacion', models.FloatField(blank=True, help_text='Desviación / media de las unidades semanales (vacío si no hubo ventas).', null=True)),
+                ('calculado_en', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Cálculo')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='empresas.empresa')),
+            ],
+            options={
+                'verbose_name': 'Clasificación ABC/XYZ',
+                'verbose_name_plural': 'Clasificaciones ABC/XYZ',
+                'indexes': [models.Index(fields=['empresa', 'clase_abc', 'clase_xyz'], name='clasificacion_empresa_idx')],
+            },
+        ),
+    ]
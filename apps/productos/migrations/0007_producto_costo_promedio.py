@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:12
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0006_clasificacion_producto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='costo_promedio',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.0000'), editable=False, max_digits=14, verbose_name='Costo Promedio'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('almacenes', '0002_initial'),
+        ('empresas', '0003_empresa_descripcion_corta'),
+        ('productos', '0007_producto_costo_promedio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValoracionInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha de la Valoración')),
+                ('productos', models.PositiveIntegerField(verbose_name='Productos')),
+                ('unidades', models.BigIntegerField(verbose_name='Unidades en Stock')),
+                ('valor_venta', models.DecimalField(decimal_places=2, help_text='Suma de precio × stock.', max_digits=16)),
+                ('valor_costo', models.DecimalField(decimal_places=2, help_text='Suma de costo promedio × stock.', max_digits=16)),
+                ('calculado_en', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Cálculo')),
+                ('almacen', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='almacenes.almacen', verbose_name='Almacén')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='empresas.empresa')),
+            ],
+            options={
+                'verbose_name': 'Valoración de Inventario',
+                'verbose_name_plural': 'Valoraciones de Inventario',
+                'indexes': [models.Index(fields=['empresa', 'fecha'], name='valoracion_empresa_fecha_idx')],
+            },
+        ),
+    ]
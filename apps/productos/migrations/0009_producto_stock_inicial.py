@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:20
+
+from django.db import migrations, models
+
+
+def stock_inicial(apps, schema_editor):
+    """
+    Punto de partida de la verificación de stock: el stock actual se toma por bueno y el
+    stock inicial es lo que no explican las entradas, salidas y ventas ya registradas.
+    """
+    Producto = apps.get_model('productos', 'Producto')
+    DetalleMovimiento = apps.get_model('movimientos', 'DetalleMovimiento')
+    DetalleVenta = apps.get_model('ventas', 'DetalleVenta')
+
+    def suma(lineas, campo):
+        total = lineas.filter(producto_id=models.OuterRef('pk')).values('producto_id') \
+            .annotate(total=models.Sum(campo)).values('total')
+        return models.functions.Coalesce(models.Subquery(total, output_field=models.IntegerField()), 0)
+
+    aceptadas = DetalleMovimiento.objects.filter(movimiento__estado='Aceptado')
+    Producto.objects.update(stock_inicial=(
+        models.F('stock')
+        - suma(aceptadas.filter(movimiento__proveedor__isnull=False), 'cantidad_suministrada')
+        + suma(aceptadas.filter(movimiento__proveedor__isnull=True), 'cantidad_suministrada')
+        + suma(DetalleVenta.objects.exclude(venta__estado='Cancelada'), 'cantidad')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movimientos', '0003_movimiento_created_at_movimiento_updated_at'),
+        ('productos', '0008_valoracion_inventario'),
+        ('ventas', '0006_detalleventa_costo_unitario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='stock_inicial',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Stock Inicial'),
+        ),
+        migrations.RunPython(stock_inicial, migrations.RunPython.noop),
+    ]
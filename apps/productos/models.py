@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from apps.categorias.models import Categoria # Asumiendo que Categoria está en apps/categorias
 from apps.almacenes.models import Almacen   # Asumiendo que Almacen está en apps/almacenes
 from apps.empresas.models import Empresa   # Importa el modelo Empresa
@@ -42,11 +43,36 @@ class Producto(models.Model):
         verbose_name="Empresa"
     )
 
+    # Alertas de inventario: el punto de reorden se recalcula por lotes a partir de la
+    # velocidad de venta (manage.py recalcular_reorden) y bajo_stock se mantiene en save().
+    punto_reorden = models.PositiveIntegerField(
+        default=10,
+        verbose_name="Punto de Reorden",
+        help_text="Cuando el stock llega a este nivel o menos, el producto queda en alerta."
+    )
+    bajo_stock = models.BooleanField(default=False, editable=False, verbose_name="Bajo Stock")
+
+    # Costo unitario promedio ponderado del stock: se actualiza al aceptar cada movimiento de
+    # entrada (apps.movimientos.costeo) y se copia en cada línea de venta al venderse.
+    costo_promedio = models.DecimalField(
+        max_digits=14, decimal_places=4, default=Decimal('0.0000'), editable=False,
+        verbose_name="Costo Promedio"
+    )
+
+    # Stock que no explican las ventas ni los movimientos: el del alta del producto más los
+    # ajustes manuales. Con él se recalcula el stock esperado (apps.productos.integridad).
+    stock_inicial = models.IntegerField(default=0, editable=False, verbose_name="Stock Inicial")
+
     class Meta:
         verbose_name = "Producto"
         verbose_name_plural = "Productos"
         ordering = ['nombre']
         unique_together = [['nombre', 'almacen', 'empresa']]
+        indexes = [
+            # Índice parcial: solo contiene los productos en alerta, ordenados como el listado
+            models.Index(fields=['empresa', 'nombre', 'id'], condition=models.Q(bajo_stock=True),
+                         name='producto_bajo_stock_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre} ({self.empresa.nombre})"
@@ -60,5 +86,99 @@ class Producto(models.Model):
             self.descuento = Decimal('1.0000')
         elif self.descuento < Decimal('0.0000'):
             self.descuento = Decimal('0.0000')
+
+        if self._state.adding and not self.stock_inicial and isinstance(self.stock, int):
+            self.stock_inicial = self.stock
+
+        # Mantener la marca de bajo stock (se omite si stock llega como expresión F())
+        if isinstance(self.stock, int) and isinstance(self.punto_reorden, int):
+            self.bajo_stock = self.stock <= self.punto_reorden
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and {'stock', 'punto_reorden'} & set(update_fields):
+                kwargs['update_fields'] = set(update_fields) | {'bajo_stock'}
         super().save(*args, **kwargs)
 
+
+
+class ProductoRelacionado(models.Model):
+    """
+    Productos que se compran junto con `producto` ("comprados juntos a menudo"), ya
+    ordenados. La tabla se recalcula por lotes (manage.py calcular_relacionados,
+    apps.productos.recomendaciones) y el marketplace solo la lee.
+    """
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='relacionados')
+    relacionado = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='+')
+    posicion = models.PositiveSmallIntegerField(verbose_name="Posición")
+    coocurrencias = models.PositiveIntegerField(verbose_name="Ventas con Ambos Productos")
+    confianza = models.FloatField(help_text="Fracción de las ventas de `producto` que incluyen también `relacionado`.")
+    lift = models.FloatField(help_text="Cuántas veces más se compran juntos de lo esperado si fueran independientes.")
+    calculado_en = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Cálculo")
+
+    class Meta:
+        verbose_name = "Producto Relacionado"
+        verbose_name_plural = "Productos Relacionados"
+        ordering = ['producto', 'posicion']
+        unique_together = [['producto', 'posicion']]
+
+    def __str__(self):
+        return f"{self.producto_id} → {self.relacionado_id} (lift {self.lift:.2f})"
+
+
+class ClasificacionProducto(models.Model):
+    """
+    Clase ABC (aporte a los ingresos de su empresa) y XYZ (variabilidad de la demanda
+    semanal) de cada producto. La calcula por lotes manage.py clasificar_productos
+    (apps.productos.clasificacion); listados, reportes y dashboard solo la leen.
+    """
+    CLASES_ABC = [('A', 'A'), ('B', 'B'), ('C', 'C')]
+    CLASES_XYZ = [('X', 'X'), ('Y', 'Y'), ('Z', 'Z')]
+
+    producto = models.OneToOneField(Producto, on_delete=models.CASCADE, primary_key=True,
+                                    related_name='clasificacion')
+    # Copia de producto.empresa para filtrar por empresa y clase con un solo índice
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='+')
+    clase_abc = models.CharField(max_length=1, choices=CLASES_ABC, verbose_name="Clase ABC")
+    clase_xyz = models.CharField(max_length=1, choices=CLASES_XYZ, verbose_name="Clase XYZ")
+    ingresos = models.DecimalField(max_digits=15, decimal_places=2, verbose_name="Ingresos del Periodo")
+    participacion_acumulada = models.FloatField(
+        help_text="Fracción de los ingresos de la empresa que suman este producto y los que venden más.")
+    coeficiente_variacion = models.FloatField(
+        null=True, blank=True, help_text="Desviación / media de las unidades semanales (vacío si no hubo ventas).")
+    calculado_en = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Cálculo")
+
+    class Meta:
+        verbose_name = "Clasificación ABC/XYZ"
+        verbose_name_plural = "Clasificaciones ABC/XYZ"
+        indexes = [
+            models.Index(fields=['empresa', 'clase_abc', 'clase_xyz'], name='clasificacion_empresa_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id}: {self.clase_abc}{self.clase_xyz}"
+
+
+class ValoracionInventario(models.Model):
+    """
+    Valor del inventario de una empresa en un almacén (o sin almacén) en una fecha: una fila
+    por empresa, almacén y día. La escribe por lotes manage.py valorar_inventario
+    (apps.productos.valoracion) y de ella leen el historial de valoración y el dashboard.
+    """
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='+')
+    almacen = models.ForeignKey(Almacen, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+                                verbose_name="Almacén")
+    fecha = models.DateField(verbose_name="Fecha de la Valoración")
+    productos = models.PositiveIntegerField(verbose_name="Productos")
+    unidades = models.BigIntegerField(verbose_name="Unidades en Stock")
+    valor_venta = models.DecimalField(max_digits=16, decimal_places=2, help_text="Suma de precio × stock.")
+    valor_costo = models.DecimalField(max_digits=16, decimal_places=2, help_text="Suma de costo promedio × stock.")
+    calculado_en = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Cálculo")
+
+    class Meta:
+        verbose_name = "Valoración de Inventario"
+        verbose_name_plural = "Valoraciones de Inventario"
+        indexes = [
+            models.Index(fields=['empresa', 'fecha'], name='valoracion_empresa_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.empresa_id}/{self.almacen_id or '-'} {self.fecha}: {self.valor_venta}"
@@ -0,0 +1,121 @@
+# apps/productos/recomendaciones.py
+
+"""
+"Comprados juntos a menudo": productos relacionados por co-compra.
+
+Por cada empresa, una consulta lee las líneas (venta, producto) de las ventas recientes y se
+arma la matriz dispersa X de ventas × productos (1 si la venta incluye el producto; cada
+venta es una cesta, DetalleVenta no repite producto en una venta). Con productos dispersos:
+
+    C = Xᵀ·X                 coocurrencias: C[i, j] = ventas con i y j; C[i, i] = ventas con i
+    confianza(i → j) = C[i, j] / C[i, i]
+    lift(i, j) = C[i, j] · N / (C[i, i] · C[j, j])      (N = número de ventas)
+
+Se descartan los pares con menos de `minimo` coocurrencias (poco soporte: el lift de pares
+raros es ruido) y para cada producto se guardan los `k` de mayor lift (a igualdad, más
+coocurrencias) en ProductoRelacionado, que el marketplace lee por índice.
+"""
+
+from datetime import datetime, time as dt_time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from scipy import sparse
+
+from apps.empresas.models import Empresa
+from apps.ventas.models import DetalleVenta
+from .models import ProductoRelacionado
+
+
+def _parametro(nombre, por_defecto):
+    return getattr(settings, nombre, por_defecto)
+
+
+def _cestas(empresa_id, desde):
+    """
+    Matriz ventas × productos de la empresa (CSR binaria) con las ventas desde el instante
+    `desde`, y los ids de producto de sus columnas.
+    """
+    lineas = DetalleVenta.objects.filter(
+        venta__empresa_id=empresa_id, venta__fecha__gte=desde, producto__is_active=True,
+    ).exclude(venta__estado='Cancelada').values_list('venta_id', 'producto_id').order_by()
+    ventas, productos = [], []
+    for venta_id, producto_id in lineas.iterator(chunk_size=5000):
+        ventas.append(venta_id)
+        productos.append(producto_id)
+    if not ventas:
+        return None, None
+
+    _, filas = np.unique(np.array(ventas), return_inverse=True)
+    ids, columnas = np.unique(np.array(productos), return_inverse=True)
+    matriz = sparse.csr_matrix(
+        (np.ones(len(filas), dtype=np.int32), (filas, columnas)),
+        shape=(filas.max() + 1, len(ids)),
+    )
+    matriz.data[:] = 1  # por si una venta repitiera producto (las entradas duplicadas se suman)
+    return matriz, ids
+
+
+def vecinos(matriz, k, minimo):
+    """
+    Top-k de cada producto (columna de `matriz`). Devuelve arrays paralelos: producto,
+    relacionado (índices de columna), posición (1..k), coocurrencias, confianza y lift.
+    """
+    n = matriz.shape[0]
+    coocurrencias = (matriz.T @ matriz).tocsr()
+    ventas = coocurrencias.diagonal()
+    coocurrencias.setdiag(0)
+    coocurrencias.data[coocurrencias.data < minimo] = 0
+    coocurrencias.eliminate_zeros()
+
+    por_fila = np.diff(coocurrencias.indptr)
+    fila = np.repeat(np.arange(coocurrencias.shape[0]), por_fila)
+    columna = coocurrencias.indices
+    conteo = coocurrencias.data.astype(np.float64)
+    confianza = conteo / ventas[fila]
+    lift = conteo * n / (ventas[fila] * ventas[columna])
+
+    # Orden por producto y, dentro de cada uno, por lift y coocurrencias descendentes; la
+    # posición es el puesto dentro del bloque de su fila
+    orden = np.lexsort((-conteo, -lift, fila))
+    posicion = np.arange(len(orden)) - np.repeat(coocurrencias.indptr[:-1], por_fila)
+    elegidos = orden[posicion < k]
+    return (fila[elegidos], columna[elegidos], posicion[posicion < k] + 1,
+            coocurrencias.data[elegidos], confianza[elegidos], lift[elegidos])
+
+
+def calcular_relacionados(empresa_ids=None, dias=None, k=None, minimo=None, lote=1000):
+    """
+    Recalcula ProductoRelacionado de las empresas activas (o de `empresa_ids`). Cada empresa
+    se reemplaza entera en una transacción. Devuelve un dict con empresas procesadas,
+    ventas (cestas), productos con relacionados y pares guardados.
+    """
+    dias = dias or _parametro('RECOMENDACIONES_DIAS_VENTAS', 365)
+    k = k or _parametro('RECOMENDACIONES_VECINOS', 10)
+    minimo = minimo or _parametro('RECOMENDACIONES_COOCURRENCIA_MINIMA', 2)
+    # Medianoche local del primer día: un instante, para que sirva el índice de venta.fecha
+    desde = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=dias - 1), dt_time.min))
+
+    empresas = Empresa.objects.filter(id__in=empresa_ids) if empresa_ids else Empresa.objects.filter(is_active=True)
+    resultado = {'empresas': 0, 'cestas': 0, 'productos': 0, 'pares': 0}
+    for empresa_id in empresas.order_by('id').values_list('id', flat=True):
+        matriz, ids = _cestas(empresa_id, desde)
+        nuevos = []
+        if matriz is not None:
+            ahora = timezone.now()
+            for producto, relacionado, posicion, conteo, confianza, lift in zip(*vecinos(matriz, k, minimo)):
+                nuevos.append(ProductoRelacionado(
+                    producto_id=int(ids[producto]), relacionado_id=int(ids[relacionado]), posicion=int(posicion),
+                    coocurrencias=int(conteo), confianza=round(float(confianza), 4), lift=round(float(lift), 4),
+                    calculado_en=ahora,
+                ))
+            resultado['cestas'] += matriz.shape[0]
+        with transaction.atomic():
+            ProductoRelacionado.objects.filter(producto__empresa_id=empresa_id).delete()
+            ProductoRelacionado.objects.bulk_create(nuevos, batch_size=lote)
+        resultado['empresas'] += 1
+        resultado['productos'] += len({fila.producto_id for fila in nuevos})
+        resultado['pares'] += len(nuevos)
+    return resultado
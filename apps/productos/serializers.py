@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Producto
+from .models import Producto, ProductoRelacionado, ValoracionInventario
 from apps.categorias.serializers import CategoriaSerializer
 from apps.almacenes.serializers import AlmacenSerializer
 from apps.empresas.serializers import EmpresaSerializer
@@ -20,8 +20,10 @@ class ProductoSerializer(serializers.ModelSerializer):
             'categoria', 'categoria_detail',
             'almacen', 'almacen_detail',
             'empresa', 'empresa_detail',
-            'descuento','is_active'  # Ensure 'descuento' is in fields
+            'descuento','is_active',  # Ensure 'descuento' is in fields
+            'punto_reorden', 'bajo_stock',
         ]
+        read_only_fields = ['bajo_stock']
         extra_kwargs = {
             'categoria': {'write_only': True, 'required': False},
             'almacen': {'write_only': True, 'required': False},
@@ -30,6 +32,13 @@ class ProductoSerializer(serializers.ModelSerializer):
             # 'descuento': {'required': False, 'allow_null': True}
         }
 
+    def update(self, instance, validated_data):
+        # Un cambio manual de stock es un ajuste: se suma al stock inicial para que la
+        # verificación de integridad (manage.py verificar_integridad) no lo tome por descuadre
+        if 'stock' in validated_data:
+            instance.stock_inicial += validated_data['stock'] - instance.stock
+        return super().update(instance, validated_data)
+
     # --- Add this custom validation for the 'descuento' field ---
     def validate_descuento(self, value):
         if value is None:
@@ -58,4 +67,37 @@ class ProductoListSerializer(serializers.ModelSerializer):
             'id', 'nombre', 'precio', 'stock', 'imagen',
             'categoria_nombre', 'empresa_nombre',
             'descuento', 'is_active' # Include is_active if it's relevant for public listing
-        ]
\ No newline at end of file
+        ]
+
+
+class ProductoRelacionadoSerializer(serializers.ModelSerializer):
+    producto = ProductoListSerializer(source='relacionado', read_only=True)
+
+    class Meta:
+        model = ProductoRelacionado
+        fields = ['posicion', 'producto', 'coocurrencias', 'confianza', 'lift']
+
+
+class AlertaStockSerializer(serializers.ModelSerializer):
+    """Producto en alerta de stock (stock <= punto de reorden)."""
+    categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True, allow_null=True)
+    almacen_nombre = serializers.CharField(source='almacen.nombre', read_only=True, allow_null=True)
+    faltante = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Producto
+        fields = ['id', 'nombre', 'stock', 'punto_reorden', 'faltante', 'categoria_nombre', 'almacen_nombre']
+
+    def get_faltante(self, obj):
+        # Unidades que faltan para volver a quedar por encima del punto de reorden
+        return obj.punto_reorden - obj.stock + 1
+
+
+class ValoracionInventarioSerializer(serializers.ModelSerializer):
+    """Fila de una valoración de inventario (empresa, almacén y fecha)."""
+    almacen_nombre = serializers.CharField(source='almacen.nombre', read_only=True, allow_null=True)
+
+    class Meta:
+        model = ValoracionInventario
+        fields = ['fecha', 'empresa', 'almacen', 'almacen_nombre', 'productos', 'unidades', 'valor_venta',
+                  'valor_costo', 'calculado_en']
@@ -1,3 +1,335 @@
-from django.test import TestCase
+# apps/productos/tests.py
 
-# Create your tests here.
+from datetime import datetime, time, timedelta
+from unittest import mock
+from decimal import Decimal
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from scipy import sparse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.almacenes.models import Almacen
+from apps.categorias.models import Categoria
+from apps.empresas.models import Empresa
+from apps.movimientos.models import DetalleMovimiento, Movimiento
+from apps.proveedores.models import Proveedor
+from apps.sucursales.models import Sucursal
+from apps.rbac.models import Role
+from apps.usuarios.models import CustomUser
+from apps.ventas.models import DetalleVenta, Venta
+from .inventario import recalcular_puntos_reorden
+from .clasificacion import clases_abc, clases_xyz, clasificar_productos
+from .integridad import verificar_integridad
+from .models import ClasificacionProducto, Producto, ProductoRelacionado
+from .recomendaciones import calcular_relacionados, vecinos
+from .valoracion import valorar_inventario
+
+
+def vender(empresa, productos, momento, cantidad, precio='1.00', estado='Completada'):
+    """
+    Venta de `cantidad` unidades de cada producto de `productos` (uno o una lista) en
+    `momento`, sin pasar por DetalleVenta.save() (no toca el stock).
+    """
+    venta = Venta.objects.create(empresa=empresa, estado=estado)
+    Venta.objects.filter(pk=venta.pk).update(fecha=momento)
+    productos = productos if isinstance(productos, (list, tuple)) else [productos]
+    DetalleVenta.objects.bulk_create([
+        DetalleVenta(venta=venta, producto=producto, cantidad=cantidad, precio_unitario=Decimal(precio))
+        for producto in productos
+    ])
+    return venta
+
+
+def medianoche(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def crear_admin(empresa, sufijo='1'):
+    """Administrador de `empresa` y un cliente de la API autenticado con su JWT."""
+    usuario = CustomUser.objects.create_user(
+        username=f'admin{sufijo}', email=f'admin{sufijo}@test.local', password='clave1234',
+        first_name='Admin', last_name='Test', ci=f'CI-{sufijo}',
+        role=Role.objects.get(name='Administrador'), empresa=empresa,
+    )
+    cliente = APIClient()
+    cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(usuario).access_token}')
+    return usuario, cliente
+
+
+class FastJsonProductosTest(TestCase):
+    """?fast=1 de /api/productos/: mismos bytes que ProductoSerializer con el JSONRenderer de DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre='Ñandú, S.A.')
+        categoria = Categoria.objects.create(nombre='Bebidas', empresa=cls.empresa)
+        sucursal = Sucursal.objects.create(nombre='Central', empresa=cls.empresa)
+        almacen = Almacen.objects.create(nombre='Depósito\u2028Norte', sucursal=sucursal, empresa=cls.empresa)
+        for i in range(6):
+            Producto.objects.create(
+                nombre=f'Producto {i // 2}', descripcion='Café' if i % 2 else None, precio=Decimal('1.50') * (i + 1),
+                stock=i, punto_reorden=2, descuento=Decimal('0.1250') * (i % 2),
+                # Con y sin imagen, categoría y almacén (las relaciones anidadas pueden ser nulas)
+                imagen=f'productos/foto {i}.jpg' if i % 2 else '',
+                categoria=categoria if i % 3 else None, almacen=None if i % 2 else almacen, empresa=cls.empresa,
+            )
+
+    def setUp(self):
+        _, self.cliente = crear_admin(self.empresa)
+
+    def comparar(self, parametros):
+        normal = self.cliente.get(f'/api/productos/?{parametros}')
+        rapida = self.cliente.get(f'/api/productos/?{parametros}&fast=1')
+        self.assertEqual(normal.status_code, 200, normal.content)
+        self.assertEqual(rapida.status_code, 200)
+        self.assertTrue(rapida.streaming)
+        # Las URL de imagen son absolutas (necesitan la petición)
+        self.assertIn(b'"imagen":"http://testserver/media/productos/foto%201.jpg"', normal.content)
+        # Los enlaces de la ruta rápida conservan ?fast=1 (el resto de parámetros va ordenado detrás)
+        self.assertEqual(b''.join(rapida.streaming_content).replace(b'fast=1&', b''), normal.content)
+
+    def test_pagina_con_cursor(self):
+        self.comparar('page_size=4')
+
+    def test_pagina_por_numero(self):
+        self.comparar('page=1&page_size=4')
+
+    def test_sin_orjson(self):
+        with mock.patch('erp.fastjson.orjson', None):
+            self.comparar('page_size=10')
+
+
+class ValoracionInventarioTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre='Empresa Valoración')
+        cls.proveedor = Proveedor.objects.create(empresa=cls.empresa, nombre='Proveedor')
+        cls.producto = Producto.objects.create(nombre='Producto', precio=Decimal('5.00'), stock=10,
+                                               empresa=cls.empresa)
+
+    def setUp(self):
+        _, self.cliente = crear_admin(self.empresa)
+
+    def aceptar_entrada(self, cantidad):
+        movimiento = Movimiento.objects.create(empresa=self.empresa, proveedor=self.proveedor)
+        DetalleMovimiento.objects.create(movimiento=movimiento, producto=self.producto,
+                                         cantidad_suministrada=cantidad, valor_unitario=Decimal('3.00'))
+        respuesta = self.cliente.post(f'/api/movimientos/{movimiento.id}/aceptar/')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        movimiento.refresh_from_db()
+        return movimiento
+
+    def dashboard(self):
+        respuesta = self.cliente.get('/api/dashboard/')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        return respuesta.json()
+
+    def test_volver_a_guardar_movimiento_aceptado_no_cambia_el_valor(self):
+        movimiento = self.aceptar_entrada(4)
+        valorar_inventario()
+        antes = self.dashboard()
+        self.assertEqual(antes['valor_total_inventario'], '70.00')
+        self.assertEqual(antes['variacion_inventario'], '0.00')
+
+        # Guardar de nuevo un movimiento aceptado antes de la valoración no lo vuelve a contar
+        movimiento.observaciones = 'Revisado'
+        movimiento.save()
+        despues = self.dashboard()
+        self.assertEqual(despues['valor_total_inventario'], antes['valor_total_inventario'])
+        self.assertEqual(despues['variacion_inventario'], '0.00')
+
+    def test_entrada_aceptada_despues_de_la_valoracion_suma(self):
+        valorar_inventario()
+        self.aceptar_entrada(6)
+        datos = self.dashboard()
+        self.assertEqual(datos['valor_total_inventario'], '80.00')
+        self.assertEqual(datos['variacion_inventario'], '30.00')
+
+
+class PuntoReordenTest(TestCase):
+    def test_ventana_desde_la_medianoche_local(self):
+        empresa = Empresa.objects.create(nombre='Empresa Reorden')
+        producto = Producto.objects.create(nombre='Producto', precio=Decimal('1.00'), empresa=empresa)
+        hoy = medianoche(timezone.localdate())
+        vender(empresa, producto, hoy - timedelta(seconds=1), 100)
+        vender(empresa, producto, hoy, 4)
+
+        recalcular_puntos_reorden(empresa_ids=[empresa.id], dias=1, dias_reposicion=1, nivel_servicio_z=0)
+
+        producto.refresh_from_db()
+        self.assertEqual(producto.punto_reorden, 4)
+
+
+class RelacionadosVentanaTest(TestCase):
+    def test_cestas_desde_la_medianoche_local(self):
+        empresa = Empresa.objects.create(nombre='Empresa Cestas')
+        a, b, c = (Producto.objects.create(nombre=nombre, precio=Decimal('1.00'), empresa=empresa)
+                   for nombre in 'ABC')
+        hoy = medianoche(timezone.localdate())
+        vender(empresa, [a, c], hoy - timedelta(seconds=1), 1)
+        vender(empresa, [a, b], hoy, 1)
+
+        calcular_relacionados(empresa_ids=[empresa.id], dias=1, k=5, minimo=1)
+
+        self.assertEqual(sorted(ProductoRelacionado.objects.values_list('producto_id', 'relacionado_id')),
+                         sorted([(a.id, b.id), (b.id, a.id)]))
+
+
+def cestas(*ventas):
+    """Matriz ventas × productos (CSR binaria) con una fila por venta, como la de _cestas()."""
+    filas = [fila for fila, productos in enumerate(ventas) for _ in productos]
+    columnas = [producto for productos in ventas for producto in productos]
+    return sparse.csr_matrix((np.ones(len(filas), dtype=np.int32), (filas, columnas)),
+                             shape=(len(ventas), max(columnas) + 1))
+
+
+class VecinosTest(SimpleTestCase):
+    # Ventas con cada producto: 0 → 4, 1 → 3, 2 → 2, 3 → 3 (N = 6)
+    CESTAS = ({0, 1}, {0, 1}, {0, 2}, {0, 2, 3}, {3}, {1, 3})
+
+    def ranking(self, matriz, k, minimo):
+        producto, relacionado, posicion, *_ = vecinos(matriz, k, minimo)
+        resultado = {}
+        for p, r, pos in zip(producto.tolist(), relacionado.tolist(), posicion.tolist()):
+            resultado.setdefault(p, []).append((pos, r))
+        return {p: [r for _pos, r in sorted(filas)] for p, filas in resultado.items()}
+
+    def test_top_k_por_lift(self):
+        # lift(0,2)=1,5  lift(0,1)=lift(2,3)=1  lift(1,3)=0,67  lift(0,3)=0,5
+        self.assertEqual(self.ranking(cestas(*self.CESTAS), k=2, minimo=1),
+                         {0: [2, 1], 1: [0, 3], 2: [0, 3], 3: [2, 1]})
+
+    def test_metricas_del_par(self):
+        producto, relacionado, posicion, conteo, confianza, lift = vecinos(cestas(*self.CESTAS), k=1, minimo=1)
+        i = producto.tolist().index(0)
+        self.assertEqual((relacionado[i], posicion[i], conteo[i]), (2, 1, 2))
+        self.assertAlmostEqual(confianza[i], 0.5)
+        self.assertAlmostEqual(lift[i], 1.5)
+
+    def test_minimo_de_coocurrencias(self):
+        # Solo (0,1) y (0,2) se compran juntos dos veces; el 3 se queda sin relacionados
+        self.assertEqual(self.ranking(cestas(*self.CESTAS), k=5, minimo=2), {0: [2, 1], 1: [0], 2: [0]})
+
+    def test_empate_de_lift_por_coocurrencias(self):
+        # lift(0,1) = 1·5/(2·2) = lift(0,2) = 2·5/(2·4): gana el par con más coocurrencias
+        matriz = cestas({0, 1, 2}, {1}, {0, 2}, {2}, {2})
+        self.assertEqual(self.ranking(matriz, k=2, minimo=1)[0], [2, 1])
+
+
+class ClasesTest(SimpleTestCase):
+    def test_abc_por_participacion_acumulada_en_su_empresa(self):
+        # Empresa 1: 50, 30, 15, 5 y 0 (antes de cada uno: 0 %, 50 %, 80 %, 95 %, 100 %);
+        # empresa 2: 10 y 10; empresa 3, sin ingresos. Mezcladas en la entrada
+        empresas = np.array([1, 2, 1, 3, 1, 1, 2, 1])
+        ingresos = np.array([15.0, 10.0, 50.0, 0.0, 0.0, 30.0, 10.0, 5.0])
+
+        clase, participacion = clases_abc(empresas, ingresos, umbral_a=0.80, umbral_b=0.95)
+
+        # Quien empieza justo en el umbral ya no entra en la clase
+        self.assertEqual(clase.tolist(), ['B', 'A', 'A', 'C', 'C', 'A', 'A', 'C'])
+        np.testing.assert_allclose(participacion, [0.95, 0.5, 0.5, 0.0, 1.0, 0.8, 1.0, 1.0])
+
+    def test_xyz_por_coeficiente_de_variacion(self):
+        demanda = np.array([
+            [1, 1, 1, 1],  # cv 0
+            [3, 1, 3, 1],  # cv 0,5: todavía X
+            [2, 0, 2, 0],  # cv 1: todavía Y
+            [4, 0, 0, 0],  # cv √3
+            [0, 0, 0, 0],  # sin ventas
+        ], dtype=float)
+
+        clase, cv = clases_xyz(demanda, cv_x=0.5, cv_y=1.0)
+
+        self.assertEqual(clase.tolist(), ['X', 'X', 'Y', 'Z', 'Z'])
+        np.testing.assert_allclose(cv, [0.0, 0.5, 1.0, 3 ** 0.5, np.nan])
+
+
+class ClasificacionVentanaTest(TestCase):
+    def test_semanas_completas_entre_medianoches_locales(self):
+        empresa = Empresa.objects.create(nombre='Empresa Clases')
+        dentro, fuera = (Producto.objects.create(nombre=nombre, precio=Decimal('1.00'), empresa=empresa)
+                         for nombre in ('Dentro', 'Fuera'))
+        hoy = timezone.localdate()
+        lunes = medianoche(hoy - timedelta(days=hoy.weekday()))
+        # El último instante de la semana pasada cuenta; el comienzo de la actual, no
+        vender(empresa, dentro, lunes - timedelta(seconds=1), 1)
+        vender(empresa, fuera, lunes, 1)
+        vender(empresa, fuera, lunes - timedelta(weeks=1, seconds=1), 1)
+
+        clasificar_productos(empresa_ids=[empresa.id], semanas=1)
+
+        clases = dict(ClasificacionProducto.objects.values_list('producto__nombre', 'ingresos'))
+        self.assertEqual(clases, {'Dentro': Decimal('1.00'), 'Fuera': Decimal('0.00')})
+
+    def test_umbral_cero_no_toma_el_valor_por_defecto(self):
+        empresa = Empresa.objects.create(nombre='Empresa Umbral')
+        producto = Producto.objects.create(nombre='Variable', precio=Decimal('1.00'), empresa=empresa)
+        hoy = timezone.localdate()
+        lunes = medianoche(hoy - timedelta(days=hoy.weekday()))
+        vender(empresa, producto, lunes - timedelta(weeks=1), 1)
+        vender(empresa, producto, lunes - timedelta(weeks=2), 3)
+
+        # cv = 0,5: con el valor por defecto (0,5) sería X; con cv_x=0, Y
+        clasificar_productos(empresa_ids=[empresa.id], semanas=2, cv_x=0)
+
+        self.assertEqual(ClasificacionProducto.objects.get(producto=producto).clase_xyz, 'Y')
+
+
+class IntegridadTest(TestCase):
+    def crear(self, nombre, stock):
+        return Producto.objects.create(nombre=nombre, precio=Decimal('1.00'), stock=stock, empresa=self.empresa)
+
+    def setUp(self):
+        self.empresa = Empresa.objects.create(nombre='Empresa Integridad')
+        proveedor = Proveedor.objects.create(empresa=self.empresa, nombre='Proveedor')
+        # Líneas cargadas sin pasar por save(): el stock guardado no se mueve
+        self.cuadrado = self.crear('Cuadrado', 10)
+        for estado in ('Completada', 'Cancelada'):
+            venta = vender(self.empresa, self.cuadrado, timezone.now(), 3, estado=estado)
+            Venta.objects.filter(pk=venta.pk).update(monto_total=Decimal('3.00'))
+        Producto.objects.filter(pk=self.cuadrado.pk).update(stock=7)
+
+        # Stock inicial 10 + entrada aceptada de 5 = 15, guardado 12
+        self.descuadrado = self.crear('Descuadrado', 10)
+        movimiento = Movimiento.objects.create(empresa=self.empresa, proveedor=proveedor, estado='Aceptado')
+        DetalleMovimiento.objects.create(movimiento=movimiento, producto=self.descuadrado,
+                                         cantidad_suministrada=5, valor_unitario=Decimal('1.00'))
+        Producto.objects.filter(pk=self.descuadrado.pk).update(stock=12)
+
+        # Vendió 2 sin stock inicial: esperado −2, y la venta guarda monto_total 0 en lugar de 2
+        self.negativo = self.crear('Negativo', 0)
+        self.venta = vender(self.empresa, self.negativo, timezone.now(), 2)
+
+    def test_detecta_sin_reparar(self):
+        (resultado,) = verificar_integridad(empresa_ids=[self.empresa.id], hilos=1)
+
+        self.assertEqual((resultado['ventas'], resultado['productos'], resultado['negativos']), (1, 2, 1))
+        self.assertEqual((resultado['reparadas'], resultado['reparados']), (0, 0))
+        self.assertEqual(resultado['muestra_ventas'], [(self.venta.id, Decimal('0.00'), Decimal('2.00'))])
+        self.assertEqual(resultado['muestra_productos'], [(self.descuadrado.id, 12, 15), (self.negativo.id, 0, -2)])
+        self.descuadrado.refresh_from_db()
+        self.assertEqual(self.descuadrado.stock, 12)
+
+    def test_reparar_salta_el_stock_esperado_negativo(self):
+        (resultado,) = verificar_integridad(empresa_ids=[self.empresa.id], reparar=True, hilos=1)
+        self.assertEqual((resultado['reparadas'], resultado['reparados']), (1, 1))
+
+        stocks = dict(Producto.objects.filter(empresa=self.empresa).values_list('nombre', 'stock'))
+        self.assertEqual(stocks, {'Cuadrado': 7, 'Descuadrado': 15, 'Negativo': 0})
+        self.venta.refresh_from_db()
+        self.assertEqual(self.venta.monto_total, Decimal('2.00'))
+
+        (despues,) = verificar_integridad(empresa_ids=[self.empresa.id], hilos=1)
+        self.assertEqual((despues['ventas'], despues['productos'], despues['negativos']), (0, 1, 1))
+
+    def test_comando(self):
+        salida = StringIO()
+        call_command('verificar_integridad', empresa=[self.empresa.id], reparar=True, hilos=1, stdout=salida)
+
+        self.assertIn('(1 con stock esperado negativo, no reparables); reparadas 1 ventas y 1 productos',
+                      salida.getvalue())
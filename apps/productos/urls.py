@@ -1,6 +1,6 @@
 # apps/productos/urls.py
 from django.urls import path
-from .views import ProductoListView, ProductoDetailView, DemandaPredictivaView
+from .views import ProductoListView, ProductoDetailView, DemandaPredictivaView, ProductoRelacionadosView
 
 urlpatterns = [
     # Esta ruta ahora será: /api/public-products/empresas/<int:empresa_id>/productos/
@@ -35,4 +35,6 @@ urlpatterns = [
     # Estas rutas se accederán como: /api/public-products/<int:pk>/ y /api/public-products/<int:pk>/demanda-predictiva/
     path('<int:pk>/', ProductoDetailView.as_view(), name='producto-detail'),
     path('<int:pk>/demanda-predictiva/', DemandaPredictivaView.as_view(), name='producto-demanda-predictiva'),
+    # Comprados juntos a menudo (tabla precalculada con manage.py calcular_relacionados)
+    path('<int:pk>/relacionados/', ProductoRelacionadosView.as_view(), name='producto-relacionados'),
 ]
\ No newline at end of file
@@ -0,0 +1,111 @@
+# apps/productos/valoracion.py
+
+"""
+Valoración del inventario por fecha.
+
+valorar_inventario() agrupa en una consulta los productos de las empresas por empresa y
+almacén (productos, unidades, precio × stock y costo promedio × stock) y guarda una fila de
+ValoracionInventario por grupo con la fecha del día. Volver a correrlo el mismo día
+reemplaza la valoración de ese día. Así "¿cuánto valía el stock a fin de mes?" es una lectura
+de unas pocas filas (valoraciones()) y no una suma sobre todos los productos.
+
+El dashboard parte de la última valoración de cada empresa y le suma el movimiento de stock
+posterior (flujos_posteriores()): las líneas de venta no canceladas y los movimientos
+aceptados desde el cálculo de la valoración, a precio actual. Los cambios de stock que no
+pasan por ventas ni movimientos (ediciones manuales, cancelaciones de ventas anteriores)
+aparecen con la valoración siguiente.
+"""
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Subquery, Sum, When
+from django.utils import timezone
+
+from apps.empresas.models import Empresa
+from apps.movimientos.models import DetalleMovimiento
+from apps.ventas.models import DetalleVenta
+from .models import Producto, ValoracionInventario
+
+VALOR = DecimalField(max_digits=16, decimal_places=2)
+
+
+def valorar_inventario(empresa_ids=None, fecha=None, lote=1000):
+    """
+    Guarda la valoración de `fecha` (hoy) de las empresas activas (o de `empresa_ids`).
+    Devuelve un dict con empresas valoradas, filas guardadas y valor total a precio de venta.
+    """
+    fecha = fecha or timezone.localdate()
+    empresas = Empresa.objects.filter(id__in=empresa_ids) if empresa_ids else Empresa.objects.filter(is_active=True)
+    grupos = Producto.objects.filter(empresa__in=empresas).values('empresa_id', 'almacen_id').annotate(
+        productos=Count('id'),
+        unidades=Sum('stock'),
+        valor_venta=Sum(F('precio') * F('stock'), output_field=VALOR),
+        valor_costo=Sum(F('costo_promedio') * F('stock'), output_field=VALOR),
+    ).order_by()
+
+    ahora = timezone.now()
+    filas = [
+        ValoracionInventario(
+            empresa_id=grupo['empresa_id'], almacen_id=grupo['almacen_id'], fecha=fecha,
+            productos=grupo['productos'], unidades=grupo['unidades'] or 0,
+            valor_venta=round(grupo['valor_venta'] or 0, 2), valor_costo=round(grupo['valor_costo'] or 0, 2),
+            calculado_en=ahora,
+        )
+        for grupo in grupos
+    ]
+    with transaction.atomic():
+        ValoracionInventario.objects.filter(empresa__in=empresas, fecha=fecha).delete()
+        ValoracionInventario.objects.bulk_create(filas, batch_size=lote)
+    return {
+        'empresas': len({fila.empresa_id for fila in filas}),
+        'filas': len(filas),
+        'valor_venta': sum((fila.valor_venta for fila in filas), 0),
+    }
+
+
+def _ultima(campo, hasta=None, empresa_ref='empresa_id'):
+    """Subconsulta: `campo` de la última valoración (hasta `hasta`) de la empresa de la fila externa."""
+    ultimas = ValoracionInventario.objects.filter(empresa_id=OuterRef(empresa_ref))
+    if hasta is not None:
+        ultimas = ultimas.filter(fecha__lte=hasta)
+    return Subquery(ultimas.order_by('-fecha', '-calculado_en').values(campo)[:1])
+
+
+def valoraciones(empresa_id=None, hasta=None):
+    """
+    Filas de la última valoración de cada empresa (o de `empresa_id`) con fecha hasta `hasta`
+    (por defecto, la más reciente), una por almacén.
+    """
+    filas = ValoracionInventario.objects.all()
+    if empresa_id is not None:
+        filas = filas.filter(empresa_id=empresa_id)
+    return filas.filter(fecha=_ultima('fecha', hasta))
+
+
+def flujos_posteriores(empresa_id=None):
+    """
+    Variación de stock desde la última valoración de cada empresa, por almacén: dos
+    querysets (ventas y movimientos) con filas {almacen_id, unidades, valor} a precio actual.
+    Las empresas sin valoración no aportan filas.
+    """
+    ventas = DetalleVenta.objects.exclude(venta__estado='Cancelada')
+    movimientos = DetalleMovimiento.objects.filter(movimiento__estado='Aceptado')
+    if empresa_id is not None:
+        ventas = ventas.filter(venta__empresa_id=empresa_id)
+        movimientos = movimientos.filter(movimiento__empresa_id=empresa_id)
+
+    ventas = ventas.filter(
+        venta__fecha__gt=_ultima('calculado_en', empresa_ref='venta__empresa_id'),
+    ).values(almacen_id=F('producto__almacen_id')).annotate(
+        unidades=-Sum('cantidad'),
+        valor=-Sum(F('cantidad') * F('producto__precio'), output_field=VALOR),
+    ).order_by()
+
+    # Con proveedor es una entrada (suma stock); sin proveedor, una salida (resta)
+    signo = Case(When(movimiento__proveedor__isnull=False, then=1), default=-1)
+    movimientos = movimientos.filter(
+        movimiento__fecha_aceptacion__gt=_ultima('calculado_en', empresa_ref='movimiento__empresa_id'),
+    ).values(almacen_id=F('producto__almacen_id')).annotate(
+        unidades=Sum(signo * F('cantidad_suministrada')),
+        valor=Sum(signo * F('cantidad_suministrada') * F('producto__precio'), output_field=VALOR),
+    ).order_by()
+    return ventas, movimientos
@@ -8,16 +8,28 @@ from rest_framework.response import Response  # Importar Response
 from rest_framework import status  # Importar status
 
 # Importaciones para DemandaPredictivaView
+from django.conf import settings
+from django.views import View
 from django.db.models import Sum, Avg, Count, F, Q, Value  # Asegurarse de que Value está aquí
 from django.db.models.functions import Coalesce, Concat  # Asegurarse de que Concat y Coalesce están aquí
 from django.utils import timezone
 from datetime import datetime, timedelta
-import random  # Para simular la aleatoriedad del modelo predictivo
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 
 from apps.empresas.models import Empresa
-from .models import Producto
-from .serializers import ProductoSerializer, ProductoListSerializer  # Asegurarse de importar ProductoListSerializer
+from .models import Producto, ProductoRelacionado
+from .serializers import (  # Asegurarse de importar ProductoListSerializer
+    ProductoSerializer, ProductoListSerializer, AlertaStockSerializer, ProductoRelacionadoSerializer,
+    ValoracionInventarioSerializer,
+)
+from .valoracion import valoraciones
 from .filters import ProductoFilter
+from erp.pagination import KeysetPagination
+from erp.asincrono import PaginaInvalida, error, paginar, respuesta_json
+from erp.exportacion import ExportacionMixin
+from erp.fastjson import FastListMixin
+from apps.predicciones.forecasting import modelo_vigente
 
 
 class ProductoPermission(permissions.BasePermission):
@@ -67,7 +79,7 @@ class ProductoPermission(permissions.BasePermission):
         return False
 
 
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(ExportacionMixin, FastListMixin, viewsets.ModelViewSet):
     """
     ViewSet para la gestión de Productos (parte administrativa).
     Proporciona acciones de listado, creación, recuperación, actualización y eliminación,
@@ -76,7 +88,8 @@ class ProductoViewSet(viewsets.ModelViewSet):
     serializer_class = ProductoSerializer
     permission_classes = [ProductoPermission]  # Asegúrate que tu permiso personalizado está activo aquí
 
-    filter_backends = [filters.SearchFilter, django_filters.rest_framework.DjangoFilterBackend]
+    filter_backends = [filters.SearchFilter, django_filters.rest_framework.DjangoFilterBackend,
+                       filters.OrderingFilter]
     filterset_class = ProductoFilter
     search_fields = [
         'nombre',
@@ -85,8 +98,31 @@ class ProductoViewSet(viewsets.ModelViewSet):
         'almacen__nombre',
         'almacen__sucursal__nombre',
     ]
+    # Orden opcional (?ordering=), p. ej. por clase ABC o ingresos del periodo
+    ordering_fields = [
+        'nombre', 'precio', 'stock',
+        'clasificacion__clase_abc', 'clasificacion__clase_xyz', 'clasificacion__ingresos',
+    ]
     # --- Importante: Define un queryset por defecto para que el router lo registre ---
     queryset = Producto.objects.all()
+    # Con ?ordering= la paginación cae a número de página (ver KeysetPagination)
+    pagination_class = KeysetPagination
+    keyset_ordering = ('nombre', 'id')
+    export_nombre = 'productos'
+    export_columns = (
+        ('id', 'ID', 8),
+        ('nombre', 'Nombre', 30),
+        ('categoria__nombre', 'Categoría', 20),
+        ('almacen__nombre', 'Almacén', 20),
+        ('precio', 'Precio', 10),
+        ('descuento', 'Descuento', 9),
+        ('stock', 'Stock', 7),
+        ('punto_reorden', 'Punto Reorden', 13),
+        ('costo_promedio', 'Costo Promedio', 14),
+        ('clasificacion__clase_abc', 'ABC', 4),
+        ('clasificacion__clase_xyz', 'XYZ', 4),
+        ('is_active', 'Activo', 6),
+    )
 
     # --- Consolidación del get_queryset ---
     def get_queryset(self):
@@ -124,27 +160,115 @@ class ProductoViewSet(viewsets.ModelViewSet):
         print(f"\n--- DEBUG: ProductoViewSet está usando el serializer: {serializer_class.__name__} ---")
         return serializer_class
 
+    @action(detail=False, methods=['get'], url_path='alertas-stock')
+    def alertas_stock(self, request):
+        """
+        Productos con stock en o por debajo de su punto de reorden, paginados.
+        La marca bajo_stock se mantiene al guardar el producto, así que la consulta
+        recorre solo el índice parcial de productos en alerta.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).filter(bajo_stock=True) \
+            .select_related('categoria', 'almacen')
+        page = self.paginate_queryset(queryset)
+        serializer = AlertaStockSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='valoracion')
+    def valoracion(self, request):
+        """
+        Valoración del inventario por almacén en ?fecha=AAAA-MM-DD: la última guardada hasta
+        ese día (por defecto, la más reciente) por manage.py valorar_inventario. Lee solo las
+        filas de esa valoración. Los superusuarios ven todas las empresas o ?empresa=<id>.
+        """
+        user = request.user
+        if user.is_superuser:
+            empresa_id = request.query_params.get('empresa') or None
+            if empresa_id is not None and not empresa_id.isdigit():
+                raise ValidationError({'empresa': "Debe ser un ID numérico."})
+        else:
+            empresa_id = user.empresa_id
+        hasta = None
+        if request.query_params.get('fecha'):
+            try:
+                hasta = datetime.strptime(request.query_params['fecha'], '%Y-%m-%d').date()
+            except ValueError:
+                raise ValidationError({'fecha': "Formato de fecha inválido. Use %Y-%m-%d."})
+
+        filas = list(valoraciones(empresa_id, hasta).select_related('almacen').order_by('empresa_id', 'almacen_id'))
+        if not filas:
+            return Response({"error": "No hay valoraciones de inventario hasta esa fecha."},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'fecha': max(fila.fecha for fila in filas),
+            'totales': {
+                'productos': sum(fila.productos for fila in filas),
+                'unidades': sum(fila.unidades for fila in filas),
+                'valor_venta': f"{sum(fila.valor_venta for fila in filas):.2f}",
+                'valor_costo': f"{sum(fila.valor_costo for fila in filas):.2f}",
+            },
+            'almacenes': ValoracionInventarioSerializer(filas, many=True).data,
+        })
+
+    @action(detail=False, methods=['get'], url_path='demanda-predictiva')
+    def demanda_predictiva(self, request):
+        """
+        Predicción de demanda de los productos visibles (paginada), calculada en bloque con el
+        modelo vigente de cada empresa: solo se proyectan las filas de los productos de la página.
+        """
+        horizonte = _horizonte(request)
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+
+        modelos = {}  # empresa_id -> pronosticador vigente (o None)
+        posiciones = {}  # producto_id -> fila en el modelo de su empresa (o None sin historial)
+        for producto in page:
+            if producto.empresa_id not in modelos:
+                modelos[producto.empresa_id] = modelo_vigente(producto.empresa_id)
+            pronosticador = modelos[producto.empresa_id]
+            posiciones[producto.id] = pronosticador.posicion(producto.id) if pronosticador else None
+
+        totales = {}  # producto_id -> demanda total en el horizonte
+        for empresa_id, pronosticador in modelos.items():
+            ids = [producto.id for producto in page
+                   if producto.empresa_id == empresa_id and posiciones[producto.id] is not None]
+            if ids:
+                diaria = pronosticador.predecir_filas([posiciones[pid] for pid in ids], horizonte)
+                totales.update(zip(ids, diaria.sum(axis=1).tolist()))
+
+        resultados = []
+        for producto in page:
+            pronosticador = modelos[producto.empresa_id]
+            posicion = posiciones[producto.id]
+            resultados.append({
+                'producto_id': producto.id,
+                'producto_nombre': producto.nombre,
+                'stock': producto.stock,
+                'prediccion_demanda': (round(totales[producto.id]) if posicion is not None else 0)
+                if pronosticador else None,
+                'confianza_prediccion': round(float(pronosticador.confianza[posicion]) * 100, 2)
+                if posicion is not None else None,
+                'modelo_version': pronosticador.version if pronosticador else None,
+            })
+        return self.get_paginated_response(resultados)
+
 
 # --- NUEVAS VISTAS PARA EL MARKETPLACE PÚBLICO ---
 
-class ProductoListView(generics.ListAPIView):
+class ProductoListView(View):
     """
     Vista para listar productos de una empresa específica en el marketplace público.
-    No requiere autenticación.
+    No requiere autenticación. Async, como el resto del marketplace (apps.empresas.views).
     """
-    serializer_class = ProductoListSerializer  # Usamos el serializer más ligero para la lista
-    permission_classes = []  # Acceso público
 
-    def get_queryset(self):
-        empresa_id = self.kwargs['empresa_id']  # Obtiene el ID de la empresa de la URL
-        try:
-            # Asegúrate de que la empresa exista y esté activa para listar sus productos
-            empresa = Empresa.objects.get(id=empresa_id, is_active=True)
-        except Empresa.DoesNotExist:
-            return Producto.objects.none()  # Si la empresa no existe o no está activa, no hay productos que mostrar
-
-        # Filtra productos por la empresa y solo los activos (asumiendo 'is_active' en Producto)
-        return Producto.objects.filter(empresa=empresa, is_active=True).order_by('nombre')
+    async def get(self, request, empresa_id):
+        # Si la empresa no existe o no está activa, no hay productos que mostrar
+        queryset = Producto.objects.filter(
+            empresa_id=empresa_id, empresa__is_active=True, is_active=True,
+        ).select_related('categoria', 'empresa').order_by('nombre')
+        pagina = await paginar(request, queryset, lambda productos: ProductoListSerializer(
+            productos, many=True, context={'request': request}).data)
+        if pagina is None:
+            return error(PaginaInvalida)
+        return respuesta_json(pagina)
 
 
 class ProductoDetailView(generics.RetrieveAPIView):
@@ -161,10 +285,48 @@ class ProductoDetailView(generics.RetrieveAPIView):
         return Producto.objects.filter(is_active=True, empresa__is_active=True)
 
 
-# --- Endpoint para el Modelo Predictivo de Demanda (SIMPLIFICADO) ---
+class ProductoRelacionadosView(generics.ListAPIView):
+    """
+    Productos comprados junto con el producto `pk` en el marketplace público, ordenados por
+    lift. Se leen de la tabla precalculada (manage.py calcular_relacionados) por su índice:
+    aquí no se analizan ventas. No requiere autenticación.
+    """
+    serializer_class = ProductoRelacionadoSerializer
+    permission_classes = []  # Acceso público
+    pagination_class = None  # Como mucho RECOMENDACIONES_VECINOS filas
+
+    def get_queryset(self):
+        return ProductoRelacionado.objects.filter(
+            producto_id=self.kwargs['pk'], producto__is_active=True, producto__empresa__is_active=True,
+            relacionado__is_active=True,
+        ).select_related('relacionado__categoria', 'relacionado__empresa').order_by('posicion')
+
+    def list(self, request, *args, **kwargs):
+        relacionados = list(self.get_queryset())
+        # Sin relacionados: distinguir un producto sin co-compras de uno que no existe
+        if not relacionados and not Producto.objects.filter(
+                pk=self.kwargs['pk'], is_active=True, empresa__is_active=True).exists():
+            return Response({"error": "Producto no encontrado o inactivo."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(self.get_serializer(relacionados, many=True).data)
+
+
+# --- Endpoint para el Modelo Predictivo de Demanda ---
+
+def _horizonte(request):
+    """Lee ?dias= (1..90); por defecto DEMANDA_HORIZONTE_DIAS."""
+    por_defecto = getattr(settings, 'DEMANDA_HORIZONTE_DIAS', 7)
+    try:
+        dias = int(request.query_params.get('dias', por_defecto))
+    except (TypeError, ValueError):
+        return por_defecto
+    return min(max(dias, 1), 90)
+
+
 class DemandaPredictivaView(generics.GenericAPIView):
     """
-    Vista para obtener una predicción de demanda simulada para un producto.
+    Vista para obtener la predicción de demanda de un producto.
+    Se sirve desde el modelo vigente de su empresa (apps.predicciones), entrenado por lotes
+    con `manage.py entrenar_demanda`; aquí no se entrena ni se consulta el historial.
     """
     permission_classes = []  # Público para esta demo
 
@@ -175,31 +337,30 @@ class DemandaPredictivaView(generics.GenericAPIView):
         except Producto.DoesNotExist:
             return Response({"error": "Producto no encontrado o inactivo."}, status=status.HTTP_404_NOT_FOUND)
 
-        # --- SIMULACIÓN DEL MODELO PREDICTIVO DE DEMANDA ---
-        # COMENTARIO CLAVE PARA LA EXPLICACIÓN: Aquí es donde iría tu lógica
-        # del modelo predictivo real (IA). Para esta demo rápida, simulamos:
-
-        # Una "demanda base" que podría ser, por ejemplo, el 10-30% del stock actual.
-        base_demanda_simulada = producto.stock * random.uniform(0.1, 0.3)
-
-        # Un factor aleatorio que añade variabilidad. Simula picos o caídas inesperadas.
-        factor_variabilidad = random.uniform(0.8, 1.2)
-
-        # Cálculo final de la predicción, redondeado a un número entero de unidades.
-        prediccion_demanda = round(base_demanda_simulada * factor_variabilidad)
-
-        # Asegurarse de que la predicción nunca sea un número negativo (la demanda siempre es >= 0)
-        prediccion_demanda = max(0, prediccion_demanda)
-
-        # Simular una "confianza" en la predicción.
-        confianza_prediccion = random.uniform(0.7, 0.95)
+        horizonte = _horizonte(request)
+        pronosticador = modelo_vigente(producto.empresa_id)
+        if pronosticador is None:
+            return Response(
+                {"error": "Todavía no hay un modelo de demanda entrenado para esta empresa."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        resultado = pronosticador.predecir(producto.id, horizonte)
+        if resultado is None:
+            # Sin ventas en el periodo de entrenamiento: no hay demanda que proyectar
+            diaria, confianza = [0.0] * horizonte, 0.0
+        else:
+            diaria, confianza = resultado
 
         return Response({
             "producto_id": producto.id,
             "producto_nombre": producto.nombre,
-            "prediccion_demanda_proximos_dias": prediccion_demanda,
-            "confianza_prediccion": round(confianza_prediccion * 100, 2),  # Se muestra en porcentaje
+            "prediccion_demanda_proximos_dias": round(float(sum(diaria))),
+            "prediccion_diaria": [round(float(valor), 2) for valor in diaria],
+            "horizonte_dias": horizonte,
+            "confianza_prediccion": round(confianza * 100, 2),  # Se muestra en porcentaje
             "fecha_prediccion": timezone.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "explicacion_simplificada": "Esta predicción de demanda se genera simulando un análisis de datos históricos de ventas y aplicando factores de variabilidad aleatorios. Aunque es una simulación, representa cómo un modelo de IA real optimizaría la gestión de tu inventario.",
+            "modelo_version": pronosticador.version,
+            "explicacion_simplificada": "La predicción se calcula con un modelo entrenado sobre el historial diario de ventas de la empresa, a partir de las ventas recientes del producto, sus promedios semanal y mensual y el patrón por día de la semana. La confianza indica qué tan bien explica el modelo las ventas pasadas del producto.",
             "beneficio_erp": "La predicción de demanda te permite anticiparte a las necesidades del mercado, optimizar tus niveles de stock, reducir costos por exceso de inventario y evitar la pérdida de ventas por falta de existencias."
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.1 on 2026-10-19 07:12
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def costos_iniciales(apps, schema_editor):
+    """
+    Punto de partida del costeo: cada producto toma el costo ponderado de todas sus entradas
+    aceptadas y las líneas de venta ya registradas toman el costo de su producto.
+    """
+    Producto = apps.get_model('productos', 'Producto')
+    DetalleMovimiento = apps.get_model('movimientos', 'DetalleMovimiento')
+    DetalleVenta = apps.get_model('ventas', 'DetalleVenta')
+
+    compras = DetalleMovimiento.objects.filter(movimiento__estado='Aceptado', movimiento__proveedor__isnull=False) \
+        .values('producto_id') \
+        .annotate(unidades=models.Sum('cantidad_suministrada'),
+                  valor=models.Sum(models.F('cantidad_suministrada') * models.F('valor_unitario'),
+                                   output_field=models.DecimalField(max_digits=20, decimal_places=4))) \
+        .order_by()
+    productos = [
+        Producto(id=fila['producto_id'],
+                 costo_promedio=(Decimal(str(fila['valor'])) / fila['unidades']).quantize(Decimal('0.0001')))
+        for fila in compras if fila['unidades']
+    ]
+    Producto.objects.bulk_update(productos, ['costo_promedio'], batch_size=1000)
+
+    DetalleVenta.objects.filter(costo_unitario__isnull=True).update(costo_unitario=models.Subquery(
+        Producto.objects.filter(pk=models.OuterRef('producto_id')).values('costo_promedio')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movimientos', '0003_movimiento_created_at_movimiento_updated_at'),
+        ('productos', '0007_producto_costo_promedio'),
+        ('ventas', '0005_alter_detalleventa_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detalleventa',
+            name='costo_unitario',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, help_text='Costo unitario promedio del producto al momento de la venta.', max_digits=14, null=True),
+        ),
+        migrations.RunPython(costos_iniciales, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 # apps/ventas/models.py
 
+from decimal import Decimal
+
 from django.db import models
 from django.db.models import Sum, F, ExpressionWrapper, DecimalField, Case, When
 from django.db import transaction
@@ -109,6 +111,9 @@ class DetalleVenta(models.Model):
                                           help_text="Precio unitario del producto al momento de la venta.")
     descuento_aplicado = models.DecimalField(max_digits=5, decimal_places=4, default=0.0000,
                                              help_text="Descuento aplicado por unidad (ej. 0.10 para 10%).")
+    # Costo promedio del producto al momento de la venta (margen bruto sin recalcular historia)
+    costo_unitario = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True, editable=False,
+                                         help_text="Costo unitario promedio del producto al momento de la venta.")
 
     # Campos de auditoría
     fecha_creacion = models.DateTimeField(auto_now_add=True)
@@ -142,6 +147,9 @@ class DetalleVenta(models.Model):
             except DetalleVenta.DoesNotExist:
                 pass # Esto no debería pasar en una actualización normal
 
+        if is_new and self.costo_unitario is None:
+            self.costo_unitario = self.producto.costo_promedio
+
         super().save(*args, **kwargs)
 
         # Si es un nuevo detalle o la cantidad ha cambiado, ajustar stock
@@ -92,19 +92,7 @@ class VentaSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         detalles_data = validated_data.pop('detalles')
 
-        usuario_id = validated_data.pop('usuario')
-        try:
-            usuario_obj = CustomUser.objects.get(id=usuario_id)
-        except CustomUser.DoesNotExist:
-            raise serializers.ValidationError({"usuario": f"El usuario con ID {usuario_id} no existe."})
-        validated_data['usuario'] = usuario_obj
-
-        empresa_id = validated_data.pop('empresa')
-        try:
-            empresa_obj = Empresa.objects.get(id=empresa_id)
-        except Empresa.DoesNotExist:
-            raise serializers.ValidationError({"empresa": f"La empresa con ID {empresa_id} no existe."})
-        validated_data['empresa'] = empresa_obj
+        # 'usuario' y 'empresa' llegan ya resueltos como instancias (PrimaryKeyRelatedField valida que existan)
 
         # Si el origen no se proporciona o no es válido, se usará el valor por defecto del modelo ('MANUAL')
         # Si se envía explícitamente desde el frontend (ej. 'MARKETPLACE'), validated_data lo tendrá.
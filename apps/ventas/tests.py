@@ -1,3 +1,141 @@
+# apps/ventas/tests.py
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.empresas.models import Empresa
+from apps.productos.models import Producto
+from apps.rbac.models import Role
+from apps.usuarios.models import CustomUser
+from .models import DetalleVenta, Venta
+
+
+def crear_admin(empresa):
+    """Administrador de `empresa` y un cliente de la API autenticado con su JWT."""
+    usuario = CustomUser.objects.create_user(
+        username='admin', email='admin@test.local', password='clave1234',
+        first_name='Admín', last_name='Test', ci='CI-1',
+        role=Role.objects.get(name='Administrador'), empresa=empresa,
+    )
+    cliente = APIClient()
+    cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(usuario).access_token}')
+    return usuario, cliente
+
+
+class KeysetVentasTest(TestCase):
+    """Recorrido por cursor de /api/ventas/ (orden -fecha, -id)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre='Empresa Cursor')
+        ahora = timezone.now().replace(microsecond=0)
+        # Tres ventas con la misma fecha en medio: el id desempata
+        fechas = [ahora, ahora - timedelta(minutes=1), ahora - timedelta(minutes=1),
+                  ahora - timedelta(minutes=1), ahora - timedelta(minutes=2), ahora - timedelta(minutes=3),
+                  ahora - timedelta(minutes=4)]
+        for fecha in fechas:
+            venta = Venta.objects.create(empresa=cls.empresa)
+            Venta.objects.filter(pk=venta.pk).update(fecha=fecha)
+        cls.orden = list(Venta.objects.order_by('-fecha', '-id').values_list('id', flat=True))
+
+    def setUp(self):
+        _, self.cliente = crear_admin(self.empresa)
+
+    def pagina(self, url):
+        respuesta = self.cliente.get(url)
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        datos = respuesta.json()
+        return [fila['id'] for fila in datos['results']], datos
+
+    def test_recorrido_completo_hacia_adelante_y_atras(self):
+        paginas = []
+        url = '/api/ventas/?page_size=3'
+        while url:
+            ids, datos = self.pagina(url)
+            paginas.append(ids)
+            self.assertIsNone(datos['count'])
+            url = datos['next']
+        self.assertEqual([len(ids) for ids in paginas], [3, 3, 1])
+        self.assertEqual(sum(paginas, []), self.orden)
+
+        # Desde la última página, "previous" devuelve las mismas páginas en sentido inverso
+        atras = []
+        url = datos['previous']
+        while url:
+            ids, datos = self.pagina(url)
+            atras.append(ids)
+            url = datos['previous']
+        self.assertEqual(atras, paginas[-2::-1])
+
+    def test_desempate_por_id_en_el_corte_de_pagina(self):
+        # La primera página corta entre las ventas con la misma fecha
+        primera, datos = self.pagina('/api/ventas/?page_size=2')
+        segunda, _ = self.pagina(datos['next'])
+        self.assertEqual(primera + segunda, self.orden[:4])
+
+    def test_conteo_exacto_opcional(self):
+        _, datos = self.pagina('/api/ventas/?page_size=3&count=exact')
+        self.assertEqual(datos['count'], len(self.orden))
+
+    def test_cursor_invalido(self):
+        respuesta = self.cliente.get('/api/ventas/?cursor=no-es-un-cursor')
+        self.assertEqual(respuesta.status_code, 404)
+
+    def test_page_cae_a_numero_de_pagina(self):
+        ids, datos = self.pagina('/api/ventas/?page=3&page_size=3')
+        # El orden de la página numerada es el del modelo (-fecha): la última tiene la venta más antigua
+        self.assertEqual(ids, self.orden[6:])
+        self.assertEqual(datos['count'], len(self.orden))
+        self.assertIsNone(datos['next'])
+
+
+class FastJsonVentasTest(TestCase):
+    """?fast=1 responde los mismos bytes que el serializer y el JSONRenderer de DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre='Empresa Ñandú')
+        productos = [
+            Producto.objects.create(nombre='Café', precio=Decimal('2.50'), empresa=cls.empresa),
+            Producto.objects.create(nombre='Línea\u2028separada', precio=Decimal('1.00'), empresa=cls.empresa),
+        ]
+        for i in range(5):
+            venta = Venta.objects.create(empresa=cls.empresa, estado='Completada' if i % 2 else 'Pendiente',
+                                         monto_total=Decimal('12.30') * i)
+            DetalleVenta.objects.bulk_create([
+                DetalleVenta(venta=venta, producto=producto, cantidad=i + 1, precio_unitario=producto.precio,
+                             descuento_aplicado=Decimal('0.1000') * i)
+                for producto in productos[:1 + i % 2]
+            ])
+        # Una venta sin líneas
+        Venta.objects.create(empresa=cls.empresa)
+
+    def setUp(self):
+        self.usuario, self.cliente = crear_admin(self.empresa)
+        # Con y sin usuario (usuario_nombre nulo)
+        Venta.objects.filter(pk__in=Venta.objects.order_by('id').values('pk')[:2]).update(usuario=self.usuario)
+
+    def comparar(self, parametros):
+        normal = self.cliente.get(f'/api/ventas/?{parametros}')
+        rapida = self.cliente.get(f'/api/ventas/?{parametros}&fast=1')
+        self.assertEqual(normal.status_code, 200, normal.content)
+        self.assertEqual(rapida.status_code, 200)
+        self.assertTrue(rapida.streaming)
+        # Los enlaces de la ruta rápida conservan ?fast=1 (el resto de parámetros va ordenado detrás)
+        self.assertEqual(b''.join(rapida.streaming_content).replace(b'fast=1&', b''), normal.content)
+
+    def test_pagina_con_cursor(self):
+        self.comparar('page_size=4')
+
+    def test_pagina_por_numero(self):
+        self.comparar('page=2&page_size=4')
 
-# Create your tests here.
+    def test_sin_orjson(self):
+        with mock.patch('erp.fastjson.orjson', None):
+            self.comparar('page_size=10')
@@ -8,6 +8,9 @@ from django.db import models
 from .models import Venta, DetalleVenta
 from .serializers import VentaSerializer, DetalleVentaSerializer
 from apps.productos.models import Producto
+from erp.pagination import KeysetPagination
+from erp.exportacion import ExportacionMixin
+from erp.fastjson import FastListMixin
 
 
 # --- Permisos Personalizados ---
@@ -28,9 +31,21 @@ class IsEmployeeOrHigher(permissions.BasePermission):
                      (hasattr(request.user, 'role') and request.user.role is not None and request.user.role.name in ['Administrador', 'Empleado'])))
 
 
-class VentaViewSet(viewsets.ModelViewSet):
+class VentaViewSet(ExportacionMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Venta.objects.all()
     serializer_class = VentaSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-fecha', '-id')
+    export_nombre = 'ventas'
+    export_columns = (
+        ('id', 'ID', 8),
+        ('fecha', 'Fecha', 19),
+        ('usuario__username', 'Usuario', 20),
+        ('empresa__nombre', 'Empresa', 25),
+        ('estado', 'Estado', 10),
+        ('origen', 'Origen', 12),
+        ('monto_total', 'Monto Total', 12),
+    )
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy', 'cancelar_venta']: # Añadir 'cancelar_venta'
@@ -0,0 +1,151 @@
+# benchmarks/medicion.py
+
+"""
+Medición de peticiones y comparación con las líneas base guardadas en baselines.json.
+
+Por cada endpoint se registra:
+- tiempo_ms: mediana del tiempo de pared de varias repeticiones.
+- consultas: número de consultas SQL de una petición.
+- filas: filas leídas de la base de datos (fetchone/fetchmany/fetchall) en esa petición.
+- memoria_kb: pico de memoria Python asignada durante la petición (tracemalloc). Se mide
+  en una repetición aparte porque tracemalloc ralentiza la ejecución.
+"""
+
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.db import connection
+from django.db.backends.utils import CursorDebugWrapper
+from django.test.utils import CaptureQueriesContext
+
+BASELINES = Path(__file__).with_name('baselines.json')
+
+# Margen permitido sobre la línea base antes de considerar que hay regresión.
+# El tiempo es ruidoso, así que su margen es amplio y configurable.
+TOLERANCIAS = {
+    'consultas': (1.0, 0),
+    'filas': (1.1, 10),
+    'memoria_kb': (1.25, 256),
+    'tiempo_ms': (float(os.getenv('ERP_BENCHMARKS_TOLERANCIA_TIEMPO', 1.5)), 5),
+}
+
+
+class _CursorContador(CursorDebugWrapper):
+    """Cursor que además de registrar las consultas cuenta las filas que se leen."""
+
+    def __init__(self, cursor, db, medicion):
+        super().__init__(cursor, db)
+        self.medicion = medicion
+
+    def fetchone(self):
+        with self.db.wrap_database_errors:
+            fila = self.cursor.fetchone()
+        if fila is not None:
+            self.medicion['filas'] += 1
+        return fila
+
+    def fetchmany(self, size=None):
+        with self.db.wrap_database_errors:
+            filas = self.cursor.fetchmany() if size is None else self.cursor.fetchmany(size)
+        self.medicion['filas'] += len(filas)
+        return filas
+
+    def fetchall(self):
+        with self.db.wrap_database_errors:
+            filas = self.cursor.fetchall()
+        self.medicion['filas'] += len(filas)
+        return filas
+
+
+@contextmanager
+def contar_sql():
+    """Cuenta consultas y filas leídas dentro del bloque. Devuelve un dict que se rellena al salir."""
+    medicion = {'consultas': 0, 'filas': 0}
+    connection.make_debug_cursor = lambda cursor: _CursorContador(cursor, connection, medicion)
+    try:
+        with CaptureQueriesContext(connection) as capturadas:
+            yield medicion
+    finally:
+        del connection.make_debug_cursor
+    medicion['consultas'] = len(capturadas)
+
+
+def _completa(funcion):
+    """
+    Ejecuta la petición y, si la respuesta es por streaming, la lee entera: la consulta y la
+    codificación ocurren al recorrer el generador, no al devolver la vista.
+    """
+    respuesta = funcion()
+    if getattr(respuesta, 'streaming', False):
+        for _bloque in respuesta.streaming_content:
+            pass
+        respuesta.close()
+    return respuesta
+
+
+def medir(funcion, repeticiones=5):
+    """
+    Ejecuta `funcion` (una petición) 1 + 1 + `repeticiones` veces: una para contar SQL,
+    una con tracemalloc y el resto cronometradas. Devuelve (respuesta, métricas).
+    Las respuestas por streaming se leen completas dentro de cada medición.
+    """
+    with contar_sql() as sql:
+        respuesta = _completa(funcion)
+
+    tracemalloc.start()
+    try:
+        _completa(funcion)
+        _actual, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        comienzo = time.perf_counter()
+        _completa(funcion)
+        tiempos.append((time.perf_counter() - comienzo) * 1000)
+
+    return respuesta, {
+        'tiempo_ms': round(statistics.median(tiempos), 2),
+        'consultas': sql['consultas'],
+        'filas': sql['filas'],
+        'memoria_kb': round(pico / 1024, 1),
+    }
+
+
+def motor():
+    """Clave de las líneas base: se guardan por motor de base de datos (sqlite, postgresql...)."""
+    return connection.vendor
+
+
+def cargar_baselines():
+    if not BASELINES.exists():
+        return {}
+    with open(BASELINES, encoding='utf-8') as fichero:
+        return json.load(fichero)
+
+
+def guardar_baselines(resultados):
+    """Fusiona `resultados` ({endpoint: métricas}) en las líneas base del motor actual."""
+    baselines = cargar_baselines()
+    baselines.setdefault(motor(), {}).update(resultados)
+    with open(BASELINES, 'w', encoding='utf-8') as fichero:
+        json.dump(baselines, fichero, indent=2, sort_keys=True, ensure_ascii=False)
+        fichero.write('\n')
+
+
+def regresiones(metricas, base):
+    """Lista de textos con cada métrica que supera su presupuesto (línea base + tolerancia)."""
+    excedidas = []
+    for metrica, (factor, holgura) in TOLERANCIAS.items():
+        if metrica not in base:
+            continue
+        presupuesto = base[metrica] * factor + holgura
+        if metricas[metrica] > presupuesto:
+            excedidas.append(f"{metrica}: {metricas[metrica]} > {presupuesto:g} (línea base {base[metrica]})")
+    return excedidas
@@ -0,0 +1,179 @@
+# benchmarks/test_api.py
+
+"""
+Benchmarks de extremo a extremo de la API sobre datos generados con PobladorDatos.
+
+Se ejecutan solo con ERP_BENCHMARKS=1:
+
+    ERP_BENCHMARKS=1 python manage.py test benchmarks
+
+Cada endpoint se compara con benchmarks/baselines.json (por motor de base de datos) y
+el test falla si alguna métrica supera su presupuesto. Con ERP_BENCHMARKS_ACTUALIZAR=1
+se reescriben las líneas base con los valores medidos en lugar de compararlos.
+Funciona con SQLite o con un PostgreSQL local (DB_ENGINE, DB_NAME...).
+"""
+
+import os
+import unittest
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.empresas.models import Empresa
+from apps.empresas.poblador import PobladorDatos
+from apps.movimientos.models import DetalleMovimiento, Movimiento
+from apps.productos.models import Producto
+from apps.usuarios.models import CustomUser
+from .medicion import cargar_baselines, guardar_baselines, medir, motor, regresiones
+
+ACTIVADO = os.getenv('ERP_BENCHMARKS') == '1'
+ACTUALIZAR = os.getenv('ERP_BENCHMARKS_ACTUALIZAR') == '1'
+REPETICIONES = int(os.getenv('ERP_BENCHMARKS_REPETICIONES', 5))
+PASSWORD = 'bench1234'
+
+# Volumen fijo: las líneas base solo son comparables con los mismos datos
+DATOS = dict(empresas=2, productos=300, clientes=150, dias=180, ventas_diarias=60, seed=2024,
+             prefijo='bench', password=PASSWORD)
+
+
+@unittest.skipUnless(ACTIVADO, "Benchmarks desactivados (ERP_BENCHMARKS=1 para ejecutarlos).")
+# Sin caché de reportes ni de PDF: cada repetición mide la consulta y la codificación
+@override_settings(REPORTES_CACHE_SEGUNDOS=0, PDF_CACHE_SEGUNDOS=0)
+class BenchmarkAPITest(TestCase):
+    resultados = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        PobladorDatos(**DATOS).generar()
+        cls.empresa = Empresa.objects.get(nombre='Bench 001')
+        cls.admin = CustomUser.objects.get(username='bench001_admin1')
+        cls.superusuario = CustomUser.objects.create_superuser(
+            username='bench_root', email='root@bench.test', password=PASSWORD,
+            first_name='Root', last_name='Bench', ci='BENCH-ROOT',
+        )
+        cls.productos = list(Producto.objects.filter(empresa=cls.empresa).order_by('id')[:3])
+        cls.pendientes = cls._crear_movimientos_pendientes(REPETICIONES + 2)
+
+    @classmethod
+    def _crear_movimientos_pendientes(cls, cantidad):
+        """Movimientos de entrada pendientes con 10 líneas para el benchmark de aceptar."""
+        proveedor = cls.empresa.proveedores.first()
+        productos = list(Producto.objects.filter(empresa=cls.empresa).order_by('id')[:10])
+        ids = []
+        for _ in range(cantidad):
+            movimiento = Movimiento.objects.create(empresa=cls.empresa, proveedor=proveedor)
+            DetalleMovimiento.objects.bulk_create([
+                DetalleMovimiento(movimiento=movimiento, producto=producto, cantidad_suministrada=25,
+                                  valor_unitario=Decimal('5.00'), valor_total_producto=Decimal('125.00'))
+                for producto in productos
+            ])
+            ids.append(movimiento.id)
+        return ids
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if not cls.resultados:
+            return
+        if ACTUALIZAR:
+            guardar_baselines(cls.resultados)
+        ancho = max(len(nombre) for nombre in cls.resultados)
+        print(f"\nBenchmarks ({motor()}):")
+        print(f"  {'endpoint':<{ancho}}  {'ms':>9}  {'consultas':>9}  {'filas':>8}  {'KB':>9}")
+        for nombre, m in sorted(cls.resultados.items()):
+            print(f"  {nombre:<{ancho}}  {m['tiempo_ms']:>9.2f}  {m['consultas']:>9}  {m['filas']:>8}  "
+                  f"{m['memoria_kb']:>9.1f}")
+
+    def cliente(self, usuario=None):
+        cliente = APIClient()
+        if usuario is not None:
+            # DRF (force_authenticate) y vistas Django puras como las exportaciones (sesión)
+            cliente.force_authenticate(usuario)
+            cliente.force_login(usuario)
+        return cliente
+
+    def medir_endpoint(self, nombre, peticion, estado=200):
+        def ejecutar():
+            # Incluye el trabajo diferido a on_commit (auditoría) como en una petición real
+            with self.captureOnCommitCallbacks(execute=True):
+                return peticion()
+
+        respuesta, metricas = medir(ejecutar, REPETICIONES)
+        self.assertEqual(respuesta.status_code, estado, getattr(respuesta, 'content', b'')[:500])
+        self.resultados[nombre] = metricas
+        if ACTUALIZAR:
+            return
+        base = cargar_baselines().get(motor(), {}).get(nombre)
+        if base is None:
+            return  # Sin línea base para este motor: solo se informa
+        excedidas = regresiones(metricas, base)
+        if excedidas:
+            self.fail(f"{nombre} supera su presupuesto:\n  " + "\n  ".join(excedidas))
+
+    # --- Autenticación ---
+
+    def test_login(self):
+        cliente = self.cliente()
+        self.medir_endpoint('login', lambda: cliente.post(
+            '/api/usuarios/login/', {'username': self.admin.username, 'password': PASSWORD}, format='json'))
+
+    # --- Dashboard y reportes ---
+
+    def test_dashboard(self):
+        cliente = self.cliente(self.superusuario)
+        self.medir_endpoint('dashboard', lambda: cliente.get('/api/dashboard/'))
+
+    def test_reportes(self):
+        cliente = self.cliente(self.superusuario)
+        filtro = {'empresa_id': self.empresa.id}
+        for reporte in ('sales-summary', 'top-selling-products', 'stock-level', 'client-performance', 'client-rfm'):
+            with self.subTest(reporte=reporte):
+                self.medir_endpoint(f"reports/{reporte}",
+                                    lambda: cliente.get(f'/api/reports/{reporte}/', filtro))
+
+    def test_exportaciones(self):
+        cliente = self.cliente(self.superusuario)
+        filtro = {'empresa_id': self.empresa.id}
+        for reporte, formato in (('sales-summary', 'txt'), ('stock-level', 'csv'), ('stock-level', 'excel'),
+                                 ('client-performance', 'pdf')):
+            with self.subTest(reporte=reporte, formato=formato):
+                self.medir_endpoint(f"reports/{reporte}/{formato}",
+                                    lambda: cliente.get(f'/api/reports/{reporte}/export/{formato}/', filtro))
+
+    # --- Ventas ---
+
+    def test_ventas_listado(self):
+        cliente = self.cliente(self.admin)
+        self.medir_endpoint('ventas/list', lambda: cliente.get('/api/ventas/'))
+        self.medir_endpoint('ventas/list?fast', lambda: cliente.get('/api/ventas/', {'fast': 1}))
+
+    def test_ventas_crear(self):
+        cliente = self.cliente(self.admin)
+        venta = {
+            'empresa': self.empresa.id,
+            'usuario': self.admin.id,
+            'estado': 'Completada',
+            'detalles': [
+                {'producto': producto.id, 'cantidad': 1, 'precio_unitario': str(producto.precio),
+                 'descuento_aplicado': '0'}
+                for producto in self.productos
+            ],
+        }
+        self.medir_endpoint('ventas/create', lambda: cliente.post('/api/ventas/', venta, format='json'), estado=201)
+
+    # --- Movimientos ---
+
+    def test_movimientos_aceptar(self):
+        cliente = self.cliente(self.admin)
+        pendientes = iter(self.pendientes)
+        self.medir_endpoint('movimientos/aceptar',
+                            lambda: cliente.post(f'/api/movimientos/{next(pendientes)}/aceptar/'))
+
+    # --- Marketplace (público) ---
+
+    def test_marketplace(self):
+        cliente = self.cliente()
+        self.medir_endpoint('marketplace/empresas', lambda: cliente.get('/api/marketplace/empresas/'))
+        self.medir_endpoint('marketplace/productos',
+                            lambda: cliente.get(f'/api/marketplace/empresas/{self.empresa.id}/productos/'))
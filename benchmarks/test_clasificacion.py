@@ -0,0 +1,78 @@
+# benchmarks/test_clasificacion.py
+
+"""
+Escritura de la clasificación ABC/XYZ: INSERT de varias filas por sentencia
+(apps.productos.clasificacion._insertar) frente a ClasificacionProducto.objects.bulk_create
+con el mismo tamaño de lote. Informa la mediana de varias repeticiones de cada uno, con la
+tabla vacía al empezar y dentro de una transacción que se revierte.
+
+    ERP_BENCHMARKS=1 python manage.py test benchmarks.test_clasificacion
+"""
+
+import os
+import statistics
+import time
+import unittest
+
+from django.db import connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.empresas.models import Empresa
+from apps.productos.clasificacion import _insertar
+from apps.productos.models import ClasificacionProducto, Producto
+
+ACTIVADO = os.getenv('ERP_BENCHMARKS') == '1'
+PRODUCTOS = int(os.getenv('ERP_BENCHMARKS_CLASIFICACION', 20000))
+REPETICIONES = int(os.getenv('ERP_BENCHMARKS_REPETICIONES', 5))
+LOTE = 2000
+
+
+@unittest.skipUnless(ACTIVADO, "Benchmarks desactivados (ERP_BENCHMARKS=1 para ejecutarlos).")
+class BenchmarkClasificacionTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre='Bench Clasificación')
+        Producto.objects.bulk_create(
+            [Producto(nombre=f'Producto {i}', precio=1, empresa=cls.empresa) for i in range(PRODUCTOS)],
+            batch_size=LOTE,
+        )
+        cls.ids = list(Producto.objects.filter(empresa=cls.empresa).order_by('id').values_list('id', flat=True))
+
+    def medir(self, escribir):
+        """Mediana (ms) de escribir() sobre la tabla vacía; cada repetición se revierte."""
+        tiempos = []
+        for _ in range(REPETICIONES):
+            with transaction.atomic():
+                ClasificacionProducto.objects.all().delete()
+                comienzo = time.perf_counter()
+                escribir()
+                tiempos.append((time.perf_counter() - comienzo) * 1000)
+                self.assertEqual(ClasificacionProducto.objects.count(), len(self.ids))
+                transaction.set_rollback(True)
+        return statistics.median(tiempos)
+
+    def test_insert_de_varias_filas_frente_a_bulk_create(self):
+        ahora = timezone.now()
+        valores = {'clase_abc': 'A', 'clase_xyz': 'X', 'ingresos': '10.00', 'participacion_acumulada': 0.5,
+                   'coeficiente_variacion': 0.25}
+
+        def con_insert():
+            # Como clasificar_productos: tuplas ya en el tipo de la columna
+            calculado_en = ClasificacionProducto._meta.get_field('calculado_en').get_db_prep_save(ahora, connection)
+            _insertar([(pid, self.empresa.id, 'A', 'X', '10.00', 0.5, 0.25, calculado_en) for pid in self.ids], LOTE)
+
+        def con_bulk_create():
+            ClasificacionProducto.objects.bulk_create(
+                [ClasificacionProducto(producto_id=pid, empresa_id=self.empresa.id, calculado_en=ahora, **valores)
+                 for pid in self.ids],
+                batch_size=LOTE,
+            )
+
+        insert = self.medir(con_insert)
+        bulk_create = self.medir(con_bulk_create)
+        print(f"\nClasificación ({connection.vendor}, {len(self.ids)} filas, lotes de {LOTE}):")
+        print(f"  {'INSERT de varias filas':<24}  {insert:>10.1f} ms")
+        print(f"  {'bulk_create':<24}  {bulk_create:>10.1f} ms")
+        self.assertLess(insert, bulk_create)
@@ -0,0 +1,86 @@
+# benchmarks/test_conexiones.py
+
+"""
+Coste de abrir conexión por petición frente a conexiones persistentes.
+
+Simula el ciclo de Django en cada petición (close_old_connections al empezar y al terminar,
+una consulta en medio) con una conexión propia configurada primero con CONN_MAX_AGE=0 y
+después con la configuración de erp/settings.py. Informa la mediana (p50) y el p95 por
+petición; contra PostgreSQL (sobre todo remoto, con TLS) la diferencia es el establecimiento
+de la conexión que se ahorra.
+
+    ERP_BENCHMARKS=1 python manage.py test benchmarks.test_conexiones
+"""
+
+import copy
+import os
+import statistics
+import tempfile
+import time
+import unittest
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.utils import load_backend
+from django.test import SimpleTestCase
+
+ACTIVADO = os.getenv('ERP_BENCHMARKS') == '1'
+PETICIONES = int(os.getenv('ERP_BENCHMARKS_PETICIONES', 200))
+
+
+@unittest.skipUnless(ACTIVADO, "Benchmarks desactivados (ERP_BENCHMARKS=1 para ejecutarlos).")
+class BenchmarkConexionesTest(SimpleTestCase):
+
+    def setUp(self):
+        # Se parte de la configuración real (no la de la base de datos de tests)
+        self.configuracion = copy.deepcopy(settings.DATABASES[DEFAULT_DB_ALIAS])
+        self.configuracion.setdefault('TIME_ZONE', None)
+        self.configuracion.setdefault('AUTOCOMMIT', True)
+        self.configuracion.setdefault('ATOMIC_REQUESTS', False)
+        self.configuracion.setdefault('TEST', {})
+        if self.configuracion['ENGINE'] == 'django.db.backends.sqlite3':
+            # SQLite en memoria nunca se cierra; con un fichero sí hay apertura real
+            fichero = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False)
+            fichero.close()
+            self.addCleanup(os.unlink, fichero.name)
+            self.configuracion['NAME'] = fichero.name
+
+    def simular(self, **cambios):
+        """Tiempos (ms) de PETICIONES peticiones simuladas con la configuración modificada."""
+        configuracion = dict(self.configuracion, **cambios)
+        backend = load_backend(configuracion['ENGINE'])
+        conexion = backend.DatabaseWrapper(configuracion, 'benchmark_conexiones')
+        tiempos = []
+        try:
+            for _ in range(PETICIONES):
+                comienzo = time.perf_counter()
+                conexion.close_if_unusable_or_obsolete()  # request_started
+                with conexion.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+                conexion.close_if_unusable_or_obsolete()  # request_finished
+                tiempos.append((time.perf_counter() - comienzo) * 1000)
+        finally:
+            conexion.close()
+            if hasattr(conexion, 'close_pool'):  # PostgreSQL: el pool es por alias y proceso
+                conexion.close_pool()
+        return tiempos
+
+    def test_conexion_persistente(self):
+        por_peticion = self.simular(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False, OPTIONS={
+            clave: valor for clave, valor in self.configuracion.get('OPTIONS', {}).items() if clave != 'pool'
+        })
+        configurada = self.simular()
+
+        def p(tiempos, q):
+            return statistics.quantiles(tiempos, n=100)[q - 1]
+
+        print(f"\nConexiones ({self.configuracion['ENGINE'].rsplit('.', 1)[-1]}, {PETICIONES} peticiones):")
+        print(f"  {'configuración':<32}  {'p50 ms':>8}  {'p95 ms':>8}")
+        print(f"  {'nueva conexión por petición':<32}  {p(por_peticion, 50):>8.3f}  {p(por_peticion, 95):>8.3f}")
+        nombre = 'pool' if 'pool' in self.configuracion.get('OPTIONS', {}) else \
+            f"CONN_MAX_AGE={self.configuracion.get('CONN_MAX_AGE', 0)}"
+        print(f"  {nombre:<32}  {p(configurada, 50):>8.3f}  {p(configurada, 95):>8.3f}")
+
+        if self.configuracion.get('CONN_MAX_AGE', 0) or 'pool' in self.configuracion.get('OPTIONS', {}):
+            self.assertLess(p(configurada, 50), p(por_peticion, 50))
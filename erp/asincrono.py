@@ -0,0 +1,265 @@
+# erp/asincrono.py
+
+"""
+Piezas comunes de las vistas asíncronas (despliegue ASGI con uvicorn, ver gunicorn.conf.py).
+
+DRF 3.14 no admite handlers async, así que las vistas de lectura intensiva (marketplace,
+dashboard, estado de exportaciones) son vistas de Django con `async def get` que usan el
+ORM asíncrono. Desde aquí reutilizan lo que ya existe en DRF:
+- autenticar(): mismos autenticadores (JWT, sesión) y clases de permiso que la API.
+- paginar(): misma forma de respuesta que StandardPageNumberPagination.
+- respuesta_json(): mismo JSON que el JSONRenderer de DRF (erp.fastjson.dumps).
+
+Las exportaciones (Excel, PDF, TXT) siguen siendo código síncrono y bloqueante. Se ejecutan
+en un pool de hilos acotado (EXPORTACIONES_HILOS) con un máximo de exportaciones simultáneas
+por empresa (EXPORTACIONES_POR_EMPRESA): una empresa con informes lentos no puede ocupar
+todos los hilos ni dejar sin servicio al resto. Las exportaciones por streaming (CSV, TXT)
+consultan y codifican mientras se envía el contenido, así que ocupan su cupo hasta que se
+termina de enviar o se cierra la respuesta.
+"""
+
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .fastjson import dumps
+
+
+def respuesta_json(data, status=200, **kwargs):
+    return HttpResponse(dumps(data), status=status, content_type='application/json', **kwargs)
+
+
+def error(excepcion):
+    """Respuesta con el mensaje y estado por defecto de una APIException, como la daría DRF."""
+    return respuesta_json({'detail': str(excepcion.default_detail)}, status=excepcion.status_code)
+
+
+def _autenticar(request, permisos):
+    """Parte síncrona de autenticar(): se ejecuta en el hilo del ORM."""
+    drf_request = Request(request, authenticators=[clase() for clase in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        usuario = drf_request.user
+    except exceptions.APIException as e:
+        # Mismo cuerpo que rest_framework.views.exception_handler
+        datos = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+        return None, respuesta_json(datos, status=e.status_code)
+    for clase in permisos:
+        if not clase().has_permission(drf_request, None):
+            if not usuario.is_authenticated:
+                return None, error(exceptions.NotAuthenticated)
+            return None, error(exceptions.PermissionDenied)
+    # Se cargan aquí las relaciones que luego se leen desde código async
+    if usuario.is_authenticated:
+        usuario.empresa
+    return usuario, None
+
+
+async def autenticar(request, permisos=()):
+    """
+    Autentica como lo haría una vista de DRF y comprueba `permisos` (clases BasePermission).
+    Devuelve (usuario, None) o (None, respuesta de error 401/403).
+    """
+    return await sync_to_async(_autenticar)(request, permisos)
+
+
+def _entero_positivo(valor, por_defecto, tope=None):
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        return por_defecto
+    if valor <= 0:
+        return por_defecto
+    return min(valor, tope) if tope else valor
+
+
+async def paginar(request, queryset, serializar):
+    """
+    Versión async de StandardPageNumberPagination: ?page= y ?page_size= (con tope).
+    `serializar` recibe la lista de objetos de la página y devuelve la lista de resultados.
+    Devuelve None si la página no existe (la vista responde con error(PaginaInvalida)).
+    """
+    tamano = _entero_positivo(request.GET.get('page_size'), api_settings.PAGE_SIZE,
+                              settings.PAGINATION_MAX_PAGE_SIZE)
+    total = await queryset.acount()
+    paginas = max((total + tamano - 1) // tamano, 1)
+    pagina = request.GET.get('page', 1)
+    if pagina == 'last':
+        pagina = paginas
+    pagina = _entero_positivo(pagina, None)
+    if pagina is None or pagina > paginas:
+        return None
+
+    inicio = (pagina - 1) * tamano
+    objetos = [objeto async for objeto in queryset[inicio:inicio + tamano]]
+
+    url = request.build_absolute_uri()
+    siguiente = replace_query_param(url, 'page', pagina + 1) if pagina < paginas else None
+    if pagina <= 1:
+        anterior = None
+    elif pagina == 2:
+        anterior = remove_query_param(url, 'page')
+    else:
+        anterior = replace_query_param(url, 'page', pagina - 1)
+    return {'count': total, 'next': siguiente, 'previous': anterior, 'results': serializar(objetos)}
+
+
+class PaginaInvalida(exceptions.NotFound):
+    default_detail = PageNumberPagination.invalid_page_message
+
+
+class Saturado(Exception):
+    """La empresa ya tiene el máximo de trabajos en curso en el ejecutor."""
+
+
+def _en_transaccion():
+    return connection.in_atomic_block
+
+
+class _Cupo:
+    """Cupo de un trabajo en curso; close() lo libera una sola vez."""
+
+    def __init__(self, contenido, liberar):
+        self._contenido = contenido
+        self._liberar = liberar
+
+    def close(self):
+        liberar, self._liberar = self._liberar, None
+        if liberar is not None:
+            liberar()
+
+
+class _ContenidoConCupo(_Cupo):
+    """
+    Contenido de una respuesta por streaming que libera el cupo al agotarse o fallar. Si no
+    se llega a leer entero, lo libera Django al cerrar la respuesta (llama a close() del
+    contenido al terminar de enviarla, también cuando el cliente se desconecta).
+    """
+
+    def __iter__(self):
+        try:
+            yield from self._contenido
+        finally:
+            self.close()
+
+
+class _ContenidoAsyncConCupo(_Cupo):
+    """Lo mismo para el contenido async de una respuesta servida con ASGI."""
+
+    async def __aiter__(self):
+        try:
+            async for parte in self._contenido:
+                yield parte
+        finally:
+            self.close()
+
+
+class EjecutorAcotado:
+    """
+    Pool de hilos con un límite de trabajos simultáneos por clave (la empresa).
+    Los trabajos que exceden el total de hilos esperan en cola; los que exceden el límite
+    de su empresa se rechazan al momento con Saturado.
+    """
+
+    def __init__(self, hilos, por_clave):
+        self.hilos = hilos
+        self.por_clave = por_clave
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='exportacion')
+        self._en_curso = Counter()
+        # Con WSGI las vistas async corren en bucles distintos por hilo: el contador se protege
+        self._lock = threading.Lock()
+
+    def en_curso(self, clave=None):
+        with self._lock:
+            return sum(self._en_curso.values()) if clave is None else self._en_curso[clave]
+
+    @staticmethod
+    def _ejecutar(funcion, args, kwargs):
+        # Los hilos del pool no reciben request_started/request_finished: se imita ese ciclo
+        # para que respeten CONN_MAX_AGE y no arrastren conexiones rotas
+        close_old_connections()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    def _liberar(self, clave):
+        with self._lock:
+            self._en_curso[clave] -= 1
+            if not self._en_curso[clave]:
+                del self._en_curso[clave]
+
+    async def _resultado(self, funcion, args, kwargs):
+        # Dentro de una transacción (ATOMIC_REQUESTS, tests) otro hilo usaría otra conexión y
+        # no vería sus cambios: se ejecuta en el hilo del ORM de la petición. La comprobación
+        # se hace allí porque el contexto async tiene su propio objeto de conexión.
+        if await sync_to_async(_en_transaccion)():
+            return await sync_to_async(funcion)(*args, **kwargs)
+        bucle = asyncio.get_running_loop()
+        return await bucle.run_in_executor(self._pool, self._ejecutar, funcion, args, kwargs)
+
+    async def ejecutar(self, clave, funcion, *args, **kwargs):
+        """
+        Ejecuta `funcion` en el pool a cuenta de `clave`. Si devuelve una respuesta por
+        streaming, el cupo sigue ocupado hasta que su contenido se agota o se cierra.
+        """
+        with self._lock:
+            if self._en_curso[clave] >= self.por_clave:
+                raise Saturado(clave)
+            self._en_curso[clave] += 1
+        try:
+            resultado = await self._resultado(funcion, args, kwargs)
+        except BaseException:
+            self._liberar(clave)
+            raise
+        if not getattr(resultado, 'streaming', False):
+            self._liberar(clave)
+            return resultado
+        envoltorio = _ContenidoAsyncConCupo if resultado.is_async else _ContenidoConCupo
+        resultado.streaming_content = envoltorio(resultado.streaming_content, lambda: self._liberar(clave))
+        return resultado
+
+
+exportaciones = EjecutorAcotado(settings.EXPORTACIONES_HILOS, settings.EXPORTACIONES_POR_EMPRESA)
+
+
+def clave_empresa(request, usuario):
+    """Empresa a la que se imputa una exportación (la del usuario o ?empresa_id= para superusuarios)."""
+    if usuario.is_superuser:
+        return f"empresa:{request.GET.get('empresa_id') or 'todas'}"
+    return f"empresa:{usuario.empresa_id}"
+
+
+def exportacion_acotada(vista):
+    """
+    Convierte una vista de exportación síncrona en una vista async que se ejecuta en el pool
+    de exportaciones. Autentica con los autenticadores de la API (JWT o sesión) y deja el
+    usuario en request.user para la vista original.
+    """
+
+    @wraps(vista)
+    async def envoltorio(request, *args, **kwargs):
+        usuario, rechazo = await autenticar(request, api_settings.DEFAULT_PERMISSION_CLASSES)
+        if rechazo is not None:
+            return rechazo
+        request.user = usuario
+        try:
+            return await exportaciones.ejecutar(clave_empresa(request, usuario), vista, request, *args, **kwargs)
+        except Saturado:
+            return respuesta_json(
+                {'detail': 'Ya hay exportaciones en curso para esta empresa. Inténtelo de nuevo en unos segundos.'},
+                status=429, headers={'Retry-After': '5'},
+            )
+
+    return envoltorio
@@ -0,0 +1,154 @@
+# erp/exportacion.py
+
+"""
+Exportaciones CSV y TXT por streaming.
+
+Las filas se leen con .values_list()/.values() e .iterator(chunk_size=...) (en PostgreSQL, un
+cursor de servidor) y se escriben por bloques en un StreamingHttpResponse: la memoria no
+depende del número de filas y el primer byte sale en cuanto llega el primer bloque.
+
+- ExportacionMixin añade a un ViewSet la acción GET <ruta>/exportar/?formato=csv|txt con los
+  mismos filtros y permisos del listado.
+- Los reportes (reports.views) usan directamente filas_csv(), filas_txt() y respuesta_streaming().
+
+Con ASGI el contenido se entrega como iterador async (cada bloque se genera en el hilo del
+ORM de la petición); si no, Django lo consumiría entero antes de enviarlo.
+"""
+
+import csv
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.decorators import action
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'txt': 'text/plain; charset=utf-8',
+}
+
+
+class _Eco:
+    """Pseudo-fichero para csv.writer: devuelve la línea en lugar de escribirla."""
+
+    def write(self, valor):
+        return valor
+
+
+def texto(valor):
+    """Valor de una celda: vacío para None, Sí/No y fechas en la zona horaria local."""
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        return 'Sí' if valor else 'No'
+    if isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    return str(valor)
+
+
+def _bloques(lineas, tamano):
+    bloque = []
+    for linea in lineas:
+        bloque.append(linea)
+        if len(bloque) >= tamano:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+def filas_csv(cabeceras, filas, bloque=None):
+    """CSV con BOM (Excel reconoce así el UTF-8) y filas agrupadas en bloques de texto."""
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow(cabeceras)
+    yield from _bloques(
+        (escritor.writerow([texto(valor) for valor in fila]) for fila in filas),
+        bloque or settings.EXPORTACION_FILAS_POR_BLOQUE,
+    )
+
+
+def filas_txt(columnas, filas, encabezado='', bloque=None):
+    """
+    Tabla de ancho fijo. `columnas` son pares (título, ancho); los valores se recortan al
+    ancho de su columna salvo en la última.
+    """
+    ultima = len(columnas) - 1
+
+    def linea(valores):
+        celdas = [
+            valor if i == ultima else f"{valor[:ancho]:<{ancho}}"
+            for i, (valor, (_titulo, ancho)) in enumerate(zip(valores, columnas))
+        ]
+        return ' | '.join(celdas) + '\n'
+
+    cabecera = linea([titulo for titulo, _ancho in columnas])
+    yield encabezado + cabecera + '-' * (len(cabecera) - 1) + '\n'
+    yield from _bloques(
+        (linea([texto(valor) for valor in fila]) for fila in filas),
+        bloque or settings.EXPORTACION_FILAS_POR_BLOQUE,
+    )
+
+
+async def iterar_async(iterador):
+    """Iterador async sobre uno síncrono; cada next() corre en el hilo del ORM de la petición."""
+    iterador = iter(iterador)
+    siguiente = sync_to_async(next)
+    fin = object()
+    while (parte := await siguiente(iterador, fin)) is not fin:
+        yield parte
+
+
+def respuesta_streaming(request, partes, formato, nombre):
+    """StreamingHttpResponse de descarga para las partes (str) de un CSV o TXT."""
+    # Las vistas de DRF reciben su Request, que envuelve la de Django
+    peticion = getattr(request, '_request', request)
+    contenido = (parte.encode('utf-8') for parte in partes)
+    if isinstance(peticion, ASGIRequest):
+        contenido = iterar_async(contenido)
+    respuesta = StreamingHttpResponse(contenido, content_type=FORMATOS[formato])
+    respuesta['Content-Disposition'] = (
+        f'attachment; filename="{nombre}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.{formato}"'
+    )
+    return respuesta
+
+
+class ExportacionMixin:
+    """
+    Mixin para ViewSets: GET <ruta>/exportar/?formato=csv|txt exporta el listado filtrado
+    (mismo get_queryset y filter_queryset que list) por streaming.
+
+    La vista define `export_columns`: tuplas (campo de values_list, título, ancho en TXT),
+    y opcionalmente `export_nombre` para el nombre del fichero.
+    """
+    export_columns = ()
+    export_nombre = None
+
+    @action(detail=False, methods=['get'], url_path='exportar')
+    def exportar(self, request):
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS:
+            raise serializers.ValidationError({'formato': f"Formato no soportado. Use: {', '.join(FORMATOS)}."})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        orden = getattr(self, 'keyset_ordering', None)
+        if orden and not queryset.query.order_by:
+            queryset = queryset.order_by(*orden)
+        campos = [campo for campo, _titulo, _ancho in self.export_columns]
+        filas = (
+            queryset.prefetch_related(None)
+            .values_list(*campos)
+            .iterator(chunk_size=settings.EXPORTACION_CHUNK_SIZE)
+        )
+
+        if formato == 'csv':
+            partes = filas_csv([titulo for _campo, titulo, _ancho in self.export_columns], filas)
+        else:
+            partes = filas_txt([(titulo, ancho) for _campo, titulo, ancho in self.export_columns], filas)
+        nombre = self.export_nombre or self.basename
+        return respuesta_streaming(request, partes, formato, nombre)
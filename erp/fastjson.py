@@ -0,0 +1,297 @@
+# erp/fastjson.py
+
+"""
+Ruta de renderizado rápido para listados grandes (?fast=1).
+
+En lugar de instanciar modelos y pasar cada fila por el ModelSerializer, se compila
+un "plan" a partir del propio serializer (una sola vez por clase): qué columnas pedir
+con .values(), cómo convertir cada valor y qué relaciones resolver aparte.
+La respuesta se escribe por bloques con StreamingHttpResponse y es byte a byte
+la misma que produce el JSONRenderer de DRF para ese serializer.
+"""
+
+import datetime
+import json
+from decimal import Decimal
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import ManyToOneRel
+from django.http import StreamingHttpResponse
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+try:  # orjson es opcional: si no está instalado se usa el json de la librería estándar
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(value):
+    # Mismo criterio que rest_framework.utils.encoders.JSONEncoder para Decimal sin coerción
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo no serializable a JSON: {type(value).__name__}")
+
+
+def dumps(data):
+    """Codifica igual que JSONRenderer de DRF (compacto, UTF-8, U+2028/U+2029 escapados)."""
+    if orjson is not None:
+        encoded = orjson.dumps(data, default=_default)
+    else:
+        encoded = json.dumps(data, default=_default, ensure_ascii=False, allow_nan=False,
+                             separators=(',', ':')).encode('utf-8')
+    return encoded.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+# --- Conversores de valores (equivalentes a Field.to_representation) ---
+
+_IDENTITY_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.ChoiceField)
+
+
+def _decimal_converter(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.decimal_places is None:
+        return field.to_representation
+    exponent = -field.decimal_places
+
+    def convert(value):
+        # Los valores leídos de la BD ya vienen con la escala de la columna: basta con formatear
+        if isinstance(value, Decimal) and value.as_tuple().exponent == exponent:
+            return f"{value:f}"
+        return field.to_representation(value)
+    return convert
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601 or hasattr(field, 'timezone'):
+        return field.to_representation
+    if str(field.default_timezone()) != 'UTC':
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, datetime.datetime) and value.utcoffset() == datetime.timedelta(0):
+            text = value.isoformat()
+            return text[:-6] + 'Z' if text.endswith('+00:00') else text
+        return field.to_representation(value)
+    return convert
+
+
+def _file_converter(field, model_field, request):
+    storage = model_field.storage
+    use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+    def convert(name):
+        if not name:
+            return None
+        if not use_url:
+            return name
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+class FastPlan:
+    """
+    Plan compilado para un ModelSerializer de solo lectura.
+    Soporta campos simples del modelo (también con source='fk.campo'), claves primarias
+    de relaciones, serializers anidados de una FK (se serializan una vez por objeto distinto)
+    y listas anidadas de una relación inversa (una consulta por bloque de filas).
+    """
+    _cache = {}
+
+    @classmethod
+    def for_serializer(cls, serializer_class):
+        plan = cls._cache.get(serializer_class)
+        if plan is None:
+            plan = cls._cache[serializer_class] = cls(serializer_class)
+        return plan
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.columns = []    # (clave, ruta en .values(), campo DRF, campo del modelo)
+        self.relations = []  # (clave, ruta del id, clase del serializer anidado, modelo relacionado)
+        self.children = []   # (clave, modelo hijo, atributo FK hacia el padre, FastPlan hijo)
+        self.order = []      # orden de las claves en la salida
+
+        for field in serializer_class()._readable_fields:
+            key = field.field_name
+            self.order.append(key)
+            if isinstance(field, serializers.ListSerializer):
+                self._add_children(key, field)
+            elif isinstance(field, serializers.BaseSerializer):
+                self._add_relation(key, field)
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                self.columns.append((key, field.source.replace('.', '__'), field, None))
+            elif isinstance(field, (serializers.SerializerMethodField, serializers.RelatedField)) or field.source == '*':
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{key}: tipo de campo no soportado por la ruta rápida."
+                )
+            else:
+                path = field.source.replace('.', '__')
+                self.columns.append((key, path, field, self._model_field(path)))
+
+    def _model_field(self, path):
+        model = self.model
+        parts = path.split('__')
+        for part in parts[:-1]:
+            model = model._meta.get_field(part).related_model
+        return model._meta.get_field(parts[-1])
+
+    def _add_relation(self, key, field):
+        model_field = self.model._meta.get_field(field.source)
+        if not model_field.many_to_one and not model_field.one_to_one:
+            raise ImproperlyConfigured(f"{self.serializer_class.__name__}.{key}: solo se soportan FKs.")
+        self.relations.append((key, field.source, field.__class__, model_field.related_model))
+
+    def _add_children(self, key, field):
+        relation = self.model._meta.get_field(field.source)
+        if not isinstance(relation, ManyToOneRel):
+            raise ImproperlyConfigured(f"{self.serializer_class.__name__}.{key}: solo se soportan relaciones inversas.")
+        child_plan = FastPlan.for_serializer(field.child.__class__)
+        self.children.append((key, relation.related_model, relation.field.attname, child_plan))
+
+    def value_paths(self, extra=()):
+        paths = set(extra)
+        if self.children:
+            paths.add('pk')
+        paths.update(path for _key, path, _field, _mf in self.columns)
+        paths.update(path for _key, path, _cls, _model in self.relations)
+        return sorted(paths)
+
+    def values(self, queryset, extra=()):
+        """Queryset de diccionarios con las columnas que necesita el plan (más `extra`)."""
+        return queryset.prefetch_related(None).values(*self.value_paths(extra))
+
+    def bind(self, context):
+        return BoundPlan(self, context)
+
+
+class BoundPlan:
+    """FastPlan ligado a un contexto (request) concreto: convierte bloques de filas en dicts."""
+
+    def __init__(self, plan, context):
+        self.plan = plan
+        self.context = context
+        request = context.get('request')
+        self.converters = []
+        for key, path, field, model_field in plan.columns:
+            if isinstance(field, serializers.DecimalField):
+                convert = _decimal_converter(field)
+            elif isinstance(field, serializers.DateTimeField):
+                convert = _datetime_converter(field)
+            elif isinstance(field, serializers.FileField):
+                convert = _file_converter(field, model_field, request)
+            elif isinstance(field, serializers.BooleanField):
+                convert = bool
+            elif isinstance(field, serializers.PrimaryKeyRelatedField) or isinstance(field, _IDENTITY_FIELDS):
+                convert = None
+            else:
+                convert = field.to_representation
+            self.converters.append((key, path, convert))
+        self.children = [(key, model, fk, child.bind(context)) for key, model, fk, child in plan.children]
+        self._relation_cache = {}
+
+    def _related_data(self, rows):
+        """Serializa cada objeto relacionado distinto una única vez (con su serializer original)."""
+        resolved = {}
+        for key, path, serializer_class, model in self.plan.relations:
+            cache = self._relation_cache.setdefault(key, {})
+            missing = {row[path] for row in rows if row[path] is not None} - cache.keys()
+            if missing:
+                for obj in model._default_manager.filter(pk__in=missing):
+                    cache[obj.pk] = serializer_class(obj, context=self.context).data
+            resolved[key] = (path, cache)
+        return resolved
+
+    def _children_data(self, rows):
+        resolved = {}
+        if not self.children:
+            return resolved
+        ids = [row['pk'] for row in rows]
+        for key, model, fk_attname, child in self.children:
+            child_rows = list(
+                model._default_manager.filter(**{f"{fk_attname}__in": ids})
+                .order_by('pk').values(fk_attname, *child.plan.value_paths())
+            )
+            grouped = {}
+            for child_row, data in zip(child_rows, child.convert(child_rows)):
+                grouped.setdefault(child_row[fk_attname], []).append(data)
+            resolved[key] = grouped
+        return resolved
+
+    def convert(self, rows):
+        related = self._related_data(rows)
+        children = self._children_data(rows)
+        columns = {key: (path, convert) for key, path, convert in self.converters}
+        result = []
+        for row in rows:
+            item = {}
+            for key in self.plan.order:
+                if key in columns:
+                    path, convert = columns[key]
+                    value = row[path]
+                    item[key] = value if convert is None or value is None else convert(value)
+                elif key in related:
+                    path, cache = related[key]
+                    item[key] = None if row[path] is None else cache.get(row[path])
+                else:
+                    item[key] = children[key].get(row['pk'], [])
+            result.append(item)
+        return result
+
+
+class FastListMixin:
+    """
+    Mixin para ViewSets: con ?fast=1 el listado se sirve con FastPlan y se transmite
+    por bloques. Sin el parámetro, el comportamiento es exactamente el de DRF.
+    """
+    fast_query_param = 'fast'
+    fast_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.fast_query_param) not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+
+        plan = FastPlan.for_serializer(self.get_serializer_class()).bind(self.get_serializer_context())
+        # Las columnas del orden keyset deben estar en cada fila para construir el cursor
+        extra = [field.lstrip('-') for field in getattr(self, 'keyset_ordering', ())]
+        rows = plan.plan.values(self.filter_queryset(self.get_queryset()), extra)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            envelope = dict(self.get_paginated_response([]).data)
+            envelope.pop('results', None)
+            stream = self._stream_page(plan, envelope, page)
+        else:
+            stream = self._stream_all(plan, rows.iterator(chunk_size=self.fast_chunk_size))
+        return StreamingHttpResponse(stream, content_type='application/json')
+
+    def _chunks(self, rows):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.fast_chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _stream_items(self, plan, rows):
+        first = True
+        for chunk in self._chunks(rows):
+            encoded = dumps(plan.convert(chunk))[1:-1]
+            yield encoded if first else b',' + encoded
+            first = False
+
+    def _stream_all(self, plan, rows):
+        yield b'['
+        yield from self._stream_items(plan, rows)
+        yield b']'
+
+    def _stream_page(self, plan, envelope, page):
+        prefix = dumps(envelope)[:-1]
+        yield prefix + (b',"results":[' if envelope else b'"results":[')
+        yield from self._stream_items(plan, page)
+        yield b']}'
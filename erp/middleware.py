@@ -0,0 +1,276 @@
+# erp/middleware.py
+
+"""
+Middlewares propios del proyecto: perfilado por petición (PerfiladoMiddleware) y
+WhiteNoise con soporte async (WhiteNoiseMiddleware).
+
+En una fracción de las peticiones (PERFILADO_MUESTREO) se registra:
+- número de consultas SQL y tiempo total en base de datos,
+- consultas repetidas agrupadas por huella (la SQL con los parámetros y las listas IN
+  normalizadas): una misma huella ejecutada muchas veces suele ser un N+1,
+- tiempo dentro de los serializers de DRF (serializer.data),
+- tamaño de la respuesta.
+
+Las métricas se devuelven en la cabecera Server-Timing (visible en las herramientas de
+desarrollo del navegador) y se añade una línea JSON por petición a PERFILADO_LOG, que rota
+por tamaño. Las peticiones no muestreadas no pagan nada más que un random() y, por consulta,
+leer una variable de contexto.
+
+Las consultas se miden con un execute_wrapper fijo en cada conexión, que se instala al
+abrirla (señal connection_created) y, para las que ya estaban abiertas, al empezar cada
+petición (request_started, que con ASGI se atiende en el hilo de sync_to_async donde corre
+el ORM). Cada hilo tiene su propia conexión: con ASGI las consultas no pasan por la del hilo
+del bucle de eventos, así que el envoltorio no puede ponerse solo alrededor de la petición.
+Lee el perfil de la petición de una ContextVar, que sync_to_async sí propaga a esos hilos.
+
+Ambos admiten WSGI y ASGI, como los de Django: con ASGI la cadena completa se mantiene
+async y las vistas async no ocupan un hilo por petición (ver erp.asincrono).
+"""
+
+import contextvars
+import json
+import logging
+import random
+import re
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+from rest_framework import serializers
+from whitenoise.middleware import WhiteNoiseMiddleware as _WhiteNoiseMiddleware
+
+logger = logging.getLogger('erp.perfilado')
+
+_perfil_actual = contextvars.ContextVar('perfil_actual', default=None)
+
+# Literales y listas de marcadores que varían entre consultas equivalentes
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+
+
+def huella(sql):
+    """SQL normalizada: consultas que solo difieren en valores comparten huella."""
+    return _LISTAS.sub('(...)', _LITERALES.sub('?', sql))
+
+
+class _Perfil:
+    """Métricas de una petición muestreada."""
+
+    def __init__(self):
+        self.comienzo = time.perf_counter()
+        self.sql_ms = 0.0
+        self.consultas = 0
+        self.por_sql = {}  # sql -> [veces, ms]; la huella se calcula al final, una vez por SQL distinta
+        self.serializacion_ms = 0.0
+        self._profundidad = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Envoltorio de connection.execute_wrapper
+        comienzo = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - comienzo) * 1000
+            self.sql_ms += ms
+            self.consultas += 1
+            acumulado = self.por_sql.setdefault(sql, [0, 0.0])
+            acumulado[0] += 1
+            acumulado[1] += ms
+
+    def repetidas(self, minimo, maximo):
+        """Huellas ejecutadas al menos `minimo` veces, de más a menos frecuentes."""
+        grupos = {}
+        for sql, (veces, ms) in self.por_sql.items():
+            grupo = grupos.setdefault(huella(sql), [0, 0.0])
+            grupo[0] += veces
+            grupo[1] += ms
+        repetidas = [
+            {'sql': sql, 'veces': veces, 'ms': round(ms, 2)}
+            for sql, (veces, ms) in grupos.items() if veces >= minimo
+        ]
+        repetidas.sort(key=lambda r: (-r['veces'], -r['ms']))
+        return repetidas[:maximo]
+
+
+def _medir_consulta(execute, sql, params, many, context):
+    """execute_wrapper de todas las conexiones: mide solo dentro de una petición muestreada."""
+    perfil = _perfil_actual.get()
+    if perfil is None:
+        return execute(sql, params, many, context)
+    return perfil(execute, sql, params, many, context)
+
+
+def _instalar_medicion(connection, **kwargs):
+    # La lista de envoltorios sobrevive a las reconexiones del mismo DatabaseWrapper
+    if _medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir_consulta)
+
+
+def _instalar_en_hilo(**kwargs):
+    """Instala la medición en las conexiones ya abiertas del hilo actual."""
+    for conexion in connections.all(initialized_only=True):
+        _instalar_medicion(conexion)
+
+
+def _medir_serializacion(data):
+    """Envuelve BaseSerializer.data para acumular su tiempo en el perfil de la petición."""
+
+    def medido(self):
+        perfil = _perfil_actual.get()
+        if perfil is None:
+            return data.fget(self)
+        # Serializers anidados que llaman a .data (SerializerMethodField) ya cuentan en el exterior
+        perfil._profundidad += 1
+        comienzo = time.perf_counter()
+        try:
+            return data.fget(self)
+        finally:
+            perfil._profundidad -= 1
+            if perfil._profundidad == 0:
+                perfil.serializacion_ms += (time.perf_counter() - comienzo) * 1000
+
+    medido._perfilado = True
+    return property(medido)
+
+
+def _registro():
+    """Handler del log JSONL; se crea la primera vez que hace falta."""
+    if not logger.handlers:
+        ruta = Path(settings.PERFILADO_LOG)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            ruta, maxBytes=settings.PERFILADO_LOG_MAX_MB * 1024 * 1024,
+            backupCount=settings.PERFILADO_LOG_COPIAS, encoding='utf-8',
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class PerfiladoMiddleware:
+    """
+    Mide consultas, tiempo SQL, serialización y tamaño de respuesta de las peticiones
+    muestreadas. Debe ir el primero en MIDDLEWARE para que el total incluya al resto.
+    Funciona igual con WSGI y ASGI (no obliga a Django a adaptar la cadena a síncrono).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = settings.PERFILADO_MUESTREO
+        if self.muestreo > 0:
+            if not getattr(serializers.BaseSerializer.data.fget, '_perfilado', False):
+                serializers.BaseSerializer.data = _medir_serializacion(serializers.BaseSerializer.data)
+            connection_created.connect(_instalar_medicion, dispatch_uid='erp.perfilado')
+            request_started.connect(_instalar_en_hilo, dispatch_uid='erp.perfilado')
+            _instalar_en_hilo()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _muestrear(self):
+        return self.muestreo > 0 and random.random() < self.muestreo
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._muestrear():
+            return self.get_response(request)
+
+        perfil = _Perfil()
+        token = _perfil_actual.set(perfil)
+        try:
+            response = self.get_response(request)
+        finally:
+            _perfil_actual.reset(token)
+        return self._terminar(request, response, perfil)
+
+    async def __acall__(self, request):
+        if not self._muestrear():
+            return await self.get_response(request)
+
+        # Las consultas corren en hilos de sync_to_async, con su propia conexión; el perfil les
+        # llega por la ContextVar, que sync_to_async copia a esos hilos
+        perfil = _Perfil()
+        token = _perfil_actual.set(perfil)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _perfil_actual.reset(token)
+        return self._terminar(request, response, perfil)
+
+    def _terminar(self, request, response, perfil):
+        total_ms = (time.perf_counter() - perfil.comienzo) * 1000
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={perfil.sql_ms:.1f};desc="{perfil.consultas} consultas"',
+            f'ser;dur={perfil.serializacion_ms:.1f};desc="Serialización"',
+            f'total;dur={total_ms:.1f}',
+        ])
+        self._registrar(request, response, perfil, total_ms)
+        return response
+
+    def _registrar(self, request, response, perfil, total_ms):
+        usuario = getattr(request, 'user', None)
+        coincidencia = getattr(request, 'resolver_match', None)
+        if response.streaming:
+            # El cuerpo aún no se ha generado; solo se conoce si la vista fijó Content-Length
+            tamano = int(response['Content-Length']) if response.has_header('Content-Length') else None
+        else:
+            tamano = len(response.content)
+        linea = {
+            'ts': timezone.now().isoformat(),
+            'metodo': request.method,
+            'ruta': request.path,
+            'vista': coincidencia.view_name if coincidencia else None,
+            'estado': response.status_code,
+            'usuario_id': usuario.pk if usuario is not None and usuario.is_authenticated else None,
+            'total_ms': round(total_ms, 2),
+            'sql_ms': round(perfil.sql_ms, 2),
+            'consultas': perfil.consultas,
+            'serializacion_ms': round(perfil.serializacion_ms, 2),
+            'bytes': tamano,
+            'streaming': response.streaming,
+            'repetidas': perfil.repetidas(settings.PERFILADO_REPETIDAS_MINIMO, 5),
+        }
+        try:
+            _registro().info(json.dumps(linea, ensure_ascii=False))
+        except OSError:
+            # El perfilado nunca debe tumbar una petición
+            logging.getLogger(__name__).exception("No se pudo escribir el log de perfilado")
+
+
+class WhiteNoiseMiddleware(_WhiteNoiseMiddleware):
+    """
+    WhiteNoise 6 solo es síncrono: con ASGI obligaría a Django a ejecutar toda la cadena en un
+    hilo por petición y las vistas async perderían su ventaja. Esta versión atiende los
+    estáticos igual (la búsqueda es en memoria) y deja pasar el resto sin cambiar de modo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,255 @@
+# erp/pagination.py
+
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """
+    Devuelve el número aproximado de filas de un queryset.
+    En PostgreSQL se usa la estimación del planificador (EXPLAIN), que no recorre la tabla.
+    En otros motores se recurre a un COUNT(*) normal; una lista ya en memoria se cuenta sin más.
+    """
+    if isinstance(queryset, (list, tuple)):
+        return len(queryset)
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    sql, params = queryset.order_by().query.get_compiler(using=queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(DjangoPaginator):
+    """Paginator de Django que usa el conteo estimado en lugar de COUNT(*)."""
+
+    @cached_property
+    def count(self):
+        return estimate_count(self.object_list)
+
+
+def _count_mode(request):
+    """Lee el parámetro ?count= (exact | estimate). Cualquier otro valor desactiva el conteo."""
+    mode = request.query_params.get('count')
+    return mode if mode in ('exact', 'estimate') else None
+
+
+class StandardPageNumberPagination(PageNumberPagination):
+    """
+    Paginación por número de página por defecto del proyecto.
+    - ?page_size= permite al cliente elegir el tamaño (con tope en PAGINATION_MAX_PAGE_SIZE).
+    - ?count=estimate usa la estimación del planificador en lugar de COUNT(*).
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if _count_mode(request) == 'estimate':
+            self.django_paginator_class = EstimatedCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre un orden compuesto y único, p. ej. ('-fecha', '-id').
+    Cada página se obtiene con un WHERE sobre la última clave vista en lugar de OFFSET,
+    así que el coste no crece con la profundidad de la página.
+
+    La vista define el orden con el atributo `keyset_ordering`. Los campos del orden
+    no deben admitir NULL y el último debe ser único (normalmente 'id' o '-id').
+
+    - ?page_size= tamaño de página elegido por el cliente (con tope).
+    - ?count=exact|estimate añade el total; por defecto no se cuenta nada.
+    - Si el cliente pide ?page= o un orden propio (?ordering=), se delega en la
+      paginación por número de página; la forma de la respuesta es la misma.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    ordering = ('-id',)
+    fallback_class = StandardPageNumberPagination
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def __init__(self):
+        self.fallback = None
+
+    # --- API pública de DRF ---
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self._use_fallback(request):
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = [(field.lstrip('-'), field.startswith('-')) for field in self.get_ordering(view)]
+        self.model = queryset.model
+
+        position, reverse = self.decode_cursor(request)
+
+        count_mode = _count_mode(request)
+        if count_mode == 'exact':
+            self.count = queryset.count()
+        elif count_mode == 'estimate':
+            self.count = estimate_count(queryset)
+        else:
+            self.count = None
+
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if position is not None:
+            queryset = queryset.filter(self._after(position, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.first_position = self._position_of(rows[0]) if rows else None
+        self.last_position = self._position_of(rows[-1]) if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    # --- Enlaces ---
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_position is None:
+            # Página vacía al retroceder: volvemos al principio
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    # --- Configuración ---
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'keyset_ordering', None) or self.ordering)
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            size = int(raw)
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def _use_fallback(self, request):
+        params = request.query_params
+        return 'page' in params or api_settings.ORDERING_PARAM in params
+
+    # --- Cursor ---
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': [self._dump_value(value) for value in position]}
+        if reverse:
+            payload['r'] = 1
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('ascii')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('ascii'))
+            raw_position = payload['p']
+            if len(raw_position) != len(self.keys):
+                raise ValueError
+            position = [
+                self.model._meta.get_field(name).to_python(value)
+                for (name, _desc), value in zip(self.keys, raw_position)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get('r'))
+
+    @staticmethod
+    def _dump_value(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    # --- Construcción de la consulta ---
+
+    def _order_by(self, reverse):
+        order = []
+        for name, desc in self.keys:
+            desc = desc != reverse
+            order.append(f"-{name}" if desc else name)
+        return order
+
+    def _after(self, position, reverse):
+        """
+        Condición lexicográfica "fila posterior a `position`" para el orden compuesto:
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+        """
+        condition = Q()
+        equal = {}
+        for (name, desc), value in zip(self.keys, position):
+            lookup = 'lt' if desc != reverse else 'gt'
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def _position_of(self, row):
+        if isinstance(row, dict):
+            return [row[name] for name, _desc in self.keys]
+        return [getattr(row, name) for name, _desc in self.keys]
@@ -1,6 +1,8 @@
+from importlib.util import find_spec
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
 from django.core.mail import DNS_NAME
 from dotenv import load_dotenv
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -9,10 +11,6 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Cargar variables de entorno desde el archivo .env
 load_dotenv(os.path.join(BASE_DIR, '.env'))
 
-REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 5,  # Define cuántos elementos por página quieres
-}
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
@@ -55,6 +53,8 @@ INSTALLED_APPS = [
     'apps.movimientos',
     'reports',
     'apps.pagos',
+    'apps.predicciones',
+    'apps.notificaciones',
 
 
 ]
@@ -64,13 +64,15 @@ MEDIA_ROOT = BASE_DIR / 'media'
 AUTH_USER_MODEL = 'usuarios.CustomUser'
 
 MIDDLEWARE = [
+    'erp.middleware.PerfiladoMiddleware',  # Primero, para que el tiempo total incluya al resto
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'erp.middleware.WhiteNoiseMiddleware',  # WhiteNoise con soporte async (ASGI)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.logs.middleware.AuditoriaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -105,10 +107,35 @@ DATABASES = {
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        # Conexiones persistentes: cada hilo de gunicorn reutiliza su conexión durante
+        # DB_CONN_MAX_AGE segundos en lugar de abrir una nueva (TCP + TLS + auth) por petición.
+        # Con CONN_HEALTH_CHECKS se comprueba antes de reutilizarla, por si el servidor la cerró.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {},
     }
 }
 
+# Pool de conexiones de psycopg 3 (solo PostgreSQL; requiere `pip install "psycopg[binary,pool]"`).
+# Un pool por proceso compartido por sus hilos. Sustituye a las conexiones persistentes:
+# Django no admite ambos a la vez, así que CONN_MAX_AGE pasa a 0. Ver gunicorn.conf.py
+# para el dimensionado de procesos, hilos y pool.
+if os.getenv('DB_POOL', 'False') == 'True':
+    # Con psycopg2 (el de requirements.txt) Django rechazaría OPTIONS['pool'] recién al
+    # conectar y con un error poco claro: mejor fallar al arrancar
+    if DATABASES['default']['ENGINE'] != 'django.db.backends.postgresql':
+        raise ImproperlyConfigured('DB_POOL=True solo es válido con DB_ENGINE=django.db.backends.postgresql.')
+    if find_spec('psycopg') is None or find_spec('psycopg_pool') is None:
+        raise ImproperlyConfigured('DB_POOL=True requiere psycopg 3 con pool: pip install "psycopg[binary,pool]".')
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN', 1)),
+        'max_size': int(os.getenv('DB_POOL_MAX', os.getenv('GUNICORN_THREADS', 2))),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -158,8 +185,92 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated', # Por defecto, requiere autenticación
     ),
     'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema', # Para autogeneración de esquemas (DRF Legacy)
-
+    # Paginación por defecto para todos los listados. Las vistas de alto volumen
+    # (ventas, pagos, logs, movimientos, productos) usan erp.pagination.KeysetPagination.
+    'DEFAULT_PAGINATION_CLASS': 'erp.pagination.StandardPageNumberPagination',
+    'PAGE_SIZE': int(os.getenv('PAGINATION_PAGE_SIZE', 25)),
 }
+# Tope para el tamaño de página que el cliente puede pedir con ?page_size=
+PAGINATION_MAX_PAGE_SIZE = int(os.getenv('PAGINATION_MAX_PAGE_SIZE', 200))
+
+# Registro de actividad (apps.logs.writer): tamaño de lote, intervalo máximo entre
+# escrituras y meses que se conservan en la tabla activa antes de archivar.
+ACTIVITY_LOG_BATCH_SIZE = int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', 200))
+ACTIVITY_LOG_FLUSH_SECONDS = float(os.getenv('ACTIVITY_LOG_FLUSH_SECONDS', 5))
+ACTIVITY_LOG_RETENTION_MONTHS = int(os.getenv('ACTIVITY_LOG_RETENTION_MONTHS', 6))
+
+# Predicción de demanda (apps.predicciones): dónde se guardan los artefactos entrenados,
+# cuántos días de historial se usan y el horizonte por defecto de las predicciones.
+DEMANDA_MODELOS_DIR = Path(os.getenv('DEMANDA_MODELOS_DIR', BASE_DIR / 'models' / 'demanda'))
+DEMANDA_DIAS_HISTORIA = int(os.getenv('DEMANDA_DIAS_HISTORIA', 180))
+DEMANDA_HORIZONTE_DIAS = int(os.getenv('DEMANDA_HORIZONTE_DIAS', 7))
+# Modelos abiertos por proceso (LRU) y precarga al arrancar
+DEMANDA_CACHE_MODELOS = int(os.getenv('DEMANDA_CACHE_MODELOS', 32))
+DEMANDA_PRECARGAR = os.getenv('DEMANDA_PRECARGAR', 'True') == 'True'
+
+# Alertas de inventario (apps.productos.inventario): ventana de ventas, plazo de reposición
+# en días, factor z del nivel de servicio y punto de reorden mínimo.
+INVENTARIO_DIAS_VENTAS = int(os.getenv('INVENTARIO_DIAS_VENTAS', 90))
+INVENTARIO_DIAS_REPOSICION = int(os.getenv('INVENTARIO_DIAS_REPOSICION', 7))
+INVENTARIO_NIVEL_SERVICIO_Z = float(os.getenv('INVENTARIO_NIVEL_SERVICIO_Z', 1.65))
+INVENTARIO_PUNTO_REORDEN_MINIMO = int(os.getenv('INVENTARIO_PUNTO_REORDEN_MINIMO', 0))
+
+# Productos comprados juntos (apps.productos.recomendaciones, manage.py calcular_relacionados):
+# días de ventas analizados, relacionados guardados por producto y ventas mínimas con
+# ambos productos para relacionarlos.
+RECOMENDACIONES_DIAS_VENTAS = int(os.getenv('RECOMENDACIONES_DIAS_VENTAS', 365))
+RECOMENDACIONES_VECINOS = int(os.getenv('RECOMENDACIONES_VECINOS', 10))
+RECOMENDACIONES_COOCURRENCIA_MINIMA = int(os.getenv('RECOMENDACIONES_COOCURRENCIA_MINIMA', 2))
+
+# Clasificación ABC/XYZ (apps.productos.clasificacion, manage.py clasificar_productos):
+# semanas completas de ventas analizadas, fracción acumulada de ingresos de las clases A y
+# B, y coeficiente de variación máximo de la demanda semanal de las clases X e Y.
+CLASIFICACION_SEMANAS = int(os.getenv('CLASIFICACION_SEMANAS', 13))
+CLASIFICACION_UMBRAL_A = float(os.getenv('CLASIFICACION_UMBRAL_A', 0.80))
+CLASIFICACION_UMBRAL_B = float(os.getenv('CLASIFICACION_UMBRAL_B', 0.95))
+CLASIFICACION_CV_X = float(os.getenv('CLASIFICACION_CV_X', 0.5))
+CLASIFICACION_CV_Y = float(os.getenv('CLASIFICACION_CV_Y', 1.0))
+
+# Notificaciones automáticas (manage.py enviar_notificaciones): horas tras las que un
+# movimiento o pago pendiente se avisa, horas antes de repetir un aviso de la misma
+# entidad e intervalo del modo --loop.
+NOTIFICACIONES_PENDIENTE_HORAS = int(os.getenv('NOTIFICACIONES_PENDIENTE_HORAS', 24))
+NOTIFICACIONES_REPETIR_HORAS = int(os.getenv('NOTIFICACIONES_REPETIR_HORAS', 24))
+NOTIFICACIONES_INTERVALO_SEGUNDOS = int(os.getenv('NOTIFICACIONES_INTERVALO_SEGUNDOS', 300))
+
+# Exportaciones de reportes (erp.asincrono): hilos del pool de exportaciones por proceso y
+# máximo de exportaciones simultáneas de una misma empresa (el resto recibe 429).
+EXPORTACIONES_HILOS = int(os.getenv('EXPORTACIONES_HILOS', 4))
+EXPORTACIONES_POR_EMPRESA = int(os.getenv('EXPORTACIONES_POR_EMPRESA', 2))
+
+# Reportes (reports.views.ReportView): segundos que se reutiliza el resultado de un reporte
+# para la misma empresa y parámetros (0 desactiva la caché).
+REPORTES_CACHE_SEGUNDOS = int(os.getenv('REPORTES_CACHE_SEGUNDOS', 60))
+# Filas máximas (detalle y subtotales) de /api/reports/pivot/
+PIVOT_MAX_FILAS = int(os.getenv('PIVOT_MAX_FILAS', 5000))
+
+# PDF de reportes (reports.pdf): procesos del pool de maquetación (0 = en el propio proceso),
+# filas por sección en tablas grandes, tiempo máximo de espera y caché de PDF idénticos.
+PDF_PROCESOS = int(os.getenv('PDF_PROCESOS', 2))
+PDF_FILAS_POR_SECCION = int(os.getenv('PDF_FILAS_POR_SECCION', 500))
+PDF_TIMEOUT_SEGUNDOS = int(os.getenv('PDF_TIMEOUT_SEGUNDOS', 90))
+PDF_CACHE_SEGUNDOS = int(os.getenv('PDF_CACHE_SEGUNDOS', 300))
+PDF_CACHE_MAX_KB = int(os.getenv('PDF_CACHE_MAX_KB', 5120))
+
+# Exportaciones CSV/TXT por streaming (erp.exportacion): filas que se leen de la base de
+# datos en cada vuelta del iterador y filas que se envían juntas en cada bloque de la respuesta.
+EXPORTACION_CHUNK_SIZE = int(os.getenv('EXPORTACION_CHUNK_SIZE', 2000))
+EXPORTACION_FILAS_POR_BLOQUE = int(os.getenv('EXPORTACION_FILAS_POR_BLOQUE', 200))
+
+# Perfilado por petición (erp.middleware.PerfiladoMiddleware): fracción de peticiones que se
+# miden (0 lo desactiva, 1 mide todas), log JSONL con rotación por tamaño y número de veces
+# que debe repetirse una consulta para listarla como posible N+1.
+PERFILADO_MUESTREO = float(os.getenv('PERFILADO_MUESTREO', 0))
+PERFILADO_LOG = Path(os.getenv('PERFILADO_LOG', BASE_DIR / 'logs' / 'perfilado.jsonl'))
+PERFILADO_LOG_MAX_MB = int(os.getenv('PERFILADO_LOG_MAX_MB', 20))
+PERFILADO_LOG_COPIAS = int(os.getenv('PERFILADO_LOG_COPIAS', 5))
+PERFILADO_REPETIDAS_MINIMO = int(os.getenv('PERFILADO_REPETIDAS_MINIMO', 3))
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Bearer': { # Define el esquema de seguridad para JWT
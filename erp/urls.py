@@ -22,6 +22,7 @@ from apps.proveedores.views import ProveedorViewSet
 from apps.suscripciones.views import SuscripcionViewSet
 from apps.productos.views import ProductoViewSet
 from apps.pagos.views import PagoViewSet # ¡NUEVO! Importar PagoViewSet
+from apps.notificaciones.views import NotificacionViewSet
 
 router = DefaultRouter()
 
@@ -40,6 +41,7 @@ router.register(r'suscripciones', SuscripcionViewSet, basename='suscripcion')
 router.register(r'productos', ProductoViewSet, basename='producto')
 router.register(r'movimientos', MovimientoViewSet, basename='movimiento')
 router.register(r'pagos', PagoViewSet) # ¡NUEVO! Registrar PagoViewSet
+router.register(r'notificaciones', NotificacionViewSet, basename='notificacion')
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -0,0 +1,56 @@
+# gunicorn.conf.py
+
+"""
+Configuración de gunicorn (se carga sola desde el directorio de trabajo).
+
+Dimensionado, todo por variables de entorno:
+
+    WEB_CONCURRENCY   procesos (workers). Por defecto 2 × núcleos + 1, con un máximo de 4.
+    GUNICORN_THREADS  hilos por proceso (WSGI). Cada hilo atiende una petición a la vez.
+    GUNICORN_ASGI     True para servir erp.asgi con workers de uvicorn. Las vistas async
+                      (marketplace, dashboard, estado de reportes) no ocupan hilo mientras
+                      esperan; el código síncrono corre en el pool de hilos de asgiref
+                      (ASGI_THREADS) y las exportaciones en su propio pool acotado
+                      (EXPORTACIONES_HILOS, ver erp.asincrono).
+
+Conexiones a PostgreSQL que se usan como máximo:
+
+    sin pool (DB_CONN_MAX_AGE > 0):  WEB_CONCURRENCY × GUNICORN_THREADS
+        Cada hilo guarda su propia conexión persistente.
+    con pool (DB_POOL=True):         WEB_CONCURRENCY × DB_POOL_MAX
+        Un pool por proceso. DB_POOL_MAX por defecto es GUNICORN_THREADS, así que nunca
+        hay hilos esperando conexión. Bajarlo solo tiene sentido si las peticiones pasan
+        mucho tiempo fuera de la base de datos (PDF, CSV...).
+    ASGI:                            WEB_CONCURRENCY × (ASGI_THREADS + EXPORTACIONES_HILOS)
+        Cada hilo que toca el ORM mantiene su conexión; con DB_POOL el tope por proceso
+        vuelve a ser DB_POOL_MAX.
+
+Ese total, más los procesos de management (enviar_notificaciones, entrenar_demanda...) y un
+margen, debe quedar por debajo de max_connections del servidor. Si se usa PgBouncer en modo
+transacción, DB_CONN_MAX_AGE puede ser alto y el límite es el del pool de PgBouncer.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+
+if os.getenv('GUNICORN_ASGI', 'False') == 'True':
+    wsgi_app = 'erp.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'erp.wsgi:application'
+    threads = int(os.getenv('GUNICORN_THREADS', 2))
+    # Con hilos gunicorn usa el worker gthread; las conexiones persistentes son por hilo
+    worker_class = 'gthread' if threads > 1 else 'sync'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Reciclar procesos de vez en cuando acota fugas de memoria; el jitter evita que todos
+# se reinicien a la vez
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+accesslog = '-'
+errorlog = '-'
@@ -0,0 +1,127 @@
+# reports/comparison.py
+
+"""
+Comparación de periodos del resumen de ventas.
+
+Para el periodo pedido se calculan también el periodo anterior de la misma duración y el
+mismo periodo del año anterior: ventas, monto, ticket promedio, crecimiento y la serie diaria
+(sparkline) de cada uno. Todo sale de una sola consulta: las ventas de los tres rangos
+agrupadas por día, con un Count/Sum condicional (filter=) por periodo. Los rangos pueden
+solaparse (periodos de más de un año) y cada día cuenta en todos los que lo incluyen.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .engine import midnight
+
+CENTAVOS = Decimal('0.01')
+
+
+def _un_anio_antes(dia):
+    try:
+        return dia.replace(year=dia.year - 1)
+    except ValueError:  # 29 de febrero
+        return dia.replace(year=dia.year - 1, day=28)
+
+
+def windows(inicio, fin):
+    """
+    Rangos (inicio, fin), ambos incluidos, de los periodos a comparar. Sin inicio (solo
+    ?fecha_fin=) el periodo actual no tiene duración y no hay periodos de referencia; sin fin,
+    el periodo acaba hoy.
+    """
+    fin = fin or timezone.localdate()
+    if inicio is None:
+        return {'actual': (None, fin)}
+    dias = (fin - inicio).days + 1
+    return {
+        'actual': (inicio, fin),
+        'anterior': (inicio - timedelta(days=dias), inicio - timedelta(days=1)),
+        'anio_anterior': (_un_anio_antes(inicio), _un_anio_antes(fin)),
+    }
+
+
+def _rango(date_field, inicio, fin):
+    lookups = {f'{date_field}__lt': midnight(fin + timedelta(days=1))}
+    if inicio is not None:
+        lookups[f'{date_field}__gte'] = midnight(inicio)
+    return Q(**lookups)
+
+
+def _crecimiento(actual, referencia):
+    if not referencia:
+        return None
+    return ((Decimal(actual) - Decimal(referencia)) * 100 / Decimal(referencia)).quantize(Decimal('0.1'))
+
+
+def compare_periods(queryset, date_field, amount_field, inicio, fin):
+    """
+    Resumen de cada periodo de windows(inicio, fin) sobre `queryset` (ya filtrado por
+    empresa y demás parámetros, sin fechas). Devuelve {nombre: resumen}; los periodos de
+    referencia llevan además el crecimiento (%) del actual respecto a ellos.
+    """
+    rangos = {nombre: _rango(date_field, *rango) for nombre, rango in windows(inicio, fin).items()}
+    por_dia = queryset.filter(reduce(or_, rangos.values())) \
+        .annotate(dia=TruncDate(date_field)) \
+        .values('dia') \
+        .annotate(**{
+            agregado: expresion
+            for nombre, rango in rangos.items()
+            for agregado, expresion in (
+                (f'ventas_{nombre}', Count('id', filter=rango)),
+                (f'monto_{nombre}', Sum(amount_field, filter=rango)),
+            )
+        }) \
+        .order_by('dia')
+    por_dia = {fila['dia']: fila for fila in por_dia}
+
+    resumen = {}
+    for nombre, (desde, hasta) in windows(inicio, fin).items():
+        # Sin inicio, la serie empieza en el primer día con ventas
+        if desde is None:
+            desde = min((dia for dia, fila in por_dia.items() if fila[f'ventas_{nombre}']), default=hasta)
+        serie = []
+        dia = desde
+        while dia <= hasta:
+            fila = por_dia.get(dia, {})
+            serie.append({
+                'fecha': dia,
+                'ventas': fila.get(f'ventas_{nombre}') or 0,
+                'monto': (fila.get(f'monto_{nombre}') or Decimal('0')).quantize(CENTAVOS),
+            })
+            dia += timedelta(days=1)
+        ventas = sum(punto['ventas'] for punto in serie)
+        monto = sum((punto['monto'] for punto in serie), Decimal('0.00'))
+        resumen[nombre] = {
+            'fecha_inicio': desde,
+            'fecha_fin': hasta,
+            'total_ventas_cantidad': ventas,
+            'monto_total_ventas': monto.quantize(CENTAVOS),
+            'promedio_por_venta': (monto / ventas).quantize(CENTAVOS) if ventas else Decimal('0.00'),
+            'serie': serie,
+        }
+
+    actual = resumen['actual']
+    for nombre, periodo in resumen.items():
+        if nombre != 'actual':
+            periodo['crecimiento'] = {
+                clave: _crecimiento(actual[clave], periodo[clave])
+                for clave in ('total_ventas_cantidad', 'monto_total_ventas', 'promedio_por_venta')
+            }
+
+    # Importes y porcentajes como cadena, igual que el resto de reportes en JSON
+    for periodo in resumen.values():
+        for clave in ('monto_total_ventas', 'promedio_por_venta'):
+            periodo[clave] = str(periodo[clave])
+        for punto in periodo['serie']:
+            punto['monto'] = str(punto['monto'])
+        for clave, valor in periodo.get('crecimiento', {}).items():
+            periodo['crecimiento'][clave] = None if valor is None else str(valor)
+    return resumen
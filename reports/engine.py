@@ -0,0 +1,422 @@
+# reports/engine.py
+
+"""
+Motor de reportes declarativo.
+
+Un reporte se describe con un ReportSpec (reports/specs.py):
+- dimensiones: columnas por las que se agrupa (un campo del ORM o una expresión),
+- medidas: agregados sobre cada grupo (Sum, Count, Avg...),
+- filtros: parámetros de la petición que se validan y se traducen a lookups,
+- orden y límite (fijo o por parámetro).
+
+compile() lo traduce a una sola consulta: .values(dimensiones).annotate(medidas) o, si el
+reporte no tiene dimensiones (un resumen de una fila), .aggregate(medidas). El alcance por
+empresa y el rango de fechas se aplican siempre igual, así que el plan de cada reporte es
+predecible y no depende de qué vista lo ejecute.
+
+Las vistas (reports.views.ReportView) solo conocen las columnas del spec: JSON, Excel, PDF,
+CSV y TXT se generan igual para todos los reportes.
+
+rollup() calcula además los subtotales de cada nivel de dimensiones en la misma consulta
+(GROUP BY ROLLUP en PostgreSQL, UNION ALL de un GROUP BY por nivel en el resto de motores).
+"""
+
+import hashlib
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Aggregate, CharField, F, Field, Func, IntegerField, Value
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.empresas.models import Empresa
+
+
+def query_params(request):
+    """Parámetros de la petición, sea una Request de DRF o una HttpRequest de Django."""
+    return request.query_params if hasattr(request, 'query_params') else request.GET
+
+
+class Column:
+    """
+    Columna de un reporte. `kind` decide cómo se normaliza el valor: 'int', 'decimal'
+    (dos decimales; en JSON como cadena, igual que DecimalField de DRF) o 'text' (sin
+    espacios sobrantes). `default` sustituye a los valores nulos.
+    """
+
+    def __init__(self, name, label, width=15, kind='text', default=None):
+        self.name = name
+        self.label = label
+        self.width = width
+        self.kind = kind
+        self.default = default
+
+    def clean(self, value):
+        if value is None:
+            return self.default
+        if self.kind == 'decimal':
+            return Decimal(value).quantize(Decimal('0.01'))
+        if self.kind == 'text' and isinstance(value, str):
+            return value.strip() or self.default
+        return value
+
+    def to_json(self, value):
+        if self.kind == 'decimal' and value is not None:
+            return str(value)
+        return value
+
+
+class Dimension(Column):
+    """Columna de agrupación: un campo (`field`, ruta del ORM) o una `expression`."""
+
+    def __init__(self, name, label, field=None, expression=None, **kwargs):
+        super().__init__(name, label, **kwargs)
+        self.expression = expression if expression is not None else F(field or name)
+        self.alias = f'd_{name}'
+
+
+class Measure(Column):
+    """Columna agregada: `expression` es un agregado de Django (Sum, Count, Avg...)."""
+
+    def __init__(self, name, label, expression, kind='decimal', **kwargs):
+        super().__init__(name, label, kind=kind, **kwargs)
+        self.expression = expression
+        self.alias = f'm_{name}'
+
+
+class Grouping(Aggregate):
+    """
+    GROUPING(a, b, ...) de PostgreSQL: máscara de bits con 1 en las dimensiones que están
+    agregadas en la fila (la primera dimensión es el bit más significativo).
+    """
+    function = 'GROUPING'
+    output_field = IntegerField()
+
+
+class Rollup(Func):
+    """
+    ROLLUP(a, b, ...) de PostgreSQL como única entrada de GROUP BY: agrupa a la vez por
+    (a, b, ...), por cada prefijo y por () (el total). No es un valor, solo una cláusula.
+    """
+    function = 'ROLLUP'
+    output_field = Field()
+
+
+class Agrupada(Func):
+    """
+    Dimensión del SELECT que ya agrupa un Rollup: se compila como su expresión pero no añade
+    sus columnas al GROUP BY (quedarían fuera del ROLLUP y anularían los subtotales).
+    """
+    template = '%(expressions)s'
+
+    def get_group_by_cols(self):
+        return []
+
+    def get_db_converters(self, connection):
+        # Los valores se leen como los de la expresión envuelta (p. ej. TruncDate)
+        return self.get_source_expressions()[0].get_db_converters(connection)
+
+
+class Filter:
+    """
+    Parámetro opcional de la petición que se traduce a `lookup`.
+
+    - cast: conversión del texto (int por defecto); un error da el mensaje `invalid`.
+    - minimum: valor mínimo admitido (mensaje `invalid`).
+    - choices: valores admitidos (mensaje `invalid`).
+    - model: si se indica, el valor es un id que debe existir en ese modelo (mensaje `missing`).
+    """
+
+    def __init__(self, param, lookup, *, invalid, cast=int, minimum=None, choices=None, model=None,
+                 missing=None):
+        self.param = param
+        self.lookup = lookup
+        self.invalid = invalid
+        self.cast = cast
+        self.minimum = minimum
+        self.choices = choices
+        self.model = model
+        self.missing = missing
+
+    def parse(self, raw):
+        try:
+            value = self.cast(raw)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({self.param: self.invalid})
+        if self.minimum is not None and value < self.minimum:
+            raise serializers.ValidationError({self.param: self.invalid})
+        if self.choices is not None and value not in self.choices:
+            raise serializers.ValidationError({self.param: self.invalid})
+        if self.model is not None and not self.model.objects.filter(id=value).exists():
+            raise serializers.ValidationError({self.param: self.missing})
+        return {self.lookup: value}
+
+
+def company_scope(request):
+    """
+    Id de la empresa a la que se limita el reporte, o None (superusuario sin ?empresa_id=:
+    todas). Los usuarios que no son superusuarios quedan siempre en su propia empresa.
+    """
+    user = request.user
+    if not user.is_superuser:
+        if user.empresa_id:
+            return user.empresa_id
+        raise serializers.ValidationError({"detail": "El usuario no está asociado a ninguna empresa."})
+
+    empresa_id = query_params(request).get('empresa_id')
+    if not empresa_id:
+        return None
+    try:
+        empresa_id = int(empresa_id)
+    except ValueError:
+        raise serializers.ValidationError({"empresa_id": "El ID de empresa debe ser un número válido."})
+    if not Empresa.objects.filter(id=empresa_id).exists():
+        raise serializers.ValidationError({"empresa_id": "La empresa especificada no existe."})
+    return empresa_id
+
+
+def company_name(empresa_id):
+    if empresa_id is not None:
+        nombre = Empresa.objects.filter(id=empresa_id).values_list('nombre', flat=True).first()
+        if nombre is not None:
+            return nombre
+    return "Todas las Empresas"
+
+
+def _parse_date(params, param):
+    try:
+        return datetime.strptime(params[param], '%Y-%m-%d').date()
+    except ValueError:
+        raise serializers.ValidationError({param: "Formato de fecha inválido. Use %Y-%m-%d."})
+
+
+def period(request):
+    """
+    (inicio, fin) de ?fecha_inicio= y ?fecha_fin= (ambas incluidas; cualquiera puede ser None).
+    Sin ninguna de las dos, los últimos 90 días.
+    """
+    params = query_params(request)
+    inicio = _parse_date(params, 'fecha_inicio') if params.get('fecha_inicio') else None
+    fin = _parse_date(params, 'fecha_fin') if params.get('fecha_fin') else None
+    if inicio is None and fin is None:
+        fin = timezone.localdate()
+        inicio = fin - timedelta(days=90)
+    return inicio, fin
+
+
+def midnight(dia):
+    """Medianoche de `dia` en la zona horaria activa (límite de los rangos de fechas)."""
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def date_range(request, date_field):
+    """Lookups de period() sobre `date_field`."""
+    inicio, fin = period(request)
+    lookups = {}
+    if inicio is not None:
+        lookups[f'{date_field}__gte'] = midnight(inicio)
+    if fin is not None:
+        lookups[f'{date_field}__lt'] = midnight(fin + timedelta(days=1))
+    return lookups
+
+
+class ReportSpec:
+    """
+    Definición declarativa de un reporte.
+
+    - company_field: lookup del id de empresa en `model` (alcance por empresa).
+    - date_field: lookup de fecha para ?fecha_inicio=/?fecha_fin=, o None si no aplica.
+    - ordering: nombres de columna, con '-' para orden descendente.
+    - sortable: columnas por las que el cliente puede ordenar con ?ordenar= (con '-' para
+      descendente); ese orden va delante de `ordering`.
+    - limit / limit_param: límite fijo, o por defecto si la petición trae `limit_param`.
+    - where: lookups fijos que se aplican siempre (p. ej. excluir ventas canceladas).
+    - computed / postprocess: columnas que no salen de la consulta sino de
+      postprocess(filas), que recibe todas las filas del reporte y devuelve las filas
+      completas (y ordenadas); se calcula en Python sobre el resultado entero.
+    - template: plantilla de PDF (por defecto la tabla genérica).
+    """
+
+    def __init__(self, name, title, model, *, dimensions=(), measures=(), filters=(),
+                 company_field='empresa_id', date_field=None, ordering=(), sortable=(), limit=None,
+                 limit_param=None, where=None, computed=(), postprocess=None,
+                 template='reports/report_table.html'):
+        self.name = name
+        self.title = title
+        self.model = model
+        self.dimensions = tuple(dimensions)
+        self.measures = tuple(measures)
+        self.filters = tuple(filters)
+        self.company_field = company_field
+        self.date_field = date_field
+        self.ordering = tuple(ordering)
+        self.sortable = tuple(sortable)
+        self.limit = limit
+        self.limit_param = limit_param
+        self.where = dict(where or {})
+        self.postprocess = postprocess
+        self.template = template
+        self._query_columns = self.dimensions + self.measures
+        self.columns = self._query_columns + tuple(computed)
+        self._aliases = {column.name: column.alias for column in self._query_columns}
+
+    @property
+    def single_row(self):
+        return not self.dimensions
+
+    def lookups(self, request, dates=True):
+        """
+        Filtros de la consulta: empresa, rango de fechas (salvo con dates=False) y parámetros
+        del spec, ya validados.
+        """
+        lookups = dict(self.where)
+        empresa_id = company_scope(request)
+        if empresa_id is not None:
+            lookups[self.company_field] = empresa_id
+        if self.date_field and dates:
+            lookups.update(date_range(request, self.date_field))
+        params = query_params(request)
+        for filtro in self.filters:
+            if params.get(filtro.param):
+                lookups.update(filtro.parse(params[filtro.param]))
+        return lookups
+
+    def get_limit(self, request):
+        limit = self.limit
+        raw = query_params(request).get(self.limit_param) if self.limit_param else None
+        if raw is not None:
+            try:
+                limit = int(raw)
+                if limit <= 0:
+                    raise ValueError
+            except ValueError:
+                raise serializers.ValidationError({self.limit_param: "El límite debe ser un número entero positivo."})
+        return limit
+
+    def get_ordering(self, request):
+        ordering = list(self.ordering)
+        pedido = query_params(request).get('ordenar') if self.sortable else None
+        if pedido:
+            if pedido.lstrip('-') not in self.sortable:
+                raise serializers.ValidationError(
+                    {'ordenar': f"Orden inválido. Opciones: {', '.join(self.sortable)} (con '-' para descendente)."})
+            ordering = [pedido] + [nombre for nombre in ordering if nombre.lstrip('-') != pedido.lstrip('-')]
+        return ordering
+
+    def _order_by(self, request):
+        return [
+            f"-{self._aliases[nombre[1:]]}" if nombre.startswith('-') else self._aliases[nombre]
+            for nombre in self.get_ordering(request)
+        ]
+
+    def compile(self, request):
+        """
+        Consulta del reporte. Con dimensiones, un queryset de .values() (una fila por grupo);
+        sin dimensiones, el dict de .aggregate() (ya ejecutado: es una sola fila).
+        """
+        queryset = self.model.objects.filter(**self.lookups(request))
+        medidas = {medida.alias: medida.expression for medida in self.measures}
+        if self.single_row:
+            return queryset.aggregate(**medidas)
+
+        queryset = queryset.values(**{dim.alias: dim.expression for dim in self.dimensions})
+        if medidas:
+            queryset = queryset.annotate(**medidas)
+        queryset = queryset.order_by(*self._order_by(request))
+        limit = self.get_limit(request)
+        return queryset[:limit] if limit else queryset
+
+    def row(self, values):
+        """Fila del reporte (dict por nombre de columna) a partir de una fila de la consulta."""
+        return {column.name: column.clean(values[column.alias]) for column in self._query_columns}
+
+    def rows(self, queryset):
+        if isinstance(queryset, dict):
+            return [self.row(queryset)]
+        rows = [self.row(values) for values in queryset]
+        return self.postprocess(rows) if self.postprocess else rows
+
+    def iter_rows(self, queryset):
+        """
+        Como rows(), leyendo la consulta por bloques (exportaciones por streaming). Con
+        postprocess hacen falta todas las filas, así que se leen enteras.
+        """
+        if isinstance(queryset, dict) or self.postprocess:
+            return iter(self.rows(queryset))
+        return (self.row(values) for values in queryset.iterator(chunk_size=settings.EXPORTACION_CHUNK_SIZE))
+
+    def to_json(self, row):
+        return {column.name: column.to_json(row[column.name]) for column in self.columns}
+
+    def rollup(self, request, max_rows=None):
+        """
+        Filas del reporte con los subtotales de cada nivel de dimensiones, en una consulta.
+        Cada fila trae además 'nivel': cuántas dimensiones (de la primera en adelante) están
+        desglosadas; las de nivel menor que len(dimensions) son subtotales y la de nivel 0 es
+        el total. Las dimensiones agregadas valen None. Con `max_rows`, se leen como mucho
+        max_rows + 1 filas (para poder detectar que el resultado no cabe).
+        """
+        queryset = self.model.objects.filter(**self.lookups(request))
+        total = len(self.dimensions)
+        if connections[queryset.db].vendor == 'postgresql':
+            filas = self._rollup_agrupado(queryset)
+        else:
+            filas = self._rollup_union(queryset)
+        if max_rows:
+            filas = filas[:max_rows + 1]
+        return [
+            dict(self.row(fila), nivel=total - int(fila['g_grouping']).bit_length())
+            for fila in filas
+        ]
+
+    def _rollup_agrupado(self, queryset):
+        """
+        rollup() en PostgreSQL: GROUP BY ROLLUP(dimensiones) y GROUPING() en la misma consulta.
+        Filas de .values() con las dimensiones, las medidas y la máscara 'g_grouping'.
+        """
+        medidas = {medida.alias: medida.expression for medida in self.measures}
+        queryset = queryset.values(**{dim.alias: Agrupada(dim.expression) for dim in self.dimensions}) \
+            .annotate(**medidas, g_grouping=Grouping(*(dim.expression for dim in self.dimensions))) \
+            .order_by()
+        # Las dimensiones ya resueltas contra la consulta, sin el envoltorio Agrupada. Dentro de
+        # ROLLUP() van las expresiones completas (un número de columna ahí sería una constante);
+        # GROUPING() y el SELECT las repiten tal cual. Con parámetros interpolados en el cliente
+        # (lo habitual; no con OPTIONS['server_side_binding']) el texto coincide.
+        consulta = queryset.query
+        consulta.group_by = (Rollup(*(
+            consulta.annotations[dim.alias].get_source_expressions()[0] for dim in self.dimensions
+        )),)
+        return queryset
+
+    def _rollup_union(self, queryset):
+        """
+        rollup() en el resto de motores: un GROUP BY por nivel (del detalle al total) unidos con
+        UNION ALL; las dimensiones agregadas son NULL y la máscara es la que daría GROUPING().
+        """
+        medidas = {medida.alias: medida.expression for medida in self.measures}
+        total = len(self.dimensions)
+        niveles = []
+        for nivel in range(total, -1, -1):
+            # Los conversores de la unión son los de la primera consulta (el detalle), así
+            # que el tipo del NULL de las dimensiones agregadas no importa
+            columnas = {
+                dim.alias: dim.expression if i < nivel else Value(None, output_field=CharField())
+                for i, dim in enumerate(self.dimensions)
+            }
+            columnas['g_grouping'] = Value((1 << (total - nivel)) - 1, output_field=IntegerField())
+            niveles.append(queryset.values(**columnas).annotate(**medidas).order_by())
+        return niveles[0].union(*niveles[1:], all=True)
+
+    def cache_key(self, request, variant):
+        """
+        Clave de caché del resultado para esta petición: el alcance por empresa del usuario y
+        todos los parámetros (un cambio de filtro, página o límite es otra clave).
+        """
+        user = request.user
+        alcance = 'todas' if user.is_superuser else user.empresa_id
+        params = sorted((clave, query_params(request).getlist(clave)) for clave in query_params(request))
+        datos = json.dumps([alcance, params], sort_keys=True, default=str)
+        return f"reportes:{self.name}:{variant}:" + hashlib.sha256(datos.encode('utf-8')).hexdigest()
@@ -0,0 +1,161 @@
+# reports/pdf.py
+
+"""
+Renderizado de reportes PDF fuera del hilo de la petición.
+
+xhtml2pdf es puro Python, consume CPU y retiene el GIL: un PDF grande renderizado en un hilo
+de gunicorn frena a todas las demás peticiones del proceso. Aquí:
+
+- El PDF se genera en un pool de procesos (PDF_PROCESOS). Cada proceso inicializa Django
+  una vez y precompila las plantillas de reportes. El hilo de la petición solo espera el
+  resultado y, mientras espera, no retiene el GIL.
+- Las tablas grandes se parten en secciones de PDF_FILAS_POR_SECCION filas. Cada sección se
+  maqueta como un documento independiente y luego se concatenan con pypdf, así que la
+  memoria de xhtml2pdf depende del tamaño de la sección y no del reporte completo.
+- El resultado se guarda en la caché de Django PDF_CACHE_SEGUNDOS con una clave que es el
+  hash del contenido (plantilla + datos, sin la fecha de generación): dos exportaciones
+  idénticas seguidas solo se maquetan una vez.
+
+Con PDF_PROCESOS=0 todo se hace en el proceso actual (desarrollo, depuración).
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Plantillas que cada proceso compila al arrancar (la tabla genérica de reports.engine)
+PLANTILLAS = (
+    'reports/report_table.html',
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _plantilla(nombre):
+    from django.template.loader import get_template
+    return get_template(nombre)
+
+
+def _inicializar_proceso():
+    """Inicializador de cada proceso del pool: Django listo y plantillas compiladas."""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    for nombre in PLANTILLAS:
+        _plantilla(nombre)
+
+
+def _secciones(contexto, filas_por_seccion):
+    """Contextos de cada sección: report_data troceado si es una lista más larga que la sección."""
+    datos = contexto.get('report_data')
+    if not isinstance(datos, list) or len(datos) <= filas_por_seccion:
+        return [contexto]
+    trozos = [datos[i:i + filas_por_seccion] for i in range(0, len(datos), filas_por_seccion)]
+    return [
+        dict(contexto, report_data=trozo, seccion=numero, secciones=len(trozos))
+        for numero, trozo in enumerate(trozos, start=1)
+    ]
+
+
+def renderizar(nombre_plantilla, contexto, filas_por_seccion):
+    """
+    Maqueta el PDF (en el proceso que lo llame). Devuelve los bytes o None si xhtml2pdf
+    informa de errores.
+    """
+    from pypdf import PdfWriter
+    from xhtml2pdf import pisa
+
+    plantilla = _plantilla(nombre_plantilla)
+    partes = []
+    for seccion in _secciones(contexto, filas_por_seccion):
+        html = plantilla.render(seccion)
+        salida = BytesIO()
+        if pisa.pisaDocument(BytesIO(html.encode('UTF-8')), salida).err:
+            return None
+        partes.append(salida)
+        del html
+
+    if len(partes) == 1:
+        return partes[0].getvalue()
+    documento = PdfWriter()
+    for parte in partes:
+        parte.seek(0)
+        documento.append(parte)
+    salida = BytesIO()
+    documento.write(salida)
+    return salida.getvalue()
+
+
+def _obtener_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: los procesos hijos no heredan hilos ni conexiones abiertas del worker web
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_PROCESOS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_inicializar_proceso,
+            )
+        return _pool
+
+
+def _descartar_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def clave_cache(nombre_plantilla, contexto):
+    """Hash del contenido del PDF. La fecha de generación no cuenta: cambia en cada petición."""
+    contenido = {clave: valor for clave, valor in contexto.items() if clave != 'generated_date'}
+    datos = json.dumps([nombre_plantilla, contenido], sort_keys=True, default=str, ensure_ascii=False)
+    return 'reportes:pdf:' + hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+
+def generar_pdf(nombre_plantilla, contexto):
+    """
+    PDF del reporte, de la caché si hay una maquetación reciente idéntica o del pool de
+    procesos si no. Devuelve los bytes o None si no se pudo generar.
+    """
+    clave = clave_cache(nombre_plantilla, contexto)
+    pdf = cache.get(clave)
+    if pdf is not None:
+        return pdf
+
+    filas = settings.PDF_FILAS_POR_SECCION
+    if settings.PDF_PROCESOS <= 0:
+        pdf = renderizar(nombre_plantilla, contexto, filas)
+    else:
+        pool = _obtener_pool()
+        futuro = pool.submit(renderizar, nombre_plantilla, contexto, filas)
+        try:
+            pdf = futuro.result(timeout=settings.PDF_TIMEOUT_SEGUNDOS)
+        except TimeoutError:
+            futuro.cancel()  # Si aún no había empezado, no ocupa un proceso
+            logger.warning("PDF %s sin terminar tras %ss", nombre_plantilla, settings.PDF_TIMEOUT_SEGUNDOS)
+            return None
+        except BrokenProcessPool:
+            # Un proceso murió (p. ej. por memoria): se recrea el pool para la siguiente petición
+            logger.exception("El pool de PDF se rompió; se recreará")
+            _descartar_pool(pool)
+            return None
+
+    if pdf is not None and len(pdf) <= settings.PDF_CACHE_MAX_KB * 1024:
+        cache.set(clave, pdf, settings.PDF_CACHE_SEGUNDOS)
+    return pdf
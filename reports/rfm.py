@@ -0,0 +1,80 @@
+# reports/rfm.py
+
+"""
+Segmentación RFM de clientes (recencia, frecuencia y valor monetario).
+
+La consulta del spec CLIENT_RFM (reports/specs.py) da una fila por cliente con su última
+compra, número de ventas y monto total. Aquí, sobre todas esas filas a la vez (vectores de
+NumPy):
+- cada métrica se puntúa de 1 a 5 por quintiles de la empresa (np.quantile + np.digitize);
+  en la recencia menos días es mejor, así que la puntuación se invierte,
+- el segmento sale de las puntuaciones de recencia y frecuencia (tabla SEGMENTOS).
+
+Con valores repetidos (p. ej. muchos clientes con una sola compra) varios cortes coinciden
+y los empatados quedan en el mismo quintil, el más bajo. Si todos los valores son iguales
+(o hay un solo cliente) la métrica no distingue a nadie y todos reciben un 3.
+"""
+
+import numpy as np
+from django.utils import timezone
+
+QUINTILES = (0.2, 0.4, 0.6, 0.8)
+
+# (segmento, condición sobre las puntuaciones r y f). Se aplica la primera que se cumple.
+SEGMENTOS = (
+    ('Campeones', lambda r, f: (r >= 4) & (f >= 4)),
+    ('Leales', lambda r, f: (r == 3) & (f >= 4)),
+    ('No se pueden perder', lambda r, f: (r <= 2) & (f >= 4)),
+    ('Nuevos', lambda r, f: (r >= 4) & (f == 1)),
+    ('Potencialmente leales', lambda r, f: r >= 4),
+    ('En riesgo', lambda r, f: (r <= 2) & (f >= 2)),
+    ('Hibernando', lambda r, f: r <= 2),
+)
+# Lo que no encaja en ninguno (recencia media, frecuencia baja o media)
+SEGMENTO_POR_DEFECTO = 'Requieren atención'
+NOMBRES_SEGMENTOS = tuple(nombre for nombre, _ in SEGMENTOS) + (SEGMENTO_POR_DEFECTO,)
+
+
+def score(valores, invertir=False):
+    """Puntuación 1-5 de cada valor según los quintiles del propio vector."""
+    if np.ptp(valores) == 0:
+        return np.full(len(valores), 3)
+    cortes = np.quantile(valores, QUINTILES)
+    puntos = np.digitize(valores, cortes, right=True) + 1
+    return 6 - puntos if invertir else puntos
+
+
+def segment_clients(rows, hoy=None):
+    """
+    Completa las filas de CLIENT_RFM (id, nombre_cliente, email_cliente, ultima_compra,
+    frecuencia, monto) con recencia_dias, r, f, m, rfm y segmento. Devuelve las filas
+    ordenadas de mejor a peor cliente: puntuación total y monto, de mayor a menor.
+    """
+    if not rows:
+        return []
+    hoy = hoy or timezone.localdate()
+    ultimas = [timezone.localtime(row['ultima_compra']).date() for row in rows]
+    recencia = np.array([(hoy - dia).days for dia in ultimas])
+    frecuencia = np.array([row['frecuencia'] for row in rows])
+    monto = np.array([float(row['monto']) for row in rows])
+
+    r = score(recencia, invertir=True)
+    f = score(frecuencia)
+    m = score(monto)
+    segmentos = np.select(
+        [condicion(r, f) for _, condicion in SEGMENTOS],
+        [nombre for nombre, _ in SEGMENTOS],
+        default=SEGMENTO_POR_DEFECTO,
+    )
+
+    for i, row in enumerate(rows):
+        row.update(
+            ultima_compra=ultimas[i],
+            recencia_dias=int(recencia[i]),
+            r=int(r[i]), f=int(f[i]), m=int(m[i]),
+            rfm=f"{r[i]}{f[i]}{m[i]}",
+            segmento=str(segmentos[i]),
+        )
+    # np.lexsort ordena por la última clave primero: total, después monto, después id
+    orden = np.lexsort((np.array([row['id'] for row in rows]), -monto, -(r + f + m)))
+    return [rows[i] for i in orden]
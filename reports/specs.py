@@ -0,0 +1,254 @@
+# reports/specs.py
+
+"""
+Definiciones de los reportes (ver reports.engine). Añadir un reporte es añadir aquí su spec
+y registrarlo en reports.views.REPORTS: JSON, exportaciones, caché y paginación son comunes.
+"""
+
+from decimal import Decimal
+
+from django.db.models import Avg, Count, DateField, DecimalField, F, Max, Sum, Value
+from django.db.models.functions import (
+    Coalesce, Concat, NullIf, TruncDate, TruncMonth, TruncQuarter, TruncWeek, TruncYear,
+)
+
+from apps.almacenes.models import Almacen
+from apps.categorias.models import Categoria
+from apps.productos.models import Producto
+from apps.usuarios.models import CustomUser
+from apps.ventas.models import DetalleVenta, Venta
+
+from .engine import Column, Dimension, Filter, Measure, ReportSpec
+from .rfm import segment_clients
+
+CERO = Value(Decimal('0.00'), output_field=DecimalField(max_digits=15, decimal_places=2))
+IMPORTE = DecimalField(max_digits=15, decimal_places=2)
+# Importe de una línea de venta, con su descuento
+IMPORTE_LINEA = F('cantidad') * F('precio_unitario') * (Decimal('1.00') - F('descuento_aplicado'))
+# Costo de una línea de venta con el costo promedio copiado al venderse (apps.movimientos.costeo)
+COSTO_LINEA = F('cantidad') * Coalesce(F('costo_unitario'), Value(Decimal('0.0000')))
+NOMBRE_CLIENTE = Concat(
+    Coalesce(F('usuario__first_name'), Value('')),
+    Value(' '),
+    Coalesce(F('usuario__last_name'), Value('')),
+)
+
+
+SALES_SUMMARY = ReportSpec(
+    'sales-summary', "Reporte de Resumen de Ventas", Venta,
+    date_field='fecha',
+    measures=[
+        Measure('total_ventas_cantidad', "Total Ventas", Count('id'), kind='int', width=12),
+        Measure('monto_total_ventas', "Monto Total Ventas", Coalesce(Sum('monto_total'), CERO), width=18),
+        Measure('promedio_por_venta', "Promedio por Venta",
+                Coalesce(Avg('monto_total', output_field=IMPORTE), CERO),
+                width=18),
+    ],
+    filters=[
+        Filter('cliente_id', 'usuario_id', model=CustomUser,
+               invalid="El ID de cliente debe ser un número válido.",
+               missing="El cliente especificado no existe."),
+        Filter('estado', 'estado', cast=str, choices=('Pendiente', 'Completada', 'Cancelada'),
+               invalid="Estado de venta inválido."),
+    ],
+)
+
+# Sobre las líneas de venta: la categoría filtra los productos contados, no las ventas
+TOP_SELLING_PRODUCTS = ReportSpec(
+    'top-selling-products', "Reporte de Productos Más Vendidos", DetalleVenta,
+    company_field='venta__empresa_id', date_field='venta__fecha',
+    dimensions=[
+        Dimension('id', "ID Producto", field='producto_id', kind='int', width=11),
+        Dimension('nombre', "Nombre Producto", field='producto__nombre', width=25),
+    ],
+    measures=[
+        Measure('cantidad_vendida', "Cantidad Vendida", Sum('cantidad'), kind='int', width=16),
+        Measure('ingresos_generados', "Ingresos Generados",
+                Coalesce(Sum(IMPORTE_LINEA, output_field=IMPORTE), CERO),
+                width=18),
+    ],
+    filters=[
+        Filter('categoria_id', 'producto__categoria_id', model=Categoria,
+               invalid="El ID de categoría debe ser un número válido.",
+               missing="La categoría especificada no existe."),
+    ],
+    ordering=['-cantidad_vendida', 'id'],
+    limit=10, limit_param='limit',
+)
+
+STOCK_LEVEL = ReportSpec(
+    'stock-level', "Reporte de Nivel de Stock", Producto,
+    dimensions=[
+        Dimension('id', "ID Producto", kind='int', width=11),
+        Dimension('nombre', "Nombre Producto", width=25),
+        Dimension('stock_actual', "Stock Actual", field='stock', kind='int', width=12),
+        Dimension('almacen_nombre', "Nombre Almacén", field='almacen__nombre', default='N/A', width=25),
+        Dimension('empresa_nombre', "Nombre Empresa", field='empresa__nombre', default='N/A', width=25),
+        Dimension('clase_abc', "Clase ABC", field='clasificacion__clase_abc', default='', width=9),
+        Dimension('clase_xyz', "Clase XYZ", field='clasificacion__clase_xyz', default='', width=9),
+    ],
+    filters=[
+        Filter('almacen_id', 'almacen_id', model=Almacen,
+               invalid="El ID de almacén debe ser un número válido.",
+               missing="El almacén especificado no existe."),
+        Filter('categoria_id', 'categoria_id', model=Categoria,
+               invalid="El ID de categoría debe ser un número válido.",
+               missing="La categoría especificada no existe."),
+        Filter('stock_min', 'stock__gte', minimum=0,
+               invalid="El stock mínimo debe ser un número entero no negativo."),
+        Filter('stock_max', 'stock__lte', minimum=0,
+               invalid="El stock máximo debe ser un número entero no negativo."),
+        Filter('clase_abc', 'clasificacion__clase_abc', cast=str, choices=('A', 'B', 'C'),
+               invalid="Clase ABC inválida."),
+        Filter('clase_xyz', 'clasificacion__clase_xyz', cast=str, choices=('X', 'Y', 'Z'),
+               invalid="Clase XYZ inválida."),
+    ],
+    ordering=['nombre', 'id'],
+    sortable=['nombre', 'stock_actual', 'clase_abc', 'clase_xyz'],
+)
+
+CLIENT_PERFORMANCE = ReportSpec(
+    'client-performance', "Reporte de Rendimiento de Clientes", Venta,
+    date_field='fecha',
+    dimensions=[
+        Dimension('id', "ID Cliente", field='usuario_id', kind='int', width=10),
+        Dimension('nombre_cliente', "Nombre Cliente", width=25, default='', expression=NOMBRE_CLIENTE),
+        Dimension('email_cliente', "Email Cliente", field='usuario__email', width=25),
+    ],
+    measures=[
+        Measure('monto_total_comprado', "Monto Total Comprado", Coalesce(Sum('monto_total'), CERO), width=20),
+        Measure('numero_ventas_realizadas', "Número Ventas", Count('id'), kind='int', width=13),
+    ],
+    ordering=['-monto_total_comprado', 'id'],
+)
+
+# Segmentación RFM (reports.rfm): todo el historial de cada cliente, sin ventas canceladas
+# ni ventas sin cliente. Las puntuaciones y el segmento se calculan sobre todas las filas.
+CLIENT_RFM = ReportSpec(
+    'client-rfm', "Segmentación RFM de Clientes", Venta,
+    where={'usuario__isnull': False, 'estado__in': ('Pendiente', 'Completada')},
+    dimensions=[
+        Dimension('id', "ID Cliente", field='usuario_id', kind='int', width=10),
+        Dimension('nombre_cliente', "Nombre Cliente", width=25, default='', expression=NOMBRE_CLIENTE),
+        Dimension('email_cliente', "Email Cliente", field='usuario__email', width=25),
+    ],
+    measures=[
+        Measure('ultima_compra', "Última Compra", Max('fecha'), kind='date', width=13),
+        Measure('frecuencia', "Ventas", Count('id'), kind='int', width=8),
+        Measure('monto', "Monto Total", Coalesce(Sum('monto_total'), CERO), width=15),
+    ],
+    computed=[
+        Column('recencia_dias', "Días Sin Comprar", kind='int', width=10),
+        Column('r', "R", kind='int', width=3),
+        Column('f', "F", kind='int', width=3),
+        Column('m', "M", kind='int', width=3),
+        Column('rfm', "RFM", width=5),
+        Column('segmento', "Segmento", width=22),
+    ],
+    postprocess=segment_clients,
+)
+
+
+
+
+def _ingresos():
+    return Coalesce(Sum(IMPORTE_LINEA, output_field=IMPORTE), CERO)
+
+
+def _costo():
+    return Coalesce(Sum(COSTO_LINEA, output_field=IMPORTE), CERO)
+
+
+def _margen_pct():
+    # Margen sobre ingresos, en porcentaje (NULL sin ingresos)
+    return (_ingresos() - _costo()) * Value(Decimal('100')) / NullIf(_ingresos(), CERO)
+
+
+# Margen bruto por producto: ingresos menos el costo copiado en cada línea de venta, así que
+# es una suma sobre DetalleVenta (sin recalcular costos). Por categoría o periodo: el pivote.
+GROSS_MARGIN = ReportSpec(
+    'gross-margin', "Reporte de Margen Bruto", DetalleVenta,
+    company_field='venta__empresa_id', date_field='venta__fecha',
+    where={'venta__estado__in': ('Pendiente', 'Completada')},
+    dimensions=[
+        Dimension('id', "ID Producto", field='producto_id', kind='int', width=11),
+        Dimension('nombre', "Nombre Producto", field='producto__nombre', width=25),
+        Dimension('categoria', "Categoría", field='producto__categoria__nombre', default='N/A', width=20),
+    ],
+    measures=[
+        Measure('unidades', "Unidades", Sum('cantidad'), kind='int', width=10),
+        Measure('ingresos', "Ingresos", _ingresos(), width=15),
+        Measure('costo', "Costo", _costo(), width=15),
+        Measure('margen_bruto', "Margen Bruto", _ingresos() - _costo(), width=15),
+        Measure('margen_pct', "Margen %", _margen_pct(), width=10),
+    ],
+    filters=[
+        Filter('categoria_id', 'producto__categoria_id', model=Categoria,
+               invalid="El ID de categoría debe ser un número válido.",
+               missing="La categoría especificada no existe."),
+        Filter('almacen_id', 'producto__almacen_id', model=Almacen,
+               invalid="El ID de almacén debe ser un número válido.",
+               missing="El almacén especificado no existe."),
+    ],
+    ordering=['-margen_bruto', 'id'],
+    sortable=['nombre', 'categoria', 'unidades', 'ingresos', 'margen_bruto', 'margen_pct'],
+)
+
+
+# --- Pivote de ventas (reports.views.PivotReportView) ---
+# Catálogo de dimensiones y medidas sobre las líneas de venta (DetalleVenta), que llegan a
+# Venta (fecha, origen, estado, cliente) y a Producto (categoría, almacén, sucursal).
+
+PIVOT_DIMENSIONS = {
+    'categoria': lambda: Dimension('categoria', "Categoría", field='producto__categoria__nombre'),
+    'almacen': lambda: Dimension('almacen', "Almacén", field='producto__almacen__nombre'),
+    'sucursal': lambda: Dimension('sucursal', "Sucursal", field='producto__almacen__sucursal__nombre'),
+    'producto': lambda: Dimension('producto', "Producto", field='producto__nombre'),
+    'origen': lambda: Dimension('origen', "Origen", field='venta__origen'),
+    'estado': lambda: Dimension('estado', "Estado", field='venta__estado'),
+    'cliente': lambda: Dimension('cliente', "Cliente", field='venta__usuario__username'),
+    'dia': lambda: Dimension('dia', "Día", expression=TruncDate('venta__fecha')),
+    'semana': lambda: Dimension('semana', "Semana", expression=TruncWeek('venta__fecha', output_field=DateField())),
+    'mes': lambda: Dimension('mes', "Mes", expression=TruncMonth('venta__fecha', output_field=DateField())),
+    'trimestre': lambda: Dimension('trimestre', "Trimestre",
+                                   expression=TruncQuarter('venta__fecha', output_field=DateField())),
+    'anio': lambda: Dimension('anio', "Año", expression=TruncYear('venta__fecha', output_field=DateField())),
+}
+
+PIVOT_MEASURES = {
+    'ingresos': lambda: Measure('ingresos', "Ingresos", _ingresos()),
+    'costo': lambda: Measure('costo', "Costo", _costo()),
+    'margen_bruto': lambda: Measure('margen_bruto', "Margen Bruto", _ingresos() - _costo()),
+    'margen_pct': lambda: Measure('margen_pct', "Margen %", _margen_pct()),
+    'unidades': lambda: Measure('unidades', "Unidades", Sum('cantidad'), kind='int', default=0),
+    'ventas': lambda: Measure('ventas', "Ventas", Count('venta_id', distinct=True), kind='int'),
+    'clientes': lambda: Measure('clientes', "Clientes", Count('venta__usuario_id', distinct=True), kind='int'),
+    'ticket_promedio': lambda: Measure(
+        'ticket_promedio', "Ticket Promedio",
+        Sum(IMPORTE_LINEA, output_field=IMPORTE) / NullIf(Count('venta_id', distinct=True), 0),
+    ),
+}
+
+PIVOT_FILTERS = [
+    Filter('estado', 'venta__estado', cast=str, choices=('Pendiente', 'Completada', 'Cancelada'),
+           invalid="Estado de venta inválido."),
+    Filter('origen', 'venta__origen', cast=str, choices=('MANUAL', 'MARKETPLACE'),
+           invalid="Origen de venta inválido."),
+    Filter('categoria_id', 'producto__categoria_id', model=Categoria,
+           invalid="El ID de categoría debe ser un número válido.",
+           missing="La categoría especificada no existe."),
+    Filter('almacen_id', 'producto__almacen_id', model=Almacen,
+           invalid="El ID de almacén debe ser un número válido.",
+           missing="El almacén especificado no existe."),
+]
+
+
+def pivot_spec(dimensiones, medidas):
+    """Spec del pivote para las dimensiones y medidas pedidas (nombres de los catálogos)."""
+    return ReportSpec(
+        'pivot', "Pivote de Ventas", DetalleVenta,
+        company_field='venta__empresa_id', date_field='venta__fecha',
+        dimensions=[PIVOT_DIMENSIONS[nombre]() for nombre in dimensiones],
+        measures=[PIVOT_MEASURES[nombre]() for nombre in medidas],
+        filters=PIVOT_FILTERS,
+    )
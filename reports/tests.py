@@ -1,3 +1,447 @@
-from django.test import TestCase
+# reports/tests.py
 
-# Create your tests here.
+import csv
+import json
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse, QueryDict, StreamingHttpResponse
+from django.test import AsyncClient, Client, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.categorias.models import Categoria
+from apps.empresas.models import Empresa
+from apps.productos.models import Producto
+from apps.rbac.models import Role
+from apps.usuarios.models import CustomUser
+from apps.ventas.models import DetalleVenta, Venta
+from erp.asincrono import EjecutorAcotado, Saturado
+from erp.exportacion import texto
+from . import pdf, specs
+from .comparison import compare_periods, windows
+from .rfm import score, segment_clients
+
+
+def peticion(**params):
+    """Petición mínima de un superusuario para los specs (alcance por ?empresa_id=)."""
+    query = QueryDict(mutable=True)
+    query.update({clave: str(valor) for clave, valor in params.items()})
+    return SimpleNamespace(user=SimpleNamespace(is_superuser=True, empresa_id=None), query_params=query)
+
+
+class EjecutorAcotadoTest(SimpleTestCase):
+    def setUp(self):
+        self.ejecutor = EjecutorAcotado(hilos=2, por_clave=1)
+
+    def ejecutar(self, funcion):
+        return async_to_sync(self.ejecutor.ejecutar)('empresa:1', funcion)
+
+    def test_respuesta_normal_libera_el_cupo_al_volver(self):
+        self.ejecutar(lambda: HttpResponse('listo'))
+        self.assertEqual(self.ejecutor.en_curso('empresa:1'), 0)
+
+    def test_streaming_ocupa_el_cupo_hasta_leerse_entero(self):
+        respuesta = self.ejecutar(lambda: StreamingHttpResponse(iter(['a', 'b'])))
+        self.assertEqual(self.ejecutor.en_curso('empresa:1'), 1)
+        with self.assertRaises(Saturado):
+            self.ejecutar(lambda: HttpResponse('otra'))
+
+        self.assertEqual(b''.join(respuesta.streaming_content), b'ab')
+        self.assertEqual(self.ejecutor.en_curso('empresa:1'), 0)
+
+    def test_streaming_cerrado_sin_leer_libera_el_cupo(self):
+        respuesta = self.ejecutar(lambda: StreamingHttpResponse(iter(['a', 'b'])))
+        respuesta.close()
+        respuesta.close()
+        self.assertEqual(self.ejecutor.en_curso(), 0)
+
+    def test_streaming_async_libera_el_cupo_al_terminar(self):
+        async def partes():
+            yield 'a'
+            yield 'b'
+
+        async def leer(respuesta):
+            return b''.join([parte async for parte in respuesta.streaming_content])
+
+        respuesta = self.ejecutar(lambda: StreamingHttpResponse(partes()))
+        self.assertEqual(self.ejecutor.en_curso('empresa:1'), 1)
+        self.assertEqual(async_to_sync(leer)(respuesta), b'ab')
+        self.assertEqual(self.ejecutor.en_curso('empresa:1'), 0)
+
+    def test_error_al_generar_libera_el_cupo(self):
+        def falla():
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            self.ejecutar(falla)
+        self.assertEqual(self.ejecutor.en_curso(), 0)
+
+
+class RollupSqlTest(SimpleTestCase):
+    def test_postgresql_agrupa_con_rollup_de_las_expresiones(self):
+        from django.db.backends.postgresql.base import DatabaseWrapper
+
+        postgres = DatabaseWrapper(dict(connection.settings_dict, ENGINE='django.db.backends.postgresql'),
+                                   alias='postgres')
+        spec = specs.pivot_spec(['categoria', 'dia'], ['unidades'])
+        queryset = spec._rollup_agrupado(DetalleVenta.objects.filter(venta__empresa_id=1))
+        sql, _params = queryset.query.get_compiler(connection=postgres).as_sql()
+
+        agrupacion = sql.split(' GROUP BY ', 1)[1]
+        (argumentos,) = re.fullmatch(r'ROLLUP\((.*)\)', agrupacion).groups()
+        self.assertIn(f'GROUPING({argumentos}) AS "g_grouping"', sql)
+        self.assertIn('"categorias_categoria"."nombre"', argumentos)
+
+
+class RollupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre='Empresa Pivote')
+        categorias = {nombre: Categoria.objects.create(nombre=nombre, empresa=cls.empresa) for nombre in 'AB'}
+        productos = {
+            nombre: Producto.objects.create(nombre=nombre, precio=Decimal('1.00'), empresa=cls.empresa,
+                                            categoria=categorias[nombre[0]])
+            for nombre in ('A1', 'A2', 'B1')
+        }
+        for estado, lineas in (('Completada', {'A1': 2, 'A2': 3, 'B1': 5}), ('Pendiente', {'A1': 7})):
+            venta = Venta.objects.create(empresa=cls.empresa, estado=estado)
+            DetalleVenta.objects.bulk_create([
+                DetalleVenta(venta=venta, producto=productos[nombre], cantidad=cantidad,
+                             precio_unitario=Decimal('1.00'))
+                for nombre, cantidad in lineas.items()
+            ])
+
+    def filas(self, queryset, spec):
+        total = len(spec.dimensions)
+        return sorted(
+            (total - int(fila['g_grouping']).bit_length(), fila['d_categoria'] or '', fila['d_estado'] or '',
+             fila['m_unidades'])
+            for fila in queryset
+        )
+
+    def test_subtotales_por_nivel(self):
+        spec = specs.pivot_spec(['categoria', 'estado'], ['unidades'])
+        filas = spec.rollup(peticion(empresa_id=self.empresa.id))
+
+        self.assertEqual(
+            sorted((fila['nivel'], fila['categoria'] or '', fila['estado'] or '', fila['unidades']) for fila in filas),
+            [(0, '', '', 17),
+             (1, 'A', '', 12), (1, 'B', '', 5),
+             (2, 'A', 'Completada', 5), (2, 'A', 'Pendiente', 7), (2, 'B', 'Completada', 5)],
+        )
+
+    def test_max_rows_lee_una_fila_de_mas(self):
+        spec = specs.pivot_spec(['categoria', 'estado'], ['unidades'])
+        self.assertEqual(len(spec.rollup(peticion(empresa_id=self.empresa.id), max_rows=2)), 3)
+
+    @skipUnless(connection.vendor == 'postgresql', "GROUP BY ROLLUP solo en PostgreSQL")
+    def test_rollup_y_union_dan_las_mismas_filas(self):
+        spec = specs.pivot_spec(['categoria', 'estado'], ['unidades'])
+        queryset = spec.model.objects.filter(**spec.lookups(peticion(empresa_id=self.empresa.id)))
+        self.assertEqual(self.filas(spec._rollup_agrupado(queryset), spec),
+                         self.filas(spec._rollup_union(queryset), spec))
+
+
+class RfmTest(SimpleTestCase):
+    def test_quintiles_de_valores_distintos(self):
+        valores = np.arange(1, 11)
+        self.assertEqual(score(valores).tolist(), [1, 1, 2, 2, 3, 3, 4, 4, 5, 5])
+        self.assertEqual(score(valores, invertir=True).tolist(), [5, 5, 4, 4, 3, 3, 2, 2, 1, 1])
+
+    def test_empatados_en_el_quintil_mas_bajo(self):
+        # Cuatro cortes coinciden en 1: los ocho empatados quedan en el quintil 1
+        self.assertEqual(score(np.array([1] * 8 + [5, 10])).tolist(), [1] * 8 + [5, 5])
+
+    def test_sin_variacion_todos_reciben_tres(self):
+        self.assertEqual(score(np.array([7, 7, 7])).tolist(), [3, 3, 3])
+        self.assertEqual(score(np.array([4])).tolist(), [3])
+
+    def filas(self, hoy, clientes):
+        mediodia = timezone.make_aware(datetime(hoy.year, hoy.month, hoy.day, 12))
+        return [
+            {'id': i, 'nombre_cliente': f'Cliente {i}', 'email_cliente': None,
+             'ultima_compra': mediodia - timedelta(days=dias), 'frecuencia': frecuencia, 'monto': Decimal(monto)}
+            for i, (dias, frecuencia, monto) in enumerate(clientes, start=1)
+        ]
+
+    def test_segmentos_y_orden(self):
+        hoy = date(2026, 1, 10)
+        # r = 5..1 por recencia; f y m, los quintiles de cada valor
+        filas = segment_clients(self.filas(hoy, [
+            (0, 1, '10.00'), (1, 2, '20.00'), (2, 5, '30.00'), (3, 4, '40.00'), (4, 3, '50.00'),
+        ]), hoy=hoy)
+
+        self.assertEqual(
+            [(fila['id'], fila['rfm'], fila['segmento']) for fila in filas],
+            [(3, '353', 'Leales'), (4, '244', 'No se pueden perder'), (5, '135', 'En riesgo'),
+             (2, '422', 'Potencialmente leales'), (1, '511', 'Nuevos')],
+        )
+        self.assertEqual(filas[-1]['ultima_compra'], hoy)
+        self.assertEqual(filas[-1]['recencia_dias'], 0)
+
+    def test_un_solo_cliente_y_sin_clientes(self):
+        hoy = date(2026, 1, 10)
+        (fila,) = segment_clients(self.filas(hoy, [(30, 1, '5.00')]), hoy=hoy)
+        self.assertEqual((fila['rfm'], fila['segmento']), ('333', 'Requieren atención'))
+        self.assertEqual(segment_clients([], hoy=hoy), [])
+
+    def test_empate_de_puntuacion_por_monto_y_despues_id(self):
+        hoy = date(2026, 1, 10)
+        filas = segment_clients(self.filas(hoy, [(5, 2, '10.00'), (5, 2, '20.00'), (5, 2, '10.00')]), hoy=hoy)
+        self.assertEqual([fila['id'] for fila in filas], [2, 1, 3])
+
+
+@override_settings(PERFILADO_MUESTREO=1)
+class PerfiladoMiddlewareTest(TestCase):
+    """Las consultas cuentan con WSGI y con ASGI (donde el ORM corre en hilos de sync_to_async)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Empresa.objects.create(nombre='Empresa Perfilada')
+
+    def comprobar(self, respuesta, registro):
+        self.assertEqual(respuesta.status_code, 200)
+        consultas = int(re.search(r'desc="(\d+) consultas"', respuesta['Server-Timing']).group(1))
+        linea = json.loads(registro.info.call_args.args[0])
+        self.assertGreater(consultas, 0)
+        self.assertEqual(linea['consultas'], consultas)
+        self.assertGreater(linea['sql_ms'], 0)
+
+    def test_wsgi(self):
+        with mock.patch('erp.middleware._registro') as registro:
+            respuesta = Client().get('/api/marketplace/empresas/')
+        self.comprobar(respuesta, registro.return_value)
+
+    async def test_asgi(self):
+        with mock.patch('erp.middleware._registro') as registro:
+            respuesta = await AsyncClient().get('/api/marketplace/empresas/')
+        self.comprobar(respuesta, registro.return_value)
+
+
+class ComparacionPeriodosTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(nombre='Empresa Periodos')
+        for dia, monto in ((date(2025, 3, 8), '10.00'), (date(2025, 3, 8), '20.00'), (date(2025, 3, 10), '30.00'),
+                           (date(2025, 3, 6), '15.00'), (date(2024, 2, 1), '5.00')):
+            venta = Venta.objects.create(empresa=cls.empresa, monto_total=Decimal(monto))
+            Venta.objects.filter(pk=venta.pk).update(fecha=timezone.make_aware(datetime(dia.year, dia.month, dia.day, 12)))
+
+    def comparar(self, inicio, fin):
+        return compare_periods(Venta.objects.filter(empresa=self.empresa), 'fecha', 'monto_total', inicio, fin)
+
+    def test_ventanas(self):
+        self.assertEqual(windows(date(2024, 3, 1), date(2024, 3, 10)), {
+            'actual': (date(2024, 3, 1), date(2024, 3, 10)),
+            'anterior': (date(2024, 2, 20), date(2024, 2, 29)),
+            'anio_anterior': (date(2023, 3, 1), date(2023, 3, 10)),
+        })
+
+    def test_29_de_febrero_un_anio_antes(self):
+        ventanas = windows(date(2024, 2, 29), date(2024, 3, 1))
+        self.assertEqual(ventanas['anio_anterior'], (date(2023, 2, 28), date(2023, 3, 1)))
+        self.assertEqual(ventanas['anterior'], (date(2024, 2, 27), date(2024, 2, 28)))
+
+    def test_solo_fecha_fin(self):
+        self.assertEqual(windows(None, date(2025, 3, 10)), {'actual': (None, date(2025, 3, 10))})
+
+        resumen = self.comparar(None, date(2025, 3, 10))
+
+        self.assertEqual(list(resumen), ['actual'])
+        # La serie empieza en el primer día con ventas
+        self.assertEqual(resumen['actual']['fecha_inicio'], date(2024, 2, 1))
+        self.assertEqual(resumen['actual']['total_ventas_cantidad'], 5)
+        self.assertNotIn('crecimiento', resumen['actual'])
+
+    def test_resumen_crecimiento_y_serie(self):
+        resumen = self.comparar(date(2025, 3, 8), date(2025, 3, 10))
+
+        actual = resumen['actual']
+        self.assertEqual((actual['total_ventas_cantidad'], actual['monto_total_ventas'], actual['promedio_por_venta']),
+                         (3, '60.00', '20.00'))
+        # El día sin ventas aparece con ceros
+        self.assertEqual([(punto['fecha'], punto['ventas'], punto['monto']) for punto in actual['serie']], [
+            (date(2025, 3, 8), 2, '30.00'), (date(2025, 3, 9), 0, '0.00'), (date(2025, 3, 10), 1, '30.00'),
+        ])
+
+        anterior = resumen['anterior']
+        self.assertEqual((anterior['fecha_inicio'], anterior['fecha_fin']), (date(2025, 3, 5), date(2025, 3, 7)))
+        self.assertEqual(anterior['monto_total_ventas'], '15.00')
+        self.assertEqual(anterior['crecimiento'], {
+            'total_ventas_cantidad': '200.0', 'monto_total_ventas': '300.0', 'promedio_por_venta': '33.3',
+        })
+
+        # Sin ventas de referencia no hay crecimiento que calcular
+        anio_anterior = resumen['anio_anterior']
+        self.assertEqual(anio_anterior['total_ventas_cantidad'], 0)
+        self.assertEqual([punto['ventas'] for punto in anio_anterior['serie']], [0, 0, 0])
+        self.assertEqual(anio_anterior['crecimiento'], {
+            'total_ventas_cantidad': None, 'monto_total_ventas': None, 'promedio_por_venta': None,
+        })
+
+    def test_periodos_solapados_cuentan_el_dia_en_ambos(self):
+        # Más de un año: el año anterior (2023-01-01 a 2024-03-10) se solapa con el actual
+        resumen = self.comparar(date(2024, 1, 1), date(2025, 3, 10))
+
+        self.assertEqual(resumen['actual']['total_ventas_cantidad'], 5)
+        self.assertEqual(resumen['anio_anterior']['total_ventas_cantidad'], 1)
+        self.assertEqual(resumen['anio_anterior']['monto_total_ventas'], '5.00')
+        self.assertEqual(resumen['anterior']['total_ventas_cantidad'], 0)
+
+
+@override_settings(PDF_PROCESOS=0, PDF_FILAS_POR_SECCION=10)
+class PdfTest(SimpleTestCase):
+    PLANTILLA = 'reports/report_table.html'
+
+    def setUp(self):
+        cache.clear()
+
+    def contexto(self, filas, generado='2025-03-10 12:00:00', **cambios):
+        return dict({
+            'generated_date': generado,
+            'company_name': 'Empresa PDF',
+            'title': 'Reporte',
+            'columns': ['Producto', 'Unidades'],
+            'report_data': [[f'Producto {i}', str(i)] for i in range(filas)],
+        }, **cambios)
+
+    def test_mismo_contenido_sale_de_la_cache(self):
+        with mock.patch('reports.pdf.renderizar', wraps=pdf.renderizar) as renderizar:
+            primero = pdf.generar_pdf(self.PLANTILLA, self.contexto(3))
+            # Solo cambia la fecha de generación: misma clave
+            segundo = pdf.generar_pdf(self.PLANTILLA, self.contexto(3, generado='2025-03-10 12:05:00'))
+
+        self.assertTrue(primero.startswith(b'%PDF'))
+        self.assertEqual(segundo, primero)
+        self.assertEqual(renderizar.call_count, 1)
+
+    def test_otros_datos_otra_clave(self):
+        contexto = self.contexto(3)
+        cambiado = self.contexto(3, report_data=[['Producto 0', '0'], ['Producto 1', '1'], ['Producto 2', '99']])
+        self.assertNotEqual(pdf.clave_cache(self.PLANTILLA, contexto), pdf.clave_cache(self.PLANTILLA, cambiado))
+
+        with mock.patch('reports.pdf.renderizar', wraps=pdf.renderizar) as renderizar:
+            pdf.generar_pdf(self.PLANTILLA, contexto)
+            pdf.generar_pdf(self.PLANTILLA, cambiado)
+        self.assertEqual(renderizar.call_count, 2)
+
+    def test_secciones(self):
+        contexto = self.contexto(25)
+        secciones = pdf._secciones(contexto, 10)
+        self.assertEqual([len(seccion['report_data']) for seccion in secciones], [10, 10, 5])
+        self.assertEqual([(seccion['seccion'], seccion['secciones']) for seccion in secciones], [(1, 3), (2, 3), (3, 3)])
+        self.assertEqual(sum((seccion['report_data'] for seccion in secciones), []), contexto['report_data'])
+        # Un reporte que cabe en una sección no se trocea
+        pequeno = self.contexto(10)
+        self.assertEqual(pdf._secciones(pequeno, 10), [pequeno])
+
+    def test_reporte_grande_por_secciones(self):
+        from pypdf import PdfReader
+
+        def paginas(documento):
+            return len(PdfReader(BytesIO(documento)).pages)
+
+        entero = pdf.renderizar(self.PLANTILLA, self.contexto(25), 100)
+        # Cada sección se maqueta aparte (al menos una página) y las partes se concatenan
+        por_secciones = pdf.generar_pdf(self.PLANTILLA, self.contexto(25))
+        self.assertEqual(paginas(entero), 1)
+        self.assertEqual(paginas(por_secciones), 3)
+
+    @override_settings(PDF_PROCESOS=1)
+    def test_pool_de_procesos(self):
+        try:
+            documento = pdf.generar_pdf(self.PLANTILLA, self.contexto(3))
+        finally:
+            if pdf._pool is not None:
+                pdf._descartar_pool(pdf._pool)
+        self.assertTrue(documento.startswith(b'%PDF'))
+
+
+class ExportacionStreamingTest(TestCase):
+    """CSV y TXT por streaming: mismas cabeceras, filas y codificación que la salida en memoria."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # La coma obliga a entrecomillar la celda en el CSV
+        cls.empresa = Empresa.objects.create(nombre='Ñandú, S.A.')
+        cls.vacia = Empresa.objects.create(nombre='Empresa Vacía')
+        cls.superusuario = CustomUser.objects.create_superuser(
+            username='root', email='root@test.local', password='clave1234', first_name='Root', last_name='Test',
+            ci='CI-ROOT')
+        productos = [Producto.objects.create(nombre=nombre, precio=Decimal('2.50'), empresa=cls.empresa)
+                     for nombre in ('Café de altura, molido', 'Té "verde"', 'Un nombre de producto largo que se recorta')]
+        for cantidad, producto in enumerate(productos, start=1):
+            venta = Venta.objects.create(empresa=cls.empresa, estado='Completada', monto_total=Decimal('2.50') * cantidad)
+            DetalleVenta.objects.bulk_create([DetalleVenta(venta=venta, producto=producto, cantidad=cantidad,
+                                                           precio_unitario=Decimal('2.50'))])
+
+    def setUp(self):
+        self.cliente = Client()
+        self.cliente.force_login(self.superusuario)
+
+    def descargar(self, url, cliente=None):
+        respuesta = (cliente or self.cliente).get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIsInstance(respuesta, StreamingHttpResponse)
+        return respuesta, b''.join(respuesta.streaming_content)
+
+    def csv_en_memoria(self, cabeceras, filas):
+        salida = StringIO()
+        escritor = csv.writer(salida)
+        escritor.writerow(cabeceras)
+        escritor.writerows([[texto(valor) for valor in fila] for fila in filas])
+        return ('\ufeff' + salida.getvalue()).encode('utf-8')
+
+    def test_csv_del_listado(self):
+        from apps.ventas.views import VentaViewSet
+        columnas = VentaViewSet.export_columns
+
+        respuesta, cuerpo = self.descargar('/api/ventas/exportar/?formato=csv')
+
+        filas = Venta.objects.filter(empresa=self.empresa).order_by('-fecha', '-id') \
+            .values_list(*[campo for campo, _titulo, _ancho in columnas])
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertRegex(respuesta['Content-Disposition'], r'^attachment; filename="ventas_\d{8}_\d{6}\.csv"$')
+        self.assertEqual(cuerpo, self.csv_en_memoria([titulo for _campo, titulo, _ancho in columnas], filas))
+
+    def test_txt_con_el_formato_anterior(self):
+        _, cuerpo = self.descargar(f'/api/reports/top-selling-products/export/txt/?empresa_id={self.empresa.id}')
+        lineas = cuerpo.decode('utf-8').splitlines()
+
+        self.assertEqual(lineas[0], 'REPORTE DE PRODUCTOS MÁS VENDIDOS')
+        self.assertEqual(lineas[2], 'Empresa: Ñandú, S.A.')
+        cabecera = 'ID Producto | Nombre Producto           | Cantidad Vendida | Ingresos Generados'
+        self.assertEqual(lineas[4:6], [cabecera, '-' * len(cabecera)])
+        # Las filas como las escribía el TXT anterior (f-strings sobre el reporte en memoria)
+        esperadas = [
+            f"{p.id:<11} | {p.nombre[:25]:<25} | {p.cantidad:<16} | {p.cantidad * Decimal('2.50'):.2f}"
+            for p in (SimpleNamespace(id=fila.producto_id, nombre=fila.producto.nombre, cantidad=fila.cantidad)
+                      for fila in DetalleVenta.objects.select_related('producto'))
+        ]
+        self.assertEqual(sorted(lineas[6:]), sorted(esperadas))
+
+    def test_exportaciones_vacias(self):
+        # El listado se limita a la empresa del administrador, que no tiene ventas
+        admin = CustomUser.objects.create_user(
+            username='admin', email='admin@test.local', password='clave1234', first_name='Admin', last_name='Test',
+            ci='CI-1', role=Role.objects.get(name='Administrador'), empresa=self.vacia)
+        cliente = Client()
+        cliente.force_login(admin)
+
+        _, cuerpo = self.descargar('/api/ventas/exportar/?formato=csv', cliente)
+        self.assertEqual(cuerpo, '\ufeffID,Fecha,Usuario,Empresa,Estado,Origen,Monto Total\r\n'.encode('utf-8'))
+
+        _, cuerpo = self.descargar('/api/ventas/exportar/?formato=txt', cliente)
+        self.assertEqual(len(cuerpo.decode('utf-8').splitlines()), 2)  # Cabecera y separador
+
+        _, cuerpo = self.descargar(f'/api/reports/top-selling-products/export/csv/?empresa_id={self.vacia.id}')
+        self.assertEqual(cuerpo, '\ufeffID Producto,Nombre Producto,Cantidad Vendida,Ingresos Generados\r\n'
+                         .encode('utf-8'))
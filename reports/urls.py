@@ -1,35 +1,27 @@
 # reports/urls.py
 
 from django.urls import path
-from .views import (
-    SalesSummaryReportView,
-    TopSellingProductsReportView,
-    StockLevelReportView,
-    ClientPerformanceReportView,
-)
+from .views import REPORTS, PivotReportView, ReportStatusView
+from erp.asincrono import exportacion_acotada
 
-urlpatterns = [
-    # URLs para previsualización (JSON)
-    path('sales-summary/', SalesSummaryReportView.as_view(), name='sales-summary-report'),
-    path('top-selling-products/', TopSellingProductsReportView.as_view(), name='top-selling-products-report'),
-    path('stock-level/', StockLevelReportView.as_view(), name='stock-level-report'),
-    path('client-performance/', ClientPerformanceReportView.as_view(), name='client-performance-report'),
-
-    # URLs para exportar a Excel
-    path('sales-summary/export/excel/', SalesSummaryReportView.export_excel, name='sales-summary-export-excel'), # <--- CAMBIO AQUÍ
-    path('top-selling-products/export/excel/', TopSellingProductsReportView.export_excel, name='top-selling-products-export-excel'), # <--- CAMBIO AQUÍ
-    path('stock-level/export/excel/', StockLevelReportView.export_excel, name='stock-level-export-excel'), # <--- CAMBIO AQUÍ
-    path('client-performance/export/excel/', ClientPerformanceReportView.export_excel, name='client-performance-export-excel'), # <--- CAMBIO AQUÍ
+# Formatos de exportación: <reporte>/export/<formato>/ → ReportView.export_<formato>
+EXPORT_FORMATS = ('excel', 'pdf', 'txt', 'csv')
 
-    # URLs para exportar a PDF
-    path('sales-summary/export/pdf/', SalesSummaryReportView.export_pdf, name='sales-summary-export-pdf'), # <--- CAMBIO AQUÍ
-    path('top-selling-products/export/pdf/', TopSellingProductsReportView.export_pdf, name='top-selling-products-export-pdf'), # <--- CAMBIO AQUÍ
-    path('stock-level/export/pdf/', StockLevelReportView.export_pdf, name='stock-level-export-pdf'), # <--- CAMBIO AQUÍ
-    path('client-performance/export/pdf/', ClientPerformanceReportView.export_pdf, name='client-performance-export-pdf'), # <--- CAMBIO AQUÍ
+urlpatterns = [
+    # Estado del pool de exportaciones (hilos, exportaciones en curso de la empresa)
+    path('status/', ReportStatusView.as_view(), name='report-status'),
+    # Pivote de ventas con subtotales (?dimensiones=&medidas=)
+    path('pivot/', PivotReportView.as_view(), name='pivot-report'),
+]
 
-    # URLs para exportar a TXT
-    path('sales-summary/export/txt/', SalesSummaryReportView.export_txt, name='sales-summary-export-txt'), # <--- CAMBIO AQUÍ
-    path('top-selling-products/export/txt/', TopSellingProductsReportView.export_txt, name='top-selling-products-export-txt'), # <--- CAMBIO AQUÍ
-    path('stock-level/export/txt/', StockLevelReportView.export_txt, name='stock-level-export-txt'), # <--- CAMBIO AQUÍ
-    path('client-performance/export/txt/', ClientPerformanceReportView.export_txt, name='client-performance-export-txt'), # <--- CAMBIO AQUÍ
-]
\ No newline at end of file
+for report in REPORTS:
+    slug = report.spec.name
+    # Previsualización (JSON)
+    urlpatterns.append(path(f'{slug}/', report.as_view(), name=f'{slug}-report'))
+    # Las exportaciones se ejecutan en un pool de hilos acotado, con límite por empresa
+    # (erp.asincrono.exportacion_acotada)
+    urlpatterns += [
+        path(f'{slug}/export/{formato}/', exportacion_acotada(getattr(report, f'export_{formato}')),
+             name=f'{slug}-export-{formato}')
+        for formato in EXPORT_FORMATS
+    ]
@@ -1,547 +1,368 @@
 # reports/views.py
 
-from rest_framework import generics, status, serializers
-from django.db.models.functions import Coalesce, Concat
-from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Avg, Count, F, Q,Value
-from django.db.models.functions import Coalesce
-from django.utils import timezone
-from datetime import datetime, timedelta
+"""
+Vistas de reportes. Cada reporte es un ReportSpec (reports/specs.py) que el motor
+(reports/engine.py) compila a una sola consulta; ReportView lo sirve en JSON (con caché y,
+con ?page=, paginado) y lo exporta a Excel, PDF, CSV y TXT a partir de sus columnas.
+"""
+
+from collections import Counter
+from datetime import timedelta
 from decimal import Decimal
-from django.http import HttpResponse  # Para exportar archivos
-import openpyxl  # Para exportar a Excel
+from functools import wraps
 from io import BytesIO  # Para manejar archivos en memoria
 
-# Para PDF
-from django.template.loader import get_template
-from xhtml2pdf import pisa
+import openpyxl  # Para exportar a Excel
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse  # Para exportar archivos
+from django.utils import timezone
+from django.views import View
+from rest_framework import generics, serializers, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from apps.ventas.models import Venta
+from erp.asincrono import autenticar, clave_empresa, exportaciones, respuesta_json
+from erp.exportacion import filas_csv, filas_txt, respuesta_streaming, texto
+from . import specs
+from .comparison import compare_periods
+from .engine import company_name, company_scope, midnight, period, query_params
+from .pdf import generar_pdf
+from .rfm import NOMBRES_SEGMENTOS
 
-from apps.ventas.models import Venta, DetalleVenta
-from apps.productos.models import Producto
-from apps.usuarios.models import CustomUser
-from apps.empresas.models import Empresa
-from apps.categorias.models import Categoria
-from apps.almacenes.models import Almacen
 
-from .serializers import (
-    SalesSummaryReportSerializer,
-    TopSellingProductReportSerializer,
-    StockLevelReportSerializer,
-    ClientPerformanceReportSerializer
-)
+def _export(metodo):
+    """
+    Las exportaciones son vistas de Django (ver urls.py): los errores de validación de los
+    filtros se responden con 400 y el mismo cuerpo que daría la API.
+    """
 
+    @wraps(metodo)
+    def envoltorio(cls, request, *args, **kwargs):
+        try:
+            return metodo(cls, request, *args, **kwargs)
+        except serializers.ValidationError as e:
+            return respuesta_json(e.detail, status=e.status_code)
 
-# Definir una clase base para los métodos de exportación.
-# Estos métodos serán llamados directamente desde urls.py y deben manejar el objeto HttpRequest.
-class ReportExportMixin:
-    @classmethod
-    def _get_params(cls, request):
-        """
-        Método auxiliar para obtener parámetros de consulta,
-        adaptándose si request.query_params (DRF) o request.GET (Django puro) está disponible.
-        """
-        # Si la solicitud proviene de una vista DRF (as_view()), tendrá query_params
-        if hasattr(request, 'query_params'):
-            return request.query_params
-        # Si es una solicitud directa de Django (ej. para un método de exportación), usará GET
-        return request.GET
+    return classmethod(envoltorio)
+
+
+class ReportView(generics.GenericAPIView):
+    """
+    Vista genérica de un reporte declarado en `spec`.
+
+    GET devuelve el reporte en JSON: un objeto si el reporte es de una sola fila, una lista
+    si no, o la respuesta paginada estándar si se pide ?page=. El resultado se guarda en la
+    caché REPORTES_CACHE_SEGUNDOS por empresa y parámetros.
+
+    Los classmethods export_* son las vistas de exportación que registra urls.py.
+    """
+    permission_classes = [IsAuthenticated]
+    spec = None
+
+    def _cached(self, request, variant, calcular):
+        segundos = settings.REPORTES_CACHE_SEGUNDOS
+        if segundos <= 0:
+            return calcular()
+        clave = self.spec.cache_key(request, variant)
+        datos = cache.get(clave)
+        if datos is None:
+            datos = calcular()
+            cache.set(clave, datos, segundos)
+        return datos
+
+    def get(self, request, *args, **kwargs):
+        spec = self.spec
+
+        def calcular():
+            queryset = spec.compile(request)
+            if spec.single_row:
+                return spec.to_json(spec.rows(queryset)[0])
+            if 'page' in query_params(request):
+                pagina = self.paginate_queryset(queryset)
+                return self.get_paginated_response([spec.to_json(row) for row in spec.rows(pagina)]).data
+            return [spec.to_json(row) for row in spec.rows(queryset)]
+
+        return Response(self._cached(request, 'json', calcular), status=status.HTTP_200_OK)
+
+    # --- Exportaciones ---
 
     @classmethod
-    def _create_instance_and_get_data(cls, request):
-        """
-        Crea una instancia de la vista y llama a _get_report_data.
-        Ajusta la request para que la instancia pueda acceder a los parámetros.
-        """
+    def _for_export(cls, request):
         instance = cls()
-        instance.request = request  # Asignar la request al atributo de la instancia
-        # Necesario para que los métodos como get_company_filter y get_date_range_filter
-        # puedan acceder a la request.
-
-        # Si la vista original hereda de GenericAPIView, necesita setup().
-        # Si solo es un @classmethod, no tiene un request.resolver_match.args, etc.
-        # Por eso, la forma más robusta para estos classmethods que llaman a métodos de instancia
-        # que a su vez acceden a `self.request` es pasarles la request explícitamente o
-        # adaptar los métodos de filtrado para que la reciban.
-        # Ya que get_company_filter y get_date_range_filter acceden a `self.request`,
-        # debemos inicializar `instance.request`.
-
-        # Los métodos de filtro (get_company_filter, get_date_range_filter) ahora
-        # usan _get_params(self.request), lo que los hace compatibles.
-        return instance._get_report_data(request), instance.get_company_filter(request)
+        instance.request = request
+        return instance
 
-    @classmethod
-    def export_excel(cls, request, *args, **kwargs):
-        report_data, company_filter = cls._create_instance_and_get_data(request)
-
-        # Ajustar headers y data según el tipo de reporte
-        if cls == SalesSummaryReportView:
-            headers = ["Total Ventas", "Monto Total Ventas", "Promedio por Venta"]
-            data_to_excel = [
-                report_data]  # Resumen es un único dict, se envuelve en lista para _generate_excel_response
-        elif cls == TopSellingProductsReportView:
-            headers = ["ID Producto", "Nombre Producto", "Cantidad Vendida", "Ingresos Generados"]
-            data_to_excel = [{
-                "ID Producto": p['id'],  # Usamos 'id' aquí
-                "Nombre Producto": p['nombre'],
-                "Cantidad Vendida": p['cantidad_vendida'],
-                "Ingresos Generados": float(p['ingresos_generados'])  # Convertir a float
-            } for p in report_data]
-        elif cls == StockLevelReportView:
-            headers = ["ID Producto", "Nombre Producto", "Stock Actual", "Nombre Almacén", "Nombre Empresa"]
-            data_to_excel = report_data  # Ya está en formato de lista de dicts
-        elif cls == ClientPerformanceReportView:
-            headers = ["ID Cliente", "Nombre Cliente", "Email Cliente", "Monto Total Comprado", "Número Ventas"]
-            data_to_excel = report_data  # Ya está en formato de lista de dicts
-        else:
-            return HttpResponse("Tipo de reporte no reconocido para exportación Excel",
-                                status=status.HTTP_400_BAD_REQUEST)
+    def _rows(self, request):
+        """Filas completas del reporte (Excel y PDF), también desde la caché."""
+        return self._cached(request, 'rows', lambda: self.spec.rows(self.spec.compile(request)))
 
-        instance = cls()
-        return instance._generate_excel_response(data_to_excel, headers,
-                                                 sheet_name=cls.__name__.replace('View', '').replace('Report', ''))
+    def _export_file_name(self):
+        return self.__class__.__name__.replace('View', '').replace('Report', '')
 
-    @classmethod
-    def export_pdf(cls, request, *args, **kwargs):
-        report_data, company_filter = cls._create_instance_and_get_data(request)
+    @_export
+    def export_excel(cls, request, *args, **kwargs):
+        instance = cls._for_export(request)
+        columns = cls.spec.columns
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = instance._export_file_name()
+        sheet.append([column.label for column in columns])
+        for row in instance._rows(request):
+            sheet.append([
+                float(row[column.name]) if isinstance(row[column.name], Decimal) else row[column.name]
+                for column in columns
+            ])
 
-        company_name = "Todas las Empresas"
-        if company_filter and 'empresa_id' in company_filter and company_filter['empresa_id'] is not None:
-            try:
-                company = Empresa.objects.get(id=int(company_filter['empresa_id']))
-                company_name = company.nombre
-            except (ValueError, Empresa.DoesNotExist):
-                pass
+        buffer = BytesIO()
+        workbook.save(buffer)
+        response = HttpResponse(buffer.getvalue(),
+                                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{instance._export_file_name()}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
+        )
+        return response
 
+    @_export
+    def export_pdf(cls, request, *args, **kwargs):
+        instance = cls._for_export(request)
+        columns = cls.spec.columns
         context = {
             'generated_date': timezone.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'company_name': company_name,
-            'report_data': report_data,  # Pasa la data tal cual como la devuelve _get_report_data
-        }
-
-        template_map = {
-            SalesSummaryReportView: 'reports/sales_summary_report.html',
-            TopSellingProductsReportView: 'reports/top_selling_products_report.html',
-            StockLevelReportView: 'reports/stock_level_report.html',
-            ClientPerformanceReportView: 'reports/client_performance_report.html',
-        }
-        title_map = {
-            SalesSummaryReportView: 'Reporte de Resumen de Ventas',
-            TopSellingProductsReportView: 'Reporte de Productos Más Vendidos',
-            StockLevelReportView: 'Reporte de Nivel de Stock',
-            ClientPerformanceReportView: 'Reporte de Rendimiento de Clientes',
+            'company_name': company_name(company_scope(request)),
+            'title': cls.spec.title,
+            'columns': [column.label for column in columns],
+            'report_data': [[texto(row[column.name]) for column in columns] for row in instance._rows(request)],
         }
+        # Maquetación en el pool de procesos, por secciones y con caché (reports/pdf.py)
+        pdf = generar_pdf(cls.spec.template, context)
+        if pdf is None:
+            return HttpResponse('Error al generar PDF', status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        response = HttpResponse(pdf, content_type='application/pdf')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{instance._export_file_name()}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf"'
+        )
+        return response
 
-        template_name = template_map.get(cls)
-        context['title'] = title_map.get(cls, "Reporte")
+    def _iter_rows(self, request):
+        """Filas del reporte para CSV y TXT, leídas por bloques mientras se envían."""
+        return self.spec.iter_rows(self.spec.compile(request))
 
-        if not template_name:
-            return HttpResponse("Tipo de reporte no reconocido para exportación PDF",
-                                status=status.HTTP_400_BAD_REQUEST)
+    @classmethod
+    def _streaming_rows(cls, request):
+        """
+        Filas como listas en el orden de las columnas. La consulta se compila (y los filtros
+        se validan) antes de empezar la respuesta.
+        """
+        rows = cls._for_export(request)._iter_rows(request)
+        return ([row[column.name] for column in cls.spec.columns] for row in rows)
 
-        instance = cls()
-        return instance._generate_pdf_response(template_name, context,
-                                               file_name=cls.__name__.replace('View', '').replace('Report', ''))
+    @_export
+    def export_csv(cls, request, *args, **kwargs):
+        instance = cls._for_export(request)
+        rows = cls._streaming_rows(request)
+        headers = [column.label for column in cls.spec.columns]
+        return respuesta_streaming(request, filas_csv(headers, rows), 'csv', instance._export_file_name())
 
-    @classmethod
+    @_export
     def export_txt(cls, request, *args, **kwargs):
-        report_data, company_filter = cls._create_instance_and_get_data(request)
-
-        company_name = "Todas las Empresas"
-        if company_filter and 'empresa_id' in company_filter and company_filter['empresa_id'] is not None:
-            try:
-                company = Empresa.objects.get(id=int(company_filter['empresa_id']))
-                company_name = company.nombre
-            except (ValueError, Empresa.DoesNotExist):
-                pass
-
-        content_map = {
-            SalesSummaryReportView: lambda data, c_name: f"""REPORTE DE RESUMEN DE VENTAS
-Fecha de Generación: {timezone.now().strftime("%Y-%m-%d %H:%M:%S")}
-Empresa: {c_name}
-
-Total Ventas: {data['total_ventas_cantidad']}
-Monto Total Ventas: {data['monto_total_ventas']}
-Promedio por Venta: {data['promedio_por_venta']}
-""",
-            TopSellingProductsReportView: lambda data, c_name: f"""REPORTE DE PRODUCTOS MÁS VENDIDOS
-Fecha de Generación: {timezone.now().strftime("%Y-%m-%d %H:%M:%S")}
-Empresa: {c_name}
-
-ID Producto | Nombre Producto           | Cantidad Vendida | Ingresos Generados
----------------------------------------------------------------------------------
-""" + "".join([f"{p['id']:<11} | {p['nombre'][:25]:<25} | {p['cantidad_vendida']:<16} | {p['ingresos_generados']}\n" for
-               p in data]),
-
-            StockLevelReportView: lambda data, c_name: f"""REPORTE DE NIVEL DE STOCK
-Fecha de Generación: {timezone.now().strftime("%Y-%m-%d %H:%M:%S")}
-Empresa: {c_name}
-
-ID Producto | Nombre Producto           | Stock Actual | Nombre Almacén          | Nombre Empresa
------------------------------------------------------------------------------------------------------
-""" + "".join([
-                                                                                                                                                                 f"{item['id']:<11} | {item['nombre'][:25]:<25} | {item['stock_actual']:<12} | {item['almacen_nombre'][:25]:<25} | {item['empresa_nombre'][:25]:<25}\n"
-                                                                                                                                                                 for
-                                                                                                                                                                 item
-                                                                                                                                                                 in
-                                                                                                                                                                 data]),
-
-            ClientPerformanceReportView: lambda data, c_name: f"""REPORTE DE RENDIMIENTO DE CLIENTES
-Fecha de Generación: {timezone.now().strftime("%Y-%m-%d %H:%M:%S")}
-Empresa: {c_name}
-
-ID Cliente | Nombre Cliente            | Email Cliente             | Monto Total Comprado | Número Ventas
------------------------------------------------------------------------------------------------------------------
-""" + "".join([
-                                                                                                                                                                        f"{client['id']:<10} | {client['nombre_cliente'][:25]:<25} | {client['email_cliente'][:25]:<25} | {client['monto_total_comprado']:<20} | {client['numero_ventas_realizadas']}\n"
-                                                                                                                                                                        for
-                                                                                                                                                                        client
-                                                                                                                                                                        in
-                                                                                                                                                                        data]),
-        }
+        instance = cls._for_export(request)
+        spec = cls.spec
+        rows = cls._streaming_rows(request)
+        encabezado = (
+            f"{spec.title.upper()}\n"
+            f"Fecha de Generación: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"Empresa: {company_name(company_scope(request))}\n\n"
+        )
+        if spec.single_row:
+            # Resumen: una línea "Título: valor" por columna
+            (row,) = rows
+            content = encabezado + "".join(
+                f"{column.label}: {texto(valor)}\n" for column, valor in zip(spec.columns, row)
+            )
+            return respuesta_streaming(request, [content], 'txt', instance._export_file_name())
+        columns = [(column.label, column.width) for column in spec.columns]
+        return respuesta_streaming(request, filas_txt(columns, rows, encabezado=encabezado), 'txt',
+                                   instance._export_file_name())
 
-        content = content_map.get(cls)
-        if callable(content):  # Para los reportes que usan lambda (lista de datos)
-            content_str = content(report_data, company_name)
-        else:  # Para el resumen de ventas (objeto único)
-            content_str = content
 
-        if not content_str:
-            return HttpResponse("Tipo de reporte no reconocido para exportación TXT",
-                                status=status.HTTP_400_BAD_REQUEST)
+class SalesSummaryReportView(ReportView):
+    """
+    Resumen de ventas del periodo. El JSON incluye además 'periodos': el periodo actual, el
+    anterior de la misma duración y el mismo periodo del año anterior, con crecimiento y
+    serie diaria (reports.comparison), calculados en una sola consulta. Las exportaciones
+    describen solo el periodo actual.
+    """
+    spec = specs.SALES_SUMMARY
 
-        instance = cls()
-        return instance._generate_txt_response(content_str,
-                                               file_name=cls.__name__.replace('View', '').replace('Report', ''))
+    def get(self, request, *args, **kwargs):
+        spec = self.spec
 
+        def calcular():
+            inicio, fin = period(request)
+            ventas = Venta.objects.filter(**spec.lookups(request, dates=False))
+            periodos = compare_periods(ventas, 'fecha', 'monto_total', inicio, fin)
+            actual = periodos['actual']
+            return dict({column.name: actual[column.name] for column in spec.columns}, periodos=periodos)
 
-class BaseReportView(generics.GenericAPIView):
-    permission_classes = [IsAuthenticated]
+        return Response(self._cached(request, 'json', calcular), status=status.HTTP_200_OK)
 
-    # --- CAMBIO AQUÍ: Ahora get_company_filter recibe `request` directamente ---
-    def get_company_filter(self, request):
-        params = ReportExportMixin._get_params(request)  # Usa el método auxiliar
-        empresa_id = params.get('empresa_id')
-
-        if not request.user.is_superuser:
-            if request.user.empresa_detail:
-                return {'empresa_id': request.user.empresa_detail.id}
-            else:
-                raise serializers.ValidationError({"detail": "El usuario no está asociado a ninguna empresa."})
-
-        if empresa_id:
-            try:
-                empresa_id = int(empresa_id)
-                if not Empresa.objects.filter(id=empresa_id).exists():
-                    raise serializers.ValidationError({"empresa_id": "La empresa especificada no existe."})
-                return {'empresa_id': empresa_id}
-            except ValueError:
-                raise serializers.ValidationError({"empresa_id": "El ID de empresa debe ser un número válido."})
-        else:
-            return {}
-
-            # --- CAMBIO AQUÍ: Ahora get_date_range_filter recibe `request` directamente ---
-
-    def get_date_range_filter(self, request, date_field='fecha'):
-        params = ReportExportMixin._get_params(request)  # Usa el método auxiliar
-        fecha_inicio_str = params.get('fecha_inicio')
-        fecha_fin_str = params.get('fecha_fin')
-
-        date_filter = {}
-        if fecha_inicio_str:
-            try:
-                date_filter[f'{date_field}__gte'] = datetime.strptime(fecha_inicio_str, '%Y-%m-%d').date()
-            except ValueError:
-                raise serializers.ValidationError({"fecha_inicio": "Formato de fecha inválido. Use %Y-%m-%d."})
-        if fecha_fin_str:
-            try:
-                fecha_fin = datetime.strptime(fecha_fin_str, '%Y-%m-%d').date()
-                date_filter[f'{date_field}__lt'] = fecha_fin + timedelta(days=1)
-            except ValueError:
-                raise serializers.ValidationError({"fecha_fin": "Formato de fecha inválido. Use %Y-%m-%d."})
-
-        if not date_filter:
-            end_date = timezone.now().date()
-            start_date = end_date - timedelta(days=90)
-            date_filter[f'{date_field}__gte'] = start_date
-            date_filter[f'{date_field}__lt'] = end_date + timedelta(days=1)
-
-        return date_filter
-
-    def _generate_excel_response(self, data, headers, sheet_name="Reporte"):
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = sheet_name
-
-        sheet.append(headers)
-
-        for row_data in data:
-            row = []
-            for header_label in headers:
-                header_key_map = {
-                    "Total Ventas": "total_ventas_cantidad",
-                    "Monto Total Ventas": "monto_total_ventas",
-                    "Promedio por Venta": "promedio_por_venta",
-                    "ID Producto": "id",
-                    "Nombre Producto": "nombre",
-                    "Cantidad Vendida": "cantidad_vendida",
-                    "Ingresos Generados": "ingresos_generados",
-                    "Stock Actual": "stock_actual",
-                    "Nombre Almacén": "almacen_nombre",
-                    "Nombre Empresa": "empresa_nombre",
-                    "ID Cliente": "id",
-                    "Nombre Cliente": "nombre_cliente",
-                    "Email Cliente": "email_cliente",
-                    "Monto Total Comprado": "monto_total_comprado",
-                    "Número Ventas": "numero_ventas_realizadas",
-                }
-                key_to_access = header_key_map.get(header_label, header_label)
-                value = row_data.get(key_to_access)  # Accede al valor por la clave mapeada
-
-                if isinstance(value, Decimal):
-                    row.append(float(value))
-                else:
-                    row.append(value)
-            sheet.append(row)
 
-        buffer = BytesIO()
-        workbook.save(buffer)
-        buffer.seek(0)
+class TopSellingProductsReportView(ReportView):
+    spec = specs.TOP_SELLING_PRODUCTS
 
-        response = HttpResponse(buffer.getvalue(),
-                                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response[
-            'Content-Disposition'] = f'attachment; filename="{sheet_name}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
-        return response
 
+class StockLevelReportView(ReportView):
+    spec = specs.STOCK_LEVEL
 
 
-    def _generate_pdf_response(self, template_name, context, file_name="reporte.pdf"):
-        template = get_template(template_name)
-        # --- CAMBIO AQUÍ: Elimina 'Context()' ---
-        html = template.render(context)
-        result = BytesIO()
-        pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
-        if not pdf.err:
-            response = HttpResponse(result.getvalue(), content_type='application/pdf')
-            response[
-                'Content-Disposition'] = f'attachment; filename="{file_name}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf"'
-            return response
-        return HttpResponse('Error al generar PDF', status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+class ClientPerformanceReportView(ReportView):
+    spec = specs.CLIENT_PERFORMANCE
 
 
+class GrossMarginReportView(ReportView):
+    spec = specs.GROSS_MARGIN
 
-    def _generate_txt_response(self, content, file_name="reporte.txt"):
-        response = HttpResponse(content, content_type='text/plain')
-        response[
-            'Content-Disposition'] = f'attachment; filename="{file_name}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.txt"'
-        return response
 
+class ClientRFMReportView(ReportView):
+    """
+    Segmentación RFM de los clientes de la empresa (reports.rfm): recencia, frecuencia y
+    monto de todo el historial, puntuaciones 1-5 por quintiles y segmento.
 
-class SalesSummaryReportView(BaseReportView, ReportExportMixin):
-    def _get_report_data(self, request):
-        company_filter = self.get_company_filter(request)  # Pasa la request
-        date_filter = self.get_date_range_filter(request, date_field='fecha')  # Pasa la request
-        params = ReportExportMixin._get_params(request)  # Usa el método auxiliar
-        cliente_id = params.get('cliente_id')
-        estado = params.get('estado')
-
-        filters = {**company_filter, **date_filter}
-        if cliente_id:
-            try:
-                filters['usuario_id'] = int(cliente_id)
-                if not CustomUser.objects.filter(id=filters['usuario_id']).exists():
-                    raise serializers.ValidationError({"cliente_id": "El cliente especificado no existe."})
-            except ValueError:
-                raise serializers.ValidationError({"cliente_id": "El ID de cliente debe ser un número válido."})
-        if estado:
-            if estado not in ['Pendiente', 'Completada', 'Cancelada']:
-                raise serializers.ValidationError({"estado": "Estado de venta inválido."})
-            filters['estado'] = estado
-
-        ventas_qs = Venta.objects.filter(**filters)
-
-        total_ventas_cantidad = ventas_qs.count()
-        monto_total_ventas = ventas_qs.aggregate(
-            total=Coalesce(Sum('monto_total'), Decimal('0.00'))
-        )['total']
-
-        promedio_por_venta = Decimal('0.00')
-        if total_ventas_cantidad > 0:
-            promedio_por_venta = (monto_total_ventas / total_ventas_cantidad).quantize(Decimal('0.01'))
-
-        return {
-            'total_ventas_cantidad': total_ventas_cantidad,
-            'monto_total_ventas': monto_total_ventas,
-            'promedio_por_venta': promedio_por_venta,
-        }
+    Las puntuaciones son relativas a todos los clientes, así que el resultado se calcula
+    entero (una consulta agrupada por cliente) y se guarda en caché por empresa y día, hasta
+    la medianoche. GET lo devuelve paginado (?page=, ?page_size=) y filtrado por ?segmento=,
+    con el número de clientes de cada segmento en 'segmentos'. Las exportaciones admiten el
+    mismo ?segmento=.
+    """
+    spec = specs.CLIENT_RFM
 
-    def get(self, request, *args, **kwargs):
-        report_data = self._get_report_data(request)
-        serializer = SalesSummaryReportSerializer(report_data)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-
-class TopSellingProductsReportView(BaseReportView, ReportExportMixin):
-    def _get_report_data(self, request):
-        company_filter = self.get_company_filter(request)  # Pasa la request
-        date_filter = self.get_date_range_filter(request, date_field='fecha')  # Pasa la request
-        params = ReportExportMixin._get_params(request)  # Usa el método auxiliar
-        categoria_id = params.get('categoria_id')
-        limit = params.get('limit', 10)
-
-        filters = {**company_filter, **date_filter}
-        if categoria_id:
-            try:
-                filters['detalles__producto__categoria_id'] = int(categoria_id)
-                if not Categoria.objects.filter(id=filters['detalles__producto__categoria_id']).exists():
-                    raise serializers.ValidationError({"categoria_id": "La categoría especificada no existe."})
-            except ValueError:
-                raise serializers.ValidationError({"categoria_id": "El ID de categoría debe ser un número válido."})
+    def _clientes(self, request):
+        """Todas las filas RFM de la empresa, calculadas como mucho una vez al día."""
+        spec = self.spec
+        if settings.REPORTES_CACHE_SEGUNDOS <= 0:
+            return spec.rows(spec.compile(request))
+        hoy = timezone.localdate()
+        empresa_id = company_scope(request)
+        clave = f"reportes:{spec.name}:{'todas' if empresa_id is None else empresa_id}:{hoy.isoformat()}"
+        filas = cache.get(clave)
+        if filas is None:
+            filas = spec.rows(spec.compile(request))
+            manana = midnight(hoy + timedelta(days=1))
+            cache.set(clave, filas, max(int((manana - timezone.now()).total_seconds()), 1))
+        return filas
 
-        try:
-            limit = int(limit)
-            if limit <= 0: raise ValueError
-        except ValueError:
-            raise serializers.ValidationError({"limit": "El límite debe ser un número entero positivo."})
-
-        ventas_filtradas_ids = Venta.objects.filter(**filters).values_list('id', flat=True)
-
-        top_products = DetalleVenta.objects.filter(venta_id__in=ventas_filtradas_ids) \
-                           .values(
-            'producto__id',  # <--- Aquí debe ser 'producto__id'
-            'producto__nombre',  # <--- Aquí debe ser 'producto__nombre'
-            'cantidad',
-            'precio_unitario',
-            'descuento_aplicado'
-        ) \
-                           .annotate(
-            # Asegúrate de que los nombres de los campos anotados coincidan con el serializer
-            id=F('producto__id'),  # <--- Renombrar a 'id'
-            nombre=F('producto__nombre'),  # <--- Renombrar a 'nombre'
-            cantidad_vendida=Sum('cantidad'),
-            ingresos_generados=Coalesce(
-                Sum(F('cantidad') * F('precio_unitario') * (Decimal('1.00') - F('descuento_aplicado'))),
-                Decimal('0.00')
-            )
-        ) \
-                           .order_by('-cantidad_vendida')[:limit]
-
-        # Eliminar las claves originales si solo queremos las renombradas para el serializer
-        # Esto es importante para que el serializer no encuentre 'producto__id'/'producto__nombre' si solo espera 'id'/'nombre'
-        final_data = []
-        for item in top_products:
-            # Crea un nuevo diccionario con las claves que espera el serializer
-            final_data.append({
-                'id': item['id'],
-                'nombre': item['nombre'],
-                'cantidad_vendida': item['cantidad_vendida'],
-                'ingresos_generados': item['ingresos_generados']
-            })
-        return final_data
+    def _segmento(self, request):
+        segmento = query_params(request).get('segmento')
+        if segmento and segmento not in NOMBRES_SEGMENTOS:
+            raise serializers.ValidationError(
+                {'segmento': f"Segmento inválido. Opciones: {', '.join(NOMBRES_SEGMENTOS)}."})
+        return segmento
 
-    def get(self, request, *args, **kwargs):
-        report_data = self._get_report_data(request)
-        serialized_data = TopSellingProductReportSerializer(report_data, many=True).data
-        return Response(serialized_data, status=status.HTTP_200_OK)
-
-
-class StockLevelReportView(BaseReportView, ReportExportMixin):
-    def _get_report_data(self, request):
-        company_filter = self.get_company_filter(request)  # Pasa la request
-        almacen_id = ReportExportMixin._get_params(request).get('almacen_id')
-        categoria_id = ReportExportMixin._get_params(request).get('categoria_id')
-        stock_min = ReportExportMixin._get_params(request).get('stock_min')
-        stock_max = ReportExportMixin._get_params(request).get('stock_max')
-
-        filters = {**company_filter}
-        if almacen_id:
-            try:
-                filters['almacen_id'] = int(almacen_id)
-                if not Almacen.objects.filter(id=filters['almacen_id']).exists():
-                    raise serializers.ValidationError({"almacen_id": "El almacén especificado no existe."})
-            except ValueError:
-                raise serializers.ValidationError({"almacen_id": "El ID de almacén debe ser un número válido."})
-        if categoria_id:
-            try:
-                filters['categoria_id'] = int(categoria_id)
-                if not Categoria.objects.filter(id=filters['categoria_id']).exists():
-                    raise serializers.ValidationError({"categoria_id": "La categoría especificada no existe."})
-            except ValueError:
-                raise serializers.ValidationError({"categoria_id": "El ID de categoría debe ser un número válido."})
-
-        if stock_min:
-            try:
-                filters['stock__gte'] = int(stock_min)
-                if filters['stock__gte'] < 0: raise ValueError
-            except ValueError:
-                raise serializers.ValidationError(
-                    {"stock_min": "El stock mínimo debe ser un número entero no negativo."})
-        if stock_max:
-            try:
-                filters['stock__lte'] = int(stock_max)
-                if filters['stock__lte'] < 0: raise ValueError
-            except ValueError:
-                raise serializers.ValidationError(
-                    {"stock_max": "El stock máximo debe ser un número entero no negativo."})
-
-        productos_qs = Producto.objects.filter(**filters) \
-            .select_related('almacen', 'empresa', 'categoria') \
-            .values('id', 'nombre', 'stock', 'almacen__nombre', 'empresa__nombre') \
-            .order_by('nombre')
-
-        report_data = []
-        for p in productos_qs:
-            report_data.append({
-                'id': p['id'],
-                'nombre': p['nombre'],
-                'stock_actual': p['stock'],
-                'almacen_nombre': p['almacen__nombre'] if p['almacen__nombre'] else 'N/A',
-                'empresa_nombre': p['empresa__nombre'] if p['empresa__nombre'] else 'N/A',
-            })
-        return report_data
+    def _rows(self, request):
+        segmento = self._segmento(request)
+        filas = self._clientes(request)
+        return [fila for fila in filas if fila['segmento'] == segmento] if segmento else filas
+
+    def _iter_rows(self, request):
+        return iter(self._rows(request))
 
     def get(self, request, *args, **kwargs):
-        report_data = self._get_report_data(request)
-        serializer = StockLevelReportSerializer(report_data, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-
-class ClientPerformanceReportView(BaseReportView, ReportExportMixin):
-    def _get_report_data(self, request):
-        company_filter = self.get_company_filter(request)  # Pasa la request
-        date_filter = self.get_date_range_filter(request, date_field='fecha')  # Pasa la request
-
-        filters = {**company_filter, **date_filter}
-
-        client_performance = Venta.objects.filter(**filters) \
-            .values('usuario__id', 'usuario__first_name', 'usuario__last_name', 'usuario__email') \
-            .annotate(
-            # Asegúrate de que los nombres de los campos anotados coincidan con el serializer
-            id=F('usuario__id'),  # Renombrar a 'id'
-            nombre_cliente=Concat(
-                Coalesce(F('usuario__first_name'), Value('')),  # Coalesce a cadena vacía
-                Value(' '),  # Espacio como Value
-                Coalesce(F('usuario__last_name'), Value(''))  # Coalesce a cadena vacía
-            ),
-            email_cliente=F('usuario__email'),
-            monto_total_comprado=Coalesce(Sum('monto_total'), Decimal('0.00')),
-            numero_ventas_realizadas=Count('id')
-        ) \
-            .order_by('-monto_total_comprado')
-
-        final_data = []
-        for client in client_performance:
-            final_data.append({
-                'id': client['id'],
-                'nombre_cliente': client['nombre_cliente'].strip(),
-                'email_cliente': client['email_cliente'],
-                'monto_total_comprado': client['monto_total_comprado'],
-                'numero_ventas_realizadas': client['numero_ventas_realizadas'],
-            })
-        return final_data
+        filas = self._rows(request)
+        conteo = Counter(fila['segmento'] for fila in self._clientes(request))
+        pagina = self.paginate_queryset(filas)
+        response = self.get_paginated_response([self.spec.to_json(fila) for fila in pagina])
+        response.data['segmentos'] = {nombre: conteo[nombre] for nombre in NOMBRES_SEGMENTOS}
+        return response
+
+
+class PivotReportView(ReportView):
+    """
+    Pivote de ventas: ?dimensiones= (hasta tres, separadas por comas, en orden de
+    anidamiento) y ?medidas= de los catálogos de reports.specs, con los mismos filtros de
+    empresa y fechas que el resto de reportes.
+
+    Devuelve el detalle y los subtotales de cada nivel (y el total) calculados en la misma
+    consulta (ReportSpec.rollup). Cada fila lleva 'nivel' (dimensiones desglosadas) y
+    'subtotal'; los subtotales van detrás de las filas que agregan. El resultado se guarda
+    en caché por empresa y parámetros.
+    """
+    MAX_DIMENSIONS = 3
+
+    @staticmethod
+    def _lista(request, param, catalogo, por_defecto=()):
+        valor = query_params(request).get(param)
+        nombres = [nombre.strip() for nombre in valor.split(',') if nombre.strip()] if valor else list(por_defecto)
+        desconocidos = [nombre for nombre in nombres if nombre not in catalogo]
+        if desconocidos or len(set(nombres)) != len(nombres):
+            raise serializers.ValidationError(
+                {param: f"Valores no válidos o repetidos. Opciones: {', '.join(catalogo)}."})
+        return nombres
 
     def get(self, request, *args, **kwargs):
-        report_data = self._get_report_data(request)
-        serializer = ClientPerformanceReportSerializer(report_data, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        dimensiones = self._lista(request, 'dimensiones', specs.PIVOT_DIMENSIONS)
+        if not 1 <= len(dimensiones) <= self.MAX_DIMENSIONS:
+            raise serializers.ValidationError(
+                {'dimensiones': f"Indique entre 1 y {self.MAX_DIMENSIONS} dimensiones."})
+        medidas = self._lista(request, 'medidas', specs.PIVOT_MEASURES, por_defecto=['ingresos'])
+        if not medidas:
+            raise serializers.ValidationError({'medidas': "Indique al menos una medida."})
+        self.spec = spec = specs.pivot_spec(dimensiones, medidas)
+
+        def calcular():
+            maximo = settings.PIVOT_MAX_FILAS
+            filas = spec.rollup(request, max_rows=maximo)
+            if len(filas) > maximo:
+                raise serializers.ValidationError({"detail": (
+                    f"El pivote tiene más de {maximo} filas. Reduzca las dimensiones o el rango de fechas."
+                )})
+
+            def orden(fila):
+                # Cada grupo seguido de su subtotal: las dimensiones agregadas van al final
+                return [
+                    (1,) if i >= fila['nivel'] else (0, fila[dim] is None, fila[dim] if fila[dim] is not None else '')
+                    for i, dim in enumerate(dimensiones)
+                ]
+
+            filas.sort(key=orden)
+            return {
+                'dimensiones': dimensiones,
+                'medidas': medidas,
+                'filas': [
+                    dict(spec.to_json(fila), nivel=fila['nivel'], subtotal=fila['nivel'] < len(dimensiones))
+                    for fila in filas
+                ],
+            }
+
+        return Response(self._cached(request, 'pivot', calcular), status=status.HTTP_200_OK)
+
+
+# Reportes publicados (urls.py registra para cada uno el JSON y sus exportaciones)
+REPORTS = [
+    SalesSummaryReportView,
+    TopSellingProductsReportView,
+    StockLevelReportView,
+    ClientPerformanceReportView,
+    ClientRFMReportView,
+    GrossMarginReportView,
+]
+
+
+class ReportStatusView(View):
+    """
+    Estado del pool de exportaciones de este proceso: hilos, exportaciones en curso en total
+    y de la empresa del usuario, y el máximo simultáneo por empresa. Vista async: responde
+    aunque todos los hilos de exportación estén ocupados.
+    """
+
+    async def get(self, request):
+        usuario, rechazo = await autenticar(request, [IsAuthenticated])
+        if rechazo is not None:
+            return rechazo
+        return respuesta_json({
+            'hilos': exportaciones.hilos,
+            'en_curso': exportaciones.en_curso(),
+            'maximo_por_empresa': exportaciones.por_clave,
+            'en_curso_empresa': exportaciones.en_curso(clave_empresa(request, usuario)),
+        })